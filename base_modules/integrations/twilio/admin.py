@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import WhatsAppConversation, WhatsAppMessage, WhatsAppTemplate
+from .models import (
+    WhatsAppConversation,
+    WhatsAppMessage,
+    WhatsAppTemplate,
+    WhatsAppBroadcast,
+    WhatsAppInboundEvent,
+)
 
 
 @admin.register(WhatsAppConversation)
@@ -44,7 +50,7 @@ class WhatsAppMessageAdmin(admin.ModelAdmin):
         "delivered_at",
         "read_at",
     ]
-    raw_id_fields = ["conversation"]
+    raw_id_fields = ["conversation", "broadcast"]
     ordering = ["-created_at"]
     
     def get_participant(self, obj):
@@ -74,3 +80,39 @@ class WhatsAppTemplateAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
     readonly_fields = ["created_at", "updated_at"]
     ordering = ["name"]
+
+
+@admin.register(WhatsAppBroadcast)
+class WhatsAppBroadcastAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "template",
+        "status",
+        "total",
+        "sent",
+        "failed",
+        "created_by",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "created_at"]
+    readonly_fields = [
+        "status",
+        "total",
+        "sent",
+        "failed",
+        "error",
+        "created_at",
+        "started_at",
+        "finished_at",
+    ]
+    raw_id_fields = ["created_by", "template"]
+    ordering = ["-created_at"]
+
+
+@admin.register(WhatsAppInboundEvent)
+class WhatsAppInboundEventAdmin(admin.ModelAdmin):
+    list_display = ["id", "twilio_sid", "received_at"]
+    search_fields = ["twilio_sid"]
+    readonly_fields = ["twilio_sid", "payload", "received_at"]
+    ordering = ["id"]
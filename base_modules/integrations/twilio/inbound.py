@@ -0,0 +1,263 @@
+"""
+Inbound WhatsApp Ingest
+
+The incoming message webhook used to check for duplicates, get or create
+the conversation, insert the message and update the conversation (4 to 6
+queries) while Twilio waited. It now only records the raw payload:
+
+- record_incoming(): one INSERT ... ON CONFLICT (twilio_sid) DO NOTHING of
+  a WhatsAppInboundEvent (Twilio's retries are ignored), then an
+  ingest_whatsapp_inbound run is scheduled, at most one per
+  TWILIO_INBOUND_BATCH_WINDOW seconds
+- ingest_events(): a worker turns a batch of events into messages with one
+  bulk INSERT (dated when the webhook received them), resolves their
+  conversations per Twilio number, and updates the unread counters and
+  last_message_at of every conversation with a single UPDATE before
+  deleting the events
+
+A burst of incoming messages thus costs one INSERT each in the web
+workers, and a few queries per batch in Celery.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import (
+    WhatsAppMessage,
+    WhatsAppConversation,
+    WhatsAppInboundEvent,
+    MessageDirection,
+    MessageStatus,
+)
+from .services import (
+    get_conversations,
+    extract_phone_number,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_KEY = "twilio:whatsapp:ingest-scheduled"
+
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+def batch_window() -> float:
+    return getattr(settings, "TWILIO_INBOUND_BATCH_WINDOW", 1)
+
+
+def batch_size() -> int:
+    return max(1, getattr(settings, "TWILIO_INBOUND_BATCH_SIZE", 500))
+
+
+# -----------------------------------------------------------------------------
+# Webhook side
+# -----------------------------------------------------------------------------
+def record_incoming(payload: Dict[str, str]) -> None:
+    """Store the payload of an incoming message webhook for the worker."""
+    WhatsAppInboundEvent.objects.bulk_create(
+        [WhatsAppInboundEvent(twilio_sid=payload["MessageSid"], payload=payload)],
+        ignore_conflicts=True,
+    )
+    schedule_ingest()
+
+
+def schedule_ingest() -> None:
+    """
+    Run ingest_whatsapp_inbound at the end of the batch window, after the
+    commit.
+
+    At most one run is scheduled per window; the beat sweep
+    (CELERY_BEAT_SCHEDULE) catches anything missed.
+    """
+    from .tasks import ingest_whatsapp_inbound
+
+    window = batch_window()
+    if not cache.add(SCHEDULED_KEY, 1, timeout=max(1, int(window))):
+        return
+
+    def enqueue():
+        try:
+            ingest_whatsapp_inbound.apply_async(countdown=window)
+        except Exception:
+            # The event is stored: the beat sweep will ingest it
+            logger.warning("Could not schedule the WhatsApp inbound ingest", exc_info=True)
+            cache.delete(SCHEDULED_KEY)
+
+    transaction.on_commit(enqueue)
+
+
+# -----------------------------------------------------------------------------
+# Worker side
+# -----------------------------------------------------------------------------
+def parse_payload(payload: Dict[str, str]) -> Dict[str, Any]:
+    """
+    The fields of an incoming message webhook.
+
+    Twilio sends:
+    - MessageSid: Unique message identifier
+    - From: Sender phone number (whatsapp:+1234567890)
+    - To: Recipient phone number (your Twilio number)
+    - Body: Message text
+    - NumMedia: Number of media attachments
+    - MediaUrl0, MediaUrl1, etc.: Media URLs
+    - MediaContentType0, etc.: Media content types
+    - ProfileName: Sender's WhatsApp profile name
+    """
+    media_urls = []
+    media_types = []
+    for i in range(int(payload.get("NumMedia") or 0)):
+        media_url = payload.get(f"MediaUrl{i}")
+        media_type = payload.get(f"MediaContentType{i}")
+        if media_url:
+            media_urls.append(media_url)
+        if media_type:
+            media_types.append(media_type)
+
+    return {
+        "twilio_sid": payload.get("MessageSid", ""),
+        "participant_phone": extract_phone_number(payload.get("From", "")),
+        "twilio_phone": extract_phone_number(payload.get("To", "")),
+        "body": payload.get("Body", ""),
+        "media_urls": media_urls,
+        "media_content_types": media_types,
+        "metadata": {
+            "profile_name": payload.get("ProfileName", ""),
+            "raw_from": payload.get("From", ""),
+            "raw_to": payload.get("To", ""),
+        },
+    }
+
+
+def ingest_events(events: List[WhatsAppInboundEvent]) -> int:
+    """
+    Create the messages of `events` and update their conversations in bulk.
+
+    Events whose message already exists, or whose payload cannot be read,
+    are skipped. Returns the number of messages created. Call inside a
+    transaction, then delete the events.
+    """
+    parsed = []
+    for event in events:
+        try:
+            parsed.append({**parse_payload(event.payload), "received_at": event.received_at})
+        except (TypeError, ValueError):
+            # A malformed payload must not hold back the rest of the batch
+            logger.exception(f"Dropping malformed WhatsApp inbound event {event.twilio_sid}")
+    existing = set(
+        WhatsAppMessage.objects.filter(
+            twilio_sid__in=[fields["twilio_sid"] for fields in parsed]
+        ).values_list("twilio_sid", flat=True)
+    )
+    new = {}
+    for fields in parsed:
+        if fields["twilio_sid"] not in existing:
+            new.setdefault(fields["twilio_sid"], fields)
+    if not new:
+        return 0
+
+    by_twilio_phone = defaultdict(list)
+    for fields in new.values():
+        by_twilio_phone[fields["twilio_phone"]].append(fields)
+
+    messages = []
+    for twilio_phone, group in by_twilio_phone.items():
+        conversations = get_conversations(
+            (fields["participant_phone"] for fields in group),
+            twilio_phone,
+            {fields["participant_phone"]: fields["metadata"]["profile_name"] for fields in group},
+        )
+        for fields in group:
+            messages.append(WhatsAppMessage(
+                conversation=conversations[fields.pop("participant_phone")],
+                direction=MessageDirection.INBOUND,
+                status=MessageStatus.RECEIVED,
+                **{key: value for key, value in fields.items() if key not in ("twilio_phone", "received_at")},
+            ))
+
+    WhatsAppMessage.objects.bulk_create(messages, ignore_conflicts=True)
+
+    # bulk_create() stamps auto_now_add fields with the ingest time: date
+    # the messages (and so their conversations) when the webhook got them
+    received_at = {sid: fields["received_at"] for sid, fields in new.items()}
+    WhatsAppMessage.objects.filter(twilio_sid__in=received_at.keys()).update(
+        created_at=Case(
+            *[When(twilio_sid=sid, then=Value(at)) for sid, at in received_at.items()],
+            output_field=models.DateTimeField(),
+        )
+    )
+    for message in messages:
+        message.created_at = received_at[message.twilio_sid]
+    update_conversations(messages)
+    return len(messages)
+
+
+def update_conversations(messages: List[WhatsAppMessage]) -> None:
+    """
+    What WhatsAppMessage.save() does for every new inbound message, for a
+    batch: one UPDATE of last_message_at and unread_count for all their
+    conversations.
+    """
+    unread = defaultdict(int)
+    last_message_at = {}
+    for message in messages:
+        unread[message.conversation_id] += 1
+        last_message_at[message.conversation_id] = max(
+            message.created_at, last_message_at.get(message.conversation_id, message.created_at)
+        )
+
+    WhatsAppConversation.objects.filter(pk__in=unread.keys()).update(
+        unread_count=F("unread_count") + Case(
+            *[When(pk=pk, then=Value(count)) for pk, count in unread.items()],
+            output_field=models.PositiveIntegerField(),
+        ),
+        # Never back: an outbound message may have been created since the
+        # webhook received these
+        last_message_at=Case(
+            *[
+                When(pk=pk, then=Greatest(Coalesce(F("last_message_at"), Value(at)), Value(at)))
+                for pk, at in last_message_at.items()
+            ],
+            output_field=models.DateTimeField(),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def process_inbound(time_budget: float) -> Tuple[Dict[str, int], bool]:
+    """
+    Ingest waiting events batch after batch, for up to `time_budget` seconds.
+
+    Returns the counters and whether events are left.
+    """
+    deadline = time.monotonic() + time_budget
+    stats = {"batches": 0, "events": 0, "messages": 0}
+    limit = batch_size()
+
+    while time.monotonic() < deadline:
+        with transaction.atomic():
+            events = list(
+                WhatsAppInboundEvent.objects.select_for_update(skip_locked=True)
+                .order_by("id")[:limit]
+            )
+            if not events:
+                return stats, False
+            stats["messages"] += ingest_events(events)
+            WhatsAppInboundEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+        stats["batches"] += 1
+        stats["events"] += len(events)
+        if len(events) < limit:
+            return stats, False
+
+    return stats, WhatsAppInboundEvent.objects.exists()
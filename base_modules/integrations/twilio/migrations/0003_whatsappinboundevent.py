@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twilio', '0002_whatsappbroadcast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhatsAppInboundEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('twilio_sid', models.CharField(max_length=50, unique=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'WhatsApp Inbound Event',
+                'verbose_name_plural': 'WhatsApp Inbound Events',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twilio', '0003_whatsappinboundevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='whatsappmessage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('submitting', 'Submitting'), ('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('delivered', 'Delivered'), ('read', 'Read'), ('failed', 'Failed'), ('received', 'Received')], default='queued', max_length=15),
+        ),
+    ]
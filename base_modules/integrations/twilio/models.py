@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -11,6 +13,10 @@ class MessageDirection(models.TextChoices):
 
 class MessageStatus(models.TextChoices):
     """Status of the WhatsApp message."""
+    # Waiting in the send queue, not handed to Twilio yet (see sending.py)
+    PENDING = "pending", "Pending"
+    # Claimed by a sender, being handed to Twilio
+    SUBMITTING = "submitting", "Submitting"
     QUEUED = "queued", "Queued"
     SENDING = "sending", "Sending"
     SENT = "sent", "Sent"
@@ -76,6 +82,70 @@ class WhatsAppConversation(models.Model):
         self.save(update_fields=["unread_count", "updated_at"])
 
 
+class BroadcastStatus(models.TextChoices):
+    """Status of a WhatsApp broadcast."""
+    PENDING = "pending", "Pending"
+    SENDING = "sending", "Sending"
+    COMPLETED = "completed", "Completed"
+    FAILED = "failed", "Failed"
+
+
+class WhatsAppBroadcast(models.Model):
+    """
+    One message (a body or a template) sent to many recipients, e.g. a
+    reminder campaign.
+    
+    Created by the broadcast API; a Celery worker turns the recipients into
+    pending messages, which the send queue delivers at the account's
+    messages-per-second rate (see sending.py).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="whatsapp_broadcasts"
+    )
+    
+    # Content: a body, or a template rendered with each recipient's variables
+    body = models.TextField(blank=True, default="")
+    template = models.ForeignKey(
+        "WhatsAppTemplate",
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="broadcasts"
+    )
+    media_urls = models.JSONField(default=list, blank=True)
+    
+    # [{"to_phone": "+39...", "variables": [...]}, ...]
+    recipients = models.JSONField(default=list)
+    
+    status = models.CharField(
+        max_length=15,
+        choices=BroadcastStatus.choices,
+        default=BroadcastStatus.PENDING
+    )
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "WhatsApp Broadcast"
+        verbose_name_plural = "WhatsApp Broadcasts"
+    
+    def __str__(self):
+        return f"Broadcast {self.pk} [{self.get_status_display()}] {self.sent + self.failed}/{self.total}"
+
+
 class WhatsAppMessage(models.Model):
     """
     Represents a single WhatsApp message, either inbound or outbound.
@@ -87,6 +157,15 @@ class WhatsAppMessage(models.Model):
         related_name="messages"
     )
     
+    # Broadcast the message was sent for, if any
+    broadcast = models.ForeignKey(
+        WhatsAppBroadcast,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="messages"
+    )
+    
     # Twilio identifiers
     twilio_sid = models.CharField(
         max_length=50,
@@ -146,6 +225,10 @@ class WhatsAppMessage(models.Model):
         ordering = ["-created_at"]
         verbose_name = "WhatsApp Message"
         verbose_name_plural = "WhatsApp Messages"
+        indexes = [
+            # Send queue and status reconciliation
+            models.Index(fields=["status", "created_at"]),
+        ]
     
     def __str__(self):
         direction_label = "→" if self.direction == MessageDirection.OUTBOUND else "←"
@@ -217,3 +300,24 @@ class WhatsAppTemplate(models.Model):
         for i, var in enumerate(variables, start=1):
             result = result.replace(f"{{{{{i}}}}}", str(var))
         return result
+
+
+class WhatsAppInboundEvent(models.Model):
+    """
+    The raw payload of an incoming message webhook, waiting to be ingested.
+    
+    The webhook only inserts this row (ignoring Twilio's retries of the same
+    MessageSid) and answers; a Celery worker turns the waiting events into
+    WhatsAppMessages in batches and deletes them (see inbound.py).
+    """
+    twilio_sid = models.CharField(max_length=50, unique=True)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "WhatsApp Inbound Event"
+        verbose_name_plural = "WhatsApp Inbound Events"
+    
+    def __str__(self):
+        return f"Inbound {self.twilio_sid}"
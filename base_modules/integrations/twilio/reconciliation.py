@@ -0,0 +1,209 @@
+"""
+WhatsApp Status Reconciliation
+
+Statuses normally arrive through the status callback webhook; a lost
+callback leaves a message queued or sent forever. reconcile_statuses()
+fetches the status of such messages from Twilio:
+
+- outbound messages still queued, sending or sent, created between
+  TWILIO_RECONCILE_MAX_AGE_HOURS hours and TWILIO_RECONCILE_MIN_AGE_MINUTES
+  minutes ago (the webhook had its chance)
+- fetched concurrently (TWILIO_SEND_CONCURRENCY threads) at no more than
+  TWILIO_RECONCILE_REQUESTS_PER_SECOND, with the process's Twilio client
+- each change saved with an UPDATE conditional on the status it was
+  computed from, so a status callback received meanwhile is kept; a
+  message never moves back (e.g. from sent to queued)
+- the last message checked is kept in the cache, so a large backlog is
+  worked through run after run; a 429 ends the run where it stopped
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional, List, Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from twilio.base.exceptions import TwilioRestException
+
+from .models import (
+    WhatsAppMessage,
+    MessageDirection,
+    MessageStatus,
+)
+from .sending import TOO_MANY_REQUESTS, Throttle, send_concurrency
+from .services import (
+    TWILIO_STATUS_MAP,
+    apply_status_info,
+    get_twilio_client,
+    message_status_info,
+)
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "twilio:whatsapp:reconcile-checkpoint"
+
+# Statuses Twilio may still change
+PENDING_STATUSES = [MessageStatus.QUEUED, MessageStatus.SENDING, MessageStatus.SENT]
+
+UPDATE_FIELDS = ["status", "delivered_at", "read_at", "error_code", "error_message", "updated_at"]
+
+# Order of the statuses a message goes through; FAILED can follow any
+STATUS_ORDER = [
+    MessageStatus.QUEUED,
+    MessageStatus.SENDING,
+    MessageStatus.SENT,
+    MessageStatus.DELIVERED,
+    MessageStatus.READ,
+]
+
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+def min_age() -> timedelta:
+    return timedelta(minutes=getattr(settings, "TWILIO_RECONCILE_MIN_AGE_MINUTES", 15))
+
+
+def max_age() -> timedelta:
+    return timedelta(hours=getattr(settings, "TWILIO_RECONCILE_MAX_AGE_HOURS", 72))
+
+
+def requests_per_second() -> float:
+    return getattr(settings, "TWILIO_RECONCILE_REQUESTS_PER_SECOND", 10)
+
+
+def batch_size() -> int:
+    return max(1, getattr(settings, "TWILIO_RECONCILE_BATCH_SIZE", 200))
+
+
+# -----------------------------------------------------------------------------
+# Checkpoint
+# -----------------------------------------------------------------------------
+def get_checkpoint() -> int:
+    """ID of the last message checked in the current pass (0 at the start of a pass)."""
+    return cache.get(CHECKPOINT_KEY, 0)
+
+
+def set_checkpoint(message_id: int) -> None:
+    cache.set(CHECKPOINT_KEY, message_id, timeout=None)
+
+
+# -----------------------------------------------------------------------------
+# Reconciliation
+# -----------------------------------------------------------------------------
+def stale_messages(after_id: int, limit: int) -> List[WhatsAppMessage]:
+    """The next messages to check, by ID, after `after_id`."""
+    now = timezone.now()
+    return list(
+        WhatsAppMessage.objects.filter(
+            pk__gt=after_id,
+            direction=MessageDirection.OUTBOUND,
+            status__in=PENDING_STATUSES,
+            created_at__lte=now - min_age(),
+            created_at__gte=now - max_age(),
+            twilio_sid__isnull=False,
+        )
+        .exclude(twilio_sid="")
+        .order_by("pk")[:limit]
+    )
+
+
+def reconcile_batch(
+    messages: List[WhatsAppMessage],
+    client=None,
+) -> Tuple[Dict[str, int], Optional[int]]:
+    """
+    Fetch the statuses of `messages` and save the changed ones.
+
+    Returns the counters and the ID of the last message checked in order
+    (None if the first one was already rate limited).
+    """
+    client = client or get_twilio_client()
+    throttle = Throttle(requests_per_second())
+
+    def fetch(message):
+        throttle.wait()
+        try:
+            return message_status_info(client.messages(message.twilio_sid).fetch()), None
+        except TwilioRestException as e:
+            return None, e
+        except Exception as e:
+            logger.exception(f"Unexpected error fetching the status of WhatsApp message {message.pk}")
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=min(send_concurrency(), len(messages))) as executor:
+        outcomes = list(executor.map(fetch, messages))
+
+    now = timezone.now()
+    stats = Counter(checked=0, updated=0, errors=0, rate_limited=0)
+    changed = []
+    last_checked = None
+    loaded_statuses = {message.pk: message.status for message in messages}
+    for message, (status_info, error) in zip(messages, outcomes):
+        if getattr(error, "status", None) == TOO_MANY_REQUESTS:
+            # Resume from this message on the next run
+            stats["rate_limited"] += 1
+            break
+        last_checked = message.pk
+        stats["checked"] += 1
+        if error is not None:
+            stats["errors"] += 1
+            continue
+        if moves_back(message.status, TWILIO_STATUS_MAP.get(status_info["status"], message.status)):
+            continue
+        if apply_status_info(message, status_info):
+            message.updated_at = now
+            changed.append(message)
+
+    for message in changed:
+        # Only if no status callback changed the message since it was loaded
+        stats["updated"] += WhatsAppMessage.objects.filter(
+            pk=message.pk, status=loaded_statuses[message.pk]
+        ).update(**{field: getattr(message, field) for field in UPDATE_FIELDS})
+    return dict(stats), last_checked
+
+
+def moves_back(current: str, new: str) -> bool:
+    """Whether going from status `current` to `new` goes back in STATUS_ORDER."""
+    if current not in STATUS_ORDER or new not in STATUS_ORDER:
+        return False
+    return STATUS_ORDER.index(new) < STATUS_ORDER.index(current)
+
+
+def reconcile_statuses(time_budget: float, client=None) -> Tuple[Dict[str, int], bool]:
+    """
+    Reconcile stale messages batch after batch, for up to `time_budget`
+    seconds, from the checkpoint on.
+
+    Returns the counters and whether the pass was completed.
+    """
+    deadline = time.monotonic() + time_budget
+    stats = Counter(batches=0, checked=0, updated=0, errors=0, rate_limited=0)
+    checkpoint = get_checkpoint()
+    limit = batch_size()
+
+    while time.monotonic() < deadline:
+        messages = stale_messages(checkpoint, limit)
+        if messages:
+            stats["batches"] += 1
+            batch_stats, last_checked = reconcile_batch(messages, client)
+            stats.update(batch_stats)
+            if last_checked is not None:
+                checkpoint = last_checked
+                set_checkpoint(checkpoint)
+            if batch_stats["rate_limited"]:
+                logger.warning(f"Twilio rate limited the WhatsApp status reconciliation at message {checkpoint}")
+                return dict(stats), False
+        if len(messages) < limit:
+            # Pass completed: the next run starts over
+            set_checkpoint(0)
+            return dict(stats), True
+
+    return dict(stats), False
@@ -0,0 +1,411 @@
+"""
+Queued WhatsApp Sending
+
+send_whatsapp_message() calls Twilio inside the request. The functions
+below queue messages instead: they are stored as PENDING WhatsAppMessages
+and delivered by the send_whatsapp_queue Celery task, in batches:
+
+- the process's Twilio client, whose pooled connections are shared by the
+  sending threads
+- at most TWILIO_SEND_CONCURRENCY requests in flight and
+  TWILIO_MESSAGES_PER_SECOND started per second, the account's limit
+  (a single sender runs at a time across workers)
+- each accepted message saved with its SID at once (status callbacks can
+  come before the batch ends), the failed and requeued ones with one
+  bulk_update, and the counters of its broadcasts with one UPDATE each
+- batches are claimed as SUBMITTING; claims older than claim_timeout()
+  (a dead sender) go back to the queue
+- messages refused with 429 (Too Many Requests) go back to the queue
+
+Broadcasts (one body or template, many recipients) are expanded into
+pending messages with bulk inserts by the start_whatsapp_broadcast task.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Optional, List, Dict, Any, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from twilio.base.exceptions import TwilioRestException
+
+from .models import (
+    WhatsAppMessage,
+    WhatsAppConversation,
+    WhatsAppTemplate,
+    WhatsAppBroadcast,
+    BroadcastStatus,
+    MessageDirection,
+    MessageStatus,
+)
+from .services import (
+    get_twilio_client,
+    get_twilio_config,
+    get_or_create_conversation,
+    get_conversations,
+    format_whatsapp_number,
+    extract_phone_number,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Messages created per INSERT when expanding a broadcast
+EXPAND_CHUNK_SIZE = 500
+
+TOO_MANY_REQUESTS = 429
+
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+def messages_per_second() -> float:
+    return getattr(settings, "TWILIO_MESSAGES_PER_SECOND", 10)
+
+
+def send_concurrency() -> int:
+    return max(1, getattr(settings, "TWILIO_SEND_CONCURRENCY", 8))
+
+
+def batch_size() -> int:
+    return max(1, getattr(settings, "TWILIO_SEND_BATCH_SIZE", 100))
+
+
+class Throttle:
+    """Spaces calls made from several threads at `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# -----------------------------------------------------------------------------
+# Queueing
+# -----------------------------------------------------------------------------
+def schedule_sending() -> None:
+    """
+    Run send_whatsapp_queue after the commit.
+
+    At most one run is scheduled every few seconds; a running sender picks
+    up what was queued meanwhile, and the beat sweep anything missed.
+    """
+    from .tasks import send_whatsapp_queue
+
+    if cache.add("twilio:whatsapp:send-scheduled", 1, timeout=5):
+        transaction.on_commit(send_whatsapp_queue.delay)
+
+
+def queue_message(
+    to_phone: str,
+    body: str = "",
+    media_urls: Optional[List[str]] = None,
+    template: Optional[WhatsAppTemplate] = None,
+    variables: Optional[List[str]] = None,
+    from_phone: Optional[str] = None,
+) -> WhatsAppMessage:
+    """
+    Queue a WhatsApp message, sent by a Celery worker after the commit.
+
+    Args:
+        to_phone: Recipient phone number (E.164 format or whatsapp: prefix)
+        body: Message text content (ignored with a template)
+        media_urls: Optional list of media URLs to attach
+        template: Template to send, rendered with `variables`
+        variables: Template variables
+        from_phone: Sender phone number (defaults to TWILIO_WHATSAPP_NUMBER)
+
+    Returns:
+        The PENDING WhatsAppMessage
+    """
+    if from_phone is None:
+        from_phone = get_twilio_config()["whatsapp_number"]
+
+    conversation = get_or_create_conversation(
+        participant_phone=to_phone,
+        twilio_phone=from_phone,
+    )
+    message = WhatsAppMessage.objects.create(
+        conversation=conversation,
+        direction=MessageDirection.OUTBOUND,
+        status=MessageStatus.PENDING,
+        **message_content(body, media_urls, template, variables),
+    )
+    schedule_sending()
+    return message
+
+
+def message_content(
+    body: str,
+    media_urls: Optional[List[str]],
+    template: Optional[WhatsAppTemplate],
+    variables: Optional[List[str]],
+) -> Dict[str, Any]:
+    """Fields of a queued message, as send_template_message() stores them."""
+    if template is None:
+        return {"body": body, "media_urls": media_urls or []}
+    variables = variables or []
+    return {
+        "body": template.render(variables),
+        "media_urls": media_urls or [],
+        "metadata": {
+            "template_slug": template.slug,
+            "template_variables": variables,
+        },
+    }
+
+
+def expand_broadcast(broadcast: WhatsAppBroadcast) -> int:
+    """
+    Turn the recipients of a PENDING broadcast into pending messages.
+
+    Returns the number of messages queued.
+    """
+    template = broadcast.template
+    twilio_phone = get_twilio_config()["whatsapp_number"]
+    conversations = get_conversations(
+        (recipient["to_phone"] for recipient in broadcast.recipients),
+        twilio_phone,
+    )
+
+    now = timezone.now()
+    messages = [
+        WhatsAppMessage(
+            conversation=conversations[extract_phone_number(recipient["to_phone"])],
+            broadcast=broadcast,
+            direction=MessageDirection.OUTBOUND,
+            status=MessageStatus.PENDING,
+            **message_content(
+                broadcast.body,
+                broadcast.media_urls,
+                template,
+                recipient.get("variables"),
+            ),
+        )
+        for recipient in broadcast.recipients
+    ]
+
+    with transaction.atomic():
+        WhatsAppMessage.objects.bulk_create(messages, batch_size=EXPAND_CHUNK_SIZE)
+        # bulk_create skips WhatsAppMessage.save(): update the conversations at once
+        WhatsAppConversation.objects.filter(
+            pk__in={message.conversation_id for message in messages}
+        ).update(last_message_at=now, updated_at=now)
+        WhatsAppBroadcast.objects.filter(pk=broadcast.pk).update(
+            status=BroadcastStatus.SENDING,
+            total=len(messages),
+            started_at=now,
+        )
+        schedule_sending()
+
+    return len(messages)
+
+
+# -----------------------------------------------------------------------------
+# Sending
+# -----------------------------------------------------------------------------
+def claim_timeout() -> timedelta:
+    """Time after which a claimed message whose sender died is put back in the queue."""
+    return timedelta(seconds=max(600, 3 * batch_size() / max(messages_per_second(), 0.01)))
+
+
+def claim_batch(limit: int) -> List[WhatsAppMessage]:
+    """
+    Mark up to `limit` pending messages as SUBMITTING and return them,
+    oldest first.
+
+    Messages claimed longer than claim_timeout() ago and never handed to
+    Twilio (their sender died) go back to the queue first: delivery is at
+    least once.
+    """
+    now = timezone.now()
+    stale = WhatsAppMessage.objects.filter(
+        status=MessageStatus.SUBMITTING,
+        direction=MessageDirection.OUTBOUND,
+        twilio_sid__isnull=True,
+        updated_at__lt=now - claim_timeout(),
+    ).update(status=MessageStatus.PENDING, updated_at=now)
+    if stale:
+        logger.warning(f"Requeued {stale} WhatsApp message(s) left by a dead sender")
+
+    with transaction.atomic():
+        messages = list(
+            WhatsAppMessage.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("conversation")
+            .filter(status=MessageStatus.PENDING, direction=MessageDirection.OUTBOUND)
+            .order_by("created_at")[:limit]
+        )
+        WhatsAppMessage.objects.filter(pk__in=[m.pk for m in messages]).update(
+            status=MessageStatus.SUBMITTING,
+            updated_at=now,
+        )
+    for message in messages:
+        message.status = MessageStatus.SUBMITTING
+    return messages
+
+
+def message_params(
+    message: WhatsAppMessage,
+    templates: Dict[str, WhatsAppTemplate],
+) -> Dict[str, Any]:
+    """Arguments of client.messages.create() for a queued message."""
+    params = {
+        "from_": format_whatsapp_number(message.conversation.twilio_phone),
+        "to": format_whatsapp_number(message.conversation.participant_phone),
+    }
+    template = templates.get(message.metadata.get("template_slug", ""))
+    if template and template.content_sid:
+        params["content_sid"] = template.content_sid
+        params["content_variables"] = dict(
+            enumerate(message.metadata.get("template_variables", []), start=1)
+        )
+    else:
+        params["body"] = message.body
+    if message.media_urls:
+        params["media_url"] = message.media_urls
+    return params
+
+
+def send_batch(messages: List[WhatsAppMessage], client=None) -> Dict[str, int]:
+    """
+    Send claimed messages concurrently, at the account's rate. Returns
+    counters.
+
+    Each message Twilio accepts is saved with its SID as soon as create()
+    returns, so status callbacks find it while the batch goes on; failed
+    and requeued messages are saved in bulk at the end.
+    """
+    if not messages:
+        return {"sent": 0, "failed": 0, "requeued": 0}
+
+    slugs = {m.metadata.get("template_slug") for m in messages} - {None}
+    templates = {t.slug: t for t in WhatsAppTemplate.objects.filter(slug__in=slugs)}
+    throttle = Throttle(messages_per_second())
+
+    def send(message):
+        throttle.wait()
+        try:
+            return client.messages.create(**message_params(message, templates)).sid, None
+        except TwilioRestException as e:
+            return None, e
+        except Exception as e:
+            logger.exception(f"Unexpected error sending queued WhatsApp message {message.pk}")
+            return None, e
+
+    try:
+        client = client or get_twilio_client()
+    except ValueError:
+        # Not configured: leave the messages queued
+        WhatsAppMessage.objects.filter(pk__in=[m.pk for m in messages]).update(
+            status=MessageStatus.PENDING
+        )
+        raise
+
+    stats = Counter(sent=0, failed=0, requeued=0)
+    broadcasts = {}
+    unsent = []
+    with ThreadPoolExecutor(max_workers=min(send_concurrency(), len(messages))) as executor:
+        futures = {executor.submit(send, message): message for message in messages}
+        for future in as_completed(futures):
+            message = futures[future]
+            sid, error = future.result()
+            now = timezone.now()
+            message.updated_at = now
+            if sid:
+                # Saved at once: Twilio's status callbacks look the message up by SID
+                mark_sent(message, sid, now)
+                outcome = "sent"
+            elif getattr(error, "status", None) == TOO_MANY_REQUESTS:
+                message.status = MessageStatus.PENDING
+                unsent.append(message)
+                outcome = "requeued"
+            else:
+                message.status = MessageStatus.FAILED
+                message.error_code = str(getattr(error, "code", "") or "")[:10]
+                message.error_message = getattr(error, "msg", None) or str(error)
+                unsent.append(message)
+                outcome = "failed"
+            stats[outcome] += 1
+            if message.broadcast_id and outcome != "requeued":
+                broadcasts.setdefault(message.broadcast_id, Counter())[outcome] += 1
+
+    WhatsAppMessage.objects.bulk_update(
+        unsent,
+        ["status", "error_code", "error_message", "updated_at"],
+    )
+    update_broadcasts(broadcasts)
+
+    if stats["requeued"]:
+        logger.warning(f"Twilio rate limited {stats['requeued']} WhatsApp message(s); requeued")
+    return dict(stats)
+
+
+def mark_sent(message: WhatsAppMessage, sid: str, now) -> None:
+    """Record that Twilio accepted a message."""
+    message.twilio_sid = sid
+    message.status = MessageStatus.SENT
+    message.sent_at = now
+    WhatsAppMessage.objects.filter(pk=message.pk).update(
+        twilio_sid=sid,
+        status=MessageStatus.SENT,
+        sent_at=now,
+        updated_at=now,
+    )
+
+
+def update_broadcasts(counts: Dict[Any, Counter]) -> None:
+    """Add the outcome of a batch to its broadcasts, and complete the finished ones."""
+    for broadcast_id, counter in counts.items():
+        WhatsAppBroadcast.objects.filter(pk=broadcast_id).update(
+            sent=F("sent") + counter["sent"],
+            failed=F("failed") + counter["failed"],
+        )
+    if counts:
+        WhatsAppBroadcast.objects.filter(
+            pk__in=counts.keys(),
+            status=BroadcastStatus.SENDING,
+            total__lte=F("sent") + F("failed"),
+        ).update(status=BroadcastStatus.COMPLETED, finished_at=timezone.now())
+
+
+def process_queue(time_budget: float, client=None) -> Tuple[Dict[str, int], bool]:
+    """
+    Send pending messages batch after batch, for up to `time_budget` seconds.
+
+    Returns the counters and whether messages are left in the queue.
+    """
+    deadline = time.monotonic() + time_budget
+    stats = Counter(batches=0, sent=0, failed=0, requeued=0)
+
+    while time.monotonic() < deadline:
+        messages = claim_batch(batch_size())
+        if not messages:
+            return dict(stats), False
+        stats["batches"] += 1
+        stats.update(send_batch(messages, client))
+        if stats["requeued"]:
+            # Over the account's limit: leave the rest for the next run
+            break
+
+    remaining = WhatsAppMessage.objects.filter(
+        status=MessageStatus.PENDING,
+        direction=MessageDirection.OUTBOUND,
+    ).exists()
+    return dict(stats), remaining
@@ -1,8 +1,10 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import (
     WhatsAppMessage,
     WhatsAppConversation,
     WhatsAppTemplate,
+    WhatsAppBroadcast,
     MessageDirection,
     MessageStatus,
 )
@@ -140,6 +142,35 @@ class WhatsAppTemplateSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
+class WhatsAppBroadcastSerializer(serializers.ModelSerializer):
+    """Serializer for WhatsApp broadcasts (progress, without the recipients)."""
+    
+    template = serializers.SlugRelatedField(slug_field="slug", read_only=True)
+    status_display = serializers.CharField(
+        source="get_status_display",
+        read_only=True
+    )
+    
+    class Meta:
+        model = WhatsAppBroadcast
+        fields = [
+            "id",
+            "body",
+            "template",
+            "media_urls",
+            "status",
+            "status_display",
+            "total",
+            "sent",
+            "failed",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
 # -----------------------------------------------------------------------------
 # Action Serializers (for custom actions)
 # -----------------------------------------------------------------------------
@@ -160,6 +191,11 @@ class SendMessageSerializer(serializers.Serializer):
         default=list,
         help_text="Optional list of media URLs to attach"
     )
+    queue = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Queue the message, sent by a background worker (202)"
+    )
     
     def validate_to_phone(self, value):
         """Validate phone number format."""
@@ -195,6 +231,11 @@ class SendTemplateMessageSerializer(serializers.Serializer):
         default=list,
         help_text="List of variables to substitute in the template"
     )
+    queue = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Queue the message, sent by a background worker (202)"
+    )
     
     def validate_to_phone(self, value):
         """Validate phone number format."""
@@ -216,6 +257,84 @@ class SendTemplateMessageSerializer(serializers.Serializer):
         return value
 
 
+class BroadcastRecipientSerializer(serializers.Serializer):
+    """A recipient of a broadcast."""
+    
+    to_phone = serializers.CharField(
+        max_length=20,
+        help_text="Recipient phone number in E.164 format"
+    )
+    variables = serializers.ListField(
+        child=serializers.CharField(max_length=500),
+        required=False,
+        default=list,
+        help_text="Template variables for this recipient"
+    )
+    
+    def validate_to_phone(self, value):
+        """Validate phone number format."""
+        value = value.strip()
+        if value.startswith("whatsapp:"):
+            value = value[9:]
+        if not value.startswith("+"):
+            raise serializers.ValidationError(
+                "Phone number must start with + (E.164 format)"
+            )
+        return value
+
+
+class CreateBroadcastSerializer(serializers.Serializer):
+    """Serializer for creating a broadcast: one body or template, many recipients."""
+    
+    body = serializers.CharField(
+        max_length=4096,
+        required=False,
+        allow_blank=True,
+        default="",
+        help_text="Message text content (or template_slug)"
+    )
+    template_slug = serializers.SlugField(
+        required=False,
+        help_text="Template slug identifier (or body)"
+    )
+    media_urls = serializers.ListField(
+        child=serializers.URLField(),
+        required=False,
+        default=list,
+        help_text="Optional list of media URLs to attach"
+    )
+    recipients = serializers.ListField(
+        child=BroadcastRecipientSerializer(),
+        min_length=1,
+        help_text="Recipients, each with its template variables"
+    )
+    
+    def validate_recipients(self, value):
+        """Limit the size of a broadcast."""
+        max_recipients = getattr(settings, "TWILIO_BROADCAST_MAX_RECIPIENTS", 10000)
+        if len(value) > max_recipients:
+            raise serializers.ValidationError(
+                f"A broadcast has at most {max_recipients} recipients"
+            )
+        return value
+    
+    def validate(self, attrs):
+        """Require a body or an active template, not both."""
+        slug = attrs.get("template_slug")
+        if bool(slug) == bool(attrs.get("body")):
+            raise serializers.ValidationError(
+                "Provide either a body or a template_slug"
+            )
+        if slug:
+            template = WhatsAppTemplate.objects.filter(slug=slug, is_active=True).first()
+            if template is None:
+                raise serializers.ValidationError(
+                    {"template_slug": f"Template with slug '{slug}' not found or is inactive"}
+                )
+            attrs["template"] = template
+        return attrs
+
+
 class MarkAsReadSerializer(serializers.Serializer):
     """Serializer for marking messages as read."""
     
@@ -9,15 +9,20 @@ Provides primitives for:
 from __future__ import annotations
 
 import logging
-from typing import Optional, List, Dict, Any, Union
+import os
+import threading
+from typing import Optional, List, Dict, Any, Union, Tuple, Iterable
 from dataclasses import dataclass
 
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
+from requests.adapters import HTTPAdapter
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
 from twilio.base.exceptions import TwilioRestException
+from urllib3.util.retry import Retry
 
 from .models import (
     WhatsAppMessage,
@@ -49,16 +54,94 @@ def get_twilio_config() -> Dict[str, str]:
     }
 
 
+def get_http_config() -> Dict[str, Any]:
+    """
+    Get the settings of the HTTP connection pool used by the Twilio client.
+    - TWILIO_HTTP_TIMEOUT: seconds before a request is abandoned
+    - TWILIO_HTTP_POOL_MAXSIZE: connections kept alive (at least one per sending thread)
+    - TWILIO_HTTP_MAX_RETRIES: retries of connections that failed before anything was sent
+    """
+    return {
+        "timeout": getattr(settings, "TWILIO_HTTP_TIMEOUT", 10),
+        "pool_maxsize": max(
+            getattr(settings, "TWILIO_HTTP_POOL_MAXSIZE", 10),
+            getattr(settings, "TWILIO_SEND_CONCURRENCY", 8),
+        ),
+        "max_retries": getattr(settings, "TWILIO_HTTP_MAX_RETRIES", 2),
+    }
+
+
+def build_http_client(http_config: Dict[str, Any]) -> TwilioHttpClient:
+    """
+    A TwilioHttpClient whose session keeps connections alive.
+    
+    Only connection failures are retried: a message create is not
+    idempotent, and 429s are handled by the callers.
+    """
+    http_client = TwilioHttpClient(pool_connections=True, timeout=http_config["timeout"])
+    retries = http_config["max_retries"]
+    http_client.session.mount("https://", HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=http_config["pool_maxsize"],
+        max_retries=Retry(total=retries, connect=retries, read=0, status=0, other=0),
+    ))
+    return http_client
+
+
+_client: Optional[Tuple[Tuple, Client]] = None
+_client_lock = threading.Lock()
+
+
 def get_twilio_client() -> Client:
     """
-    Create and return a Twilio REST API client.
+    Return the Twilio REST API client of this process.
+    
+    The client and its connection pool are shared by every call (and by the
+    threads of a sending batch), so consecutive requests reuse the same
+    TLS connections. It is rebuilt when the credentials or the HTTP
+    settings change.
     """
     config = get_twilio_config()
     if not config["account_sid"] or not config["auth_token"]:
         raise ValueError(
             "TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN must be configured in settings."
         )
-    return Client(config["account_sid"], config["auth_token"])
+    http_config = get_http_config()
+    key = (config["account_sid"], config["auth_token"], tuple(sorted(http_config.items())))
+    
+    with _client_lock:
+        global _client
+        if _client is None or _client[0] != key:
+            if _client is not None:
+                _client[1].http_client.session.close()
+            client = Client(
+                config["account_sid"],
+                config["auth_token"],
+                http_client=build_http_client(http_config),
+            )
+            _client = (key, client)
+        return _client[1]
+
+
+def close_twilio_client() -> None:
+    """Close the connections of this process's Twilio client."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client[1].http_client.session.close()
+        _client = None
+
+
+def _reset_after_fork() -> None:
+    # The child inherits the parent's pooled sockets: forget them without
+    # closing, the parent still uses them
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 def format_whatsapp_number(phone: str) -> str:
@@ -136,6 +219,61 @@ def get_or_create_conversation(
     return conversation
 
 
+def get_conversations(
+    participant_phones: Iterable[str],
+    twilio_phone: str,
+    participant_names: Optional[Dict[str, str]] = None,
+) -> Dict[str, WhatsAppConversation]:
+    """
+    Conversations with many participants, by phone, created when missing.
+    
+    Two queries and one INSERT instead of a get_or_create per participant.
+    `participant_names` (by phone) fills in the names still unknown, as
+    get_or_create_conversation() does.
+    """
+    twilio_phone = extract_phone_number(twilio_phone)
+    names = {
+        extract_phone_number(phone): name
+        for phone, name in (participant_names or {}).items() if name
+    }
+    phones = {extract_phone_number(phone) for phone in participant_phones}
+    
+    def existing():
+        return {
+            conversation.participant_phone: conversation
+            for conversation in WhatsAppConversation.objects.filter(
+                twilio_phone=twilio_phone,
+                participant_phone__in=phones,
+            )
+        }
+    
+    conversations = existing()
+    missing = phones - conversations.keys()
+    if missing:
+        WhatsAppConversation.objects.bulk_create(
+            [
+                WhatsAppConversation(
+                    participant_phone=phone,
+                    twilio_phone=twilio_phone,
+                    participant_name=names.get(phone, ""),
+                )
+                for phone in missing
+            ],
+            ignore_conflicts=True,
+        )
+        conversations = existing()
+    
+    unnamed = [
+        conversation for phone, conversation in conversations.items()
+        if phone in names and not conversation.participant_name
+    ]
+    for conversation in unnamed:
+        conversation.participant_name = names[conversation.participant_phone]
+    if unnamed:
+        WhatsAppConversation.objects.bulk_update(unnamed, ["participant_name"])
+    return conversations
+
+
 def get_conversation_messages(
     conversation: Union[int, WhatsAppConversation],
     limit: int = 50,
@@ -414,24 +552,39 @@ def send_template_message(
 # -----------------------------------------------------------------------------
 # Message Retrieval from Twilio API
 # -----------------------------------------------------------------------------
-def fetch_message_status(twilio_sid: str) -> Dict[str, Any]:
+# Twilio message status -> MessageStatus
+TWILIO_STATUS_MAP = {
+    "queued": MessageStatus.QUEUED,
+    "sending": MessageStatus.SENDING,
+    "sent": MessageStatus.SENT,
+    "delivered": MessageStatus.DELIVERED,
+    "read": MessageStatus.READ,
+    "failed": MessageStatus.FAILED,
+    "undelivered": MessageStatus.FAILED,
+}
+
+
+def message_status_info(message) -> Dict[str, Any]:
+    """Status fields of a message resource fetched from Twilio."""
+    return {
+        "sid": message.sid,
+        "status": message.status,
+        "error_code": message.error_code,
+        "error_message": message.error_message,
+        "date_sent": message.date_sent,
+        "date_updated": message.date_updated,
+    }
+
+
+def fetch_message_status(twilio_sid: str, client: Optional[Client] = None) -> Dict[str, Any]:
     """
     Fetch the current status of a message from Twilio API.
     
     Returns a dict with status info or error details.
     """
     try:
-        client = get_twilio_client()
-        message = client.messages(twilio_sid).fetch()
-        
-        return {
-            "sid": message.sid,
-            "status": message.status,
-            "error_code": message.error_code,
-            "error_message": message.error_message,
-            "date_sent": message.date_sent,
-            "date_updated": message.date_updated,
-        }
+        client = client or get_twilio_client()
+        return message_status_info(client.messages(twilio_sid).fetch())
     
     except TwilioRestException as e:
         return {
@@ -441,38 +594,18 @@ def fetch_message_status(twilio_sid: str) -> Dict[str, Any]:
         }
 
 
-def sync_message_status(message: Union[int, WhatsAppMessage]) -> WhatsAppMessage:
-    """
-    Sync a message's status from Twilio API.
+def apply_status_info(message: WhatsAppMessage, status_info: Dict[str, Any]) -> List[str]:
     """
-    if isinstance(message, int):
-        message = WhatsAppMessage.objects.get(pk=message)
-    
-    if not message.twilio_sid:
-        return message
-    
-    status_info = fetch_message_status(message.twilio_sid)
-    
-    if status_info.get("error"):
-        return message
+    Copy a status fetched from Twilio onto a message, without saving it.
     
-    # Map Twilio status to our MessageStatus
-    twilio_status_map = {
-        "queued": MessageStatus.QUEUED,
-        "sending": MessageStatus.SENDING,
-        "sent": MessageStatus.SENT,
-        "delivered": MessageStatus.DELIVERED,
-        "read": MessageStatus.READ,
-        "failed": MessageStatus.FAILED,
-        "undelivered": MessageStatus.FAILED,
-    }
-    
-    new_status = twilio_status_map.get(
+    Returns the names of the changed fields.
+    """
+    new_status = TWILIO_STATUS_MAP.get(
         status_info["status"], 
         message.status
     )
     
-    update_fields = ["updated_at"]
+    update_fields = []
     
     if new_status != message.status:
         message.status = new_status
@@ -488,9 +621,31 @@ def sync_message_status(message: Union[int, WhatsAppMessage]) -> WhatsAppMessage
     
     if status_info.get("error_code"):
         message.error_code = str(status_info["error_code"])
-        message.error_message = status_info.get("error_message", "")
+        message.error_message = status_info.get("error_message") or ""
         update_fields.extend(["error_code", "error_message"])
     
+    return update_fields
+
+
+def sync_message_status(
+    message: Union[int, WhatsAppMessage],
+    client: Optional[Client] = None,
+) -> WhatsAppMessage:
+    """
+    Sync a message's status from Twilio API.
+    """
+    if isinstance(message, int):
+        message = WhatsAppMessage.objects.get(pk=message)
+    
+    if not message.twilio_sid:
+        return message
+    
+    status_info = fetch_message_status(message.twilio_sid, client)
+    
+    if status_info.get("error"):
+        return message
+    
+    update_fields = ["updated_at", *apply_status_info(message, status_info)]
     message.save(update_fields=update_fields)
     return message
 
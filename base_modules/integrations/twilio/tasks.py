@@ -0,0 +1,122 @@
+"""
+Celery tasks for the Twilio WhatsApp integration.
+"""
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .inbound import process_inbound
+from .models import WhatsAppBroadcast, BroadcastStatus
+from .reconciliation import reconcile_statuses
+from .sending import expand_broadcast, process_queue
+
+
+logger = logging.getLogger(__name__)
+
+SENDER_LOCK = "twilio:whatsapp:sender"
+RECONCILER_LOCK = "twilio:whatsapp:reconciler"
+INGEST_LOCK = "twilio:whatsapp:ingest"
+
+# Seconds an ingest_whatsapp_inbound run works before handing over
+INGEST_TIME_BUDGET = 30
+
+# Seconds before resuming a queue stopped by Twilio's rate limit
+RATE_LIMITED_PAUSE = 5
+
+
+@shared_task
+def send_whatsapp_queue() -> dict:
+    """
+    Send the pending WhatsApp messages (see sending.py).
+
+    One sender runs at a time, so the account's messages-per-second limit
+    holds across workers; it works for TWILIO_SEND_TIME_BUDGET seconds and
+    then hands the rest of the queue over to a new run.
+    """
+    time_budget = getattr(settings, "TWILIO_SEND_TIME_BUDGET", 50)
+    if not cache.add(SENDER_LOCK, 1, timeout=int(time_budget) + 60):
+        return {"skipped": "sender already running"}
+
+    try:
+        stats, remaining = process_queue(time_budget)
+    except ValueError as e:
+        logger.error(f"WhatsApp queue not sent: {e}")
+        return {"error": str(e)}
+    finally:
+        cache.delete(SENDER_LOCK)
+
+    if remaining:
+        send_whatsapp_queue.apply_async(countdown=RATE_LIMITED_PAUSE if stats["requeued"] else 0)
+    if stats["batches"]:
+        logger.info(f"WhatsApp queue: {stats}")
+    return {**stats, "remaining": remaining}
+
+
+@shared_task
+def start_whatsapp_broadcast(broadcast_id: str) -> dict:
+    """Queue the messages of a broadcast created by the broadcast API."""
+    broadcast = WhatsAppBroadcast.objects.select_related("template").filter(
+        pk=broadcast_id, status=BroadcastStatus.PENDING
+    ).first()
+    if broadcast is None:
+        return {"broadcast": broadcast_id, "skipped": True}
+
+    try:
+        queued = expand_broadcast(broadcast)
+    except Exception as e:
+        logger.exception(f"WhatsApp broadcast {broadcast_id} could not be queued")
+        WhatsAppBroadcast.objects.filter(pk=broadcast_id).update(
+            status=BroadcastStatus.FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+        raise
+    return {"broadcast": broadcast_id, "queued": queued}
+
+
+@shared_task
+def reconcile_whatsapp_statuses() -> dict:
+    """
+    Fetch from Twilio the statuses of messages whose callback never came
+    (see reconciliation.py). Runs from beat; a large backlog is worked
+    through over several runs, from where the last one stopped.
+    """
+    time_budget = getattr(settings, "TWILIO_RECONCILE_TIME_BUDGET", 120)
+    if not cache.add(RECONCILER_LOCK, 1, timeout=int(time_budget) + 60):
+        return {"skipped": "reconciliation already running"}
+
+    try:
+        stats, completed = reconcile_statuses(time_budget)
+    except ValueError as e:
+        logger.error(f"WhatsApp statuses not reconciled: {e}")
+        return {"error": str(e)}
+    finally:
+        cache.delete(RECONCILER_LOCK)
+
+    if stats["updated"]:
+        logger.info(f"WhatsApp status reconciliation: {stats}")
+    return {**stats, "completed": completed}
+
+
+@shared_task
+def ingest_whatsapp_inbound() -> dict:
+    """
+    Turn the payloads stored by the incoming message webhook into messages,
+    in batches (see inbound.py).
+    """
+    if not cache.add(INGEST_LOCK, 1, timeout=INGEST_TIME_BUDGET + 60):
+        return {"skipped": "ingest already running"}
+
+    try:
+        stats, remaining = process_inbound(INGEST_TIME_BUDGET)
+    finally:
+        cache.delete(INGEST_LOCK)
+
+    if remaining:
+        ingest_whatsapp_inbound.delay()
+    return {**stats, "remaining": remaining}
@@ -1,23 +1,42 @@
 """
 Tests for Twilio WhatsApp Integration
 """
-from django.test import TestCase
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from unittest.mock import patch, MagicMock
+from rest_framework.test import APIClient
+from twilio.base.exceptions import TwilioRestException
+from twilio.request_validator import RequestValidator
 
 from .models import (
     WhatsAppConversation,
     WhatsAppMessage,
     WhatsAppTemplate,
+    WhatsAppBroadcast,
+    WhatsAppInboundEvent,
+    BroadcastStatus,
     MessageDirection,
     MessageStatus,
 )
+from .inbound import process_inbound
+from .reconciliation import get_checkpoint, reconcile_batch, reconcile_statuses, stale_messages
+from . import sending
+from .sending import Throttle, claim_batch, process_queue, queue_message, send_batch
+from . import services
 from .services import (
+    close_twilio_client,
+    get_twilio_client,
     format_whatsapp_number,
     extract_phone_number,
     get_or_create_conversation,
     SendMessageResult,
 )
+from .tasks import start_whatsapp_broadcast
 
 
 User = get_user_model()
@@ -205,3 +224,446 @@ class SendMessageResultTests(TestCase):
         self.assertFalse(result.success)
         self.assertEqual(result.error_code, "21211")
         self.assertEqual(result.error_message, "Invalid phone number")
+
+
+def twilio_client(errors=None):
+    """A mock Twilio client; `errors` maps recipients to the exception raised."""
+    errors = errors or {}
+    client = MagicMock()
+    
+    def create(**params):
+        if params["to"] in errors:
+            raise errors[params["to"]]
+        return MagicMock(sid=f"SM{client.messages.create.call_count:032d}")
+    
+    client.messages.create.side_effect = create
+    return client
+
+
+@override_settings(TWILIO_WHATSAPP_NUMBER="+14155238886", TWILIO_MESSAGES_PER_SECOND=1000)
+class QueuedSendingTests(TestCase):
+    """Tests for the queued sending pipeline and broadcasts."""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="sender", email="sender@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.template = WhatsAppTemplate.objects.create(
+            name="Reminder",
+            slug="reminder",
+            body_template="Ciao {{1}}, appuntamento alle {{2}}.",
+        )
+    
+    def test_queued_message_answers_at_once(self):
+        """Test that a queued message is stored as pending and sent by the worker."""
+        with patch("base_modules.integrations.twilio.tasks.send_whatsapp_queue.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post("/api/whatsapp/messages/send/", {
+                    "to_phone": "+393401234567",
+                    "body": "Hello",
+                    "queue": True,
+                }, format="json")
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], MessageStatus.PENDING)
+        delay.assert_called_once_with()
+        
+        client = twilio_client()
+        stats, remaining = process_queue(time_budget=10, client=client)
+        
+        self.assertEqual((stats["sent"], remaining), (1, False))
+        message = WhatsAppMessage.objects.get(pk=response.json()["id"])
+        self.assertEqual(message.status, MessageStatus.SENT)
+        self.assertTrue(message.twilio_sid.startswith("SM"))
+        client.messages.create.assert_called_once_with(
+            from_="whatsapp:+14155238886", to="whatsapp:+393401234567", body="Hello"
+        )
+    
+    def test_broadcast(self):
+        """Test a template broadcast, from the API to the sent messages."""
+        get_or_create_conversation("+393400000001", "+14155238886")
+        recipients = [
+            {"to_phone": f"+39340000000{n}", "variables": [f"User {n}", "10:00"]}
+            for n in range(1, 6)
+        ]
+        with patch("base_modules.integrations.twilio.views.start_whatsapp_broadcast.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post("/api/whatsapp/broadcasts/", {
+                    "template_slug": "reminder",
+                    "recipients": recipients,
+                }, format="json")
+        
+        self.assertEqual(response.status_code, 202)
+        broadcast_id = response.json()["id"]
+        delay.assert_called_once_with(broadcast_id)
+        
+        with patch("base_modules.integrations.twilio.tasks.send_whatsapp_queue.delay"):
+            self.assertEqual(start_whatsapp_broadcast(broadcast_id)["queued"], 5)
+        self.assertEqual(WhatsAppConversation.objects.count(), 5)
+        
+        messages = claim_batch(10)
+        with self.assertNumQueries(8):
+            # Templates, one UPDATE per sent message, broadcast counters and completion
+            stats = send_batch(messages, twilio_client())
+        
+        self.assertEqual(stats["sent"], 5)
+        broadcast = WhatsAppBroadcast.objects.get(pk=broadcast_id)
+        self.assertEqual(broadcast.status, BroadcastStatus.COMPLETED)
+        self.assertEqual((broadcast.sent, broadcast.failed, broadcast.total), (5, 0, 5))
+        self.assertEqual(
+            broadcast.messages.order_by("created_at").first().body,
+            "Ciao User 1, appuntamento alle 10:00.",
+        )
+    
+    def test_broadcast_requires_body_or_template(self):
+        """Test broadcast validation."""
+        response = self.client.post("/api/whatsapp/broadcasts/", {
+            "body": "Hi",
+            "template_slug": "reminder",
+            "recipients": [{"to_phone": "+393401234567"}],
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+    
+    def test_failed_and_rate_limited_messages(self):
+        """Test that 429s are requeued and other errors fail the message."""
+        with patch("base_modules.integrations.twilio.tasks.send_whatsapp_queue.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                ok = queue_message("+393400000001", "a")
+                limited = queue_message("+393400000002", "b")
+                invalid = queue_message("+393400000003", "c")
+        
+        client = twilio_client({
+            "whatsapp:+393400000002": TwilioRestException(429, "uri", msg="Too Many Requests", code=20429),
+            "whatsapp:+393400000003": TwilioRestException(400, "uri", msg="Invalid To", code=21211),
+        })
+        stats = send_batch(claim_batch(10), client)
+        
+        self.assertEqual(stats, {"sent": 1, "failed": 1, "requeued": 1})
+        for message in (ok, limited, invalid):
+            message.refresh_from_db()
+        self.assertEqual(ok.status, MessageStatus.SENT)
+        self.assertEqual(limited.status, MessageStatus.PENDING)
+        self.assertEqual((invalid.status, invalid.error_code), (MessageStatus.FAILED, "21211"))
+    
+    @override_settings(TWILIO_AUTH_TOKEN="token", TWILIO_SEND_CONCURRENCY=1)
+    def test_status_callback_during_the_batch(self):
+        """Test that a callback for a message sent earlier in the batch is applied."""
+        with patch("base_modules.integrations.twilio.tasks.send_whatsapp_queue.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                messages = [queue_message(f"+39340000000{n}", "hi") for n in range(1, 4)]
+        
+        url = "/api/whatsapp/webhooks/status/"
+        responses = []
+        mark_sent = sending.mark_sent
+        
+        def mark_sent_then_callback(message, sid, now):
+            mark_sent(message, sid, now)
+            if not responses:
+                payload = {"MessageSid": sid, "MessageStatus": "undelivered", "ErrorCode": "63016"}
+                signature = RequestValidator("token").compute_signature(f"http://testserver{url}", payload)
+                responses.append(self.client.post(url, payload, HTTP_X_TWILIO_SIGNATURE=signature))
+        
+        with patch("base_modules.integrations.twilio.sending.mark_sent", side_effect=mark_sent_then_callback):
+            stats = send_batch(claim_batch(10), twilio_client())
+        
+        self.assertEqual(stats["sent"], 3)
+        self.assertEqual(responses[0].status_code, 200)
+        for message in messages:
+            message.refresh_from_db()
+        self.assertEqual((messages[0].status, messages[0].error_code), (MessageStatus.FAILED, "63016"))
+        self.assertEqual([m.status for m in messages[1:]], [MessageStatus.SENT, MessageStatus.SENT])
+    
+    def test_claims_of_a_dead_sender_are_requeued(self):
+        """Test that messages claimed by a sender that died go back to the queue."""
+        with patch("base_modules.integrations.twilio.tasks.send_whatsapp_queue.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                message = queue_message("+393401234567", "hi")
+        
+        self.assertEqual([m.pk for m in claim_batch(10)], [message.pk])
+        message.refresh_from_db()
+        self.assertEqual(message.status, MessageStatus.SUBMITTING)
+        # A recent claim is left to its sender
+        self.assertEqual(claim_batch(10), [])
+        
+        WhatsAppMessage.objects.filter(pk=message.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        with self.assertLogs("base_modules.integrations.twilio.sending", "WARNING"):
+            self.assertEqual([m.pk for m in claim_batch(10)], [message.pk])
+    
+    def test_throttle_spaces_calls(self):
+        """Test the messages-per-second throttle."""
+        throttle = Throttle(20)
+        started = time.monotonic()
+        for _ in range(5):
+            throttle.wait()
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+
+@override_settings(TWILIO_ACCOUNT_SID="AC" + "0" * 32, TWILIO_AUTH_TOKEN="token")
+class TwilioClientTests(TestCase):
+    """Tests for the process-level Twilio client."""
+    
+    def setUp(self):
+        close_twilio_client()
+        self.addCleanup(close_twilio_client)
+    
+    def test_client_is_shared(self):
+        """Test that the client and its connection pool are reused."""
+        client = get_twilio_client()
+        self.assertIs(get_twilio_client(), client)
+        self.assertIs(get_twilio_client().http_client.session, client.http_client.session)
+    
+    @override_settings(TWILIO_HTTP_POOL_MAXSIZE=24, TWILIO_HTTP_TIMEOUT=5)
+    def test_pool_configuration(self):
+        """Test the HTTP settings of the client."""
+        http_client = get_twilio_client().http_client
+        adapter = http_client.session.get_adapter("https://api.twilio.com")
+        self.assertEqual(adapter._pool_maxsize, 24)
+        self.assertEqual(adapter.max_retries.status, 0)
+        self.assertEqual(http_client.timeout, 5)
+    
+    def test_rebuilt_when_config_changes(self):
+        """Test that new credentials or HTTP settings give a new client."""
+        client = get_twilio_client()
+        with override_settings(TWILIO_AUTH_TOKEN="rotated"):
+            rotated = get_twilio_client()
+            self.assertIsNot(rotated, client)
+            self.assertEqual(rotated.password, "rotated")
+        with override_settings(TWILIO_HTTP_TIMEOUT=3):
+            self.assertEqual(get_twilio_client().http_client.timeout, 3)
+    
+    def test_reset_after_fork(self):
+        """Test that a forked child does not reuse the parent's client."""
+        client = get_twilio_client()
+        services._reset_after_fork()
+        self.assertIsNot(get_twilio_client(), client)
+    
+    @override_settings(TWILIO_AUTH_TOKEN="")
+    def test_not_configured(self):
+        """Test that missing credentials raise ValueError."""
+        with self.assertRaises(ValueError):
+            get_twilio_client()
+
+
+def status_client(statuses, errors=None):
+    """A mock Twilio client whose messages(sid).fetch() returns `statuses[sid]`."""
+    errors = errors or {}
+    client = MagicMock()
+    
+    def fetch(sid):
+        if sid in errors:
+            raise errors[sid]
+        return MagicMock(
+            sid=sid, status=statuses.get(sid, "sent"), error_code=None, error_message=None,
+            date_sent=None, date_updated=None,
+        )
+    
+    client.messages.side_effect = lambda sid: MagicMock(fetch=lambda: fetch(sid))
+    return client
+
+
+@override_settings(TWILIO_RECONCILE_REQUESTS_PER_SECOND=1000, TWILIO_RECONCILE_BATCH_SIZE=2)
+class StatusReconciliationTests(TestCase):
+    """Tests for the reconciliation of stale message statuses."""
+    
+    def setUp(self):
+        cache.clear()
+        self.conversation = WhatsAppConversation.objects.create(
+            participant_phone="+393401234567",
+            twilio_phone="+14155238886",
+        )
+    
+    def create_message(self, sid, minutes_ago=60, status=MessageStatus.SENT, direction=MessageDirection.OUTBOUND):
+        message = WhatsAppMessage.objects.create(
+            conversation=self.conversation,
+            twilio_sid=sid,
+            body="Hi",
+            direction=direction,
+            status=status,
+        )
+        WhatsAppMessage.objects.filter(pk=message.pk).update(
+            created_at=timezone.now() - timedelta(minutes=minutes_ago)
+        )
+        return message
+    
+    def test_reconcile_stale_messages(self):
+        """Test that only stale, non-final outbound messages are fetched and updated."""
+        delivered = self.create_message("SM1")
+        failed = self.create_message("SM2", status=MessageStatus.QUEUED)
+        unchanged = self.create_message("SM3")
+        recent = self.create_message("SM4", minutes_ago=1)
+        too_old = self.create_message("SM5", minutes_ago=60 * 24 * 7)
+        final = self.create_message("SM6", status=MessageStatus.READ)
+        inbound = self.create_message("SM7", status=MessageStatus.RECEIVED, direction=MessageDirection.INBOUND)
+        self.create_message(None)
+        self.create_message("")
+        
+        client = status_client({"SM1": "delivered", "SM2": "undelivered"})
+        stats, completed = reconcile_statuses(time_budget=10, client=client)
+        
+        self.assertTrue(completed)
+        self.assertEqual(
+            (stats["batches"], stats["checked"], stats["updated"]), (2, 3, 2)
+        )
+        self.assertEqual(
+            sorted(call.args[0] for call in client.messages.call_args_list), ["SM1", "SM2", "SM3"]
+        )
+        for message in (delivered, failed, unchanged, recent, too_old, final, inbound):
+            message.refresh_from_db()
+        self.assertEqual(delivered.status, MessageStatus.DELIVERED)
+        self.assertIsNotNone(delivered.delivered_at)
+        self.assertEqual(failed.status, MessageStatus.FAILED)
+        self.assertEqual(unchanged.status, MessageStatus.SENT)
+        self.assertEqual(get_checkpoint(), 0)
+    
+    def test_rate_limit_checkpoints_progress(self):
+        """Test that a 429 stops the run and the next one resumes from there."""
+        first = self.create_message("SM1")
+        limited = self.create_message("SM2")
+        last = self.create_message("SM3")
+        
+        client = status_client(
+            {"SM1": "delivered", "SM2": "read", "SM3": "read"},
+            errors={"SM2": TwilioRestException(429, "uri", msg="Too Many Requests", code=20429)},
+        )
+        stats, completed = reconcile_statuses(time_budget=10, client=client)
+        
+        self.assertFalse(completed)
+        self.assertEqual((stats["updated"], stats["rate_limited"]), (1, 1))
+        self.assertEqual(get_checkpoint(), first.pk)
+        
+        stats, completed = reconcile_statuses(time_budget=10, client=status_client({"SM2": "read", "SM3": "read"}))
+        
+        self.assertTrue(completed)
+        self.assertEqual((stats["checked"], stats["updated"]), (2, 2))
+        limited.refresh_from_db()
+        last.refresh_from_db()
+        self.assertEqual((limited.status, last.status), (MessageStatus.READ, MessageStatus.READ))
+    
+    def test_callbacks_during_the_batch_are_kept(self):
+        """Test that a status received after the batch was loaded is not overwritten."""
+        read = self.create_message("SM1")
+        behind = self.create_message("SM2", status=MessageStatus.SENT)
+        messages = stale_messages(0, 10)
+        # Status callback received while the batch is being fetched
+        read_at = timezone.now()
+        WhatsAppMessage.objects.filter(pk=read.pk).update(status=MessageStatus.READ, read_at=read_at)
+        
+        stats, _ = reconcile_batch(messages, status_client({"SM1": "delivered", "SM2": "queued"}))
+        
+        self.assertEqual((stats["checked"], stats["updated"]), (2, 0))
+        read.refresh_from_db()
+        behind.refresh_from_db()
+        self.assertEqual((read.status, read.read_at, read.delivered_at), (MessageStatus.READ, read_at, None))
+        self.assertEqual(behind.status, MessageStatus.SENT)
+
+
+@override_settings(TWILIO_AUTH_TOKEN="token", TWILIO_SKIP_SIGNATURE_VALIDATION=False)
+class InboundWebhookTests(TestCase):
+    """Tests for the incoming message webhook and the ingest worker."""
+    
+    url = "/api/whatsapp/webhooks/incoming/"
+    
+    def setUp(self):
+        cache.clear()
+    
+    def post(self, payload, signature=None):
+        if signature is None:
+            signature = RequestValidator("token").compute_signature(f"http://testserver{self.url}", payload)
+        return self.client.post(self.url, payload, HTTP_X_TWILIO_SIGNATURE=signature)
+    
+    def payload(self, sid, phone="+393401234567", body="Hi", **extra):
+        return {
+            "MessageSid": sid,
+            "From": f"whatsapp:{phone}",
+            "To": "whatsapp:+14155238886",
+            "Body": body,
+            "NumMedia": "0",
+            "ProfileName": "Mario",
+            **extra,
+        }
+    
+    def test_webhook_only_stores_the_payload(self):
+        """Test that the webhook answers after a single INSERT, ignoring retries."""
+        with patch("base_modules.integrations.twilio.tasks.ingest_whatsapp_inbound.apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertNumQueries(1):
+                    response = self.post(self.payload("SM1"))
+                self.post(self.payload("SM1"))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"<Response></Response>", response.content)
+        self.assertEqual(WhatsAppInboundEvent.objects.count(), 1)
+        self.assertFalse(WhatsAppMessage.objects.exists())
+        apply_async.assert_called_once_with(countdown=1)
+    
+    def test_invalid_signature(self):
+        """Test that unsigned requests are refused before anything is stored."""
+        response = self.post(self.payload("SM1"), signature="forged")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(WhatsAppInboundEvent.objects.exists())
+    
+    def test_ingest_batch(self):
+        """Test that waiting events become messages, with conversation counters updated in bulk."""
+        existing = get_or_create_conversation("+393401234567", "+14155238886")
+        existing.unread_count = 2
+        existing.save(update_fields=["unread_count"])
+        WhatsAppMessage.objects.create(
+            conversation=existing, twilio_sid="SM0", direction=MessageDirection.INBOUND,
+            status=MessageStatus.RECEIVED,
+        )
+        payloads = [
+            self.payload("SM0"),
+            self.payload("SM1", body="First"),
+            self.payload("SM2", body="Second"),
+            self.payload(
+                "SM3", phone="+393409999999", body="", NumMedia="1",
+                MediaUrl0="https://api.twilio.com/media/1", MediaContentType0="image/jpeg",
+            ),
+        ]
+        WhatsAppInboundEvent.objects.bulk_create(
+            [WhatsAppInboundEvent(twilio_sid=p["MessageSid"], payload=p) for p in payloads]
+        )
+        received = timezone.now() - timedelta(minutes=5)
+        WhatsAppConversation.objects.filter(pk=existing.pk).update(last_message_at=received - timedelta(hours=1))
+        for n, payload in enumerate(payloads):
+            WhatsAppInboundEvent.objects.filter(twilio_sid=payload["MessageSid"]).update(
+                received_at=received + timedelta(seconds=n)
+            )
+        
+        stats, remaining = process_inbound(time_budget=10)
+        
+        self.assertEqual((stats["events"], stats["messages"], remaining), (4, 3, False))
+        self.assertFalse(WhatsAppInboundEvent.objects.exists())
+        existing.refresh_from_db()
+        self.assertEqual(existing.unread_count, 5)
+        self.assertEqual(existing.participant_name, "Mario")
+        self.assertEqual(WhatsAppMessage.objects.get(twilio_sid="SM1").created_at, received + timedelta(seconds=1))
+        self.assertEqual(existing.last_message_at, received + timedelta(seconds=2))
+        
+        new = WhatsAppConversation.objects.get(participant_phone="+393409999999")
+        self.assertEqual((new.unread_count, new.participant_name), (1, "Mario"))
+        self.assertEqual(new.last_message_at, received + timedelta(seconds=3))
+        media = WhatsAppMessage.objects.get(twilio_sid="SM3")
+        self.assertEqual(media.media_urls, ["https://api.twilio.com/media/1"])
+        self.assertEqual(media.media_content_types, ["image/jpeg"])
+        self.assertEqual(media.direction, MessageDirection.INBOUND)
+    
+    def test_ingest_keeps_later_messages_last(self):
+        """Test that last_message_at does not go back to the receipt time of older events."""
+        conversation = get_or_create_conversation("+393401234567", "+14155238886")
+        WhatsAppInboundEvent.objects.create(twilio_sid="SM1", payload=self.payload("SM1"))
+        # Replied to before the ingest ran
+        WhatsAppMessage.objects.create(
+            conversation=conversation, twilio_sid="SM2", direction=MessageDirection.OUTBOUND,
+            status=MessageStatus.SENT,
+        )
+        conversation.refresh_from_db()
+        replied_at = conversation.last_message_at
+        
+        process_inbound(time_budget=10)
+        
+        conversation.refresh_from_db()
+        self.assertEqual((conversation.last_message_at, conversation.unread_count), (replied_at, 1))
@@ -5,6 +5,7 @@ from .views import (
     WhatsAppConversationViewSet,
     WhatsAppMessageViewSet,
     WhatsAppTemplateViewSet,
+    WhatsAppBroadcastViewSet,
 )
 from .webhooks import whatsapp_incoming, whatsapp_status
 
@@ -26,6 +27,11 @@ router.register(
     WhatsAppTemplateViewSet, 
     basename="whatsapp-template"
 )
+router.register(
+    r"broadcasts", 
+    WhatsAppBroadcastViewSet, 
+    basename="whatsapp-broadcast"
+)
 
 urlpatterns = [
     # REST API endpoints
@@ -2,20 +2,24 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.db.models import Q
 
 from .models import (
     WhatsAppMessage,
     WhatsAppConversation,
     WhatsAppTemplate,
+    WhatsAppBroadcast,
 )
 from .serializers import (
     WhatsAppMessageSerializer,
     WhatsAppConversationSerializer,
     WhatsAppConversationDetailSerializer,
     WhatsAppTemplateSerializer,
+    WhatsAppBroadcastSerializer,
     SendMessageSerializer,
     SendTemplateMessageSerializer,
+    CreateBroadcastSerializer,
 )
 from .services import (
     send_whatsapp_message,
@@ -23,6 +27,8 @@ from .services import (
     sync_message_status,
     get_conversation_messages,
 )
+from .sending import queue_message
+from .tasks import start_whatsapp_broadcast
 
 
 class WhatsAppConversationViewSet(viewsets.ModelViewSet):
@@ -123,6 +129,18 @@ class WhatsAppConversationViewSet(viewsets.ModelViewSet):
         serializer = SendMessageSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        if serializer.validated_data["queue"]:
+            message = queue_message(
+                to_phone=conversation.participant_phone,
+                body=serializer.validated_data["body"],
+                media_urls=serializer.validated_data.get("media_urls"),
+                from_phone=conversation.twilio_phone,
+            )
+            return Response(
+                WhatsAppMessageSerializer(message).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
+        
         result = send_whatsapp_message(
             to_phone=conversation.participant_phone,
             body=serializer.validated_data["body"],
@@ -203,10 +221,22 @@ class WhatsAppMessageViewSet(viewsets.ModelViewSet):
         - to_phone: Recipient phone number
         - body: Message text
         - media_urls: Optional list of media URLs
+        - queue: Send from the queue, answering 202 at once (default false)
         """
         serializer = SendMessageSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        if serializer.validated_data["queue"]:
+            message = queue_message(
+                to_phone=serializer.validated_data["to_phone"],
+                body=serializer.validated_data["body"],
+                media_urls=serializer.validated_data.get("media_urls"),
+            )
+            return Response(
+                WhatsAppMessageSerializer(message).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
+        
         result = send_whatsapp_message(
             to_phone=serializer.validated_data["to_phone"],
             body=serializer.validated_data["body"],
@@ -237,10 +267,24 @@ class WhatsAppMessageViewSet(viewsets.ModelViewSet):
         - to_phone: Recipient phone number
         - template_slug: Template slug identifier
         - variables: List of template variables
+        - queue: Send from the queue, answering 202 at once (default false)
         """
         serializer = SendTemplateMessageSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        if serializer.validated_data["queue"]:
+            message = queue_message(
+                to_phone=serializer.validated_data["to_phone"],
+                template=WhatsAppTemplate.objects.get(
+                    slug=serializer.validated_data["template_slug"]
+                ),
+                variables=serializer.validated_data.get("variables", []),
+            )
+            return Response(
+                WhatsAppMessageSerializer(message).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
+        
         result = send_template_message(
             to_phone=serializer.validated_data["to_phone"],
             template=serializer.validated_data["template_slug"],
@@ -324,3 +368,45 @@ class WhatsAppTemplateViewSet(viewsets.ModelViewSet):
             "template": WhatsAppTemplateSerializer(template).data,
             "rendered": rendered,
         })
+
+
+class WhatsAppBroadcastViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for WhatsApp broadcasts: one message to many recipients.
+    
+    - create: Queue a broadcast, answering 202 at once; the messages are
+      sent in the background at the account's rate
+    - list / retrieve: Progress of the broadcasts (sent, failed, total)
+    """
+    queryset = WhatsAppBroadcast.objects.select_related("template").all()
+    serializer_class = WhatsAppBroadcastSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def create(self, request):
+        """
+        Queue a broadcast.
+        
+        Request body:
+        - body: Message text, or
+        - template_slug: Template slug identifier
+        - media_urls: Optional list of media URLs
+        - recipients: [{"to_phone": "+39...", "variables": [...]}, ...]
+        """
+        serializer = CreateBroadcastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        broadcast = WhatsAppBroadcast.objects.create(
+            created_by=request.user,
+            body=data.get("body", ""),
+            template=data.get("template"),
+            media_urls=data.get("media_urls", []),
+            recipients=[dict(recipient) for recipient in data["recipients"]],
+            total=len(data["recipients"]),
+        )
+        transaction.on_commit(lambda: start_whatsapp_broadcast.delay(str(broadcast.pk)))
+        
+        return Response(
+            WhatsAppBroadcastSerializer(broadcast).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
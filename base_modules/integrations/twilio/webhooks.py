@@ -18,16 +18,11 @@ from django.utils import timezone
 
 from twilio.request_validator import RequestValidator
 
+from .inbound import record_incoming
 from .models import (
     WhatsAppMessage,
-    WhatsAppConversation,
-    MessageDirection,
     MessageStatus,
 )
-from .services import (
-    get_or_create_conversation,
-    extract_phone_number,
-)
 
 
 logger = logging.getLogger(__name__)
@@ -96,73 +91,29 @@ def whatsapp_incoming(request):
     - MediaUrl0, MediaUrl1, etc.: Media URLs
     - MediaContentType0, etc.: Media content types
     - ProfileName: Sender's WhatsApp profile name
+    
+    The payload is stored as is (a single INSERT, retries of the same
+    MessageSid are ignored) and turned into a message by a Celery worker,
+    so Twilio gets its answer at once (see inbound.py).
     """
-    try:
-        # Extract data from the webhook
-        message_sid = request.POST.get("MessageSid", "")
-        from_number = request.POST.get("From", "")
-        to_number = request.POST.get("To", "")
-        body = request.POST.get("Body", "")
-        profile_name = request.POST.get("ProfileName", "")
-        num_media = int(request.POST.get("NumMedia", 0))
-        
-        # Extract phone numbers
-        participant_phone = extract_phone_number(from_number)
-        twilio_phone = extract_phone_number(to_number)
-        
-        # Collect media URLs
-        media_urls = []
-        media_types = []
-        for i in range(num_media):
-            media_url = request.POST.get(f"MediaUrl{i}")
-            media_type = request.POST.get(f"MediaContentType{i}")
-            if media_url:
-                media_urls.append(media_url)
-            if media_type:
-                media_types.append(media_type)
-        
-        # Check if we already have this message (idempotency)
-        if WhatsAppMessage.objects.filter(twilio_sid=message_sid).exists():
-            logger.info(f"Duplicate message received: {message_sid}")
-            return HttpResponse("OK", status=200)
-        
-        # Get or create conversation
-        conversation = get_or_create_conversation(
-            participant_phone=participant_phone,
-            twilio_phone=twilio_phone,
-            participant_name=profile_name,
-        )
-        
-        # Create the message record
-        message = WhatsAppMessage.objects.create(
-            conversation=conversation,
-            twilio_sid=message_sid,
-            body=body,
-            media_urls=media_urls,
-            media_content_types=media_types,
-            direction=MessageDirection.INBOUND,
-            status=MessageStatus.RECEIVED,
-            metadata={
-                "profile_name": profile_name,
-                "raw_from": from_number,
-                "raw_to": to_number,
-            }
-        )
-        
-        logger.info(
-            f"Received WhatsApp message. SID: {message_sid}, "
-            f"From: {participant_phone}, Body length: {len(body)}"
-        )
-        
-        # Return TwiML response (empty response is fine for just receiving)
-        return HttpResponse(
-            '<?xml version="1.0" encoding="UTF-8"?><Response></Response>',
-            content_type="text/xml",
-        )
+    message_sid = request.POST.get("MessageSid", "")
+    if not message_sid:
+        return HttpResponse("Missing MessageSid", status=400)
     
+    try:
+        record_incoming(request.POST.dict())
     except Exception as e:
-        logger.exception(f"Error processing incoming WhatsApp message: {e}")
+        # Twilio retries the webhook on errors
+        logger.exception(f"Error recording incoming WhatsApp message {message_sid}: {e}")
         return HttpResponse("Error", status=500)
+    
+    logger.info(f"Received WhatsApp message. SID: {message_sid}")
+    
+    # Return TwiML response (empty response is fine for just receiving)
+    return HttpResponse(
+        '<?xml version="1.0" encoding="UTF-8"?><Response></Response>',
+        content_type="text/xml",
+    )
 
 
 # -----------------------------------------------------------------------------
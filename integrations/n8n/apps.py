@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class N8nIntegrationConfig(AppConfig):
     name = 'integrations.n8n'
     verbose_name = "n8n Integration"
+
+    def ready(self):
+        # Domain events (tickets, transactions) sent to n8n through the outbox
+        from .signals import connect_signals
+        connect_signals()
@@ -0,0 +1,127 @@
+# integrations/n8n/batch.py
+"""
+Batch webhook execution for n8n.
+
+Runs a list of webhook calls with bounded concurrency on one event loop:
+each call is limited by its own timeout, the whole batch by an optional
+deadline, and the results come back in input order whatever the order of
+completion. Calls still running or waiting when the deadline expires are
+cancelled and reported as failed.
+
+Used by the batch-webhook endpoint (async view) and, for large batches,
+by the run_webhook_batch Celery task (see tasks.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from mixtum_core.async_http import close_client_session
+
+from .services import AsyncN8nService, N8nError, WebhookResponse
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_EXCEEDED = "Batch deadline exceeded"
+
+
+def default_concurrency() -> int:
+    return getattr(settings, "N8N_BATCH_CONCURRENCY", 5)
+
+
+async def _call(service: AsyncN8nService, webhook_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Call one webhook of a batch; errors become a failed result."""
+    call = service.call_webhook_test if webhook_config.get("is_test") else service.call_webhook
+    try:
+        result = await call(
+            webhook_path=webhook_config["webhook_path"],
+            payload=webhook_config.get("payload"),
+            method=webhook_config.get("method", "POST"),
+            query_params=webhook_config.get("query_params"),
+            headers=webhook_config.get("headers"),
+            timeout=webhook_config.get("timeout")
+        )
+    except N8nError as e:
+        return {
+            "webhook_path": webhook_config["webhook_path"],
+            "success": False,
+            "error": str(e),
+            "status_code": e.status_code
+        }
+    return {"webhook_path": webhook_config["webhook_path"], **result.to_dict()}
+
+
+async def run_batch(
+    webhooks: List[Dict[str, Any]],
+    max_concurrency: Optional[int] = None,
+    deadline: Optional[float] = None,
+    service: Optional[AsyncN8nService] = None
+) -> List[Dict[str, Any]]:
+    """
+    Call the webhooks, at most `max_concurrency` at a time.
+
+    Args:
+        webhooks: Webhook configurations (as validated by CallWebhookSerializer)
+        max_concurrency: Calls in flight at once (1 = sequential)
+        deadline: Seconds after which unfinished calls are cancelled
+        service: AsyncN8nService to use
+
+    Returns:
+        One result dict per webhook, in input order
+    """
+    service = service or AsyncN8nService()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or default_concurrency()))
+
+    async def bounded(webhook_config):
+        async with semaphore:
+            return await _call(service, webhook_config)
+
+    tasks = [asyncio.ensure_future(bounded(webhook_config)) for webhook_config in webhooks]
+    if not tasks:
+        return []
+
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.warning("n8n batch deadline exceeded: %d of %d calls cancelled", len(pending), len(tasks))
+
+    results = []
+    for webhook_config, task in zip(webhooks, tasks):
+        if task in done:
+            results.append(task.result())
+        else:
+            timed_out = WebhookResponse(status_code=0, success=False, error=DEADLINE_EXCEEDED)
+            results.append({"webhook_path": webhook_config["webhook_path"], **timed_out.to_dict()})
+    return results
+
+
+def run_batch_sync(
+    webhooks: List[Dict[str, Any]],
+    max_concurrency: Optional[int] = None,
+    deadline: Optional[float] = None,
+    service: Optional[AsyncN8nService] = None
+) -> List[Dict[str, Any]]:
+    """run_batch() for sync callers (Celery tasks), on a private event loop."""
+    async def run():
+        try:
+            return await run_batch(webhooks, max_concurrency, deadline, service)
+        finally:
+            await close_client_session()
+
+    return asyncio.run(run())
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Response body of a batch: the results and their counts."""
+    successful = sum(1 for result in results if result.get("success"))
+    return {
+        "all_success": successful == len(results),
+        "results": results,
+        "total": len(results),
+        "successful": successful
+    }
@@ -0,0 +1,116 @@
+# integrations/n8n/executions.py
+"""
+Tracking of n8n workflow executions.
+
+Triggering a workflow with wait_for_completion holds the caller for as
+long as the workflow runs (up to 300 seconds). A WorkflowExecution is
+created instead, the workflow triggered by a Celery worker, and the
+record updated from n8n's execution data:
+
+- by tasks.poll_workflow_execution, which polls get_execution_status with
+  an exponential backoff until the execution finishes or times out
+- by the workflow itself, posting to the execution's callback URL (sent
+  to n8n in the "_callback" key of the payload when requested)
+
+Clients follow the record with a long-poll (?wait=) or an SSE stream.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ExecutionStatus, WorkflowExecution
+
+logger = logging.getLogger(__name__)
+
+# n8n execution statuses ("crashed" and "failed" come from older versions)
+N8N_STATUSES = {
+    "new": ExecutionStatus.QUEUED,
+    "running": ExecutionStatus.RUNNING,
+    "waiting": ExecutionStatus.WAITING,
+    "success": ExecutionStatus.SUCCESS,
+    "error": ExecutionStatus.ERROR,
+    "crashed": ExecutionStatus.ERROR,
+    "failed": ExecutionStatus.ERROR,
+    "canceled": ExecutionStatus.CANCELED,
+}
+
+
+def poll_delay(poll_count: int) -> float:
+    """Seconds before the next status poll: doubles from N8N_EXECUTION_POLL_INITIAL up to _MAX."""
+    initial = getattr(settings, "N8N_EXECUTION_POLL_INITIAL", 2)
+    maximum = getattr(settings, "N8N_EXECUTION_POLL_MAX", 60)
+    return min(initial * 2 ** min(poll_count, 16), maximum)
+
+
+def execution_timeout() -> int:
+    """Seconds after which an unfinished execution is marked as timed out."""
+    return getattr(settings, "N8N_EXECUTION_TIMEOUT", 3600)
+
+
+def _unwrap(data: Any) -> Any:
+    # The API answers {"data": {...}} or the execution itself
+    if isinstance(data, dict) and isinstance(data.get("data"), dict) and "status" not in data:
+        return data["data"]
+    return data
+
+
+def execution_id_from(data: Any) -> str:
+    """The n8n execution id in a workflow trigger response, or ""."""
+    data = _unwrap(data)
+    if not isinstance(data, dict):
+        return ""
+    execution_id = data.get("executionId") or data.get("id") or ""
+    return str(execution_id)
+
+
+def status_from(data: Any) -> Optional[str]:
+    """The ExecutionStatus described by n8n execution data, None if unknown."""
+    data = _unwrap(data)
+    if not isinstance(data, dict):
+        return None
+    n8n_status = data.get("status")
+    if n8n_status in N8N_STATUSES:
+        return N8N_STATUSES[n8n_status]
+    if data.get("finished") is True:
+        return ExecutionStatus.SUCCESS
+    return None
+
+
+def apply_status(
+    execution: WorkflowExecution,
+    status: str,
+    result: Any = None,
+    error: str = ""
+) -> bool:
+    """
+    Record a new status of an execution, unless it has already finished.
+
+    Locks the row, so the poller and the callback never overwrite each
+    other's final status.
+
+    Returns:
+        True if the record changed
+    """
+    with transaction.atomic():
+        current = WorkflowExecution.objects.select_for_update().get(pk=execution.pk)
+        if current.is_finished:
+            return False
+
+        current.status = status
+        if result is not None:
+            current.result = result
+        if error:
+            current.error = error
+        if current.is_finished:
+            current.finished_at = timezone.now()
+        current.save(update_fields=["status", "result", "error", "finished_at", "updated_at"])
+
+    for field in ("status", "result", "error", "finished_at", "updated_at"):
+        setattr(execution, field, getattr(current, field))
+    logger.info("n8n execution %s (%s): %s", execution.pk, execution.execution_id, status)
+    return True
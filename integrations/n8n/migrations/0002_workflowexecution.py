@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:33
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('n8n', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowExecution',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('workflow_id', models.CharField(max_length=64)),
+                ('execution_id', models.CharField(blank=True, db_index=True, default='', help_text='Execution id assigned by n8n', max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('waiting', 'Waiting'), ('success', 'Success'), ('error', 'Error'), ('canceled', 'Canceled'), ('timeout', 'Timed out')], default='queued', max_length=16)),
+                ('payload', models.JSONField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('callback_url', models.URLField(blank=True, default='', max_length=500)),
+                ('callback_token', models.CharField(blank=True, default='', editable=False, max_length=64)),
+                ('poll_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='n8n_workflow_executions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,180 @@
+# integrations/n8n/models.py
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class WebhookBatchStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    RUNNING = "running", "Running"
+    COMPLETED = "completed", "Completed"
+    FAILED = "failed", "Failed"
+
+
+class WebhookBatch(models.Model):
+    """
+    A batch of webhook calls run in the background by a Celery worker.
+
+    Created by the async batch-webhook endpoint, whose response carries the
+    batch id; results are stored in input order as they complete.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="n8n_webhook_batches"
+    )
+    status = models.CharField(max_length=16, choices=WebhookBatchStatus.choices, default=WebhookBatchStatus.PENDING)
+
+    webhooks = models.JSONField(default=list, help_text="Webhook configurations, as sent by the client")
+    max_concurrency = models.PositiveSmallIntegerField(default=5)
+    deadline_seconds = models.PositiveIntegerField(null=True, blank=True)
+
+    results = models.JSONField(default=list, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    successful = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Batch {self.pk} [{self.get_status_display()}] {self.completed}/{self.total}"
+
+
+class ExecutionStatus(models.TextChoices):
+    QUEUED = "queued", "Queued"
+    RUNNING = "running", "Running"
+    WAITING = "waiting", "Waiting"
+    SUCCESS = "success", "Success"
+    ERROR = "error", "Error"
+    CANCELED = "canceled", "Canceled"
+    TIMEOUT = "timeout", "Timed out"
+
+
+FINISHED_EXECUTION_STATUSES = (
+    ExecutionStatus.SUCCESS,
+    ExecutionStatus.ERROR,
+    ExecutionStatus.CANCELED,
+    ExecutionStatus.TIMEOUT,
+)
+
+
+class WorkflowExecution(models.Model):
+    """
+    A workflow run triggered through the executions endpoint.
+
+    The record is created by the request and the workflow triggered by a
+    Celery worker; its status is then kept up to date by polling n8n (see
+    tasks.poll_workflow_execution) or by the workflow itself calling the
+    callback URL with callback_token.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="n8n_workflow_executions"
+    )
+    workflow_id = models.CharField(max_length=64)
+    execution_id = models.CharField(max_length=64, blank=True, default="", db_index=True,
+                                    help_text="Execution id assigned by n8n")
+    status = models.CharField(max_length=16, choices=ExecutionStatus.choices, default=ExecutionStatus.QUEUED)
+
+    payload = models.JSONField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    callback_url = models.URLField(max_length=500, blank=True, default="")
+    callback_token = models.CharField(max_length=64, blank=True, default="", editable=False)
+    poll_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Workflow {self.workflow_id} [{self.get_status_display()}] {self.pk}"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_EXECUTION_STATUSES
+
+
+class DeliveryStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    SENDING = "sending", "Sending"
+    DELIVERED = "delivered", "Delivered"
+    FAILED = "failed", "Failed"
+
+
+class WebhookDelivery(models.Model):
+    """
+    An outbound webhook call waiting in the outbox (see outbox.py).
+
+    Written in the caller's transaction and delivered by the
+    process_outbox Celery task, which retries failures with an
+    exponential backoff. Coalesced deliveries to the same webhook path are
+    sent together as one batched payload.
+    """
+    webhook_path = models.CharField(max_length=255)
+    event = models.CharField(max_length=100, blank=True, default="", help_text="Domain event name, e.g. ticket.created")
+    payload = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    coalesce = models.BooleanField(default=True, help_text="May be batched with other events for the same webhook")
+
+    status = models.CharField(max_length=16, choices=DeliveryStatus.choices, default=DeliveryStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.event or 'delivery'} -> {self.webhook_path} [{self.get_status_display()}]"
+
+
+class WebhookStats(models.Model):
+    """Delivery counters and latency of one webhook path, updated by the outbox consumer."""
+    webhook_path = models.CharField(max_length=255, unique=True)
+    calls = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    events_delivered = models.PositiveIntegerField(default=0)
+    total_latency_ms = models.FloatField(default=0)
+    max_latency_ms = models.FloatField(default=0)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_failure_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["webhook_path"]
+        verbose_name_plural = "Webhook stats"
+
+    def __str__(self):
+        return f"{self.webhook_path}: {self.calls} calls, {self.failures} failures"
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.total_latency_ms / self.calls if self.calls else 0.0
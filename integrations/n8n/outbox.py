@@ -0,0 +1,258 @@
+# integrations/n8n/outbox.py
+"""
+Outbox for n8n webhook deliveries.
+
+enqueue() stores a WebhookDelivery in the caller's transaction and returns
+at once: the webhook is called by the process_outbox Celery task, after
+the commit, so a request never waits on n8n and a failed call is retried
+instead of lost.
+
+- Coalescing: events for the same webhook path enqueued within
+  N8N_OUTBOX_COALESCE_WINDOW seconds share a due time and are sent as one
+  POST of {"events": [...], "count": n}
+- Retries: a failed call is retried after N8N_OUTBOX_RETRY_BASE seconds,
+  doubling up to N8N_OUTBOX_RETRY_MAX, and given up after
+  N8N_OUTBOX_MAX_ATTEMPTS
+- Stats: every call updates the WebhookStats of its path (calls,
+  failures, latency)
+
+Domain events (ticket.created, transaction.paid, ...) reach n8n through
+publish_event(), for the events mapped in N8N_EVENT_WEBHOOKS.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import timedelta
+from itertools import groupby
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import DeliveryStatus, WebhookDelivery, WebhookStats
+from .services import N8nError, N8nService, get_n8n_service
+
+logger = logging.getLogger(__name__)
+
+# A worker that died mid-delivery leaves rows in SENDING: requeue them
+SENDING_TIMEOUT = timedelta(minutes=5)
+
+
+def coalesce_window() -> float:
+    return getattr(settings, "N8N_OUTBOX_COALESCE_WINDOW", 5)
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before retrying a delivery that failed `attempts` times."""
+    base = getattr(settings, "N8N_OUTBOX_RETRY_BASE", 10)
+    maximum = getattr(settings, "N8N_OUTBOX_RETRY_MAX", 3600)
+    return min(base * 2 ** min(max(attempts - 1, 0), 16), maximum)
+
+
+def enqueue(
+    webhook_path: str,
+    payload: Any = None,
+    event: str = "",
+    coalesce: bool = True
+) -> WebhookDelivery:
+    """
+    Queue a webhook call, delivered after the current transaction commits.
+
+    Args:
+        webhook_path: Webhook path/ID, as for N8nService.call_webhook
+        payload: JSON payload (dates and decimals are encoded as strings)
+        event: Domain event name, sent along in batched payloads
+        coalesce: Allow batching with other events for the same path
+
+    Returns:
+        The WebhookDelivery
+    """
+    now = timezone.now()
+    window = coalesce_window()
+    coalesce = coalesce and window > 0
+
+    due = now
+    if coalesce:
+        # Join the window already open for this path, if any
+        due = (
+            WebhookDelivery.objects.filter(
+                webhook_path=webhook_path,
+                status=DeliveryStatus.PENDING,
+                coalesce=True,
+                attempts=0,
+                next_attempt_at__gt=now
+            )
+            .order_by("next_attempt_at")
+            .values_list("next_attempt_at", flat=True)
+            .first()
+        ) or now + timedelta(seconds=window)
+
+    delivery = WebhookDelivery.objects.create(
+        webhook_path=webhook_path,
+        event=event,
+        payload=payload,
+        coalesce=coalesce,
+        next_attempt_at=due
+    )
+    schedule_processing(webhook_path, (due - now).total_seconds())
+    return delivery
+
+
+def publish_event(event: str, payload: Dict[str, Any]) -> Optional[WebhookDelivery]:
+    """Queue a domain event for the webhook mapped to it in N8N_EVENT_WEBHOOKS, if any."""
+    webhook_path = getattr(settings, "N8N_EVENT_WEBHOOKS", {}).get(event)
+    if not webhook_path:
+        return None
+    return enqueue(webhook_path, payload, event=event)
+
+
+def schedule_processing(webhook_path: str, delay: float) -> None:
+    """
+    Run process_outbox once the delivery is due, after the commit.
+
+    At most one run is scheduled per path and window; the beat sweep
+    (CELERY_BEAT_SCHEDULE) catches anything missed.
+    """
+    from .tasks import process_outbox
+
+    if delay > 0 and not cache.add(f"n8n:outbox:scheduled:{webhook_path}", 1, timeout=max(1, int(delay))):
+        return
+    transaction.on_commit(lambda: process_outbox.apply_async(countdown=max(0.0, delay)))
+
+
+def claim_due(limit: int) -> List[WebhookDelivery]:
+    """Mark up to `limit` due deliveries as SENDING and return them."""
+    now = timezone.now()
+    WebhookDelivery.objects.filter(
+        status=DeliveryStatus.SENDING,
+        updated_at__lt=now - SENDING_TIMEOUT
+    ).update(status=DeliveryStatus.PENDING)
+
+    with transaction.atomic():
+        deliveries = list(
+            WebhookDelivery.objects.select_for_update(skip_locked=True)
+            .filter(status=DeliveryStatus.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:limit]
+        )
+        WebhookDelivery.objects.filter(pk__in=[d.pk for d in deliveries]).update(
+            status=DeliveryStatus.SENDING,
+            updated_at=now
+        )
+    return deliveries
+
+
+def group_deliveries(deliveries: List[WebhookDelivery]) -> List[List[WebhookDelivery]]:
+    """One group per call: coalesced deliveries by path (up to N8N_OUTBOX_MAX_BATCH), others alone."""
+    max_batch = getattr(settings, "N8N_OUTBOX_MAX_BATCH", 100)
+    groups = [[delivery] for delivery in deliveries if not delivery.coalesce]
+
+    coalesced = sorted((d for d in deliveries if d.coalesce), key=lambda d: (d.webhook_path, d.pk))
+    for _, same_path in groupby(coalesced, key=lambda d: d.webhook_path):
+        same_path = list(same_path)
+        groups.extend(same_path[i:i + max_batch] for i in range(0, len(same_path), max_batch))
+
+    return sorted(groups, key=lambda group: group[0].pk)
+
+
+def batch_payload(group: List[WebhookDelivery]) -> Dict[str, Any]:
+    return {
+        "events": [
+            {
+                "id": delivery.pk,
+                "event": delivery.event,
+                "payload": delivery.payload,
+                "created_at": delivery.created_at.isoformat()
+            }
+            for delivery in group
+        ],
+        "count": len(group)
+    }
+
+
+def record_call(
+    webhook_path: str,
+    success: bool,
+    latency_ms: float,
+    status_code: Optional[int],
+    error: str = "",
+    events: int = 1
+) -> None:
+    """Add one call to the WebhookStats of a path."""
+    stats, _ = WebhookStats.objects.get_or_create(webhook_path=webhook_path)
+    now = timezone.now()
+    updates = {
+        "calls": F("calls") + 1,
+        "total_latency_ms": F("total_latency_ms") + latency_ms,
+        "max_latency_ms": Greatest(F("max_latency_ms"), Value(latency_ms)),
+        "last_status_code": status_code or None,
+    }
+    if success:
+        updates.update(events_delivered=F("events_delivered") + events, last_success_at=now)
+    else:
+        updates.update(failures=F("failures") + 1, last_error=error[:1000], last_failure_at=now)
+    WebhookStats.objects.filter(pk=stats.pk).update(**updates)
+
+
+def deliver(service: Optional[N8nService], group: List[WebhookDelivery]) -> bool:
+    """Send a group of deliveries in one call and record the outcome."""
+    first = group[0]
+    body = batch_payload(group) if first.coalesce else first.payload
+
+    started = time.monotonic()
+    status_code = None
+    try:
+        if service is None:
+            service = get_n8n_service()
+        response = service.call_webhook(first.webhook_path, body)
+        success, status_code, error = response.success, response.status_code, response.error or ""
+    except N8nError as e:
+        success, status_code, error = False, e.status_code, str(e)
+    latency_ms = (time.monotonic() - started) * 1000
+
+    record_call(first.webhook_path, success, latency_ms, status_code, error, events=len(group))
+
+    now = timezone.now()
+    max_attempts = getattr(settings, "N8N_OUTBOX_MAX_ATTEMPTS", 8)
+    for delivery in group:
+        delivery.attempts += 1
+        if success:
+            delivery.status = DeliveryStatus.DELIVERED
+            delivery.delivered_at = now
+            delivery.last_error = ""
+        else:
+            delivery.last_error = error
+            if delivery.attempts >= max_attempts:
+                delivery.status = DeliveryStatus.FAILED
+            else:
+                delivery.status = DeliveryStatus.PENDING
+                delivery.next_attempt_at = now + timedelta(seconds=retry_delay(delivery.attempts))
+        delivery.updated_at = now
+    WebhookDelivery.objects.bulk_update(
+        group, ["status", "attempts", "next_attempt_at", "last_error", "delivered_at", "updated_at"]
+    )
+
+    if not success:
+        logger.warning(
+            "n8n outbox: %s failed for %d event(s) (attempt %d): %s",
+            first.webhook_path, len(group), first.attempts, error
+        )
+    return success
+
+
+def process_due(limit: int = 500, service: Optional[N8nService] = None) -> Dict[str, int]:
+    """Deliver the due deliveries. Returns counters for the task result."""
+    deliveries = claim_due(limit)
+    stats = {"claimed": len(deliveries), "calls": 0, "delivered": 0, "failed_calls": 0}
+
+    for group in group_deliveries(deliveries):
+        stats["calls"] += 1
+        if deliver(service, group):
+            stats["delivered"] += len(group)
+        else:
+            stats["failed_calls"] += 1
+    return stats
@@ -4,6 +4,9 @@ Serializers for n8n integration API endpoints.
 """
 from rest_framework import serializers
 
+from .executions import N8N_STATUSES
+from .models import WebhookBatch, WebhookDelivery, WebhookStats, WorkflowExecution
+
 
 class WebhookResponseSerializer(serializers.Serializer):
     """Serializer for webhook response output."""
@@ -98,5 +101,157 @@ class BatchWebhookSerializer(serializers.Serializer):
     parallel = serializers.BooleanField(
         required=False,
         default=False,
-        help_text="Execute webhooks in parallel (not yet implemented)"
+        help_text="Execute webhooks in parallel, at most max_concurrency at a time"
+    )
+    max_concurrency = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        max_value=20,
+        help_text="Webhook calls in flight at once when parallel (default N8N_BATCH_CONCURRENCY)"
     )
+    deadline = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        max_value=600,
+        help_text="Seconds after which unfinished calls are cancelled and reported as failed"
+    )
+
+
+class AsyncBatchWebhookSerializer(BatchWebhookSerializer):
+    """Serializer for a batch of webhooks run in the background."""
+    webhooks = serializers.ListField(
+        child=CallWebhookSerializer(),
+        min_length=1,
+        max_length=1000,
+        help_text="List of webhook configurations to call"
+    )
+    deadline = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        max_value=3600,
+        help_text="Seconds after which unfinished calls are cancelled and reported as failed"
+    )
+
+
+class WebhookBatchSerializer(serializers.ModelSerializer):
+    """Serializer for a background batch and its results so far."""
+
+    class Meta:
+        model = WebhookBatch
+        fields = [
+            "id", "status", "total", "completed", "successful", "results", "error",
+            "max_concurrency", "deadline_seconds", "created_at", "started_at", "finished_at"
+        ]
+        read_only_fields = fields
+
+
+class StartExecutionSerializer(serializers.Serializer):
+    """Serializer for starting a tracked workflow execution."""
+    workflow_id = serializers.CharField(
+        required=True,
+        max_length=64,
+        help_text="The n8n workflow ID to trigger"
+    )
+    payload = serializers.JSONField(
+        required=False,
+        allow_null=True,
+        default=None,
+        help_text="Data to pass to the workflow"
+    )
+    callback = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Send the workflow a callback URL and token (payload key '_callback') to report its result"
+    )
+
+    def validate_payload(self, value):
+        if value is not None and not isinstance(value, dict):
+            raise serializers.ValidationError("Must be a JSON object.")
+        return value
+
+
+class ExecutionCallbackSerializer(serializers.Serializer):
+    """Serializer for the result posted by a workflow to its callback URL."""
+    status = serializers.ChoiceField(
+        choices=sorted(N8N_STATUSES),
+        help_text="Execution status, as named by n8n"
+    )
+    data = serializers.JSONField(
+        required=False,
+        allow_null=True,
+        default=None,
+        help_text="Result of the workflow"
+    )
+    error = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        default=""
+    )
+
+
+class WorkflowExecutionSerializer(serializers.ModelSerializer):
+    """Serializer for a tracked workflow execution."""
+    finished = serializers.BooleanField(source="is_finished", read_only=True)
+
+    class Meta:
+        model = WorkflowExecution
+        fields = [
+            "id", "workflow_id", "execution_id", "status", "finished", "result", "error",
+            "poll_count", "created_at", "updated_at", "finished_at"
+        ]
+        read_only_fields = fields
+
+
+class QueueWebhookSerializer(serializers.Serializer):
+    """Serializer for queueing a webhook call in the outbox."""
+    webhook_path = serializers.CharField(
+        required=True,
+        max_length=255,
+        help_text="Webhook path/ID (e.g., 'my-webhook' or 'production/my-webhook')"
+    )
+    payload = serializers.JSONField(
+        required=False,
+        allow_null=True,
+        default=None,
+        help_text="JSON payload to send to the webhook"
+    )
+    event = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        default="",
+        max_length=100,
+        help_text="Event name, sent along when batched"
+    )
+    coalesce = serializers.BooleanField(
+        required=False,
+        default=True,
+        help_text="Allow batching with other events for the same webhook"
+    )
+
+
+class WebhookDeliverySerializer(serializers.ModelSerializer):
+    """Serializer for an outbox delivery."""
+
+    class Meta:
+        model = WebhookDelivery
+        fields = [
+            "id", "webhook_path", "event", "status", "attempts", "next_attempt_at",
+            "last_error", "created_at", "delivered_at"
+        ]
+        read_only_fields = fields
+
+
+class WebhookStatsSerializer(serializers.ModelSerializer):
+    """Serializer for the delivery stats of a webhook path."""
+    avg_latency_ms = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = WebhookStats
+        fields = [
+            "webhook_path", "calls", "failures", "events_delivered", "avg_latency_ms",
+            "max_latency_ms", "last_status_code", "last_error", "last_success_at", "last_failure_at"
+        ]
+        read_only_fields = fields
@@ -6,14 +6,21 @@ Provides primitives for calling n8n webhooks with custom payloads.
 from __future__ import annotations
 
 import os
+import json
+import asyncio
 import logging
+import time
 from typing import Optional, Dict, Any, List, Union
 from dataclasses import dataclass, field
 from enum import Enum
 
+import aiohttp
 import requests
 from django.conf import settings
 
+from mixtum_core.async_http import client_timeout, get_client_session
+from mixtum_core.http_sessions import get_session
+
 
 logger = logging.getLogger(__name__)
 
@@ -79,7 +86,8 @@ class N8nService:
         base_url: Optional[str] = None,
         api_key: Optional[str] = None,
         timeout: int = 30,
-        verify_ssl: bool = True
+        verify_ssl: bool = True,
+        session: Optional[requests.Session] = None
     ):
         """
         Initialize N8nService.
@@ -91,6 +99,8 @@ class N8nService:
                      Uses N8N_API_KEY from environment if not provided.
             timeout: Request timeout in seconds.
             verify_ssl: Whether to verify SSL certificates.
+            session: HTTP session to use. Defaults to the process-wide
+                     pooled session (see mixtum_core.http_sessions).
         """
         self.base_url = (
             base_url or 
@@ -106,10 +116,16 @@ class N8nService:
         
         self.timeout = timeout
         self.verify_ssl = verify_ssl
+        self._session = session
         
         if not self.base_url:
             raise N8nError("n8n base URL not configured. Set N8N_BASE_URL environment variable.")
     
+    @property
+    def session(self) -> requests.Session:
+        """Pooled HTTP session: keep-alive connections, 429s retried after Retry-After."""
+        return self._session or get_session("n8n")
+    
     def _build_headers(
         self, 
         custom_headers: Optional[Dict[str, str]] = None,
@@ -167,7 +183,7 @@ class N8nService:
         request_headers = self._build_headers(headers)
         
         try:
-            response = requests.request(
+            response = self.session.request(
                 method=method.value,
                 url=url,
                 json=payload if method in (HttpMethod.POST, HttpMethod.PUT, HttpMethod.PATCH) else None,
@@ -255,7 +271,7 @@ class N8nService:
         request_headers = self._build_headers(headers)
         
         try:
-            response = requests.request(
+            response = self.session.request(
                 method=method.value,
                 url=url,
                 json=payload if method in (HttpMethod.POST, HttpMethod.PUT, HttpMethod.PATCH) else None,
@@ -339,7 +355,7 @@ class N8nService:
             body["waitForCompletion"] = True
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 url,
                 json=body,
                 headers=headers,
@@ -390,7 +406,7 @@ class N8nService:
         }
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 url,
                 headers=headers,
                 timeout=self.timeout,
@@ -420,6 +436,195 @@ class N8nService:
             raise N8nError(f"Request failed: {str(e)}")
 
 
+class AsyncN8nService:
+    """
+    Async counterpart of N8nService, for async views.
+    
+    Same methods and results, over the event loop's shared aiohttp session
+    (see mixtum_core.async_http), so a request waiting on a long workflow
+    (wait_for_completion can take minutes) doesn't hold a worker.
+    Configuration comes from the wrapped N8nService.
+    
+    Usage:
+        n8n = AsyncN8nService()
+        response = await n8n.call_webhook("my-webhook", {"key": "value"})
+    """
+    
+    def __init__(self, service: Optional[N8nService] = None):
+        self.service = service or get_n8n_service()
+    
+    @property
+    def base_url(self) -> str:
+        return self.service.base_url
+    
+    @property
+    def api_key(self) -> Optional[str]:
+        return self.service.api_key
+    
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: float,
+        json_body: Any = None,
+        params: Optional[Dict[str, str]] = None
+    ) -> WebhookResponse:
+        """Send a request and wrap the reply; aiohttp errors propagate."""
+        started = time.perf_counter()
+        async with get_client_session().request(
+            method,
+            url,
+            json=json_body,
+            params=params,
+            headers=headers,
+            timeout=client_timeout(timeout),
+            ssl=self.service.verify_ssl
+        ) as response:
+            body = await response.text()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = body
+        
+        success = 200 <= response.status < 300
+        return WebhookResponse(
+            status_code=response.status,
+            success=success,
+            data=data,
+            headers=dict(response.headers),
+            elapsed_ms=elapsed_ms,
+            error=None if success else f"HTTP {response.status}"
+        )
+    
+    async def _call(
+        self,
+        url: str,
+        payload: Optional[Dict[str, Any]],
+        method: Union[str, HttpMethod],
+        query_params: Optional[Dict[str, str]],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[int],
+        raise_on_error: bool,
+        label: str
+    ) -> WebhookResponse:
+        if isinstance(method, str):
+            method = HttpMethod(method.upper())
+        
+        try:
+            result = await self._send(
+                method.value,
+                url,
+                headers=self.service._build_headers(headers),
+                timeout=timeout or self.service.timeout,
+                json_body=payload if method in (HttpMethod.POST, HttpMethod.PUT, HttpMethod.PATCH) else None,
+                params=query_params
+            )
+        except asyncio.TimeoutError as e:
+            logger.warning(f"n8n {label} timeout: {url}")
+            if raise_on_error:
+                raise N8nError(f"Request timeout: {str(e)}")
+            return WebhookResponse(status_code=0, success=False, error=f"Request timeout: {str(e)}")
+        except aiohttp.ClientError as e:
+            logger.exception(f"n8n {label} request failed: {url}")
+            if raise_on_error:
+                raise N8nError(f"Request failed: {str(e)}")
+            return WebhookResponse(status_code=0, success=False, error=f"Request failed: {str(e)}")
+        
+        if raise_on_error and not result.success:
+            raise N8nError(
+                f"{label.capitalize()} call failed with status {result.status_code}",
+                status_code=result.status_code,
+                response_data=result.data
+            )
+        return result
+    
+    async def call_webhook(
+        self,
+        webhook_path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        method: Union[str, HttpMethod] = HttpMethod.POST,
+        query_params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[int] = None,
+        raise_on_error: bool = False
+    ) -> WebhookResponse:
+        """Call an n8n webhook (see N8nService.call_webhook)."""
+        url = f"{self.base_url}/webhook/{webhook_path.lstrip('/')}"
+        return await self._call(
+            url, payload, method, query_params, headers, timeout, raise_on_error, "webhook"
+        )
+    
+    async def call_webhook_test(
+        self,
+        webhook_path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        method: Union[str, HttpMethod] = HttpMethod.POST,
+        query_params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[int] = None,
+        raise_on_error: bool = False
+    ) -> WebhookResponse:
+        """Call an n8n TEST webhook (see N8nService.call_webhook_test)."""
+        url = f"{self.base_url}/webhook-test/{webhook_path.lstrip('/')}"
+        return await self._call(
+            url, payload, method, query_params, headers, timeout, raise_on_error, "test webhook"
+        )
+    
+    async def trigger_workflow(
+        self,
+        workflow_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        wait_for_completion: bool = False
+    ) -> WebhookResponse:
+        """Trigger a workflow by ID (see N8nService.trigger_workflow)."""
+        if not self.api_key:
+            raise N8nError("API key required for triggering workflows by ID")
+        
+        body = {}
+        if payload:
+            body["data"] = payload
+        if wait_for_completion:
+            body["waitForCompletion"] = True
+        
+        try:
+            return await self._send(
+                "POST",
+                f"{self.base_url}/api/v1/workflows/{workflow_id}/execute",
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                    "X-N8N-API-KEY": self.api_key
+                },
+                timeout=self.service.timeout if not wait_for_completion else 300,
+                json_body=body
+            )
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            logger.exception(f"n8n workflow trigger failed: {workflow_id}")
+            raise N8nError(f"Request failed: {str(e)}")
+    
+    async def get_execution_status(self, execution_id: str) -> WebhookResponse:
+        """Get the status of a workflow execution (see N8nService.get_execution_status)."""
+        if not self.api_key:
+            raise N8nError("API key required for checking execution status")
+        
+        try:
+            return await self._send(
+                "GET",
+                f"{self.base_url}/api/v1/executions/{execution_id}",
+                headers={
+                    "Accept": "application/json",
+                    "X-N8N-API-KEY": self.api_key
+                },
+                timeout=self.service.timeout
+            )
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            logger.exception(f"n8n execution status check failed: {execution_id}")
+            raise N8nError(f"Request failed: {str(e)}")
+
+
 # -----------------------------------------------------------------------------
 # Module-level convenience functions
 # -----------------------------------------------------------------------------
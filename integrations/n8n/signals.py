@@ -0,0 +1,51 @@
+# integrations/n8n/signals.py
+"""
+Domain events sent to n8n through the outbox.
+
+Connected in N8nIntegrationConfig.ready() for the installed apps. An event
+is queued only if N8N_EVENT_WEBHOOKS maps it to a webhook path; delivery
+happens after the commit, off the request path (see outbox.py).
+"""
+from django.apps import apps
+from django.conf import settings
+
+from .outbox import publish_event
+
+
+def _published(event: str) -> bool:
+    return bool(getattr(settings, "N8N_EVENT_WEBHOOKS", {}).get(event))
+
+
+def on_ticket_created(sender, ticket, **kwargs):
+    if not _published("ticket.created"):
+        return
+    publish_event("ticket.created", {
+        "id": ticket.pk,
+        "title": ticket.title,
+        "status": ticket.status,
+        "priority": ticket.priority,
+        "project_id": ticket.project_id,
+        "client_id": ticket.client_id,
+        "opening_date": ticket.opening_date,
+    })
+
+
+def on_transaction_paid(sender, transaction_id, payment_date, **kwargs):
+    if not _published("transaction.paid"):
+        return
+    values = (
+        sender.objects.filter(pk=transaction_id)
+        .values("account_id", "category_id", "description", "gross_amount", "transaction_type")
+        .first()
+    ) or {}
+    publish_event("transaction.paid", {"id": transaction_id, "payment_date": payment_date, **values})
+
+
+def connect_signals():
+    if apps.is_installed("plugins.ticket_manager"):
+        from plugins.ticket_manager.signals import ticket_created
+        ticket_created.connect(on_ticket_created, dispatch_uid="n8n_ticket_created")
+
+    if apps.is_installed("plugins.finance_manager_core"):
+        from plugins.finance_manager_core.signals import transaction_paid
+        transaction_paid.connect(on_transaction_paid, dispatch_uid="n8n_transaction_paid")
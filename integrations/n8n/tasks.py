@@ -0,0 +1,183 @@
+# integrations/n8n/tasks.py
+"""
+Celery tasks for the n8n integration.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .batch import DEADLINE_EXCEEDED, run_batch_sync
+from .executions import apply_status, execution_id_from, execution_timeout, poll_delay, status_from
+from .models import FINISHED_EXECUTION_STATUSES, ExecutionStatus, WebhookBatch, WebhookBatchStatus, WorkflowExecution
+from .outbox import process_due
+from .services import N8nError, WebhookResponse, get_n8n_service
+
+logger = logging.getLogger(__name__)
+
+
+def _finish(batch: WebhookBatch, status: str, error: str = "") -> None:
+    batch.status = status
+    batch.error = error
+    batch.finished_at = timezone.now()
+    batch.save(update_fields=["status", "error", "finished_at"])
+
+
+@shared_task
+def run_webhook_batch(batch_id: str) -> dict:
+    """
+    Run a WebhookBatch created by the async batch-webhook endpoint.
+
+    The webhooks are called in chunks of N8N_BATCH_CHUNK_SIZE, with the
+    batch's concurrency limit inside each chunk; results and counters are
+    saved after every chunk, so clients polling the batch see progress.
+    The batch deadline runs from the start of the task.
+
+    Returns:
+        dict with the batch counters
+    """
+    updated = WebhookBatch.objects.filter(pk=batch_id, status=WebhookBatchStatus.PENDING).update(
+        status=WebhookBatchStatus.RUNNING,
+        started_at=timezone.now()
+    )
+    if not updated:
+        # Unknown, or already picked up by another worker
+        return {"batch_id": str(batch_id), "skipped": True}
+
+    batch = WebhookBatch.objects.get(pk=batch_id)
+    chunk_size = getattr(settings, "N8N_BATCH_CHUNK_SIZE", 100)
+    started = time.monotonic()
+    results = []
+
+    try:
+        for offset in range(0, len(batch.webhooks), chunk_size):
+            chunk = batch.webhooks[offset:offset + chunk_size]
+            remaining = None
+            if batch.deadline_seconds:
+                remaining = batch.deadline_seconds - (time.monotonic() - started)
+
+            if remaining is not None and remaining <= 0:
+                timed_out = WebhookResponse(status_code=0, success=False, error=DEADLINE_EXCEEDED).to_dict()
+                results.extend({"webhook_path": config["webhook_path"], **timed_out} for config in chunk)
+            else:
+                results.extend(run_batch_sync(chunk, batch.max_concurrency, remaining))
+
+            batch.results = results
+            batch.completed = len(results)
+            batch.successful = sum(1 for result in results if result.get("success"))
+            batch.save(update_fields=["results", "completed", "successful"])
+    except N8nError as e:
+        # Configuration errors (e.g. no base URL): nothing can be called
+        _finish(batch, WebhookBatchStatus.FAILED, str(e))
+    except Exception as e:
+        _finish(batch, WebhookBatchStatus.FAILED, str(e))
+        raise
+    else:
+        _finish(batch, WebhookBatchStatus.COMPLETED)
+
+    logger.info(
+        "n8n webhook batch %s %s: %d/%d successful",
+        batch.pk, batch.status, batch.successful, batch.total
+    )
+    return {
+        "batch_id": str(batch.pk),
+        "status": batch.status,
+        "total": batch.total,
+        "completed": batch.completed,
+        "successful": batch.successful
+    }
+
+
+@shared_task
+def start_workflow_execution(execution_pk: str) -> dict:
+    """
+    Trigger the workflow of a WorkflowExecution, without waiting for it.
+
+    Stores the n8n execution id and schedules poll_workflow_execution.
+    """
+    execution = WorkflowExecution.objects.filter(pk=execution_pk).first()
+    if execution is None or execution.execution_id or execution.status != ExecutionStatus.QUEUED:
+        # Unknown, or already triggered by an earlier delivery of the task
+        return {"execution": str(execution_pk), "skipped": True}
+
+    payload = execution.payload
+    if execution.callback_url:
+        payload = {
+            **(payload or {}),
+            "_callback": {"url": execution.callback_url, "token": execution.callback_token}
+        }
+
+    try:
+        response = get_n8n_service().trigger_workflow(execution.workflow_id, payload)
+    except N8nError as e:
+        apply_status(execution, ExecutionStatus.ERROR, error=str(e))
+        return {"execution": str(execution.pk), "status": execution.status}
+
+    if not response.success:
+        apply_status(execution, ExecutionStatus.ERROR, result=response.data, error=response.error or "")
+        return {"execution": str(execution.pk), "status": execution.status}
+
+    execution.execution_id = execution_id_from(response.data)
+    execution.save(update_fields=["execution_id", "updated_at"])
+
+    status = status_from(response.data) or ExecutionStatus.RUNNING
+    apply_status(execution, status, result=response.data if status in FINISHED_EXECUTION_STATUSES else None)
+    if not execution.is_finished:
+        poll_workflow_execution.apply_async((str(execution.pk),), countdown=poll_delay(0))
+    return {"execution": str(execution.pk), "status": execution.status, "execution_id": execution.execution_id}
+
+
+@shared_task
+def poll_workflow_execution(execution_pk: str) -> dict:
+    """
+    Poll n8n for the status of a WorkflowExecution.
+
+    Reschedules itself with an exponential backoff (see
+    executions.poll_delay) until the execution finishes, is finished by the
+    callback, or runs longer than N8N_EXECUTION_TIMEOUT. Without an n8n
+    execution id only the callback can finish it, so only the timeout is
+    checked.
+    """
+    execution = WorkflowExecution.objects.filter(pk=execution_pk).first()
+    if execution is None or execution.is_finished:
+        return {"execution": str(execution_pk), "skipped": True}
+
+    if (timezone.now() - execution.created_at).total_seconds() > execution_timeout():
+        apply_status(execution, ExecutionStatus.TIMEOUT, error=f"Not finished after {execution_timeout()} seconds")
+        return {"execution": str(execution.pk), "status": execution.status}
+
+    if execution.execution_id:
+        try:
+            response = get_n8n_service().get_execution_status(execution.execution_id)
+        except N8nError as e:
+            logger.warning("n8n execution %s: status poll failed: %s", execution.pk, e)
+        else:
+            status = status_from(response.data) if response.success else None
+            if status and status != execution.status:
+                finished = status in FINISHED_EXECUTION_STATUSES
+                apply_status(execution, status, result=response.data if finished else None)
+
+    if not execution.is_finished:
+        WorkflowExecution.objects.filter(pk=execution.pk).update(poll_count=F("poll_count") + 1)
+        execution.poll_count += 1
+        poll_workflow_execution.apply_async((str(execution.pk),), countdown=poll_delay(execution.poll_count))
+    return {"execution": str(execution.pk), "status": execution.status, "polls": execution.poll_count}
+
+
+@shared_task
+def process_outbox() -> dict:
+    """
+    Deliver the due webhook calls of the outbox (see outbox.py).
+
+    Scheduled by enqueue() when a delivery is due, and run periodically by
+    beat for retries.
+    """
+    stats = process_due(limit=getattr(settings, "N8N_OUTBOX_CLAIM_LIMIT", 500))
+    if stats["claimed"]:
+        logger.info("n8n outbox: %s", stats)
+    return stats
@@ -0,0 +1,403 @@
+"""
+Tests for the n8n integration.
+"""
+import asyncio
+import time
+from unittest import mock
+
+from aiohttp import web
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from mixtum_core.testing import stub_server
+
+from .batch import DEADLINE_EXCEEDED, run_batch_sync
+from .models import (
+    DeliveryStatus,
+    ExecutionStatus,
+    WebhookBatch,
+    WebhookBatchStatus,
+    WebhookDelivery,
+    WebhookStats,
+    WorkflowExecution,
+)
+from .outbox import enqueue, process_due
+from .services import AsyncN8nService, N8nService
+from .tasks import poll_workflow_execution, run_webhook_batch, start_workflow_execution
+
+
+class WebhookStub:
+    """n8n webhook stub: /webhook/<name>?delay=<seconds>, tracking concurrency."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def hook(self, request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(float(request.query.get('delay', 0)))
+        finally:
+            self.in_flight -= 1
+        return web.json_response({'hook': request.match_info['name']})
+
+    def routes(self):
+        return {('POST', '/webhook/{name}'): self.hook}
+
+
+async def read_stream(response):
+    return b''.join([chunk async for chunk in response.streaming_content])
+
+
+def webhook(name, delay=0):
+    return {'webhook_path': name, 'query_params': {'delay': str(delay)}}
+
+
+class RunBatchTests(TestCase):
+    """Tests for batch.run_batch."""
+
+    def setUp(self):
+        self.stub = WebhookStub()
+
+    def run_batch(self, base_url, webhooks, **kwargs):
+        service = AsyncN8nService(N8nService(base_url=base_url))
+        return run_batch_sync(webhooks, service=service, **kwargs)
+
+    def test_results_in_input_order(self):
+        with stub_server(self.stub.routes()) as base_url:
+            results = self.run_batch(
+                base_url,
+                [webhook('slow', 0.2), webhook('fast'), webhook('medium', 0.1)],
+                max_concurrency=3
+            )
+
+        self.assertEqual([r['webhook_path'] for r in results], ['slow', 'fast', 'medium'])
+        self.assertEqual([r['data']['hook'] for r in results], ['slow', 'fast', 'medium'])
+        self.assertTrue(all(r['success'] for r in results))
+
+    def test_concurrency_is_bounded(self):
+        with stub_server(self.stub.routes()) as base_url:
+            results = self.run_batch(base_url, [webhook(f'h{i}', 0.05) for i in range(12)], max_concurrency=4)
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual(self.stub.peak, 4)
+
+    def test_deadline_cancels_unfinished_calls(self):
+        with stub_server(self.stub.routes()) as base_url:
+            results = self.run_batch(
+                base_url,
+                [webhook('fast'), webhook('stuck', 1.5), webhook('queued')],
+                max_concurrency=2,
+                deadline=0.3
+            )
+
+        self.assertTrue(results[0]['success'])
+        # 'queued' got a slot after 'fast' finished
+        self.assertTrue(results[2]['success'])
+        self.assertFalse(results[1]['success'])
+        self.assertEqual(results[1]['error'], DEADLINE_EXCEEDED)
+
+    def test_failed_calls_are_reported(self):
+        with stub_server(self.stub.routes()) as base_url:
+            results = self.run_batch(base_url, [webhook('ok'), {'webhook_path': '../missing', 'method': 'GET'}])
+
+        self.assertTrue(results[0]['success'])
+        self.assertFalse(results[1]['success'])
+
+
+class BatchWebhookAPITests(TestCase):
+    """Tests for the batch-webhook endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='n8n', email='n8n@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.stub = WebhookStub()
+
+    def test_parallel_batch(self):
+        with stub_server(self.stub.routes()) as base_url:
+            with mock.patch('integrations.n8n.batch.AsyncN8nService', lambda: AsyncN8nService(N8nService(base_url=base_url))):
+                response = self.client.post('/api/n8n/batch-webhook/', {
+                    'webhooks': [webhook(f'h{i}', 0.05) for i in range(6)],
+                    'parallel': True,
+                    'max_concurrency': 3
+                }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['successful'], 6)
+        self.assertEqual(self.stub.peak, 3)
+
+    def test_sequential_by_default(self):
+        with stub_server(self.stub.routes()) as base_url:
+            with mock.patch('integrations.n8n.batch.AsyncN8nService', lambda: AsyncN8nService(N8nService(base_url=base_url))):
+                response = self.client.post('/api/n8n/batch-webhook/', {
+                    'webhooks': [webhook('a', 0.02), webhook('b', 0.02)]
+                }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stub.peak, 1)
+
+    def test_async_batch(self):
+        with mock.patch('integrations.n8n.views.run_webhook_batch.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/n8n/batch-webhook/async/', {
+                    'webhooks': [webhook('a'), webhook('b')],
+                    'parallel': True,
+                    'deadline': 30
+                }, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        batch_id = response.json()['batch_id']
+        delay.assert_called_once_with(batch_id)
+
+        batch = WebhookBatch.objects.get(pk=batch_id)
+        self.assertEqual(batch.total, 2)
+        self.assertEqual(batch.deadline_seconds, 30)
+        self.assertEqual(batch.created_by, self.user)
+
+        with stub_server(self.stub.routes()) as base_url:
+            with mock.patch('integrations.n8n.batch.AsyncN8nService', lambda: AsyncN8nService(N8nService(base_url=base_url))):
+                stats = run_webhook_batch(batch_id)
+                # A second delivery of the task does nothing
+                self.assertTrue(run_webhook_batch(batch_id)['skipped'])
+
+        self.assertEqual(stats['successful'], 2)
+        response = self.client.get(f'/api/n8n/batch-webhook/{batch_id}/')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['status'], WebhookBatchStatus.COMPLETED)
+        self.assertEqual([r['webhook_path'] for r in body['results']], ['a', 'b'])
+
+    def test_batch_of_another_user_is_hidden(self):
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        batch = WebhookBatch.objects.create(created_by=other, webhooks=[webhook('a')], total=1)
+
+        response = self.client.get(f'/api/n8n/batch-webhook/{batch.pk}/')
+
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(N8N_EXECUTION_WATCH_INTERVAL=0.05)
+class WorkflowExecutionTests(TestCase):
+    """Tests for tracked workflow executions."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='n8n', email='n8n@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.statuses = ['running', 'success']
+
+    def routes(self):
+        async def execute(request):
+            return web.json_response({'data': {'executionId': 42}})
+
+        async def execution(request):
+            n8n_status = self.statuses.pop(0)
+            return web.json_response({'id': request.match_info['id'], 'status': n8n_status, 'finished': n8n_status == 'success'})
+
+        return {
+            ('POST', '/api/v1/workflows/{id}/execute'): execute,
+            ('GET', '/api/v1/executions/{id}'): execution,
+        }
+
+    def start(self, **data):
+        with mock.patch('integrations.n8n.views.start_workflow_execution.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/n8n/executions/', {'workflow_id': 'wf1', **data}, format='json')
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(response.json()['id'])
+        return WorkflowExecution.objects.get(pk=response.json()['id'])
+
+    def test_trigger_returns_at_once(self):
+        execution = self.start(payload={'a': 1})
+
+        self.assertEqual(execution.status, ExecutionStatus.QUEUED)
+        self.assertEqual(execution.payload, {'a': 1})
+        self.assertEqual(execution.callback_url, '')
+
+    def test_worker_triggers_and_polls_with_backoff(self):
+        execution = self.start()
+
+        with stub_server(self.routes()) as base_url, \
+                mock.patch('integrations.n8n.tasks.get_n8n_service', return_value=N8nService(base_url=base_url, api_key='key')), \
+                mock.patch('integrations.n8n.tasks.poll_workflow_execution.apply_async') as schedule:
+            start_workflow_execution(str(execution.pk))
+            execution.refresh_from_db()
+            self.assertEqual(execution.execution_id, '42')
+            self.assertEqual(execution.status, ExecutionStatus.RUNNING)
+
+            poll_workflow_execution(str(execution.pk))
+            poll_workflow_execution(str(execution.pk))
+
+        self.assertEqual([c.kwargs['countdown'] for c in schedule.call_args_list], [2, 4])
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, ExecutionStatus.SUCCESS)
+        self.assertEqual(execution.result['id'], '42')
+        self.assertIsNotNone(execution.finished_at)
+
+    @override_settings(N8N_EXECUTION_TIMEOUT=0)
+    def test_poll_times_out(self):
+        execution = WorkflowExecution.objects.create(created_by=self.user, workflow_id='wf1', status=ExecutionStatus.RUNNING)
+
+        poll_workflow_execution(str(execution.pk))
+
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, ExecutionStatus.TIMEOUT)
+
+    def test_callback(self):
+        execution = self.start(callback=True)
+        self.assertTrue(execution.callback_url.endswith(f'/api/n8n/executions/{execution.pk}/callback/'))
+        callback = APIClient()
+
+        response = callback.post(execution.callback_url, {'status': 'success'}, format='json',
+                                 HTTP_X_N8N_CALLBACK_TOKEN='wrong')
+        self.assertEqual(response.status_code, 403)
+
+        response = callback.post(execution.callback_url, {'status': 'success', 'data': {'total': 3}}, format='json',
+                                 HTTP_X_N8N_CALLBACK_TOKEN=execution.callback_token)
+        self.assertEqual(response.status_code, 200)
+        execution.refresh_from_db()
+        self.assertEqual(execution.status, ExecutionStatus.SUCCESS)
+        self.assertEqual(execution.result, {'total': 3})
+
+        # A finished execution is not changed by late reports
+        response = callback.post(execution.callback_url, {'status': 'error'}, format='json',
+                                 HTTP_X_N8N_CALLBACK_TOKEN=execution.callback_token)
+        self.assertFalse(response.json()['updated'])
+        self.assertTrue(poll_workflow_execution(str(execution.pk))['skipped'])
+
+    def test_long_poll(self):
+        execution = WorkflowExecution.objects.create(created_by=self.user, workflow_id='wf1', status=ExecutionStatus.RUNNING)
+        url = f'/api/n8n/executions/{execution.pk}/'
+
+        response = self.client.get(url, {'wait': 10, 'since': 'queued'})
+        self.assertEqual(response.json()['status'], 'running')
+
+        started = time.monotonic()
+        response = self.client.get(url, {'wait': 0.3})
+        self.assertEqual(response.json()['status'], 'running')
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+
+        other = APIClient()
+        other.force_authenticate(get_user_model().objects.create_user(username='other', email='other@example.com'))
+        self.assertEqual(other.get(url).status_code, 404)
+
+    def test_event_stream(self):
+        execution = WorkflowExecution.objects.create(created_by=self.user, workflow_id='wf1', status=ExecutionStatus.SUCCESS)
+
+        response = self.client.get(f'/api/n8n/executions/{execution.pk}/events/')
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        body = async_to_sync(read_stream)(response).decode()
+        self.assertIn('"status": "success"', body)
+        self.assertTrue(body.endswith('data: {"type":"done"}\n\n'))
+
+
+@override_settings(N8N_OUTBOX_COALESCE_WINDOW=5, N8N_OUTBOX_RETRY_BASE=10, N8N_OUTBOX_MAX_ATTEMPTS=2)
+class OutboxTests(TestCase):
+    """Tests for the webhook outbox."""
+
+    def setUp(self):
+        cache.clear()
+        self.received = []
+        self.fail = False
+
+    def routes(self):
+        async def hook(request):
+            self.received.append((request.match_info['name'], await request.json()))
+            if self.fail:
+                return web.json_response({'message': 'boom'}, status=500)
+            return web.json_response({'ok': True})
+
+        return {('POST', '/webhook/{name}'): hook}
+
+    def make_due(self):
+        WebhookDelivery.objects.update(next_attempt_at=timezone.now())
+
+    def process(self, base_url):
+        return process_due(service=N8nService(base_url=base_url))
+
+    def test_events_for_a_webhook_are_coalesced(self):
+        with mock.patch('integrations.n8n.tasks.process_outbox.apply_async') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = enqueue('orders', {'n': 1}, event='order.created')
+                enqueue('orders', {'n': 2}, event='order.created')
+                enqueue('other', {'n': 3})
+                enqueue('orders', {'n': 4}, coalesce=False)
+
+        # One run per path and window; the uncoalesced delivery is due at once
+        self.assertEqual(schedule.call_count, 3)
+        self.assertEqual(WebhookDelivery.objects.filter(next_attempt_at=first.next_attempt_at).count(), 2)
+
+        with stub_server(self.routes()) as base_url:
+            self.assertEqual(self.process(base_url)['claimed'], 1)
+            self.make_due()
+            stats = self.process(base_url)
+
+        self.assertEqual(stats, {'claimed': 3, 'calls': 2, 'delivered': 3, 'failed_calls': 0})
+        self.assertEqual(self.received[0], ('orders', {'n': 4}))
+        name, body = self.received[1]
+        self.assertEqual(name, 'orders')
+        self.assertEqual(body['count'], 2)
+        self.assertEqual([e['payload'] for e in body['events']], [{'n': 1}, {'n': 2}])
+        self.assertEqual(body['events'][0]['event'], 'order.created')
+        self.assertEqual(WebhookDelivery.objects.filter(status=DeliveryStatus.DELIVERED).count(), 4)
+
+        orders = WebhookStats.objects.get(webhook_path='orders')
+        self.assertEqual((orders.calls, orders.failures, orders.events_delivered), (2, 0, 3))
+        self.assertGreater(orders.max_latency_ms, 0)
+
+    def test_failures_are_retried_with_backoff(self):
+        delivery = enqueue('orders', {'n': 1}, coalesce=False)
+        self.fail = True
+
+        with stub_server(self.routes()) as base_url:
+            self.process(base_url)
+            delivery.refresh_from_db()
+            self.assertEqual(delivery.status, DeliveryStatus.PENDING)
+            self.assertEqual(delivery.attempts, 1)
+            self.assertAlmostEqual((delivery.next_attempt_at - timezone.now()).total_seconds(), 10, delta=2)
+
+            # Not due yet
+            self.assertEqual(self.process(base_url)['claimed'], 0)
+            self.make_due()
+            self.process(base_url)
+
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, DeliveryStatus.FAILED)
+        self.assertEqual(delivery.last_error, 'HTTP 500')
+        stats = WebhookStats.objects.get(webhook_path='orders')
+        self.assertEqual((stats.calls, stats.failures, stats.last_status_code), (2, 2, 500))
+
+    @override_settings(N8N_EVENT_WEBHOOKS={'transaction.paid': 'payments'})
+    def test_domain_events(self):
+        from plugins.finance_manager_core.models import Transaction
+        from plugins.finance_manager_core.signals import transaction_paid
+        from plugins.ticket_manager.models import Ticket
+        from plugins.ticket_manager.signals import ticket_created
+
+        paid_on = timezone.now().date()
+        transaction_paid.send(sender=Transaction, transaction_id=12345, payment_date=paid_on)
+        # Not mapped to a webhook
+        ticket_created.send(sender=Ticket, ticket=mock.Mock())
+
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.webhook_path, delivery.event), ('payments', 'transaction.paid'))
+        self.assertEqual(delivery.payload, {'id': 12345, 'payment_date': paid_on.isoformat()})
+
+    def test_api(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='n8n', email='n8n@example.com'))
+
+        response = client.post('/api/n8n/outbox/', {'webhook_path': 'orders', 'payload': {'n': 1}}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], DeliveryStatus.PENDING)
+
+        self.assertEqual(len(client.get('/api/n8n/outbox/', {'status': 'pending'}).json()), 1)
+        self.assertEqual(client.get('/api/n8n/outbox/', {'status': 'nope'}).status_code, 400)
+        self.assertEqual(client.get('/api/n8n/outbox/stats/').json(), [])
@@ -1,11 +1,38 @@
 # integrations/n8n/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import N8nViewSet
+from .views import (
+    N8nViewSet,
+    N8nCallWebhookView,
+    N8nTriggerWorkflowView,
+    N8nExecutionStatusView,
+    N8nBatchWebhookView,
+    N8nBatchWebhookAsyncView,
+    WebhookBatchDetailView,
+    WorkflowExecutionCreateView,
+    WorkflowExecutionDetailView,
+    WorkflowExecutionEventsView,
+    WorkflowExecutionCallbackView,
+    OutboxView,
+    OutboxStatsView,
+)
 
 router = DefaultRouter()
 router.register(r"", N8nViewSet, basename="n8n")
 
 urlpatterns = [
+    # Async views (see views.py)
+    path("call-webhook/", N8nCallWebhookView.as_view(), name="n8n-call-webhook"),
+    path("trigger-workflow/", N8nTriggerWorkflowView.as_view(), name="n8n-trigger-workflow"),
+    path("execution-status/", N8nExecutionStatusView.as_view(), name="n8n-execution-status"),
+    path("batch-webhook/", N8nBatchWebhookView.as_view(), name="n8n-batch-webhook"),
+    path("batch-webhook/async/", N8nBatchWebhookAsyncView.as_view(), name="n8n-batch-webhook-async"),
+    path("batch-webhook/<uuid:batch_id>/", WebhookBatchDetailView.as_view(), name="n8n-webhook-batch-detail"),
+    path("executions/", WorkflowExecutionCreateView.as_view(), name="n8n-execution-create"),
+    path("executions/<uuid:execution_id>/", WorkflowExecutionDetailView.as_view(), name="n8n-execution-detail"),
+    path("executions/<uuid:execution_id>/events/", WorkflowExecutionEventsView.as_view(), name="n8n-execution-events"),
+    path("executions/<uuid:execution_id>/callback/", WorkflowExecutionCallbackView.as_view(), name="n8n-execution-callback"),
+    path("outbox/", OutboxView.as_view(), name="n8n-outbox"),
+    path("outbox/stats/", OutboxStatsView.as_view(), name="n8n-outbox-stats"),
     path("", include(router.urls)),
 ]
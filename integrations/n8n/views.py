@@ -2,20 +2,59 @@
 """
 API Views for n8n integration.
 Provides endpoints for calling n8n webhooks with custom payloads.
+
+The call endpoints (webhook, batch, workflow trigger, execution status)
+are async views: a call waiting on n8n, up to minutes with
+wait_for_completion, doesn't hold a worker when served by ASGI.
 """
+import asyncio
+import json
+import secrets
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
 from rest_framework.viewsets import ViewSet
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
-from .services import N8nService, N8nError, get_n8n_service
+from mixtum_core.async_views import AsyncAPIView, json_response
+
+from .batch import default_concurrency, run_batch, summarize
+from .executions import N8N_STATUSES, apply_status
+from .models import (
+    FINISHED_EXECUTION_STATUSES,
+    DeliveryStatus,
+    WebhookBatch,
+    WebhookDelivery,
+    WebhookStats,
+    WorkflowExecution,
+)
+from .outbox import enqueue
+from .services import AsyncN8nService, N8nService, N8nError, get_n8n_service
 from .serializers import (
     CallWebhookSerializer,
     TriggerWorkflowSerializer,
     ExecutionStatusSerializer,
     BatchWebhookSerializer,
+    AsyncBatchWebhookSerializer,
+    WebhookBatchSerializer,
+    StartExecutionSerializer,
+    ExecutionCallbackSerializer,
+    WorkflowExecutionSerializer,
+    QueueWebhookSerializer,
+    WebhookDeliverySerializer,
+    WebhookStatsSerializer,
 )
+from .tasks import run_webhook_batch, start_workflow_execution
 
 
 class N8nViewSet(ViewSet):
@@ -23,10 +62,11 @@ class N8nViewSet(ViewSet):
     ViewSet for n8n operations.
     
     Provides endpoints for:
-    - Calling webhooks with custom payloads
-    - Triggering workflows by ID
-    - Checking execution status
-    - Batch webhook calls
+    - Health check
+    
+    Webhook calls (single and batch), workflow triggers and execution
+    status are served by the async views below; background batches by
+    N8nBatchWebhookAsyncView.
     """
     permission_classes = [IsAuthenticated]
     
@@ -45,217 +85,455 @@ class N8nViewSet(ViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    @action(detail=False, methods=["post"], url_path="call-webhook")
-    def call_webhook(self, request):
+    @action(detail=False, methods=["get"], url_path="health")
+    def health_check(self, request):
         """
-        Call an n8n webhook with a custom payload.
+        Check if n8n service is configured and reachable.
         
-        POST /api/n8n/call-webhook/
-        {
-            "webhook_path": "my-webhook",
-            "payload": {"key": "value"},
-            "method": "POST",  // optional, default POST
-            "query_params": {},  // optional
-            "headers": {},  // optional
-            "timeout": 30,  // optional
-            "is_test": false  // optional, use test endpoint
-        }
+        GET /api/n8n/health/
         """
-        serializer = CallWebhookSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
         try:
             service = self._get_service()
-            
-            if data.get("is_test"):
-                result = service.call_webhook_test(
-                    webhook_path=data["webhook_path"],
-                    payload=data.get("payload"),
-                    method=data.get("method", "POST"),
-                    query_params=data.get("query_params"),
-                    headers=data.get("headers"),
-                    timeout=data.get("timeout")
-                )
-            else:
-                result = service.call_webhook(
-                    webhook_path=data["webhook_path"],
-                    payload=data.get("payload"),
-                    method=data.get("method", "POST"),
-                    query_params=data.get("query_params"),
-                    headers=data.get("headers"),
-                    timeout=data.get("timeout")
-                )
-            
-            response_status = (
-                status.HTTP_200_OK if result.success 
-                else status.HTTP_502_BAD_GATEWAY
-            )
-            
-            return Response(result.to_dict(), status=response_status)
-            
+            return Response({
+                "configured": True,
+                "base_url": service.base_url,
+                "has_api_key": bool(service.api_key)
+            })
         except N8nError as e:
-            return self._handle_n8n_error(e)
+            return Response({
+                "configured": False,
+                "error": str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+# -----------------------------------------------------------------------------
+# Async views
+# -----------------------------------------------------------------------------
+
+def _n8n_error_response(e: N8nError):
+    """Same body as N8nViewSet._handle_n8n_error."""
+    return json_response(
+        {
+            "error": str(e),
+            "status_code": e.status_code,
+            "response_data": e.response_data
+        },
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _webhook_result_response(result):
+    response_status = (
+        status.HTTP_200_OK if result.success
+        else status.HTTP_502_BAD_GATEWAY
+    )
+    return json_response(result.to_dict(), status=response_status)
+
+
+class N8nCallWebhookView(AsyncAPIView):
+    """
+    Call an n8n webhook with a custom payload.
     
-    @action(detail=False, methods=["post"], url_path="trigger-workflow")
-    def trigger_workflow(self, request):
-        """
-        Trigger an n8n workflow by ID.
-        
-        Note: Requires N8N_API_KEY to be configured.
+    POST /api/n8n/call-webhook/
+    {
+        "webhook_path": "my-webhook",
+        "payload": {"key": "value"},
+        "method": "POST",  // optional, default POST
+        "query_params": {},  // optional
+        "headers": {},  // optional
+        "timeout": 30,  // optional
+        "is_test": false  // optional, use test endpoint
+    }
+    """
+    permission_classes = [IsAuthenticated]
+    
+    async def post(self, request):
+        data = self.validate(CallWebhookSerializer, request.data)
         
-        POST /api/n8n/trigger-workflow/
-        {
-            "workflow_id": "123",
-            "payload": {"key": "value"},  // optional
-            "wait_for_completion": false  // optional
-        }
-        """
-        serializer = TriggerWorkflowSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
+        try:
+            service = AsyncN8nService()
+            call = service.call_webhook_test if data.get("is_test") else service.call_webhook
+            result = await call(
+                webhook_path=data["webhook_path"],
+                payload=data.get("payload"),
+                method=data.get("method", "POST"),
+                query_params=data.get("query_params"),
+                headers=data.get("headers"),
+                timeout=data.get("timeout")
+            )
+            return _webhook_result_response(result)
+        except N8nError as e:
+            return _n8n_error_response(e)
+
+
+class N8nTriggerWorkflowView(AsyncAPIView):
+    """
+    Trigger an n8n workflow by ID.
+    
+    Note: Requires N8N_API_KEY to be configured. To follow a long workflow
+    without holding the request, use the executions endpoint instead.
+    
+    POST /api/n8n/trigger-workflow/
+    {
+        "workflow_id": "123",
+        "payload": {"key": "value"},  // optional
+        "wait_for_completion": false  // optional
+    }
+    """
+    permission_classes = [IsAuthenticated]
+    
+    async def post(self, request):
+        data = self.validate(TriggerWorkflowSerializer, request.data)
         
         try:
-            service = self._get_service()
-            result = service.trigger_workflow(
+            result = await AsyncN8nService().trigger_workflow(
                 workflow_id=data["workflow_id"],
                 payload=data.get("payload"),
                 wait_for_completion=data.get("wait_for_completion", False)
             )
-            
-            response_status = (
-                status.HTTP_200_OK if result.success 
-                else status.HTTP_502_BAD_GATEWAY
-            )
-            
-            return Response(result.to_dict(), status=response_status)
-            
+            return _webhook_result_response(result)
         except N8nError as e:
-            return self._handle_n8n_error(e)
+            return _n8n_error_response(e)
+
+
+class N8nExecutionStatusView(AsyncAPIView):
+    """
+    Get the status of a workflow execution.
     
-    @action(detail=False, methods=["post"], url_path="execution-status")
-    def execution_status(self, request):
-        """
-        Get the status of a workflow execution.
-        
-        Note: Requires N8N_API_KEY to be configured.
+    Note: Requires N8N_API_KEY to be configured.
+    
+    POST /api/n8n/execution-status/
+    {
+        "execution_id": "12345"
+    }
+    """
+    permission_classes = [IsAuthenticated]
+    
+    async def post(self, request):
+        data = self.validate(ExecutionStatusSerializer, request.data)
         
-        POST /api/n8n/execution-status/
-        {
-            "execution_id": "12345"
-        }
-        """
-        serializer = ExecutionStatusSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
+        try:
+            result = await AsyncN8nService().get_execution_status(data["execution_id"])
+            return _webhook_result_response(result)
+        except N8nError as e:
+            return _n8n_error_response(e)
+
+
+class N8nBatchWebhookView(AsyncAPIView):
+    """
+    Call multiple webhooks, in sequence or in parallel.
+    
+    Results are returned in input order. With a deadline, calls not finished
+    in time are cancelled and reported with success false.
+    
+    POST /api/n8n/batch-webhook/
+    {
+        "webhooks": [
+            {"webhook_path": "hook1", "payload": {}},
+            {"webhook_path": "hook2", "payload": {}}
+        ],
+        "parallel": false,  // optional
+        "max_concurrency": 5,  // optional, when parallel
+        "deadline": 60  // optional, seconds
+    }
+    """
+    permission_classes = [IsAuthenticated]
+    
+    async def post(self, request):
+        data = self.validate(BatchWebhookSerializer, request.data)
+        max_concurrency = 1
+        if data.get("parallel"):
+            max_concurrency = data.get("max_concurrency") or default_concurrency()
         
         try:
-            service = self._get_service()
-            result = service.get_execution_status(data["execution_id"])
-            
-            response_status = (
-                status.HTTP_200_OK if result.success 
-                else status.HTTP_502_BAD_GATEWAY
+            results = await run_batch(
+                data["webhooks"],
+                max_concurrency=max_concurrency,
+                deadline=data.get("deadline")
             )
-            
-            return Response(result.to_dict(), status=response_status)
-            
         except N8nError as e:
-            return self._handle_n8n_error(e)
+            return _n8n_error_response(e)
+        
+        body = summarize(results)
+        response_status = (
+            status.HTTP_200_OK if body["all_success"]
+            else status.HTTP_207_MULTI_STATUS
+        )
+        return json_response(body, status=response_status)
+
+
+class N8nBatchWebhookAsyncView(APIView):
+    """
+    Run a batch of webhooks in the background.
     
-    @action(detail=False, methods=["post"], url_path="batch-webhook")
-    def batch_webhook(self, request):
-        """
-        Call multiple webhooks in sequence.
+    Returns the batch id at once; a Celery worker calls the webhooks and
+    stores the results, readable from the batch detail endpoint.
+    
+    POST /api/n8n/batch-webhook/async/
+    Same body as batch-webhook/, with up to 1000 webhooks.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = AsyncBatchWebhookSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
         
-        POST /api/n8n/batch-webhook/
-        {
-            "webhooks": [
-                {"webhook_path": "hook1", "payload": {}},
-                {"webhook_path": "hook2", "payload": {}}
-            ],
-            "parallel": false  // not yet implemented
-        }
-        """
-        serializer = BatchWebhookSerializer(data=request.data)
+        max_concurrency = 1
+        if data.get("parallel"):
+            max_concurrency = data.get("max_concurrency") or default_concurrency()
+        
+        batch = WebhookBatch.objects.create(
+            created_by=request.user,
+            webhooks=data["webhooks"],
+            max_concurrency=max_concurrency,
+            deadline_seconds=data.get("deadline"),
+            total=len(data["webhooks"])
+        )
+        transaction.on_commit(lambda: run_webhook_batch.delay(str(batch.pk)))
+        
+        return Response({
+            "batch_id": str(batch.pk),
+            "status": batch.status,
+            "total": batch.total
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class WebhookBatchDetailView(APIView):
+    """
+    Status and results of a background batch.
+    
+    GET /api/n8n/batch-webhook/<batch_id>/
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, batch_id):
+        batch = get_object_or_404(WebhookBatch, pk=batch_id, created_by=request.user)
+        return Response(WebhookBatchSerializer(batch).data)
+
+
+# -----------------------------------------------------------------------------
+# Tracked executions (see executions.py)
+# -----------------------------------------------------------------------------
+
+class WorkflowExecutionCreateView(APIView):
+    """
+    Start a tracked workflow execution.
+    
+    Returns at once with the execution record; a Celery worker triggers the
+    workflow and keeps the record up to date.
+    
+    POST /api/n8n/executions/
+    {
+        "workflow_id": "123",
+        "payload": {"key": "value"},  // optional
+        "callback": false  // optional, let the workflow report its result
+    }
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = StartExecutionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
         
-        results = []
-        all_success = True
+        execution = WorkflowExecution(
+            created_by=request.user,
+            workflow_id=data["workflow_id"],
+            payload=data.get("payload")
+        )
+        if data.get("callback"):
+            execution.callback_token = secrets.token_urlsafe(32)
+            execution.callback_url = request.build_absolute_uri(
+                reverse("n8n:n8n-execution-callback", args=[execution.pk])
+            )
+        execution.save()
+        transaction.on_commit(lambda: start_workflow_execution.delay(str(execution.pk)))
         
+        return Response(WorkflowExecutionSerializer(execution).data, status=status.HTTP_202_ACCEPTED)
+
+
+async def _get_execution(request, execution_id) -> WorkflowExecution:
+    execution = await WorkflowExecution.objects.filter(pk=execution_id, created_by=request.user).afirst()
+    if execution is None:
+        raise Http404("Execution not found")
+    return execution
+
+
+def _watch_interval() -> float:
+    return getattr(settings, "N8N_EXECUTION_WATCH_INTERVAL", 1.0)
+
+
+class WorkflowExecutionDetailView(AsyncAPIView):
+    """
+    Get a tracked execution, optionally waiting for it to change (long-poll).
+    
+    GET /api/n8n/executions/<id>/?wait=30&since=running
+    
+    With wait (seconds, up to N8N_EXECUTION_LONG_POLL_MAX), the response is
+    held until the status differs from `since` (default: the current
+    status), the execution finishes or the wait expires.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    async def get(self, request, execution_id):
+        execution = await _get_execution(request, execution_id)
         try:
-            service = self._get_service()
-            
-            for webhook_config in data["webhooks"]:
-                try:
-                    if webhook_config.get("is_test"):
-                        result = service.call_webhook_test(
-                            webhook_path=webhook_config["webhook_path"],
-                            payload=webhook_config.get("payload"),
-                            method=webhook_config.get("method", "POST"),
-                            query_params=webhook_config.get("query_params"),
-                            headers=webhook_config.get("headers"),
-                            timeout=webhook_config.get("timeout")
-                        )
-                    else:
-                        result = service.call_webhook(
-                            webhook_path=webhook_config["webhook_path"],
-                            payload=webhook_config.get("payload"),
-                            method=webhook_config.get("method", "POST"),
-                            query_params=webhook_config.get("query_params"),
-                            headers=webhook_config.get("headers"),
-                            timeout=webhook_config.get("timeout")
-                        )
-                    
-                    results.append({
-                        "webhook_path": webhook_config["webhook_path"],
-                        **result.to_dict()
-                    })
-                    
-                    if not result.success:
-                        all_success = False
-                        
-                except N8nError as e:
-                    all_success = False
-                    results.append({
-                        "webhook_path": webhook_config["webhook_path"],
-                        "success": False,
-                        "error": str(e),
-                        "status_code": e.status_code
-                    })
-            
-            response_status = (
-                status.HTTP_200_OK if all_success 
-                else status.HTTP_207_MULTI_STATUS
-            )
+            wait = float(request.query_params.get("wait") or 0)
+        except ValueError:
+            return json_response({"error": "wait must be a number of seconds"}, status=status.HTTP_400_BAD_REQUEST)
+        wait = max(0.0, min(wait, getattr(settings, "N8N_EXECUTION_LONG_POLL_MAX", 60)))
+        since = request.query_params.get("since") or execution.status
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while not execution.is_finished and execution.status == since and loop.time() < deadline:
+            await asyncio.sleep(min(_watch_interval(), max(0.0, deadline - loop.time())))
+            execution = await _get_execution(request, execution_id)
+        
+        return json_response(WorkflowExecutionSerializer(execution).data)
+
+
+class WorkflowExecutionEventsView(AsyncAPIView):
+    """
+    Follow a tracked execution as Server-Sent Events.
+    
+    GET /api/n8n/executions/<id>/events/
+      response: text/event-stream
+        data: {"type":"status","execution":{...}}   // on every change
+        ...
+        data: {"type":"done"}
+    
+    The stream ends when the execution finishes, or after
+    N8N_EXECUTION_STREAM_TIMEOUT seconds.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    async def get(self, request, execution_id):
+        execution = await _get_execution(request, execution_id)
+        
+        async def event_stream():
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + getattr(settings, "N8N_EXECUTION_STREAM_TIMEOUT", 600)
+            keepalive = getattr(settings, "N8N_EXECUTION_STREAM_KEEPALIVE", 15)
+            current, last_change, last_sent = execution, None, loop.time()
             
-            return Response({
-                "all_success": all_success,
-                "results": results,
-                "total": len(results),
-                "successful": sum(1 for r in results if r.get("success"))
-            }, status=response_status)
+            while current is not None:
+                if current.updated_at != last_change:
+                    last_change = current.updated_at
+                    data = {"type": "status", "execution": WorkflowExecutionSerializer(current).data}
+                    yield f"data: {json.dumps(data, cls=JSONEncoder, ensure_ascii=False)}\n\n".encode("utf-8")
+                    last_sent = loop.time()
+                elif loop.time() - last_sent >= keepalive:
+                    yield b": keepalive\n\n"
+                    last_sent = loop.time()
+                
+                if current.is_finished or loop.time() >= deadline:
+                    break
+                await asyncio.sleep(_watch_interval())
+                current = await WorkflowExecution.objects.filter(pk=execution.pk).afirst()
             
-        except N8nError as e:
-            return self._handle_n8n_error(e)
+            yield b"data: {\"type\":\"done\"}\n\n"
+        
+        resp = StreamingHttpResponse(
+            streaming_content=event_stream(),
+            content_type="text/event-stream; charset=utf-8",
+        )
+        resp["Cache-Control"] = "no-cache"
+        resp["X-Accel-Buffering"] = "no"
+        return resp
+
+
+class WorkflowExecutionCallbackView(APIView):
+    """
+    Result reported by the workflow itself.
     
-    @action(detail=False, methods=["get"], url_path="health")
-    def health_check(self, request):
-        """
-        Check if n8n service is configured and reachable.
+    Called by n8n (e.g. an HTTP Request node at the end of the workflow)
+    with the URL and token it received in the payload's "_callback" key.
+    
+    POST /api/n8n/executions/<id>/callback/
+    X-N8N-Callback-Token: <token>
+    {
+        "status": "success",  // n8n status: success, error, canceled, running, ...
+        "data": {...},  // optional
+        "error": ""  // optional
+    }
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    
+    def post(self, request, execution_id):
+        execution = get_object_or_404(WorkflowExecution, pk=execution_id)
+        token = request.headers.get("X-N8N-Callback-Token") or request.query_params.get("token", "")
+        if not execution.callback_token or not constant_time_compare(token, execution.callback_token):
+            raise PermissionDenied("Invalid callback token")
         
-        GET /api/n8n/health/
-        """
-        try:
-            service = self._get_service()
-            return Response({
-                "configured": True,
-                "base_url": service.base_url,
-                "has_api_key": bool(service.api_key)
-            })
-        except N8nError as e:
-            return Response({
-                "configured": False,
-                "error": str(e)
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        serializer = ExecutionCallbackSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        new_status = N8N_STATUSES[data["status"]]
+        finished = new_status in FINISHED_EXECUTION_STATUSES
+        updated = apply_status(
+            execution,
+            new_status,
+            result=data.get("data") if finished else None,
+            error=data.get("error", "")
+        )
+        return Response({"status": execution.status, "updated": updated})
+
+
+# -----------------------------------------------------------------------------
+# Outbox (see outbox.py)
+# -----------------------------------------------------------------------------
+
+class OutboxView(APIView):
+    """
+    Queue a webhook call, delivered in the background with retries.
+    
+    POST /api/n8n/outbox/
+    {
+        "webhook_path": "my-webhook",
+        "payload": {"key": "value"},
+        "event": "invoice.sent",  // optional
+        "coalesce": true  // optional, batch with other events for this webhook
+    }
+    
+    GET /api/n8n/outbox/?status=failed
+    Lists the latest deliveries (100), optionally by status.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        deliveries = WebhookDelivery.objects.all()
+        delivery_status = request.query_params.get("status")
+        if delivery_status:
+            if delivery_status not in DeliveryStatus.values:
+                return Response({"error": f"Unknown status: {delivery_status}"}, status=status.HTTP_400_BAD_REQUEST)
+            deliveries = deliveries.filter(status=delivery_status)
+        return Response(WebhookDeliverySerializer(deliveries[:100], many=True).data)
+    
+    def post(self, request):
+        serializer = QueueWebhookSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        delivery = enqueue(
+            data["webhook_path"],
+            data.get("payload"),
+            event=data.get("event", ""),
+            coalesce=data.get("coalesce", True)
+        )
+        return Response(WebhookDeliverySerializer(delivery).data, status=status.HTTP_202_ACCEPTED)
+
+
+class OutboxStatsView(APIView):
+    """
+    Delivery stats per webhook path: calls, failures, latency.
+    
+    GET /api/n8n/outbox/stats/
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        return Response(WebhookStatsSerializer(WebhookStats.objects.all(), many=True).data)
@@ -0,0 +1,211 @@
+# integrations/slack/metadata.py
+"""
+Cache of Slack user and channel metadata.
+
+users.info and conversations.info change rarely but were called for every
+lookup, e.g. once per message to show author names. Entries are kept in
+the Django cache (shared through Redis when CACHE_URL is set):
+
+- fresh for SLACK_METADATA_TTL seconds
+- then served stale while a Celery task refreshes them in the background,
+  up to SLACK_METADATA_MAX_AGE seconds, after which they expire
+- warmed in bulk from users.list (warm_users), by beat and whenever a
+  message list finds authors missing from the cache
+
+resolve_authors() only reads the cache: rendering a message list makes no
+Slack call, authors not cached yet are left as None until the warm-up ends.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .services import AsyncSlackService, SlackService, get_slack_service
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "slack"
+USER = "user"
+CHANNEL = "channel"
+
+# Seconds between two warm-ups triggered by message lists
+WARM_UP_INTERVAL = 300
+
+# Fields of a user copied into the author of a message
+AUTHOR_FIELDS = ("id", "name", "real_name", "is_bot")
+
+
+def ttl() -> int:
+    return getattr(settings, "SLACK_METADATA_TTL", 3600)
+
+
+def max_age() -> int:
+    return getattr(settings, "SLACK_METADATA_MAX_AGE", 86400)
+
+
+def _key(kind: str, object_id: str) -> str:
+    return f"{KEY_PREFIX}:{kind}:{object_id}"
+
+
+def _entry(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"data": data, "fetched_at": time.time()}
+
+
+def _is_stale(entry: Dict[str, Any]) -> bool:
+    return time.time() - entry["fetched_at"] > ttl()
+
+
+def store(kind: str, items: Iterable[Dict[str, Any]]) -> int:
+    """Cache users or channels as returned by the API. Returns how many."""
+    entries = {_key(kind, item["id"]): _entry(item) for item in items if item.get("id")}
+    cache.set_many(entries, timeout=max_age())
+    return len(entries)
+
+
+def _fetch(kind: str, object_id: str, service: Optional[SlackService]) -> Dict[str, Any]:
+    service = service or get_slack_service()
+    if kind == USER:
+        return service.get_user_info(object_id)
+    return service.get_channel_info(object_id)
+
+
+async def _afetch(kind: str, object_id: str, service: Optional[AsyncSlackService]) -> Dict[str, Any]:
+    service = service or AsyncSlackService()
+    if kind == USER:
+        return await service.get_user_info(object_id)
+    return await service.get_channel_info(object_id)
+
+
+def schedule_refresh(kind: str, object_id: str) -> None:
+    """Refresh an entry in the background, once per entry at a time."""
+    from .tasks import refresh_slack_metadata
+
+    if not cache.add(_key(f"refreshing:{kind}", object_id), 1, timeout=60):
+        return
+    try:
+        refresh_slack_metadata.delay(kind, object_id)
+    except Exception:
+        # Stale data is still served; the next lookup tries again
+        logger.warning("Could not schedule the refresh of Slack %s %s", kind, object_id, exc_info=True)
+        cache.delete(_key(f"refreshing:{kind}", object_id))
+
+
+def schedule_warm_up() -> None:
+    """Warm the user cache in the background, at most every WARM_UP_INTERVAL seconds."""
+    from .tasks import warm_slack_users
+
+    if not cache.add(_key("warming", USER), 1, timeout=WARM_UP_INTERVAL):
+        return
+    try:
+        warm_slack_users.delay()
+    except Exception:
+        logger.warning("Could not schedule the Slack user cache warm-up", exc_info=True)
+        cache.delete(_key("warming", USER))
+
+
+def refresh(kind: str, object_id: str, service: Optional[SlackService] = None) -> Dict[str, Any]:
+    """Fetch an entry from Slack and cache it."""
+    data = _fetch(kind, object_id, service)
+    cache.set(_key(kind, object_id), _entry(data), timeout=max_age())
+    cache.delete(_key(f"refreshing:{kind}", object_id))
+    return data
+
+
+def get(kind: str, object_id: str, service: Optional[SlackService] = None) -> Dict[str, Any]:
+    """A user or channel, from the cache when possible (stale entries are refreshed in the background)."""
+    entry = cache.get(_key(kind, object_id))
+    if entry is None:
+        return refresh(kind, object_id, service)
+    if _is_stale(entry):
+        schedule_refresh(kind, object_id)
+    return entry["data"]
+
+
+async def aget(kind: str, object_id: str, service: Optional[AsyncSlackService] = None) -> Dict[str, Any]:
+    """get() for async views."""
+    key = _key(kind, object_id)
+    entry = await cache.aget(key)
+    if entry is None:
+        data = await _afetch(kind, object_id, service)
+        await cache.aset(key, _entry(data), timeout=max_age())
+        return data
+    if _is_stale(entry):
+        await sync_to_async(schedule_refresh)(kind, object_id)
+    return entry["data"]
+
+
+def get_user(user_id: str, service: Optional[SlackService] = None) -> Dict[str, Any]:
+    return get(USER, user_id, service)
+
+
+def get_channel(channel_id: str, service: Optional[SlackService] = None) -> Dict[str, Any]:
+    return get(CHANNEL, channel_id, service)
+
+
+def warm_users(service: Optional[SlackService] = None) -> int:
+    """Cache every workspace user, from users.list. Returns how many."""
+    service = service or get_slack_service()
+    count = 0
+    batch = []
+    for user in service.iter_users():
+        batch.append(user)
+        if len(batch) >= 200:
+            count += store(USER, batch)
+            batch = []
+    count += store(USER, batch)
+    return count
+
+
+def author(user: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The fields of a user shown as a message author."""
+    if not user:
+        return None
+    profile = user.get("profile") or {}
+    return {
+        **{field: user.get(field) for field in AUTHOR_FIELDS},
+        "display_name": profile.get("display_name") or user.get("real_name") or user.get("name"),
+        "image": profile.get("image_48"),
+    }
+
+
+def _attach_authors(messages: List[Dict[str, Any]], entries: Dict[str, Any]) -> bool:
+    """Set the authors from cache entries. Returns True if some were missing or stale."""
+    warm_up = False
+    for message in messages:
+        user_id = message.get("user")
+        if not user_id:
+            continue
+        entry = entries.get(_key(USER, user_id))
+        if entry is None or _is_stale(entry):
+            warm_up = True
+        message["author"] = author(entry["data"]) if entry else None
+    return warm_up
+
+
+def _user_keys(messages: List[Dict[str, Any]]) -> List[str]:
+    return list({_key(USER, message["user"]) for message in messages if message.get("user")})
+
+
+def resolve_authors(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Add an "author" to every message with a user, from the cache only.
+
+    One cache read for the whole list and no Slack call; authors not
+    cached are None. Missing or stale authors trigger a background
+    warm-up of the whole user cache.
+    """
+    if _attach_authors(messages, cache.get_many(_user_keys(messages))):
+        schedule_warm_up()
+    return messages
+
+
+async def aresolve_authors(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """resolve_authors() for async views."""
+    if _attach_authors(messages, await cache.aget_many(_user_keys(messages))):
+        await sync_to_async(schedule_warm_up)()
+    return messages
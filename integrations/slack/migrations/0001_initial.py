@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:49
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundMessage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('channel_id', models.CharField(max_length=64)),
+                ('text', models.TextField()),
+                ('blocks', models.JSONField(blank=True, null=True)),
+                ('thread_ts', models.CharField(blank=True, default='', max_length=32)),
+                ('reply_broadcast', models.BooleanField(default=False)),
+                ('merge', models.BooleanField(default=False, help_text='May be merged with other messages to the same channel')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('ts', models.CharField(blank=True, default='', help_text='Timestamp of the posted message', max_length=32)),
+                ('merged_count', models.PositiveSmallIntegerField(default=1, help_text='Messages in the post that carried this one')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='slack_outbound_messages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='slack_outbo_status_d6fbfc_idx')],
+            },
+        ),
+    ]
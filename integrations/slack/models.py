@@ -0,0 +1,60 @@
+# integrations/slack/models.py
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundMessageStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    SENDING = "sending", "Sending"
+    SENT = "sent", "Sent"
+    FAILED = "failed", "Failed"
+
+
+class OutboundMessage(models.Model):
+    """
+    A Slack message waiting in the outbox (see outbox.py).
+
+    Written by the request, which answers at once with its id, and posted
+    by the send_outbox Celery task, which stores the resulting ts. Messages
+    to the same channel with `merge` set, queued within
+    SLACK_OUTBOX_MERGE_WINDOW seconds, are posted together as one Block Kit
+    message and share its ts.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="slack_outbound_messages"
+    )
+    channel_id = models.CharField(max_length=64)
+    text = models.TextField()
+    blocks = models.JSONField(null=True, blank=True)
+    thread_ts = models.CharField(max_length=32, blank=True, default="")
+    reply_broadcast = models.BooleanField(default=False)
+    merge = models.BooleanField(default=False, help_text="May be merged with other messages to the same channel")
+
+    status = models.CharField(max_length=16, choices=OutboundMessageStatus.choices, default=OutboundMessageStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+
+    ts = models.CharField(max_length=32, blank=True, default="", help_text="Timestamp of the posted message")
+    merged_count = models.PositiveSmallIntegerField(default=1, help_text="Messages in the post that carried this one")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"Message to {self.channel_id} [{self.get_status_display()}] {self.pk}"
@@ -0,0 +1,280 @@
+# integrations/slack/outbox.py
+"""
+Outbox for Slack messages.
+
+enqueue() stores an OutboundMessage in the caller's transaction and
+returns at once: the message is posted by the send_outbox Celery task,
+after the commit, through the pooled and rate-limited SlackService, so a
+request never waits on Slack and a failed post is retried instead of lost.
+
+- Merging: messages with `merge` set for the same channel (and thread)
+  queued within SLACK_OUTBOX_MERGE_WINDOW seconds are posted as one Block
+  Kit message, each one its own section, separated by dividers
+- Retries: a failed post is retried after SLACK_OUTBOX_RETRY_BASE
+  seconds, doubling up to SLACK_OUTBOX_RETRY_MAX, and given up after
+  SLACK_OUTBOX_MAX_ATTEMPTS or at once for errors a retry can't fix
+  (unknown channel, revoked token, ...). Rate-limited posts are put back
+  for Retry-After without using an attempt
+"""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundMessage, OutboundMessageStatus
+from .services import SlackError, SlackRateLimited, SlackService, get_slack_service
+
+logger = logging.getLogger(__name__)
+
+# A worker that died mid-post leaves messages in SENDING: requeue them
+SENDING_TIMEOUT = timedelta(minutes=5)
+
+# Block Kit limits: blocks per message, characters per section
+MAX_BLOCKS = 50
+MAX_SECTION_TEXT = 3000
+
+# Errors a retry won't fix
+PERMANENT_ERRORS = {
+    "channel_not_found",
+    "not_in_channel",
+    "is_archived",
+    "invalid_auth",
+    "account_inactive",
+    "token_revoked",
+    "msg_too_long",
+    "no_text",
+    "invalid_blocks",
+    "restricted_action",
+}
+
+
+def merge_window() -> float:
+    return getattr(settings, "SLACK_OUTBOX_MERGE_WINDOW", 5)
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before retrying a message whose post failed `attempts` times."""
+    base = getattr(settings, "SLACK_OUTBOX_RETRY_BASE", 10)
+    maximum = getattr(settings, "SLACK_OUTBOX_RETRY_MAX", 3600)
+    return min(base * 2 ** min(max(attempts - 1, 0), 16), maximum)
+
+
+def enqueue(
+    channel_id: str,
+    text: str,
+    blocks: Optional[List[Dict]] = None,
+    thread_ts: Optional[str] = None,
+    reply_broadcast: bool = False,
+    merge: bool = False,
+    created_by=None
+) -> OutboundMessage:
+    """
+    Queue a message, posted after the current transaction commits.
+
+    Args:
+        channel_id: The Slack channel ID
+        text: Message text (also used as fallback for blocks)
+        blocks: Slack Block Kit blocks
+        thread_ts: If set, posted as a reply to this thread
+        reply_broadcast: Also post to channel when replying to thread
+        merge: Allow merging with other messages to the same channel
+        created_by: User queueing the message
+
+    Returns:
+        The OutboundMessage
+    """
+    now = timezone.now()
+    window = merge_window()
+    merge = merge and window > 0
+    thread_ts = thread_ts or ""
+
+    due = now
+    if merge:
+        # Join the window already open for this channel, if any
+        due = (
+            OutboundMessage.objects.filter(
+                channel_id=channel_id,
+                thread_ts=thread_ts,
+                status=OutboundMessageStatus.PENDING,
+                merge=True,
+                attempts=0,
+                next_attempt_at__gt=now
+            )
+            .order_by("next_attempt_at")
+            .values_list("next_attempt_at", flat=True)
+            .first()
+        ) or now + timedelta(seconds=window)
+
+    message = OutboundMessage.objects.create(
+        created_by=created_by,
+        channel_id=channel_id,
+        text=text,
+        blocks=blocks or None,
+        thread_ts=thread_ts,
+        reply_broadcast=reply_broadcast,
+        merge=merge,
+        next_attempt_at=due
+    )
+    schedule_sending(channel_id, thread_ts, (due - now).total_seconds())
+    return message
+
+
+def schedule_sending(channel_id: str, thread_ts: str, delay: float) -> None:
+    """
+    Run send_outbox once the message is due, after the commit.
+
+    At most one run is scheduled per merge window, i.e. per channel and
+    thread; the beat sweep (CELERY_BEAT_SCHEDULE) catches anything missed.
+    """
+    from .tasks import send_outbox
+
+    key = f"slack:outbox:scheduled:{channel_id}:{thread_ts}"
+    if delay > 0 and not cache.add(key, 1, timeout=max(1, int(delay))):
+        return
+    transaction.on_commit(lambda: send_outbox.apply_async(countdown=max(0.0, delay)))
+
+
+def claim_due(limit: int) -> List[OutboundMessage]:
+    """Mark up to `limit` due messages as SENDING and return them, oldest first."""
+    now = timezone.now()
+    OutboundMessage.objects.filter(
+        status=OutboundMessageStatus.SENDING,
+        updated_at__lt=now - SENDING_TIMEOUT
+    ).update(status=OutboundMessageStatus.PENDING)
+
+    with transaction.atomic():
+        messages = list(
+            OutboundMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundMessageStatus.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "created_at")[:limit]
+        )
+        OutboundMessage.objects.filter(pk__in=[m.pk for m in messages]).update(
+            status=OutboundMessageStatus.SENDING,
+            updated_at=now
+        )
+    return messages
+
+
+def message_blocks(message: OutboundMessage) -> List[Dict[str, Any]]:
+    """The blocks of a message in a merged post: its own, or its text as a section."""
+    if message.blocks:
+        return message.blocks
+    return [{"type": "section", "text": {"type": "mrkdwn", "text": message.text[:MAX_SECTION_TEXT]}}]
+
+
+def group_messages(messages: List[OutboundMessage]) -> List[List[OutboundMessage]]:
+    """
+    One group per post: mergeable messages by channel and thread, within
+    the Block Kit limit, the others alone. Groups are in queueing order.
+    """
+    groups = [[message] for message in messages if not message.merge]
+
+    mergeable = sorted(
+        (m for m in messages if m.merge),
+        key=lambda m: (m.channel_id, m.thread_ts, m.created_at)
+    )
+    for _, same_channel in groupby(mergeable, key=lambda m: (m.channel_id, m.thread_ts)):
+        group, blocks = [], 0
+        for message in same_channel:
+            # One divider between two messages
+            size = len(message_blocks(message)) + (1 if group else 0)
+            if group and blocks + size > MAX_BLOCKS:
+                groups.append(group)
+                group, blocks, size = [], 0, len(message_blocks(message))
+            group.append(message)
+            blocks += size
+        groups.append(group)
+
+    return sorted(groups, key=lambda group: group[0].created_at)
+
+
+def post_content(group: List[OutboundMessage]) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+    """Text and blocks of the post carrying a group."""
+    if len(group) == 1:
+        return group[0].text, group[0].blocks or None
+
+    blocks = []
+    for message in group:
+        if blocks:
+            blocks.append({"type": "divider"})
+        blocks.extend(message_blocks(message))
+    return "\n\n".join(message.text for message in group), blocks
+
+
+def deliver(service: Optional[SlackService], group: List[OutboundMessage]) -> bool:
+    """Post a group of messages as one message and record the outcome."""
+    first = group[0]
+    text, blocks = post_content(group)
+
+    ts, error, permanent, retry_after = "", "", False, None
+    try:
+        if service is None:
+            service = get_slack_service()
+        ts = service.send_message(
+            channel_id=first.channel_id,
+            text=text,
+            blocks=blocks,
+            thread_ts=first.thread_ts or None,
+            reply_broadcast=first.reply_broadcast
+        ).ts
+    except SlackRateLimited as e:
+        error, retry_after = str(e), e.retry_after
+    except SlackError as e:
+        error, permanent = str(e), e.error_code in PERMANENT_ERRORS
+
+    now = timezone.now()
+    max_attempts = getattr(settings, "SLACK_OUTBOX_MAX_ATTEMPTS", 6)
+    for message in group:
+        if ts:
+            message.attempts += 1
+            message.status = OutboundMessageStatus.SENT
+            message.ts = ts
+            message.merged_count = len(group)
+            message.sent_at = now
+            message.last_error = ""
+        elif retry_after is not None:
+            # Not the message's fault: no attempt used
+            message.status = OutboundMessageStatus.PENDING
+            message.next_attempt_at = now + timedelta(seconds=retry_after)
+            message.last_error = error
+        else:
+            message.attempts += 1
+            message.last_error = error
+            if permanent or message.attempts >= max_attempts:
+                message.status = OutboundMessageStatus.FAILED
+            else:
+                message.status = OutboundMessageStatus.PENDING
+                message.next_attempt_at = now + timedelta(seconds=retry_delay(message.attempts))
+        message.updated_at = now
+    OutboundMessage.objects.bulk_update(
+        group,
+        ["status", "attempts", "next_attempt_at", "last_error", "ts", "merged_count", "sent_at", "updated_at"]
+    )
+
+    if not ts:
+        logger.warning(
+            "Slack outbox: post to %s failed for %d message(s) (attempt %d): %s",
+            first.channel_id, len(group), first.attempts, error
+        )
+    return bool(ts)
+
+
+def process_due(limit: int = 200, service: Optional[SlackService] = None) -> Dict[str, int]:
+    """Post the due messages. Returns counters for the task result."""
+    messages = claim_due(limit)
+    stats = {"claimed": len(messages), "posts": 0, "sent": 0, "failed_posts": 0}
+
+    for group in group_messages(messages):
+        stats["posts"] += 1
+        if deliver(service, group):
+            stats["sent"] += len(group)
+        else:
+            stats["failed_posts"] += 1
+    return stats
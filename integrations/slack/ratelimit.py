@@ -0,0 +1,433 @@
+# integrations/slack/ratelimit.py
+"""
+Slack Web API rate limits.
+
+Every Web API method belongs to a rate-limit tier, allowing a number of
+calls per minute per workspace (https://api.slack.com/apis/rate-limits).
+chat.postMessage has no tier but allows about one message per second per
+channel, with short bursts.
+
+- RateLimiter (SlackService and AsyncSlackService) shares the allowance
+  of a workspace between processes: a reservation per call in Redis
+  (SLACK_RATE_LIMIT_REDIS_URL, CACHE_URL by default), in process memory
+  when Redis is not configured or unreachable. Calls wait for their slot
+  instead of being rejected with 429, so bulk operations (warm-ups,
+  exports, broadcasts) run at the allowed rate; a 429 still received
+  pushes every process back by its Retry-After. aacquire()/ablock() are
+  the same operations for coroutines, run off the event loop.
+- AsyncRateLimiter spaces the calls of one event loop with a token bucket
+  per method, without sharing anything (e.g. for scripts without Redis).
+
+Both record the time calls spent waiting, per method (throttle_stats()).
+
+The limits can be lowered or raised with SLACK_TIER_LIMITS, e.g. for apps
+whose conversations.history/replies limits are reduced by Slack.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Calls per minute allowed by each tier
+TIER_LIMITS = {
+    1: 1,
+    2: 20,
+    3: 50,
+    4: 100,
+}
+
+METHOD_TIERS = {
+    "conversations.history": 3,
+    "conversations.replies": 3,
+    "conversations.info": 3,
+    "conversations.list": 2,
+    "users.info": 4,
+    "users.list": 2,
+    "chat.update": 3,
+    "chat.delete": 3,
+    "reactions.add": 3,
+    "reactions.remove": 2,
+}
+
+# Calls per minute per channel, for methods limited per channel
+CHANNEL_LIMITS = {
+    "chat.postMessage": 60,
+}
+
+# Seconds of calls a bucket may spend at once
+BURST_SECONDS = 10
+CHANNEL_BURST_SECONDS = 3
+
+# Seconds RateLimiter stays on process memory after a Redis error
+REDIS_RETRY_INTERVAL = 30
+
+STATS_PREFIX = "slack:ratelimit:stats"
+
+
+def method_limit(method: str) -> Optional[int]:
+    """Calls per minute allowed for a Web API method, None if not limited here."""
+    tier = METHOD_TIERS.get(method)
+    if tier is None:
+        return None
+    limits = {**TIER_LIMITS, **getattr(settings, "SLACK_TIER_LIMITS", {})}
+    return limits.get(tier)
+
+
+def channel_limit(method: str) -> Optional[int]:
+    """Calls per minute per channel allowed for a Web API method, None if not limited per channel."""
+    return CHANNEL_LIMITS.get(method)
+
+
+def retry_after_seconds(value: Optional[str], default: float = 1.0) -> float:
+    """Seconds to wait from a Retry-After header, capped at HTTP_RETRY_AFTER_MAX."""
+    try:
+        seconds = float(value) if value is not None else default
+    except ValueError:
+        seconds = default
+    return max(0.0, min(seconds, getattr(settings, "HTTP_RETRY_AFTER_MAX", 30)))
+
+
+def max_wait() -> float:
+    """Seconds a call may wait for its slot before failing instead."""
+    return getattr(settings, "SLACK_RATE_LIMIT_MAX_WAIT", 30)
+
+
+# -----------------------------------------------------------------------------
+# Metrics
+# -----------------------------------------------------------------------------
+
+def _incr(key: str, delta: int) -> None:
+    try:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # First record: add() so a concurrent first record is not lost
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)
+    except Exception:
+        # Metrics never fail a Slack call
+        logger.debug("Could not record Slack rate-limit metric %s", key, exc_info=True)
+
+
+def record_throttle(method: str, seconds: float) -> None:
+    """Count a call that waited `seconds` for its slot."""
+    _incr(f"{STATS_PREFIX}:{method}:throttled_calls", 1)
+    _incr(f"{STATS_PREFIX}:{method}:throttled_ms", int(seconds * 1000))
+
+
+def record_rate_limited(method: str, count: int = 1) -> None:
+    """Count 429 responses received for a method."""
+    _incr(f"{STATS_PREFIX}:{method}:rate_limited", count)
+
+
+def throttle_stats() -> Dict[str, Dict[str, Any]]:
+    """Per method: calls that waited for a slot, seconds waited, 429s received."""
+    methods = sorted({*METHOD_TIERS, *CHANNEL_LIMITS})
+    fields = ("throttled_calls", "throttled_ms", "rate_limited")
+    values = cache.get_many([f"{STATS_PREFIX}:{method}:{field}" for method in methods for field in fields])
+
+    stats = {}
+    for method in methods:
+        counters = {field: values.get(f"{STATS_PREFIX}:{method}:{field}", 0) for field in fields}
+        stats[method] = {
+            "limit_per_minute": method_limit(method),
+            "channel_limit_per_minute": channel_limit(method),
+            "throttled_calls": counters["throttled_calls"],
+            "throttled_seconds": round(counters["throttled_ms"] / 1000, 3),
+            "rate_limited": counters["rate_limited"],
+        }
+    return stats
+
+
+# -----------------------------------------------------------------------------
+# Shared rate limiter (sync)
+# -----------------------------------------------------------------------------
+
+class RateLimitExceeded(Exception):
+    """A call would have waited more than the allowed time for its slot."""
+
+    def __init__(self, method: str, retry_after: float):
+        super().__init__(f"{method} rate limit: next slot in {retry_after:.1f}s")
+        self.method = method
+        self.retry_after = retry_after
+
+
+class MemoryBackend:
+    """
+    Reservations in process memory (generic cell rate algorithm).
+
+    Each key holds the time at which its allowance is fully used up; a call
+    reserves the next slot and is told how long to wait for it.
+    """
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, keys: List[str], limits: List[Tuple[float, float]], wait_limit: float) -> float:
+        """
+        Reserve a slot in every key, each with its (interval, burst).
+        Returns the seconds to wait, negative (nothing reserved) past `wait_limit`.
+        """
+        with self._lock:
+            now = time.time()
+            tats = [max(self._tats.get(key, now), now) for key in keys]
+            wait = max([0.0] + [tat - burst - now for tat, (_, burst) in zip(tats, limits)])
+            if wait > wait_limit:
+                return -wait
+            for key, tat, (interval, _) in zip(keys, tats, limits):
+                self._tats[key] = tat + interval
+            return wait
+
+    def block(self, key: str, seconds: float, burst: float) -> None:
+        """Give no slot for `seconds` (after a 429)."""
+        with self._lock:
+            self._tats[key] = max(self._tats.get(key, 0.0), time.time() + seconds + burst)
+
+
+class RedisBackend:
+    """MemoryBackend's reservations in Redis, shared by every process; the clock is Redis'."""
+
+    # All keys are checked before any is reserved: a call rejected by one
+    # limit takes nothing from the others
+    RESERVE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local wait_limit = tonumber(ARGV[1])
+local tats = {}
+local wait = 0
+for i = 1, #KEYS do
+    local tat = tonumber(redis.call('GET', KEYS[i]) or now)
+    if tat < now then tat = now end
+    tats[i] = tat
+    wait = math.max(wait, tat - tonumber(ARGV[2 * i + 1]) - now)
+end
+if wait > wait_limit then return tostring(-wait) end
+for i = 1, #KEYS do
+    local tat = tats[i] + tonumber(ARGV[2 * i])
+    redis.call('SET', KEYS[i], tostring(tat), 'PX', math.ceil((tat - now + 1) * 1000))
+end
+return tostring(wait)
+"""
+
+    BLOCK = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local blocked = now + tonumber(ARGV[1]) + tonumber(ARGV[2])
+if tonumber(redis.call('GET', KEYS[1]) or 0) < blocked then
+    redis.call('SET', KEYS[1], tostring(blocked), 'PX', math.ceil((blocked - now + 1) * 1000))
+end
+return 1
+"""
+
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self._reserve = self.client.register_script(self.RESERVE)
+        self._block = self.client.register_script(self.BLOCK)
+
+    def reserve(self, keys: List[str], limits: List[Tuple[float, float]], wait_limit: float) -> float:
+        args = [wait_limit]
+        for interval, burst in limits:
+            args += [interval, burst]
+        return float(self._reserve(keys=keys, args=args))
+
+    def block(self, key: str, seconds: float, burst: float) -> None:
+        self._block(keys=[key], args=[seconds, burst])
+
+
+class RateLimiter:
+    """
+    Rate limits of SlackService, per workspace (bot token), method and,
+    for chat.postMessage, channel.
+
+    Usage:
+        limiter.acquire("conversations.history", token=bot_token)  # waits for a slot
+        limiter.block("conversations.history", retry_after, token=bot_token)  # after a 429
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, burst_seconds: float = BURST_SECONDS):
+        self.burst_seconds = burst_seconds
+        self.memory = MemoryBackend()
+        self.redis = RedisBackend(redis_url) if redis_url else None
+        self._redis_down_until = 0.0
+
+    def _scopes(self, method: str, channel: Optional[str]) -> List[Tuple[str, float, float]]:
+        """(key suffix, seconds between calls, burst seconds) of every limit a call counts against."""
+        scopes = []
+        limit = method_limit(method)
+        if limit:
+            scopes.append((method, 60 / limit, self.burst_seconds))
+        limit = channel_limit(method)
+        if limit and channel:
+            scopes.append((f"{method}:{channel}", 60 / limit, CHANNEL_BURST_SECONDS))
+        return scopes
+
+    @staticmethod
+    def _key(token: str, suffix: str) -> str:
+        workspace = hashlib.sha256(token.encode()).hexdigest()[:12]
+        return f"slack:ratelimit:{workspace}:{suffix}"
+
+    def _call(self, operation: str, *args):
+        """Run a backend operation on Redis, or on process memory while Redis is unavailable."""
+        if self.redis and time.monotonic() >= self._redis_down_until:
+            try:
+                return getattr(self.redis, operation)(*args)
+            except redis.RedisError as e:
+                logger.warning("Slack rate limiter: Redis unavailable (%s), limiting per process", e)
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        return getattr(self.memory, operation)(*args)
+
+    def reserve(self, method: str, channel: Optional[str] = None, token: str = "") -> float:
+        """
+        Reserve a slot of `method`. Returns the seconds to wait for it.
+
+        Raises RateLimitExceeded when the slot is more than
+        SLACK_RATE_LIMIT_MAX_WAIT seconds away.
+        """
+        scopes = self._scopes(method, channel)
+        if not scopes:
+            return 0.0
+        # One reservation across every scope: if one limit rejects the call,
+        # the others keep their slot
+        wait = self._call(
+            "reserve",
+            [self._key(token, suffix) for suffix, _, _ in scopes],
+            [(interval, burst) for _, interval, burst in scopes],
+            max_wait(),
+        )
+        if wait < 0:
+            raise RateLimitExceeded(method, -wait)
+        if wait > 0:
+            record_throttle(method, wait)
+        return wait
+
+    def acquire(self, method: str, channel: Optional[str] = None, token: str = "") -> float:
+        """
+        Wait for a slot of `method`. Returns the seconds waited.
+
+        Raises RateLimitExceeded, without waiting, when the slot is more than
+        SLACK_RATE_LIMIT_MAX_WAIT seconds away.
+        """
+        wait = self.reserve(method, channel, token)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, method: str, channel: Optional[str] = None, token: str = "") -> float:
+        """acquire() for coroutines: the reservation runs in a thread, the wait on the event loop."""
+        wait = await sync_to_async(self.reserve, thread_sensitive=False)(method, channel, token)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def block(self, method: str, seconds: float, channel: Optional[str] = None, token: str = "") -> bool:
+        """
+        Hold every call of `method` for `seconds`, in every process.
+
+        Returns False for methods not limited here (the caller waits itself).
+        """
+        scopes = self._scopes(method, channel)
+        for suffix, _, burst in scopes:
+            self._call("block", self._key(token, suffix), seconds, burst)
+        return bool(scopes)
+
+    async def ablock(self, method: str, seconds: float, channel: Optional[str] = None, token: str = "") -> bool:
+        """block() for coroutines."""
+        return await sync_to_async(self.block, thread_sensitive=False)(method, seconds, channel, token)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """The RateLimiter of this process, on SLACK_RATE_LIMIT_REDIS_URL if set."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(getattr(settings, "SLACK_RATE_LIMIT_REDIS_URL", ""))
+    return _rate_limiter
+
+
+def _reset_after_fork() -> None:
+    # Don't share the parent's Redis connections
+    global _rate_limiter, _lock
+    _rate_limiter = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# -----------------------------------------------------------------------------
+# Per-process rate limiter (async)
+# -----------------------------------------------------------------------------
+
+class AsyncTokenBucket:
+    """Token bucket for coroutines of one event loop."""
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take a token, waiting for one if needed. Returns the seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class AsyncRateLimiter:
+    """
+    One token bucket per rate-limited method, for an AsyncSlackService
+    that should not share its allowance (RateLimiter's interface).
+    """
+
+    def __init__(self, burst_seconds: float = BURST_SECONDS):
+        self.burst_seconds = burst_seconds
+        self._buckets: Dict[str, AsyncTokenBucket] = {}
+
+    async def acquire(self, method: str) -> float:
+        limit = method_limit(method)
+        if not limit:
+            return 0.0
+        bucket = self._buckets.get(method)
+        if bucket is None:
+            bucket = self._buckets[method] = AsyncTokenBucket(limit, self.burst_seconds)
+        waited = await bucket.acquire()
+        if waited > 0:
+            await sync_to_async(record_throttle)(method, waited)
+        return waited
+
+    async def aacquire(self, method: str, channel: Optional[str] = None, token: str = "") -> float:
+        return await self.acquire(method)
+
+    async def ablock(self, method: str, seconds: float, channel: Optional[str] = None, token: str = "") -> bool:
+        # Nothing shared to hold: the caller waits itself
+        return False
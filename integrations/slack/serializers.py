@@ -4,6 +4,8 @@ Serializers for Slack integration API endpoints.
 """
 from rest_framework import serializers
 
+from .models import OutboundMessage
+
 
 class SlackMessageSerializer(serializers.Serializer):
     """Serializer for Slack message output."""
@@ -44,6 +46,16 @@ class SendMessageSerializer(serializers.Serializer):
         default=False,
         help_text="Also post to channel when replying to thread"
     )
+    queue = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Queue the message in the outbox and answer at once (202) with its id"
+    )
+    merge = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Queued messages only: may be merged with other messages to the same channel"
+    )
 
 
 class ReplyToThreadSerializer(serializers.Serializer):
@@ -103,6 +115,36 @@ class GetMessagesSerializer(serializers.Serializer):
     )
 
 
+class ExportChannelSerializer(serializers.Serializer):
+    """Serializer for exporting a channel with its threads."""
+    channel_id = serializers.CharField(
+        required=True, 
+        help_text="Slack channel ID"
+    )
+    oldest = serializers.CharField(
+        required=False, 
+        allow_null=True,
+        help_text="Only messages after this Unix timestamp"
+    )
+    latest = serializers.CharField(
+        required=False, 
+        allow_null=True,
+        help_text="Only messages before this Unix timestamp"
+    )
+    include_replies = serializers.BooleanField(
+        required=False,
+        default=True,
+        help_text="Fetch the replies of every thread"
+    )
+    max_workers = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        max_value=32,
+        help_text="Threads fetched at once (default SLACK_EXPORT_WORKERS)"
+    )
+
+
 class GetThreadRepliesSerializer(serializers.Serializer):
     """Serializer for fetching thread replies."""
     channel_id = serializers.CharField(
@@ -169,3 +211,15 @@ class ChannelInfoSerializer(serializers.Serializer):
 class UserInfoSerializer(serializers.Serializer):
     """Serializer for user info request."""
     user_id = serializers.CharField(required=True, help_text="Slack user ID")
+
+
+class OutboundMessageSerializer(serializers.ModelSerializer):
+    """Serializer for a message of the outbox."""
+
+    class Meta:
+        model = OutboundMessage
+        fields = [
+            "id", "channel_id", "text", "thread_ts", "merge", "status", "attempts", "next_attempt_at",
+            "last_error", "ts", "merged_count", "created_at", "sent_at"
+        ]
+        read_only_fields = fields
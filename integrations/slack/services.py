@@ -6,17 +6,42 @@ Provides primitives for interacting with Slack API:
 - Sending messages
 - Replying to threads
 - Getting channel/user info
+
+List methods return one page; the iter_* methods follow
+response_metadata.next_cursor lazily, fetching a page only when the
+previous one is consumed.
+
+Every call waits for its method's rate-limit slot (see ratelimit.py), so
+bulk use throttles itself instead of collecting 429s; a 429 still
+received is retried after Retry-After, and SlackRateLimited is raised
+when the limit can't be met in time.
 """
 from __future__ import annotations
 
 import os
+import time
+import asyncio
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, AsyncIterator, Callable
 from dataclasses import dataclass
 
+import aiohttp
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from mixtum_core.async_http import client_timeout, get_client_session
+from mixtum_core.http_sessions import get_session
+
+from .ratelimit import (
+    AsyncRateLimiter,
+    RateLimiter,
+    RateLimitExceeded,
+    get_rate_limiter,
+    record_rate_limited,
+    retry_after_seconds,
+)
+
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +68,114 @@ class SlackError(Exception):
         self.response = response
 
 
+class SlackRateLimited(SlackError):
+    """The rate limit of a method could not be met; retry after `retry_after` seconds."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message, error_code="ratelimited")
+        self.retry_after = retry_after
+
+
+# -----------------------------------------------------------------------------
+# Request parameters and results, shared by SlackService and AsyncSlackService
+# -----------------------------------------------------------------------------
+
+def _with_optional(params: Dict[str, Any], **optional) -> Dict[str, Any]:
+    """`params` plus the optional values that are set."""
+    params.update({key: value for key, value in optional.items() if value})
+    return params
+
+
+def _history_params(
+    channel_id: str,
+    limit: int,
+    cursor: Optional[str],
+    oldest: Optional[str],
+    latest: Optional[str],
+    inclusive: bool,
+    thread_ts: Optional[str] = None
+) -> Dict[str, Any]:
+    """Parameters of conversations.history, or of conversations.replies with `thread_ts`."""
+    params = {"channel": channel_id, "limit": limit, "inclusive": inclusive}
+    if thread_ts:
+        params["ts"] = thread_ts
+    return _with_optional(params, cursor=cursor, oldest=oldest, latest=latest)
+
+
+def _message_data(
+    channel_id: str,
+    text: str,
+    blocks: Optional[List[Dict]],
+    attachments: Optional[List[Dict]],
+    thread_ts: Optional[str],
+    reply_broadcast: bool,
+    unfurl_links: bool,
+    unfurl_media: bool,
+    mrkdwn: bool
+) -> Dict[str, Any]:
+    """Body of chat.postMessage."""
+    data = {
+        "channel": channel_id,
+        "text": text,
+        "unfurl_links": unfurl_links,
+        "unfurl_media": unfurl_media,
+        "mrkdwn": mrkdwn
+    }
+    if thread_ts:
+        data["reply_broadcast"] = reply_broadcast
+    return _with_optional(data, blocks=blocks, attachments=attachments, thread_ts=thread_ts)
+
+
+def _update_data(
+    channel_id: str,
+    ts: str,
+    text: str,
+    blocks: Optional[List[Dict]],
+    attachments: Optional[List[Dict]]
+) -> Dict[str, Any]:
+    """Body of chat.update."""
+    return _with_optional({"channel": channel_id, "ts": ts, "text": text}, blocks=blocks, attachments=attachments)
+
+
+def _reaction_data(channel_id: str, ts: str, emoji: str) -> Dict[str, Any]:
+    """Body of reactions.add and reactions.remove."""
+    return {"channel": channel_id, "timestamp": ts, "name": emoji}
+
+
+def _sent_message(result: Dict[str, Any], channel_id: str, text: str, thread_ts: Optional[str]) -> SlackMessage:
+    return SlackMessage(
+        ts=result.get("ts", ""),
+        channel=result.get("channel", channel_id),
+        text=text,
+        thread_ts=thread_ts,
+        raw=result
+    )
+
+
+def _updated_message(result: Dict[str, Any], channel_id: str, ts: str, text: str) -> SlackMessage:
+    return SlackMessage(
+        ts=result.get("ts", ts),
+        channel=result.get("channel", channel_id),
+        text=text,
+        raw=result
+    )
+
+
+def _check_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a Web API response, raising SlackError if it is not ok."""
+    if not result.get("ok"):
+        error = result.get("error", "unknown_error")
+        raise SlackError(
+            f"Slack API error: {error}",
+            error_code=error,
+            response=result
+        )
+    return result
+
+
+def _next_cursor(result: Dict[str, Any]) -> Optional[str]:
+    return (result.get("response_metadata") or {}).get("next_cursor")
+
+
 class SlackService:
     """
     Service class for Slack API interactions.
@@ -62,7 +195,9 @@ class SlackService:
     def __init__(
         self, 
         bot_token: Optional[str] = None,
-        timeout: int = 30
+        timeout: int = 30,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None
     ):
         """
         Initialize SlackService.
@@ -71,13 +206,29 @@ class SlackService:
             bot_token: Slack Bot Token (xoxb-...). If not provided, 
                        uses SLACK_BOT_TOKEN from environment/settings.
             timeout: Request timeout in seconds.
+            session: HTTP session to use. Defaults to the process-wide
+                     pooled session (see mixtum_core.http_sessions), which
+                     leaves 429s to the rate limiter.
+            rate_limiter: Rate limiter to use. Defaults to the process-wide
+                          one, shared through Redis (see ratelimit.py).
         """
         self.bot_token = bot_token or getattr(settings, 'SLACK_BOT_TOKEN', None) or os.environ.get('SLACK_BOT_TOKEN')
         self.timeout = timeout
+        self._session = session
+        self._rate_limiter = rate_limiter
         
         if not self.bot_token:
             raise SlackError("Slack bot token not configured. Set SLACK_BOT_TOKEN environment variable.")
     
+    @property
+    def session(self) -> requests.Session:
+        """Pooled HTTP session: keep-alive connections, 429s returned to _request()."""
+        return self._session or get_session("slack", retry_rate_limited=False)
+    
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self._rate_limiter or get_rate_limiter()
+    
     @property
     def _headers(self) -> Dict[str, str]:
         return {
@@ -92,35 +243,66 @@ class SlackService:
         data: Optional[Dict] = None,
         params: Optional[Dict] = None
     ) -> Dict[str, Any]:
-        """Make a request to Slack API."""
+        """Make a request to Slack API, within the method's rate limit."""
         url = f"{self.BASE_URL}/{endpoint}"
+        channel = (data or params or {}).get("channel")
+        limiter = self.rate_limiter
+        retries = getattr(settings, "SLACK_RATE_LIMIT_RETRIES", 3)
         
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=self._headers,
-                json=data,
-                params=params,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            if not result.get("ok"):
-                error = result.get("error", "unknown_error")
-                raise SlackError(
-                    f"Slack API error: {error}",
-                    error_code=error,
-                    response=result
+            for attempt in range(retries + 1):
+                limiter.acquire(endpoint, channel=channel, token=self.bot_token)
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    headers=self._headers,
+                    json=data,
+                    params=params,
+                    timeout=self.timeout
                 )
+                if response.status_code != 429:
+                    break
+                
+                record_rate_limited(endpoint)
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+                # Hold the other callers too, in every process
+                held = limiter.block(endpoint, delay, channel=channel, token=self.bot_token)
+                if attempt == retries:
+                    raise SlackRateLimited(f"Slack API rate limited: {endpoint}", retry_after=delay)
+                logger.warning("Slack %s rate limited, retrying in %.1fs", endpoint, delay)
+                if not held:
+                    time.sleep(delay)
             
-            return result
+            response.raise_for_status()
+            return _check_result(response.json())
             
+        except RateLimitExceeded as e:
+            raise SlackRateLimited(f"Slack API rate limited: {e}", retry_after=e.retry_after)
         except requests.exceptions.RequestException as e:
             logger.exception("Slack API request failed")
             raise SlackError(f"Request failed: {str(e)}")
     
+    def _paginate(
+        self,
+        fetch: Callable[..., Dict[str, Any]],
+        items_key: str,
+        max_items: Optional[int] = None,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the items of every page of a cursor-paginated method, up to `max_items`."""
+        cursor = None
+        count = 0
+        while True:
+            result = fetch(cursor=cursor, **kwargs)
+            for item in result.get(items_key, []):
+                yield item
+                count += 1
+                if max_items and count >= max_items:
+                    return
+            cursor = _next_cursor(result)
+            if not cursor:
+                return
+    
     # -------------------------------------------------------------------------
     # Channel Operations
     # -------------------------------------------------------------------------
@@ -155,11 +337,25 @@ class SlackService:
         Returns:
             Dict with 'channels' list and 'response_metadata' for pagination
         """
-        params = {"types": types, "limit": limit}
-        if cursor:
-            params["cursor"] = cursor
+        return self._request("GET", "conversations.list", params=_with_optional(
+            {"types": types, "limit": limit}, cursor=cursor
+        ))
+    
+    def iter_channels(
+        self,
+        types: str = "public_channel,private_channel",
+        page_size: int = 200,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the channels the bot has access to, across pages.
         
-        return self._request("GET", "conversations.list", params=params)
+        Args:
+            types: Comma-separated channel types
+            page_size: Channels per API call
+            limit: Stop after this many channels
+        """
+        return self._paginate(self.list_channels, "channels", max_items=limit, types=types, limit=page_size)
     
     # -------------------------------------------------------------------------
     # Message Operations
@@ -188,20 +384,34 @@ class SlackService:
         Returns:
             Dict with 'messages' list and 'response_metadata' for pagination
         """
-        params = {
-            "channel": channel_id,
-            "limit": limit,
-            "inclusive": inclusive
-        }
-        if cursor:
-            params["cursor"] = cursor
-        if oldest:
-            params["oldest"] = oldest
-        if latest:
-            params["latest"] = latest
+        return self._request("GET", "conversations.history", params=_history_params(
+            channel_id, limit, cursor, oldest, latest, inclusive
+        ))
+    
+    def iter_channel_messages(
+        self,
+        channel_id: str,
+        oldest: Optional[str] = None,
+        latest: Optional[str] = None,
+        inclusive: bool = True,
+        page_size: int = 200,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the messages of a channel, newest first, across pages.
         
-        result = self._request("GET", "conversations.history", params=params)
-        return result
+        Args:
+            channel_id: The Slack channel ID
+            oldest: Only messages after this Unix timestamp
+            latest: Only messages before this Unix timestamp
+            inclusive: Include messages with oldest/latest timestamps
+            page_size: Messages per API call
+            limit: Stop after this many messages
+        """
+        return self._paginate(
+            self.get_channel_messages, "messages", max_items=limit,
+            channel_id=channel_id, limit=page_size, oldest=oldest, latest=latest, inclusive=inclusive
+        )
     
     def get_thread_replies(
         self, 
@@ -228,21 +438,34 @@ class SlackService:
         Returns:
             Dict with 'messages' list (first is parent, rest are replies)
         """
-        params = {
-            "channel": channel_id,
-            "ts": thread_ts,
-            "limit": limit,
-            "inclusive": inclusive
-        }
-        if cursor:
-            params["cursor"] = cursor
-        if oldest:
-            params["oldest"] = oldest
-        if latest:
-            params["latest"] = latest
+        return self._request("GET", "conversations.replies", params=_history_params(
+            channel_id, limit, cursor, oldest, latest, inclusive, thread_ts=thread_ts
+        ))
+    
+    def iter_thread_replies(
+        self,
+        channel_id: str,
+        thread_ts: str,
+        page_size: int = 200,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the replies of a thread, oldest first, across pages.
         
-        result = self._request("GET", "conversations.replies", params=params)
-        return result
+        Unlike get_thread_replies, the parent message is left out.
+        """
+        replies = self._paginate(
+            self.get_thread_replies, "messages",
+            channel_id=channel_id, thread_ts=thread_ts, limit=page_size
+        )
+        count = 0
+        for reply in replies:
+            if reply.get("ts") == thread_ts:
+                continue
+            yield reply
+            count += 1
+            if limit and count >= limit:
+                return
     
     def send_message(
         self,
@@ -273,31 +496,11 @@ class SlackService:
         Returns:
             SlackMessage object with the sent message details
         """
-        data = {
-            "channel": channel_id,
-            "text": text,
-            "unfurl_links": unfurl_links,
-            "unfurl_media": unfurl_media,
-            "mrkdwn": mrkdwn
-        }
-        
-        if blocks:
-            data["blocks"] = blocks
-        if attachments:
-            data["attachments"] = attachments
-        if thread_ts:
-            data["thread_ts"] = thread_ts
-            data["reply_broadcast"] = reply_broadcast
-        
-        result = self._request("POST", "chat.postMessage", data=data)
-        
-        return SlackMessage(
-            ts=result.get("ts", ""),
-            channel=result.get("channel", channel_id),
-            text=text,
-            thread_ts=thread_ts,
-            raw=result
-        )
+        result = self._request("POST", "chat.postMessage", data=_message_data(
+            channel_id, text, blocks, attachments, thread_ts, reply_broadcast,
+            unfurl_links, unfurl_media, mrkdwn
+        ))
+        return _sent_message(result, channel_id, text, thread_ts)
     
     def reply_to_thread(
         self,
@@ -352,25 +555,8 @@ class SlackService:
         Returns:
             SlackMessage with updated message details
         """
-        data = {
-            "channel": channel_id,
-            "ts": ts,
-            "text": text
-        }
-        
-        if blocks:
-            data["blocks"] = blocks
-        if attachments:
-            data["attachments"] = attachments
-        
-        result = self._request("POST", "chat.update", data=data)
-        
-        return SlackMessage(
-            ts=result.get("ts", ts),
-            channel=result.get("channel", channel_id),
-            text=text,
-            raw=result
-        )
+        result = self._request("POST", "chat.update", data=_update_data(channel_id, ts, text, blocks, attachments))
+        return _updated_message(result, channel_id, ts, text)
     
     def delete_message(self, channel_id: str, ts: str) -> bool:
         """
@@ -418,11 +604,11 @@ class SlackService:
         Returns:
             Dict with 'members' list and 'response_metadata'
         """
-        params = {"limit": limit}
-        if cursor:
-            params["cursor"] = cursor
-        
-        return self._request("GET", "users.list", params=params)
+        return self._request("GET", "users.list", params=_with_optional({"limit": limit}, cursor=cursor))
+    
+    def iter_users(self, page_size: int = 200, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the workspace users, across pages."""
+        return self._paginate(self.list_users, "members", max_items=limit, limit=page_size)
     
     # -------------------------------------------------------------------------
     # Reactions
@@ -440,11 +626,7 @@ class SlackService:
         Returns:
             True if added successfully
         """
-        self._request("POST", "reactions.add", data={
-            "channel": channel_id,
-            "timestamp": ts,
-            "name": emoji
-        })
+        self._request("POST", "reactions.add", data=_reaction_data(channel_id, ts, emoji))
         return True
     
     def remove_reaction(self, channel_id: str, ts: str, emoji: str) -> bool:
@@ -459,11 +641,279 @@ class SlackService:
         Returns:
             True if removed successfully
         """
-        self._request("POST", "reactions.remove", data={
-            "channel": channel_id,
-            "timestamp": ts,
-            "name": emoji
-        })
+        self._request("POST", "reactions.remove", data=_reaction_data(channel_id, ts, emoji))
+        return True
+
+
+class AsyncSlackService:
+    """
+    Async counterpart of SlackService, for async views.
+    
+    Same methods and results, over the event loop's shared aiohttp session
+    (see mixtum_core.async_http), so requests waiting on Slack don't hold a
+    worker. Configuration comes from the wrapped SlackService; requests and
+    results are built by the same helpers, only the transport differs.
+    
+    Every call first waits for its slot in the wrapped SlackService's rate
+    limiter, shared through Redis with every process (see ratelimit.py).
+    Rate-limited (429) calls hold the method for everyone and are retried
+    after Retry-After, up to SLACK_RATE_LIMIT_RETRIES times, then
+    SlackRateLimited is raised.
+    
+    Usage:
+        slack = AsyncSlackService()
+        message = await slack.send_message("C12345678", "Hello!")
+    """
+    
+    def __init__(
+        self,
+        service: Optional[SlackService] = None,
+        rate_limiter: Optional[RateLimiter | AsyncRateLimiter] = None
+    ):
+        self.service = service or get_slack_service()
+        self.rate_limiter = rate_limiter or self.service.rate_limiter
+    
+    async def _request(
+        self, 
+        method: str, 
+        endpoint: str, 
+        data: Optional[Dict] = None,
+        params: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Make a request to Slack API."""
+        url = f"{self.service.BASE_URL}/{endpoint}"
+        if params:
+            # aiohttp only accepts str/int/float query values
+            params = {key: str(value).lower() if isinstance(value, bool) else value for key, value in params.items()}
+        channel = (data or params or {}).get("channel")
+        token = self.service.bot_token
+        limiter = self.rate_limiter
+        retries = getattr(settings, "SLACK_RATE_LIMIT_RETRIES", 3)
+        
+        for attempt in range(retries + 1):
+            try:
+                await limiter.aacquire(endpoint, channel=channel, token=token)
+            except RateLimitExceeded as e:
+                raise SlackRateLimited(f"Slack API rate limited: {e}", retry_after=e.retry_after)
+            try:
+                async with get_client_session().request(
+                    method,
+                    url,
+                    headers=self.service._headers,
+                    json=data,
+                    params=params,
+                    timeout=client_timeout(self.service.timeout)
+                ) as response:
+                    if response.status == 429:
+                        await sync_to_async(record_rate_limited)(endpoint)
+                        delay = retry_after_seconds(response.headers.get("Retry-After"))
+                        # Hold the other callers too, in every process
+                        held = await limiter.ablock(endpoint, delay, channel=channel, token=token)
+                        if attempt == retries:
+                            raise SlackRateLimited(f"Slack API rate limited: {endpoint}", retry_after=delay)
+                        logger.warning("Slack %s rate limited, retrying in %.1fs", endpoint, delay)
+                        if not held:
+                            await asyncio.sleep(delay)
+                        continue
+                    response.raise_for_status()
+                    result = await response.json(content_type=None)
+                    break
+            except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+                logger.exception("Slack API request failed")
+                raise SlackError(f"Request failed: {str(e)}")
+        
+        return _check_result(result)
+    
+    async def _paginate(
+        self,
+        fetch: Callable[..., Any],
+        items_key: str,
+        max_items: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """See SlackService._paginate."""
+        cursor = None
+        count = 0
+        while True:
+            result = await fetch(cursor=cursor, **kwargs)
+            for item in result.get(items_key, []):
+                yield item
+                count += 1
+                if max_items and count >= max_items:
+                    return
+            cursor = _next_cursor(result)
+            if not cursor:
+                return
+    
+    async def get_channel_info(self, channel_id: str) -> Dict[str, Any]:
+        """See SlackService.get_channel_info."""
+        result = await self._request("GET", "conversations.info", params={"channel": channel_id})
+        return result.get("channel", {})
+    
+    async def list_channels(
+        self, 
+        types: str = "public_channel,private_channel",
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """See SlackService.list_channels."""
+        return await self._request("GET", "conversations.list", params=_with_optional(
+            {"types": types, "limit": limit}, cursor=cursor
+        ))
+    
+    def iter_channels(
+        self,
+        types: str = "public_channel,private_channel",
+        page_size: int = 200,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """See SlackService.iter_channels."""
+        return self._paginate(self.list_channels, "channels", max_items=limit, types=types, limit=page_size)
+    
+    async def get_channel_messages(
+        self, 
+        channel_id: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        oldest: Optional[str] = None,
+        latest: Optional[str] = None,
+        inclusive: bool = True
+    ) -> Dict[str, Any]:
+        """See SlackService.get_channel_messages."""
+        return await self._request("GET", "conversations.history", params=_history_params(
+            channel_id, limit, cursor, oldest, latest, inclusive
+        ))
+    
+    def iter_channel_messages(
+        self,
+        channel_id: str,
+        oldest: Optional[str] = None,
+        latest: Optional[str] = None,
+        inclusive: bool = True,
+        page_size: int = 200,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """See SlackService.iter_channel_messages."""
+        return self._paginate(
+            self.get_channel_messages, "messages", max_items=limit,
+            channel_id=channel_id, limit=page_size, oldest=oldest, latest=latest, inclusive=inclusive
+        )
+    
+    async def get_thread_replies(
+        self, 
+        channel_id: str, 
+        thread_ts: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        oldest: Optional[str] = None,
+        latest: Optional[str] = None,
+        inclusive: bool = True
+    ) -> Dict[str, Any]:
+        """See SlackService.get_thread_replies."""
+        return await self._request("GET", "conversations.replies", params=_history_params(
+            channel_id, limit, cursor, oldest, latest, inclusive, thread_ts=thread_ts
+        ))
+    
+    async def iter_thread_replies(
+        self,
+        channel_id: str,
+        thread_ts: str,
+        page_size: int = 200,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """See SlackService.iter_thread_replies."""
+        count = 0
+        async for reply in self._paginate(
+            self.get_thread_replies, "messages",
+            channel_id=channel_id, thread_ts=thread_ts, limit=page_size
+        ):
+            if reply.get("ts") == thread_ts:
+                continue
+            yield reply
+            count += 1
+            if limit and count >= limit:
+                return
+    
+    async def send_message(
+        self,
+        channel_id: str,
+        text: str,
+        blocks: Optional[List[Dict]] = None,
+        attachments: Optional[List[Dict]] = None,
+        thread_ts: Optional[str] = None,
+        reply_broadcast: bool = False,
+        unfurl_links: bool = True,
+        unfurl_media: bool = True,
+        mrkdwn: bool = True
+    ) -> SlackMessage:
+        """See SlackService.send_message."""
+        result = await self._request("POST", "chat.postMessage", data=_message_data(
+            channel_id, text, blocks, attachments, thread_ts, reply_broadcast,
+            unfurl_links, unfurl_media, mrkdwn
+        ))
+        return _sent_message(result, channel_id, text, thread_ts)
+    
+    async def reply_to_thread(
+        self,
+        channel_id: str,
+        thread_ts: str,
+        text: str,
+        blocks: Optional[List[Dict]] = None,
+        attachments: Optional[List[Dict]] = None,
+        reply_broadcast: bool = False
+    ) -> SlackMessage:
+        """See SlackService.reply_to_thread."""
+        return await self.send_message(
+            channel_id=channel_id,
+            text=text,
+            blocks=blocks,
+            attachments=attachments,
+            thread_ts=thread_ts,
+            reply_broadcast=reply_broadcast
+        )
+    
+    async def update_message(
+        self,
+        channel_id: str,
+        ts: str,
+        text: str,
+        blocks: Optional[List[Dict]] = None,
+        attachments: Optional[List[Dict]] = None
+    ) -> SlackMessage:
+        """See SlackService.update_message."""
+        result = await self._request("POST", "chat.update", data=_update_data(channel_id, ts, text, blocks, attachments))
+        return _updated_message(result, channel_id, ts, text)
+    
+    async def delete_message(self, channel_id: str, ts: str) -> bool:
+        """See SlackService.delete_message."""
+        await self._request("POST", "chat.delete", data={"channel": channel_id, "ts": ts})
+        return True
+    
+    async def get_user_info(self, user_id: str) -> Dict[str, Any]:
+        """See SlackService.get_user_info."""
+        result = await self._request("GET", "users.info", params={"user": user_id})
+        return result.get("user", {})
+    
+    async def list_users(
+        self, 
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """See SlackService.list_users."""
+        return await self._request("GET", "users.list", params=_with_optional({"limit": limit}, cursor=cursor))
+    
+    def iter_users(self, page_size: int = 200, limit: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """See SlackService.iter_users."""
+        return self._paginate(self.list_users, "members", max_items=limit, limit=page_size)
+    
+    async def add_reaction(self, channel_id: str, ts: str, emoji: str) -> bool:
+        """See SlackService.add_reaction."""
+        await self._request("POST", "reactions.add", data=_reaction_data(channel_id, ts, emoji))
+        return True
+    
+    async def remove_reaction(self, channel_id: str, ts: str, emoji: str) -> bool:
+        """See SlackService.remove_reaction."""
+        await self._request("POST", "reactions.remove", data=_reaction_data(channel_id, ts, emoji))
         return True
 
 
@@ -520,6 +970,34 @@ def send_slack_message(
     )
 
 
+def queue_slack_message(
+    channel_id: str,
+    text: str,
+    thread_ts: Optional[str] = None,
+    blocks: Optional[List[Dict]] = None,
+    merge: bool = False
+):
+    """
+    Convenience function to queue a Slack message in the outbox.
+    
+    Unlike send_slack_message, returns at once: the message is posted by a
+    Celery worker after the current transaction commits (see outbox.py).
+    
+    Args:
+        channel_id: The Slack channel ID
+        text: Message text
+        thread_ts: Optional thread timestamp for replies
+        blocks: Optional Block Kit blocks
+        merge: Allow merging with other messages to the same channel
+        
+    Returns:
+        OutboundMessage, whose ts is set once posted
+    """
+    from .outbox import enqueue
+    
+    return enqueue(channel_id, text, blocks=blocks, thread_ts=thread_ts, merge=merge)
+
+
 def get_slack_messages(
     channel_id: str,
     limit: int = 100,
@@ -531,7 +1009,7 @@ def get_slack_messages(
     
     Args:
         channel_id: The Slack channel ID
-        limit: Number of messages to fetch
+        limit: Number of messages to fetch, across as many pages as needed
         oldest: Only messages after this timestamp
         latest: Only messages before this timestamp
         
@@ -539,10 +1017,10 @@ def get_slack_messages(
         List of message dictionaries
     """
     service = get_slack_service()
-    result = service.get_channel_messages(
+    return list(service.iter_channel_messages(
         channel_id=channel_id,
-        limit=limit,
         oldest=oldest,
-        latest=latest
-    )
-    return result.get("messages", [])
+        latest=latest,
+        page_size=min(limit, 200),
+        limit=limit
+    ))
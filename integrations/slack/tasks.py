@@ -0,0 +1,62 @@
+# integrations/slack/tasks.py
+"""
+Celery tasks for the Slack integration.
+
+Calls that can't get a rate-limit slot in time (SlackRateLimited) are not
+failed: the task is retried once the limit allows it.
+"""
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from . import metadata
+from .outbox import process_due
+from .services import SlackError, SlackRateLimited
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=5)
+def refresh_slack_metadata(self, kind: str, object_id: str) -> dict:
+    """Refresh a stale cached user or channel (see metadata.py)."""
+    try:
+        metadata.refresh(kind, object_id)
+    except SlackRateLimited as e:
+        raise self.retry(countdown=e.retry_after)
+    except SlackError as e:
+        logger.warning("Slack %s %s refresh failed: %s", kind, object_id, e)
+        return {"kind": kind, "id": object_id, "error": str(e)}
+    return {"kind": kind, "id": object_id}
+
+
+@shared_task(bind=True, max_retries=5)
+def warm_slack_users(self) -> dict:
+    """Cache every workspace user from users.list (see metadata.warm_users)."""
+    try:
+        count = metadata.warm_users()
+    except SlackRateLimited as e:
+        # Users cached so far are kept; the retry starts over
+        raise self.retry(countdown=e.retry_after)
+    except SlackError as e:
+        # Also raised when no bot token is configured
+        logger.warning("Slack user cache warm-up failed: %s", e)
+        return {"error": str(e)}
+    logger.info("Slack user cache warmed: %d users", count)
+    return {"users": count}
+
+
+@shared_task
+def send_outbox() -> dict:
+    """
+    Post the due messages of the outbox (see outbox.py).
+
+    Scheduled by enqueue() when a message is due, and run periodically by
+    beat for retries.
+    """
+    stats = process_due(limit=getattr(settings, "SLACK_OUTBOX_CLAIM_LIMIT", 200))
+    if stats["claimed"]:
+        logger.info("Slack outbox: %s", stats)
+    return stats
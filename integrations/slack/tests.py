@@ -0,0 +1,527 @@
+"""
+Tests for the Slack integration.
+"""
+import asyncio
+import time
+from unittest import mock
+
+import requests
+
+from aiohttp import web
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from mixtum_core.async_http import close_client_session
+from mixtum_core.http_sessions import build_session
+from mixtum_core.testing import stub_server
+
+from . import metadata
+from .export import export_channel_sync
+from .models import OutboundMessage, OutboundMessageStatus
+from .outbox import enqueue, process_due
+from .ratelimit import AsyncTokenBucket, RateLimiter, RateLimitExceeded, method_limit, throttle_stats
+from .services import AsyncSlackService, SlackRateLimited, SlackService
+
+
+def make_messages(start, count, threads=()):
+    messages = []
+    for n in range(start, start + count):
+        ts = f"1700000{n:03d}.000100"
+        message = {"ts": ts, "text": f"message {n}", "user": "U1"}
+        if n in threads:
+            message.update(thread_ts=ts, reply_count=3)
+        messages.append(message)
+    return messages
+
+
+class SlackStub:
+    """
+    Slack API stub: a channel of 10 messages, newest first, in pages of
+    `limit`; messages 2, 5 and 8 are threads with 3 replies, in pages of 2.
+    """
+
+    def __init__(self):
+        self.messages = list(reversed(make_messages(0, 10, threads=(2, 5, 8))))
+        self.calls = {}
+        self.in_flight = 0
+        self.peak = 0
+        self.rate_limited_once = False
+
+    def count(self, method):
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    async def history(self, request):
+        self.count("conversations.history")
+        limit = int(request.query["limit"])
+        offset = int(request.query.get("cursor") or 0)
+        page = self.messages[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(self.messages) else ""
+        return web.json_response({
+            "ok": True,
+            "messages": page,
+            "has_more": bool(next_cursor),
+            "response_metadata": {"next_cursor": next_cursor}
+        })
+
+    async def replies(self, request):
+        self.count("conversations.replies")
+        if not self.rate_limited_once:
+            self.rate_limited_once = True
+            return web.json_response({"ok": False, "error": "ratelimited"}, status=429, headers={"Retry-After": "0"})
+
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.in_flight -= 1
+
+        parent_ts = request.query["ts"]
+        thread = [{"ts": parent_ts, "thread_ts": parent_ts, "reply_count": 3}] + [
+            {"ts": f"{parent_ts[:-3]}{n:03d}", "thread_ts": parent_ts, "text": f"reply {n}"} for n in (1, 2, 3)
+        ]
+        # The parent comes first on every page, as Slack does
+        if request.query.get("cursor"):
+            page, next_cursor = [thread[0], thread[3]], ""
+        else:
+            page, next_cursor = thread[:3], "page2"
+        return web.json_response({"ok": True, "messages": page, "response_metadata": {"next_cursor": next_cursor}})
+
+    async def users_list(self, request):
+        self.count("users.list")
+        offset = int(request.query.get("cursor") or 0)
+        members = [
+            {"id": f"U{n}", "name": f"user{n}", "real_name": f"User {n}", "profile": {"display_name": f"u{n}"}}
+            for n in range(offset, min(offset + 2, 5))
+        ]
+        next_cursor = str(offset + 2) if offset + 2 < 5 else ""
+        return web.json_response({"ok": True, "members": members, "response_metadata": {"next_cursor": next_cursor}})
+
+    async def users_info(self, request):
+        self.count("users.info")
+        user_id = request.query["user"]
+        return web.json_response({"ok": True, "user": {"id": user_id, "name": user_id.lower()}})
+
+    def routes(self):
+        return {
+            ("GET", "/conversations.history"): self.history,
+            ("GET", "/conversations.replies"): self.replies,
+            ("GET", "/users.list"): self.users_list,
+            ("GET", "/users.info"): self.users_info,
+        }
+
+
+class PaginationTests(TestCase):
+    """Tests for the cursor-following iterators."""
+
+    def setUp(self):
+        self.stub = SlackStub()
+
+    def service(self, base_url):
+        service = SlackService(bot_token="xoxb-test", rate_limiter=RateLimiter())
+        service.BASE_URL = base_url
+        return service
+
+    def test_iter_channel_messages_follows_cursors(self):
+        with stub_server(self.stub.routes()) as base_url:
+            messages = list(self.service(base_url).iter_channel_messages("C1", page_size=4))
+
+        self.assertEqual(len(messages), 10)
+        self.assertEqual(messages, self.stub.messages)
+        self.assertEqual(self.stub.calls["conversations.history"], 3)
+
+    def test_iterators_are_lazy(self):
+        with stub_server(self.stub.routes()) as base_url:
+            messages = self.service(base_url).iter_channel_messages("C1", page_size=4)
+            first = next(messages)
+            self.assertEqual(self.stub.calls["conversations.history"], 1)
+            limited = list(self.service(base_url).iter_channel_messages("C1", page_size=4, limit=6))
+
+        self.assertEqual(first, self.stub.messages[0])
+        self.assertEqual(len(limited), 6)
+        self.assertEqual(self.stub.calls["conversations.history"], 3)
+
+    def test_iter_thread_replies_skips_the_parent(self):
+        self.stub.rate_limited_once = True
+        parent_ts = "1700000002.000100"
+        with stub_server(self.stub.routes()) as base_url:
+            replies = list(self.service(base_url).iter_thread_replies("C1", parent_ts))
+
+        self.assertEqual([reply["text"] for reply in replies], ["reply 1", "reply 2", "reply 3"])
+
+
+class AsyncServiceTests(TestCase):
+    """Tests for AsyncSlackService."""
+
+    def test_same_requests_and_results_as_the_sync_service(self):
+        bodies = []
+
+        async def record(request):
+            body = await request.json()
+            bodies.append((request.path, body))
+            return web.json_response({"ok": True, "channel": body["channel"], "ts": "1700000000.000100"})
+
+        async def send_async(service):
+            slack = AsyncSlackService(service)
+            try:
+                return [
+                    await slack.reply_to_thread("C1", "1699999999.000100", "hi", blocks=[{"type": "divider"}]),
+                    await slack.update_message("C1", "1700000000.000100", "edited"),
+                    await slack.add_reaction("C1", "1700000000.000100", "tada"),
+                ]
+            finally:
+                await close_client_session()
+
+        routes = {("POST", f"/{method}"): record for method in ("chat.postMessage", "chat.update", "reactions.add")}
+        with stub_server(routes) as base_url:
+            service = SlackService(bot_token="xoxb-test", rate_limiter=RateLimiter())
+            service.BASE_URL = base_url
+            sync_results = [
+                service.reply_to_thread("C1", "1699999999.000100", "hi", blocks=[{"type": "divider"}]),
+                service.update_message("C1", "1700000000.000100", "edited"),
+                service.add_reaction("C1", "1700000000.000100", "tada"),
+            ]
+            async_results = async_to_sync(send_async)(service)
+
+        self.assertEqual(bodies[:3], bodies[3:])
+        self.assertEqual(bodies[0][1]["thread_ts"], "1699999999.000100")
+        self.assertEqual(sync_results, async_results)
+
+
+class ChannelExportTests(TestCase):
+    """Tests for export.export_channel."""
+
+    def test_export_hydrates_threads_concurrently(self):
+        stub = SlackStub()
+        with stub_server(stub.routes()) as base_url:
+            service = SlackService(bot_token="xoxb-test", rate_limiter=RateLimiter())
+            service.BASE_URL = base_url
+            result = export_channel_sync("C1", max_workers=2, service=service)
+
+        self.assertEqual(result["message_count"], 10)
+        self.assertEqual(result["thread_count"], 3)
+        self.assertEqual(result["reply_count"], 9)
+        self.assertEqual(result["errors"], [])
+        # Oldest first, replies attached to their parents
+        self.assertEqual(result["messages"][0]["text"], "message 0")
+        self.assertEqual([reply["text"] for reply in result["messages"][2]["replies"]], ["reply 1", "reply 2", "reply 3"])
+        # Bounded concurrency; the 429 was retried
+        self.assertEqual(stub.peak, 2)
+        self.assertEqual(stub.calls["conversations.replies"], 7)
+
+
+class RateLimitTests(TestCase):
+    """Tests for the tier rate limits."""
+
+    def test_method_limits(self):
+        self.assertEqual(method_limit("conversations.replies"), 50)
+        self.assertIsNone(method_limit("chat.postMessage"))
+        with override_settings(SLACK_TIER_LIMITS={3: 5}):
+            self.assertEqual(method_limit("conversations.replies"), 5)
+
+    def test_token_bucket_spaces_calls(self):
+        async def acquire(count):
+            # 20 calls per second, no burst
+            bucket = AsyncTokenBucket(per_minute=1200, burst_seconds=0)
+            started = time.monotonic()
+            for _ in range(count):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        elapsed = async_to_sync(acquire)(5)
+
+        self.assertGreaterEqual(elapsed, 0.19)
+
+
+class SharedRateLimiterTests(TestCase):
+    """Tests for the RateLimiter of SlackService."""
+
+    def setUp(self):
+        cache.clear()
+        self.posts = []
+        self.rate_limited = 0
+
+    async def post_message(self, request):
+        if self.rate_limited:
+            self.rate_limited -= 1
+            return web.json_response({"ok": False, "error": "ratelimited"}, status=429, headers={"Retry-After": "0"})
+        body = await request.json()
+        self.posts.append(body)
+        return web.json_response({"ok": True, "channel": body["channel"], "ts": f"1700000000.{len(self.posts):06d}"})
+
+    def service(self, base_url, **kwargs):
+        service = SlackService(bot_token="xoxb-test", rate_limiter=RateLimiter(), **kwargs)
+        service.BASE_URL = base_url
+        return service
+
+    def test_posts_wait_for_the_channel_slot(self):
+        limiter = RateLimiter()
+        with mock.patch("integrations.slack.ratelimit.time.sleep") as sleep:
+            # One message per second per channel, after a 3 second burst
+            waits = [limiter.acquire("chat.postMessage", channel="C1", token="xoxb-test") for _ in range(5)]
+            other = limiter.acquire("chat.postMessage", channel="C2", token="xoxb-test")
+
+        self.assertEqual(waits[:4], [0, 0, 0, 0])
+        self.assertAlmostEqual(waits[4], 1.0, delta=0.1)
+        self.assertEqual(other, 0)
+        sleep.assert_called_once_with(waits[4])
+
+        stats = throttle_stats()["chat.postMessage"]
+        self.assertEqual(stats["throttled_calls"], 1)
+        self.assertAlmostEqual(stats["throttled_seconds"], 1.0, delta=0.1)
+
+    @override_settings(SLACK_RATE_LIMIT_MAX_WAIT=0.5)
+    def test_slot_too_far_away_fails_without_waiting(self):
+        limiter = RateLimiter()
+        for _ in range(4):
+            limiter.acquire("chat.postMessage", channel="C1")
+
+        with mock.patch("integrations.slack.ratelimit.time.sleep") as sleep:
+            with self.assertRaises(RateLimitExceeded) as raised:
+                limiter.acquire("chat.postMessage", channel="C1")
+
+        sleep.assert_not_called()
+        self.assertAlmostEqual(raised.exception.retry_after, 1.0, delta=0.1)
+
+    @override_settings(SLACK_RATE_LIMIT_MAX_WAIT=0.5)
+    def test_a_rejected_call_takes_no_slot_from_other_scopes(self):
+        limiter = RateLimiter()
+        # A method limited per workspace (50/min) and per channel (60/min)
+        with mock.patch.dict("integrations.slack.ratelimit.CHANNEL_LIMITS", {"chat.update": 60}):
+            for _ in range(4):
+                limiter.acquire("chat.update", channel="C1")
+            for _ in range(10):
+                with self.assertRaises(RateLimitExceeded):
+                    limiter.acquire("chat.update", channel="C1")
+
+            # The workspace allowance only lost the 4 calls made
+            waits = [limiter.acquire("chat.update", channel=f"D{i}") for i in range(4)]
+        self.assertEqual(waits, [0, 0, 0, 0])
+
+    def test_a_429_holds_the_method(self):
+        limiter = RateLimiter()
+        self.assertTrue(limiter.block("users.list", 5))
+        self.assertFalse(limiter.block("chat.postEphemeral", 5))
+
+        with mock.patch("integrations.slack.ratelimit.time.sleep") as sleep:
+            limiter.acquire("users.list")
+
+        self.assertAlmostEqual(sleep.call_args[0][0], 5, delta=0.1)
+
+    def test_redis_unavailable_falls_back_to_memory(self):
+        limiter = RateLimiter("redis://127.0.0.1:1/0")
+
+        with self.assertLogs("integrations.slack.ratelimit", "WARNING"):
+            self.assertEqual(limiter.acquire("users.list"), 0)
+        self.assertEqual(limiter.acquire("users.list"), 0)
+
+    def test_rate_limited_posts_are_retried(self):
+        self.rate_limited = 2
+        with stub_server({("POST", "/chat.postMessage"): self.post_message}) as base_url:
+            message = self.service(base_url, session=requests.Session()).send_message("C1", "hi")
+
+        self.assertEqual(message.ts, "1700000000.000001")
+        self.assertEqual(len(self.posts), 1)
+        self.assertEqual(throttle_stats()["chat.postMessage"]["rate_limited"], 2)
+
+    def test_slack_session_leaves_429s_to_the_limiter(self):
+        self.rate_limited = 1
+        limiter = RateLimiter()
+        with stub_server({("POST", "/chat.postMessage"): self.post_message}) as base_url:
+            service = SlackService(
+                bot_token="xoxb-test", rate_limiter=limiter, session=build_session(retry_rate_limited=False)
+            )
+            service.BASE_URL = base_url
+            with mock.patch.object(limiter, "block", wraps=limiter.block) as block:
+                service.send_message("C1", "hi")
+
+        block.assert_called_once_with("chat.postMessage", 0, channel="C1", token="xoxb-test")
+        self.assertEqual(throttle_stats()["chat.postMessage"]["rate_limited"], 1)
+
+    def test_send_message_view_waits_for_the_channel_slot(self):
+        user = get_user_model().objects.create_user(username="limited", email="limited@example.com")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with stub_server({("POST", "/chat.postMessage"): self.post_message}) as base_url:
+            service = self.service(base_url)
+            # Another process used the channel's allowance
+            service.rate_limiter.block("chat.postMessage", 0.3, channel="C1", token="xoxb-test")
+            with mock.patch("integrations.slack.services.get_slack_service", return_value=service):
+                started = time.monotonic()
+                response = client.post("/api/slack/send-message/", {"channel_id": "C1", "text": "hi"}, format="json")
+                elapsed = time.monotonic() - started
+                other = client.post("/api/slack/send-message/", {"channel_id": "C2", "text": "hi"}, format="json")
+
+        self.assertEqual((response.status_code, other.status_code), (201, 201))
+        self.assertGreaterEqual(elapsed, 0.25)
+        self.assertEqual(len(self.posts), 2)
+        self.assertEqual(throttle_stats()["chat.postMessage"]["throttled_calls"], 1)
+
+    @override_settings(SLACK_RATE_LIMIT_RETRIES=1)
+    def test_rate_limited_beyond_the_retries(self):
+        self.rate_limited = 5
+        with stub_server({("POST", "/chat.postMessage"): self.post_message}) as base_url:
+            with self.assertRaises(SlackRateLimited) as raised:
+                self.service(base_url, session=requests.Session()).send_message("C1", "hi")
+
+        self.assertEqual(raised.exception.retry_after, 0)
+        self.assertEqual(self.rate_limited, 3)
+        self.assertEqual(self.posts, [])
+
+
+class MetadataCacheTests(TestCase):
+    """Tests for the user and channel metadata cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.stub = SlackStub()
+        self.user = get_user_model().objects.create_user(username="slack", email="slack@example.com")
+
+    def service(self, base_url):
+        service = SlackService(bot_token="xoxb-test", rate_limiter=RateLimiter())
+        service.BASE_URL = base_url
+        return service
+
+    def test_warm_up_and_cached_lookups(self):
+        with stub_server(self.stub.routes()) as base_url:
+            service = self.service(base_url)
+            self.assertEqual(metadata.warm_users(service), 5)
+            self.assertEqual(self.stub.calls["users.list"], 3)
+
+            self.assertEqual(metadata.get_user("U3", service)["real_name"], "User 3")
+            self.assertEqual(metadata.get_user("U9", service)["name"], "u9")
+            self.assertEqual(metadata.get_user("U9", service)["name"], "u9")
+
+        self.assertEqual(self.stub.calls["users.info"], 1)
+
+    @override_settings(SLACK_METADATA_TTL=0)
+    def test_stale_entries_are_refreshed_in_the_background(self):
+        metadata.store(metadata.USER, [{"id": "U1", "name": "old"}])
+
+        with mock.patch("integrations.slack.tasks.refresh_slack_metadata.delay") as refresh:
+            self.assertEqual(metadata.get_user("U1")["name"], "old")
+            self.assertEqual(metadata.get_user("U1")["name"], "old")
+
+        refresh.assert_called_once_with(metadata.USER, "U1")
+
+    def test_message_list_resolves_authors_from_the_cache(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.stub.messages = [
+            {"ts": "1700000001.000100", "text": "hi", "user": "U1"},
+            {"ts": "1700000002.000100", "text": "hello", "user": "U7"},
+            {"ts": "1700000003.000100", "text": "joined", "subtype": "channel_join"},
+        ]
+        metadata.store(metadata.USER, [{"id": "U1", "name": "user1", "real_name": "User 1", "profile": {"image_48": "a.png"}}])
+
+        with stub_server(self.stub.routes()) as base_url, \
+                mock.patch("integrations.slack.services.get_slack_service", return_value=self.service(base_url)), \
+                mock.patch("integrations.slack.tasks.warm_slack_users.delay") as warm_up:
+            response = client.post("/api/slack/get-messages/", {"channel_id": "C1"}, format="json")
+            client.post("/api/slack/get-messages/", {"channel_id": "C1"}, format="json")
+
+        messages = response.json()["messages"]
+        self.assertEqual(messages[0]["author"]["display_name"], "User 1")
+        self.assertEqual(messages[0]["author"]["image"], "a.png")
+        # Not cached: no users.info call, one background warm-up
+        self.assertIsNone(messages[1]["author"])
+        self.assertNotIn("author", messages[2])
+        self.assertNotIn("users.info", self.stub.calls)
+        warm_up.assert_called_once_with()
+
+
+class OutboxTests(TestCase):
+    """Tests for the outbox of queued messages."""
+
+    def setUp(self):
+        cache.clear()
+        self.posts = []
+        self.error = None
+        self.user = get_user_model().objects.create_user(username="outbox", email="outbox@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    async def post_message(self, request):
+        if self.error:
+            return web.json_response({"ok": False, "error": self.error})
+        body = await request.json()
+        self.posts.append(body)
+        return web.json_response({"ok": True, "channel": body["channel"], "ts": f"1700000000.{len(self.posts):06d}"})
+
+    def send_due(self):
+        with stub_server({("POST", "/chat.postMessage"): self.post_message}) as base_url:
+            service = SlackService(bot_token="xoxb-test", rate_limiter=RateLimiter())
+            service.BASE_URL = base_url
+            return process_due(service=service)
+
+    def test_queued_message_is_sent_by_the_worker(self):
+        with mock.patch("integrations.slack.tasks.send_outbox.apply_async") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post("/api/slack/send-message/", {
+                    "channel_id": "C1", "text": "Deployed", "queue": True
+                }, format="json")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], OutboundMessageStatus.PENDING)
+        schedule.assert_called_once_with(countdown=0.0)
+
+        stats = self.send_due()
+
+        self.assertEqual(stats, {"claimed": 1, "posts": 1, "sent": 1, "failed_posts": 0})
+        self.assertEqual(self.posts[0]["text"], "Deployed")
+        detail = self.client.get(f"/api/slack/outbox/{response.json()['id']}/").json()
+        self.assertEqual(detail["status"], OutboundMessageStatus.SENT)
+        self.assertEqual(detail["ts"], "1700000000.000001")
+
+    @override_settings(SLACK_OUTBOX_MERGE_WINDOW=0.01)
+    def test_mergeable_messages_share_one_post(self):
+        with mock.patch("integrations.slack.tasks.send_outbox.apply_async"):
+            merged = [enqueue("C1", f"alert {n}", merge=True) for n in range(3)]
+            alone = enqueue("C1", "not merged")
+            other_channel = enqueue("C2", "alert", merge=True)
+        time.sleep(0.02)
+
+        stats = self.send_due()
+
+        self.assertEqual(stats["posts"], 3)
+        post = next(p for p in self.posts if p["text"].startswith("alert 0"))
+        self.assertEqual([block["type"] for block in post["blocks"]], ["section", "divider", "section", "divider", "section"])
+        self.assertEqual(post["blocks"][2]["text"]["text"], "alert 1")
+        messages = OutboundMessage.objects.filter(pk__in=[m.pk for m in merged])
+        self.assertEqual({(m.ts, m.merged_count) for m in messages}, {(messages[0].ts, 3)})
+        self.assertNotIn("blocks", next(p for p in self.posts if p["text"] == "not merged"))
+        for message in (alone, other_channel):
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutboundMessageStatus.SENT)
+
+    def test_each_thread_window_is_scheduled(self):
+        with mock.patch("integrations.slack.tasks.send_outbox.apply_async") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue("C1", "alert", merge=True)
+                enqueue("C1", "alert", merge=True)
+                enqueue("C1", "reply", thread_ts="1700000000.000001", merge=True)
+
+        # One run for the channel's window, one for the thread's
+        self.assertEqual(schedule.call_count, 2)
+
+    def test_failed_posts(self):
+        with mock.patch("integrations.slack.tasks.send_outbox.apply_async"):
+            message = enqueue("C1", "hi")
+
+        self.error = "internal_error"
+        self.send_due()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboundMessageStatus.PENDING, 1))
+        self.assertGreater(message.next_attempt_at, message.updated_at)
+
+        # Retry a permanent error: given up at once
+        OutboundMessage.objects.filter(pk=message.pk).update(next_attempt_at=message.created_at)
+        self.error = "channel_not_found"
+        self.send_due()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboundMessageStatus.FAILED, 2))
+        self.assertIn("channel_not_found", message.last_error)
@@ -1,11 +1,21 @@
 # integrations/slack/urls.py
-from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from .views import SlackViewSet
-
-router = DefaultRouter()
-router.register(r"", SlackViewSet, basename="slack")
+from django.urls import path
+from . import views
 
 urlpatterns = [
-    path("", include(router.urls)),
+    path("send-message/", views.SendMessageView.as_view(), name="slack-send-message"),
+    path("reply-thread/", views.ReplyToThreadView.as_view(), name="slack-reply-to-thread"),
+    path("get-messages/", views.GetMessagesView.as_view(), name="slack-get-messages"),
+    path("export-channel/", views.ExportChannelView.as_view(), name="slack-export-channel"),
+    path("get-thread-replies/", views.GetThreadRepliesView.as_view(), name="slack-get-thread-replies"),
+    path("update-message/", views.UpdateMessageView.as_view(), name="slack-update-message"),
+    path("delete-message/", views.DeleteMessageView.as_view(), name="slack-delete-message"),
+    path("add-reaction/", views.AddReactionView.as_view(), name="slack-add-reaction"),
+    path("remove-reaction/", views.RemoveReactionView.as_view(), name="slack-remove-reaction"),
+    path("channel-info/", views.ChannelInfoView.as_view(), name="slack-channel-info"),
+    path("user-info/", views.UserInfoView.as_view(), name="slack-user-info"),
+    path("channels/", views.ListChannelsView.as_view(), name="slack-list-channels"),
+    path("outbox/", views.OutboxView.as_view(), name="slack-outbox"),
+    path("outbox/<uuid:message_id>/", views.OutboxMessageDetailView.as_view(), name="slack-outbox-message"),
+    path("rate-limits/", views.RateLimitStatsView.as_view(), name="slack-rate-limits"),
 ]
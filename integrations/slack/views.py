@@ -2,18 +2,41 @@
 """
 API Views for Slack integration.
 Provides endpoints for interacting with Slack.
+
+Every endpoint is a call to the Slack API, so the views are async: served
+by ASGI workers, a request waiting on Slack doesn't hold a worker. Messages
+can also be queued in the outbox instead ("queue": true), to be posted by
+a Celery worker (see outbox.py).
+
+User and channel info come from the metadata cache, and message lists get
+their authors from it without further Slack calls (see metadata.py).
+
+A call that can't get its rate-limit slot in time is answered with 429 and
+Retry-After.
 """
+import math
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import get_object_or_404
 from rest_framework import status
-from rest_framework.decorators import action
-from rest_framework.response import Response
-from rest_framework.viewsets import ViewSet
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .services import SlackService, SlackError, get_slack_service
+from mixtum_core.async_views import AsyncAPIView, json_response
+
+from . import metadata
+from .export import export_channel
+from .models import OutboundMessage, OutboundMessageStatus
+from .outbox import enqueue
+from .ratelimit import throttle_stats
+from .services import AsyncSlackService, SlackError, SlackRateLimited
 from .serializers import (
     SendMessageSerializer,
+    OutboundMessageSerializer,
     ReplyToThreadSerializer,
     GetMessagesSerializer,
+    ExportChannelSerializer,
     GetThreadRepliesSerializer,
     UpdateMessageSerializer,
     DeleteMessageSerializer,
@@ -23,28 +46,28 @@ from .serializers import (
 )
 
 
-class SlackViewSet(ViewSet):
+class SlackAPIView(AsyncAPIView):
     """
-    ViewSet for Slack operations.
-    
-    Provides endpoints for:
-    - Sending messages
-    - Replying to threads
-    - Fetching channel messages
-    - Fetching thread replies
-    - Managing messages (update, delete)
-    - Adding/removing reactions
-    - Getting channel/user info
+    Base view for Slack operations.
+
+    POST endpoints validate the body with `serializer_class` and pass the
+    validated data to `perform()`, which returns the response body (and
+    optionally the status code). Slack errors are reported uniformly.
     """
     permission_classes = [IsAuthenticated]
-    
-    def _get_service(self) -> SlackService:
-        """Get or create Slack service instance."""
-        return get_slack_service()
-    
-    def _handle_slack_error(self, e: SlackError) -> Response:
+    serializer_class = None
+    success_status = status.HTTP_200_OK
+
+    def _handle_slack_error(self, e: SlackError):
         """Handle Slack API errors uniformly."""
-        return Response(
+        if isinstance(e, SlackRateLimited):
+            response = json_response(
+                {"error": str(e), "error_code": e.error_code, "retry_after": e.retry_after},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            response["Retry-After"] = str(math.ceil(e.retry_after))
+            return response
+        return json_response(
             {
                 "error": str(e),
                 "error_code": e.error_code,
@@ -52,324 +75,387 @@ class SlackViewSet(ViewSet):
             },
             status=status.HTTP_400_BAD_REQUEST
         )
-    
-    @action(detail=False, methods=["post"], url_path="send-message")
-    def send_message(self, request):
-        """
-        Send a message to a Slack channel.
-        
-        POST /api/slack/send-message/
-        {
-            "channel_id": "C12345678",
-            "text": "Hello, World!",
-            "thread_ts": null,  // optional: for thread replies
-            "blocks": [],  // optional: Block Kit blocks
-            "reply_broadcast": false  // optional
-        }
-        """
-        serializer = SendMessageSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
-        try:
-            service = self._get_service()
-            result = service.send_message(
-                channel_id=data["channel_id"],
-                text=data["text"],
-                thread_ts=data.get("thread_ts"),
-                blocks=data.get("blocks"),
-                reply_broadcast=data.get("reply_broadcast", False)
-            )
-            return Response({
-                "ok": True,
-                "ts": result.ts,
-                "channel": result.channel,
-                "text": result.text,
-                "thread_ts": result.thread_ts
-            }, status=status.HTTP_201_CREATED)
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="reply-thread")
-    def reply_to_thread(self, request):
-        """
-        Reply to a Slack thread.
-        
-        POST /api/slack/reply-thread/
-        {
-            "channel_id": "C12345678",
-            "thread_ts": "1234567890.123456",
-            "text": "This is a reply",
-            "blocks": [],  // optional
-            "reply_broadcast": false  // optional
-        }
-        """
-        serializer = ReplyToThreadSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
-        try:
-            service = self._get_service()
-            result = service.reply_to_thread(
-                channel_id=data["channel_id"],
-                thread_ts=data["thread_ts"],
-                text=data["text"],
-                blocks=data.get("blocks"),
-                reply_broadcast=data.get("reply_broadcast", False)
-            )
-            return Response({
-                "ok": True,
-                "ts": result.ts,
-                "channel": result.channel,
-                "text": result.text,
-                "thread_ts": result.thread_ts
-            }, status=status.HTTP_201_CREATED)
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="get-messages")
-    def get_messages(self, request):
-        """
-        Fetch messages from a Slack channel.
-        
-        POST /api/slack/get-messages/
-        {
-            "channel_id": "C12345678",
-            "limit": 100,  // optional
-            "oldest": null,  // optional: Unix timestamp
-            "latest": null,  // optional: Unix timestamp
-            "cursor": null  // optional: pagination
-        }
-        """
-        serializer = GetMessagesSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
-        try:
-            service = self._get_service()
-            result = service.get_channel_messages(
-                channel_id=data["channel_id"],
-                limit=data.get("limit", 100),
-                oldest=data.get("oldest"),
-                latest=data.get("latest"),
-                cursor=data.get("cursor")
-            )
-            return Response({
-                "ok": True,
-                "messages": result.get("messages", []),
-                "has_more": result.get("has_more", False),
-                "response_metadata": result.get("response_metadata", {})
-            })
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="get-thread-replies")
-    def get_thread_replies(self, request):
-        """
-        Fetch replies to a thread.
-        
-        POST /api/slack/get-thread-replies/
-        {
-            "channel_id": "C12345678",
-            "thread_ts": "1234567890.123456",
-            "limit": 100,  // optional
-            "cursor": null  // optional
-        }
-        """
-        serializer = GetThreadRepliesSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
+
+    async def perform(self, service: AsyncSlackService, data: dict) -> dict:
+        raise NotImplementedError
+
+    async def run(self, data: dict):
         try:
-            service = self._get_service()
-            result = service.get_thread_replies(
-                channel_id=data["channel_id"],
-                thread_ts=data["thread_ts"],
-                limit=data.get("limit", 100),
-                cursor=data.get("cursor")
-            )
-            return Response({
-                "ok": True,
-                "messages": result.get("messages", []),
-                "has_more": result.get("has_more", False),
-                "response_metadata": result.get("response_metadata", {})
-            })
+            body = await self.perform(AsyncSlackService(), data)
         except SlackError as e:
             return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="update-message")
-    def update_message(self, request):
-        """
-        Update an existing Slack message.
-        
-        POST /api/slack/update-message/
-        {
-            "channel_id": "C12345678",
-            "ts": "1234567890.123456",
-            "text": "Updated message text",
-            "blocks": []  // optional
+        return json_response(body, status=self.success_status)
+
+
+class SlackPostView(SlackAPIView):
+
+    async def post(self, request):
+        return await self.run(self.validate(self.serializer_class, request.data))
+
+
+class SendMessageView(SlackPostView):
+    """
+    Send a message to a Slack channel.
+
+    POST /api/slack/send-message/
+    {
+        "channel_id": "C12345678",
+        "text": "Hello, World!",
+        "thread_ts": null,  // optional: for thread replies
+        "blocks": [],  // optional: Block Kit blocks
+        "reply_broadcast": false,  // optional
+        "queue": false,  // optional: post from the outbox, answer 202 with the message id
+        "merge": false  // optional, queued messages: merge with others to the channel
+    }
+    """
+    serializer_class = SendMessageSerializer
+    success_status = status.HTTP_201_CREATED
+
+    async def post(self, request):
+        data = self.validate(self.serializer_class, request.data)
+        if not data["queue"]:
+            return await self.run(data)
+
+        message = await sync_to_async(enqueue)(
+            data["channel_id"],
+            data["text"],
+            blocks=data.get("blocks"),
+            thread_ts=data.get("thread_ts"),
+            reply_broadcast=data.get("reply_broadcast", False),
+            merge=data["merge"],
+            created_by=request.user
+        )
+        return json_response(OutboundMessageSerializer(message).data, status=status.HTTP_202_ACCEPTED)
+
+    async def perform(self, service, data):
+        result = await service.send_message(
+            channel_id=data["channel_id"],
+            text=data["text"],
+            thread_ts=data.get("thread_ts"),
+            blocks=data.get("blocks"),
+            reply_broadcast=data.get("reply_broadcast", False)
+        )
+        return {
+            "ok": True,
+            "ts": result.ts,
+            "channel": result.channel,
+            "text": result.text,
+            "thread_ts": result.thread_ts
         }
-        """
-        serializer = UpdateMessageSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
-        try:
-            service = self._get_service()
-            result = service.update_message(
-                channel_id=data["channel_id"],
-                ts=data["ts"],
-                text=data["text"],
-                blocks=data.get("blocks")
-            )
-            return Response({
-                "ok": True,
-                "ts": result.ts,
-                "channel": result.channel,
-                "text": result.text
-            })
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="delete-message")
-    def delete_message(self, request):
-        """
-        Delete a Slack message.
-        
-        POST /api/slack/delete-message/
-        {
-            "channel_id": "C12345678",
-            "ts": "1234567890.123456"
+
+
+class ReplyToThreadView(SlackPostView):
+    """
+    Reply to a Slack thread.
+
+    POST /api/slack/reply-thread/
+    {
+        "channel_id": "C12345678",
+        "thread_ts": "1234567890.123456",
+        "text": "This is a reply",
+        "blocks": [],  // optional
+        "reply_broadcast": false  // optional
+    }
+    """
+    serializer_class = ReplyToThreadSerializer
+    success_status = status.HTTP_201_CREATED
+
+    async def perform(self, service, data):
+        result = await service.reply_to_thread(
+            channel_id=data["channel_id"],
+            thread_ts=data["thread_ts"],
+            text=data["text"],
+            blocks=data.get("blocks"),
+            reply_broadcast=data.get("reply_broadcast", False)
+        )
+        return {
+            "ok": True,
+            "ts": result.ts,
+            "channel": result.channel,
+            "text": result.text,
+            "thread_ts": result.thread_ts
         }
-        """
-        serializer = DeleteMessageSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
-        try:
-            service = self._get_service()
-            service.delete_message(
-                channel_id=data["channel_id"],
-                ts=data["ts"]
-            )
-            return Response({"ok": True})
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="add-reaction")
-    def add_reaction(self, request):
-        """
-        Add a reaction to a message.
-        
-        POST /api/slack/add-reaction/
-        {
-            "channel_id": "C12345678",
-            "ts": "1234567890.123456",
-            "emoji": "thumbsup"
+
+
+class GetMessagesView(SlackPostView):
+    """
+    Fetch messages from a Slack channel.
+
+    POST /api/slack/get-messages/
+    {
+        "channel_id": "C12345678",
+        "limit": 100,  // optional
+        "oldest": null,  // optional: Unix timestamp
+        "latest": null,  // optional: Unix timestamp
+        "cursor": null  // optional: pagination
+    }
+    """
+    serializer_class = GetMessagesSerializer
+
+    async def perform(self, service, data):
+        result = await service.get_channel_messages(
+            channel_id=data["channel_id"],
+            limit=data.get("limit", 100),
+            oldest=data.get("oldest"),
+            latest=data.get("latest"),
+            cursor=data.get("cursor")
+        )
+        return {
+            "ok": True,
+            "messages": await metadata.aresolve_authors(result.get("messages", [])),
+            "has_more": result.get("has_more", False),
+            "response_metadata": result.get("response_metadata", {})
         }
-        """
-        serializer = AddReactionSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
-        try:
-            service = self._get_service()
-            service.add_reaction(
-                channel_id=data["channel_id"],
-                ts=data["ts"],
-                emoji=data["emoji"]
-            )
-            return Response({"ok": True})
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="remove-reaction")
-    def remove_reaction(self, request):
-        """
-        Remove a reaction from a message.
-        
-        POST /api/slack/remove-reaction/
-        {
-            "channel_id": "C12345678",
-            "ts": "1234567890.123456",
-            "emoji": "thumbsup"
+
+
+class ExportChannelView(SlackPostView):
+    """
+    Export a channel: every message in the range, with thread replies.
+
+    Pages are followed to the end; thread replies are fetched concurrently
+    within the Slack rate limits (see export.py).
+
+    POST /api/slack/export-channel/
+    {
+        "channel_id": "C12345678",
+        "oldest": "1700000000",  // optional: Unix timestamp
+        "latest": null,  // optional: Unix timestamp
+        "include_replies": true,  // optional
+        "max_workers": 8  // optional
+    }
+    """
+    serializer_class = ExportChannelSerializer
+
+    async def perform(self, service, data):
+        result = await export_channel(
+            channel_id=data["channel_id"],
+            oldest=data.get("oldest"),
+            latest=data.get("latest"),
+            include_replies=data.get("include_replies", True),
+            max_workers=data.get("max_workers"),
+            service=service
+        )
+        messages = result["messages"] + [reply for message in result["messages"] for reply in message.get("replies", [])]
+        await metadata.aresolve_authors(messages)
+        return {"ok": True, **result}
+
+
+class GetThreadRepliesView(SlackPostView):
+    """
+    Fetch replies to a thread.
+
+    POST /api/slack/get-thread-replies/
+    {
+        "channel_id": "C12345678",
+        "thread_ts": "1234567890.123456",
+        "limit": 100,  // optional
+        "cursor": null  // optional
+    }
+    """
+    serializer_class = GetThreadRepliesSerializer
+
+    async def perform(self, service, data):
+        result = await service.get_thread_replies(
+            channel_id=data["channel_id"],
+            thread_ts=data["thread_ts"],
+            limit=data.get("limit", 100),
+            cursor=data.get("cursor")
+        )
+        return {
+            "ok": True,
+            "messages": await metadata.aresolve_authors(result.get("messages", [])),
+            "has_more": result.get("has_more", False),
+            "response_metadata": result.get("response_metadata", {})
         }
-        """
-        serializer = AddReactionSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        
-        try:
-            service = self._get_service()
-            service.remove_reaction(
-                channel_id=data["channel_id"],
-                ts=data["ts"],
-                emoji=data["emoji"]
-            )
-            return Response({"ok": True})
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="channel-info")
-    def channel_info(self, request):
-        """
-        Get information about a Slack channel.
-        
-        POST /api/slack/channel-info/
-        {
-            "channel_id": "C12345678"
+
+
+class UpdateMessageView(SlackPostView):
+    """
+    Update an existing Slack message.
+
+    POST /api/slack/update-message/
+    {
+        "channel_id": "C12345678",
+        "ts": "1234567890.123456",
+        "text": "Updated message text",
+        "blocks": []  // optional
+    }
+    """
+    serializer_class = UpdateMessageSerializer
+
+    async def perform(self, service, data):
+        result = await service.update_message(
+            channel_id=data["channel_id"],
+            ts=data["ts"],
+            text=data["text"],
+            blocks=data.get("blocks")
+        )
+        return {
+            "ok": True,
+            "ts": result.ts,
+            "channel": result.channel,
+            "text": result.text
         }
-        """
-        serializer = ChannelInfoSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        
-        try:
-            service = self._get_service()
-            channel = service.get_channel_info(serializer.validated_data["channel_id"])
-            return Response({"ok": True, "channel": channel})
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["post"], url_path="user-info")
-    def user_info(self, request):
-        """
-        Get information about a Slack user.
-        
-        POST /api/slack/user-info/
-        {
-            "user_id": "U12345678"
+
+
+class DeleteMessageView(SlackPostView):
+    """
+    Delete a Slack message.
+
+    POST /api/slack/delete-message/
+    {
+        "channel_id": "C12345678",
+        "ts": "1234567890.123456"
+    }
+    """
+    serializer_class = DeleteMessageSerializer
+
+    async def perform(self, service, data):
+        await service.delete_message(
+            channel_id=data["channel_id"],
+            ts=data["ts"]
+        )
+        return {"ok": True}
+
+
+class AddReactionView(SlackPostView):
+    """
+    Add a reaction to a message.
+
+    POST /api/slack/add-reaction/
+    {
+        "channel_id": "C12345678",
+        "ts": "1234567890.123456",
+        "emoji": "thumbsup"
+    }
+    """
+    serializer_class = AddReactionSerializer
+
+    async def perform(self, service, data):
+        await service.add_reaction(
+            channel_id=data["channel_id"],
+            ts=data["ts"],
+            emoji=data["emoji"]
+        )
+        return {"ok": True}
+
+
+class RemoveReactionView(SlackPostView):
+    """
+    Remove a reaction from a message.
+
+    POST /api/slack/remove-reaction/
+    {
+        "channel_id": "C12345678",
+        "ts": "1234567890.123456",
+        "emoji": "thumbsup"
+    }
+    """
+    serializer_class = AddReactionSerializer
+
+    async def perform(self, service, data):
+        await service.remove_reaction(
+            channel_id=data["channel_id"],
+            ts=data["ts"],
+            emoji=data["emoji"]
+        )
+        return {"ok": True}
+
+
+class ChannelInfoView(SlackPostView):
+    """
+    Get information about a Slack channel.
+
+    POST /api/slack/channel-info/
+    {
+        "channel_id": "C12345678"
+    }
+    """
+    serializer_class = ChannelInfoSerializer
+
+    async def perform(self, service, data):
+        channel = await metadata.aget(metadata.CHANNEL, data["channel_id"], service)
+        return {"ok": True, "channel": channel}
+
+
+class UserInfoView(SlackPostView):
+    """
+    Get information about a Slack user.
+
+    POST /api/slack/user-info/
+    {
+        "user_id": "U12345678"
+    }
+    """
+    serializer_class = UserInfoSerializer
+
+    async def perform(self, service, data):
+        user = await metadata.aget(metadata.USER, data["user_id"], service)
+        return {"ok": True, "user": user}
+
+
+class ListChannelsView(SlackAPIView):
+    """
+    List channels the bot has access to.
+
+    GET /api/slack/channels/
+    Query params:
+    - limit: int (default 100)
+    - cursor: str (optional, for pagination)
+    """
+
+    async def get(self, request):
+        return await self.run({
+            "limit": int(request.query_params.get("limit", 100)),
+            "cursor": request.query_params.get("cursor")
+        })
+
+    async def perform(self, service, data):
+        result = await service.list_channels(limit=data["limit"], cursor=data["cursor"])
+        return {
+            "ok": True,
+            "channels": result.get("channels", []),
+            "response_metadata": result.get("response_metadata", {})
         }
-        """
-        serializer = UserInfoSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        
-        try:
-            service = self._get_service()
-            user = service.get_user_info(serializer.validated_data["user_id"])
-            return Response({"ok": True, "user": user})
-        except SlackError as e:
-            return self._handle_slack_error(e)
-    
-    @action(detail=False, methods=["get"], url_path="channels")
-    def list_channels(self, request):
-        """
-        List channels the bot has access to.
-        
-        GET /api/slack/channels/
-        Query params:
-        - limit: int (default 100)
-        - cursor: str (optional, for pagination)
-        """
-        limit = int(request.query_params.get("limit", 100))
-        cursor = request.query_params.get("cursor")
-        
-        try:
-            service = self._get_service()
-            result = service.list_channels(limit=limit, cursor=cursor)
-            return Response({
-                "ok": True,
-                "channels": result.get("channels", []),
-                "response_metadata": result.get("response_metadata", {})
-            })
-        except SlackError as e:
-            return self._handle_slack_error(e)
+
+
+class RateLimitStatsView(SlackAPIView):
+    """
+    Rate limits per Slack method and the time calls spent waiting for them.
+
+    GET /api/slack/rate-limits/
+    """
+
+    async def get(self, request):
+        return json_response({"ok": True, "methods": await sync_to_async(throttle_stats)()})
+
+
+class OutboxView(APIView):
+    """
+    Latest messages queued by the user (100), optionally by status.
+
+    GET /api/slack/outbox/?status=failed
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        messages = OutboundMessage.objects.filter(created_by=request.user)
+        message_status = request.query_params.get("status")
+        if message_status:
+            if message_status not in OutboundMessageStatus.values:
+                return Response({"error": f"Unknown status: {message_status}"}, status=status.HTTP_400_BAD_REQUEST)
+            messages = messages.filter(status=message_status)
+        return Response(OutboundMessageSerializer(messages[:100], many=True).data)
+
+
+class OutboxMessageDetailView(APIView):
+    """
+    A queued message: its status and, once posted, its ts.
+
+    GET /api/slack/outbox/<uuid>/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, message_id):
+        message = get_object_or_404(OutboundMessage, pk=message_id, created_by=request.user)
+        return Response(OutboundMessageSerializer(message).data)
@@ -0,0 +1,49 @@
+"""
+Shared aiohttp client session for async views.
+
+One session (and so one connection pool) per event loop: under uvicorn a
+worker runs a single loop for its whole life, so every async view of the
+process reuses the same keep-alive connections to Slack, n8n and friends.
+
+Under a sync server Django runs each async view in a fresh event loop,
+so AsyncAPIView closes the loop's session when the request ends.
+"""
+import asyncio
+import logging
+import weakref
+from typing import Optional
+
+import aiohttp
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_client_session() -> aiohttp.ClientSession:
+    """Return the client session of the running event loop, creating it if needed."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=getattr(settings, "ASYNC_HTTP_MAX_CONNECTIONS", 200),
+            limit_per_host=getattr(settings, "ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST", 50),
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[loop] = session
+    return session
+
+
+async def close_client_session() -> None:
+    """Close the client session of the running event loop, if any."""
+    session: Optional[aiohttp.ClientSession] = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def client_timeout(total: Optional[float]) -> aiohttp.ClientTimeout:
+    """Timeout for one request, in seconds (None: no limit)."""
+    return aiohttp.ClientTimeout(total=total)
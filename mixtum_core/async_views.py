@@ -0,0 +1,126 @@
+"""
+Async API views.
+
+DRF views are synchronous: a view waiting on a slow external service holds
+a whole worker. AsyncAPIView is a plain Django view with async handlers
+that authenticates, checks permissions and reports errors the way a DRF
+APIView does, so the integration endpoints waiting on Slack, n8n or the
+Cheshire Cat can be served by an ASGI worker (see scripts/entrypoint.sh)
+with hundreds of outbound calls in flight.
+
+Handlers receive the DRF Request (request.data, request.user, ...) and
+return a Django response, usually through json_response().
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .async_http import close_client_session
+
+def json_response(data, status: int = 200) -> JsonResponse:
+    """JSON response encoded like DRF's JSONRenderer (dates, decimals, ...)."""
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+class AsyncAPIView(View):
+    """
+    Base class for API views with async handlers (async def get/post/...).
+
+    Authentication and permissions are those of the DRF settings unless
+    overridden, as on APIView; they run in a worker thread since they may
+    query the database.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # As for APIView: session authentication enforces CSRF by itself
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def initialize_request(self, request) -> Request:
+        return Request(
+            request,
+            parsers=[parser() for parser in self.parser_classes],
+            authenticators=[auth() for auth in self.authentication_classes],
+        )
+
+    def initial(self, request: Request) -> None:
+        """Authenticate the request and check every permission, like APIView.initial()."""
+        self.perform_authentication(request)
+        self.check_permissions(request)
+
+    def perform_authentication(self, request: Request) -> None:
+        """
+        Authenticate now, in the worker thread: request.user is lazy, and
+        a handler reading it first would query the database on the event
+        loop.
+        """
+        request.user
+
+    def check_permissions(self, request: Request) -> None:
+        """Check every permission, raising NotAuthenticated or PermissionDenied."""
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(detail=getattr(permission, 'message', None))
+
+    def validate(self, serializer_class, data) -> dict:
+        """Validate data with a serializer, raising ValidationError (400)."""
+        serializer = serializer_class(data=data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def handle_exception(self, request: Request, exc: Exception) -> JsonResponse:
+        """Turn an API exception into the response DRF would return."""
+        if isinstance(exc, Http404):
+            exc = exceptions.NotFound(*exc.args)
+        elif isinstance(exc, PermissionDenied):
+            exc = exceptions.PermissionDenied(*exc.args)
+        if not isinstance(exc, exceptions.APIException):
+            raise exc
+
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+            if not header:
+                exc.status_code = 403
+        else:
+            header = None
+
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = json_response(data, status=exc.status_code)
+        if header:
+            response['WWW-Authenticate'] = header
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        drf_request = self.initialize_request(request)
+        self.request = drf_request
+        try:
+            await sync_to_async(self.initial)(drf_request)
+
+            method = request.method.lower()
+            handler = getattr(self, method, None) if method in self.http_method_names else None
+            if handler is None:
+                handler = self.http_method_not_allowed
+            response = handler(drf_request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+            return response
+        except Exception as exc:
+            return self.handle_exception(drf_request, exc)
+        finally:
+            if not isinstance(request, ASGIRequest):
+                # Sync server: this event loop ends with the request
+                await close_client_session()
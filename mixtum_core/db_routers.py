@@ -0,0 +1,190 @@
+"""
+Primary/replica database routing.
+
+When a read replica is configured (see settings/db.py), reads go to it only
+where the code opts in:
+- API views using ReplicaReadMixin, for their read-only methods
+- code running inside replica_reads(), e.g. reporting Celery tasks
+
+Everything else, and every write, uses the primary. A user who has just
+written is pinned to the primary for DATABASE_REPLICA_STICKY_SECONDS, so they
+read their own writes while the replica catches up; a request that writes
+reads from the primary for the rest of the request.
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_DATABASE = "default"
+
+# Methods of ReplicaReadMixin views served from the replica by default
+REPLICA_READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_use_replica = ContextVar("use_replica", default=False)
+_wrote = ContextVar("wrote", default=False)
+
+
+def replica_alias():
+    """Alias of the replica database, or None when none is configured."""
+    return getattr(settings, "DATABASE_REPLICA_ALIAS", None)
+
+
+def reading_from_replica() -> bool:
+    """Whether reads in the current context go to the replica."""
+    return bool(replica_alias()) and _use_replica.get() and not _wrote.get()
+
+
+def replica_cache_timeout(timeout: int) -> int:
+    """
+    Cache timeout for a result computed in the current context.
+
+    The replica may lag behind the primary, so a result read from it is
+    cached for at most DATABASE_REPLICA_CACHE_TIMEOUT seconds.
+    """
+    if reading_from_replica():
+        return min(timeout, getattr(settings, "DATABASE_REPLICA_CACHE_TIMEOUT", 60))
+    return timeout
+
+
+@contextmanager
+def replica_reads():
+    """
+    Send the reads of the enclosed block to the replica.
+
+    Usable as a decorator. Writes still go to the primary, and the reads
+    that follow a write fall back to it.
+    """
+    use_token = _use_replica.set(True)
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _wrote.reset(wrote_token)
+        _use_replica.reset(use_token)
+
+
+# =============================================================================
+# Read-your-writes pinning
+# =============================================================================
+
+def _pin_key(user_id) -> str:
+    return f"db:primary_pin:{user_id}"
+
+
+def pin_to_primary(user) -> None:
+    """Route the reads of `user` to the primary for the sticky window."""
+    if not replica_alias() or user is None or not getattr(user, "is_authenticated", False):
+        return
+    timeout = getattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 10)
+    cache.set(_pin_key(user.pk), True, timeout)
+
+
+def is_pinned_to_primary(user) -> bool:
+    """Whether `user` wrote recently enough to be kept on the primary."""
+    if user is None or not getattr(user, "is_authenticated", False):
+        return False
+    return bool(cache.get(_pin_key(user.pk)))
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending opted-in reads to the replica.
+
+    Writes always go to the primary and mark the current context, so later
+    reads in the same request or task see them.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return replica_alias()
+        return PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db != replica_alias()
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin a user to the primary after a request in which they wrote.
+
+    The write is detected by the router, so it also covers writes made by
+    signal handlers or services called from the view. Async-capable, so
+    async views served by ASGI workers don't need a thread per request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                # DRF sets request.user on the underlying request once it
+                # has authenticated the client (JWT included)
+                pin_to_primary(getattr(request, "user", None))
+        finally:
+            _wrote.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        token = _wrote.set(False)
+        try:
+            # Writes made through sync_to_async propagate their context back
+            response = await self.get_response(request)
+            if _wrote.get():
+                await sync_to_async(pin_to_primary)(getattr(request, "user", None))
+        finally:
+            _wrote.reset(token)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    DRF view mixin serving read-only methods from the replica.
+
+    The decision is taken after authentication, so a user pinned to the
+    primary by a recent write keeps reading from it. Views whose POST is
+    read-only (e.g. calculations) can extend replica_read_methods.
+    """
+    replica_read_methods = REPLICA_READ_METHODS
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # Also on unhandled exceptions, which skip finalize_response
+            if self._replica_token is not None:
+                _use_replica.reset(self._replica_token)
+                self._replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            replica_alias()
+            and request.method in self.replica_read_methods
+            and not is_pinned_to_primary(request.user)
+        ):
+            self._replica_token = _use_replica.set(True)
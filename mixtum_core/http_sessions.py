@@ -0,0 +1,126 @@
+"""
+Pooled HTTP sessions for the outbound API clients (Slack, n8n, ...).
+
+requests.request() opens a new connection, and so a new TCP and TLS
+handshake, for every call. get_session() instead returns one
+requests.Session per name and per process, whose adapter keeps
+connections alive and retries what is safe to retry:
+
+- connection failures, before anything was sent
+- 429 responses, whatever the method: the server did not process the
+  request. Retry-After is honoured, up to HTTP_RETRY_AFTER_MAX seconds
+- 502/503/504 responses, for idempotent methods only
+
+Clients with their own rate limiter (Slack) ask for a session that leaves
+429s to them, so every 429 goes through the limiter and there is a
+single retry layer.
+
+Sessions are dropped in forked children (gunicorn workers, Celery prefork
+pool), so a child never shares the parent's sockets.
+"""
+import os
+import threading
+from typing import Dict
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RATE_LIMITED = 429
+
+
+class RetryAfterRetry(Retry):
+    """
+    urllib3 Retry that also replays rate-limited non-idempotent requests,
+    and caps the Retry-After wait so a worker never sleeps for minutes.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == RATE_LIMITED and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, getattr(settings, "HTTP_RETRY_AFTER_MAX", 30))
+
+
+class NoRateLimitRetry(RetryAfterRetry):
+    """RetryAfterRetry that returns 429 responses to the caller instead."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == RATE_LIMITED:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def build_session(retry_rate_limited: bool = True) -> requests.Session:
+    """
+    A session with a pooled, retrying adapter, configured from settings.
+
+    With retry_rate_limited=False, 429 responses are returned as they are.
+    """
+    retries = getattr(settings, "HTTP_MAX_RETRIES", 2)
+    retry_class = RetryAfterRetry if retry_rate_limited else NoRateLimitRetry
+    retry = retry_class(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=getattr(settings, "HTTP_RETRY_BACKOFF", 0.5),
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, "HTTP_POOL_CONNECTIONS", 4),
+        pool_maxsize=getattr(settings, "HTTP_POOL_MAXSIZE", 20),
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_sessions: Dict[str, requests.Session] = {}
+_lock = threading.Lock()
+
+
+def get_session(name: str, retry_rate_limited: bool = True) -> requests.Session:
+    """
+    Return the shared session called `name` for this process.
+
+    `retry_rate_limited` applies when the session is created (see
+    build_session).
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _sessions[name] = build_session(retry_rate_limited)
+    return session
+
+
+def close_sessions() -> None:
+    """Close every session of this process (e.g. after a settings change)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _reset_after_fork() -> None:
+    # The child inherits the parent's pooled sockets: forget them without
+    # closing, the parent still uses them
+    global _lock
+    _sessions.clear()
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
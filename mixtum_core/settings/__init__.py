@@ -8,6 +8,7 @@ import os
 # 1) Core blocks (order matters a bit: base first)
 from .base import *               # Base, paths, i18n, defaults
 from .db import *                 # DATABASES
+from .cache import *              # CACHES
 from .static_media import *       # STATIC/MEDIA
 from .celery_conf import *        # Celery/Beat/Results
 from .email import *              # Email/TurboSMTP
@@ -27,6 +28,9 @@ if AUTH_MODE == "keycloak":
 
 # 3) Project integrations (placeholders you can grow)
 from .bedrock import *
+from .n8n_conf import *
+from .slack_conf import *
+from .twilio_conf import *
 
 # 4) Environment overlay
 SETTINGS_ENV = os.getenv("SETTINGS_ENV", "local").lower()
@@ -0,0 +1,23 @@
+import os
+
+# Shared cache (Redis) when CACHE_URL is set, per-process memory otherwise.
+# Version-keyed caches in the finance plugins need a shared backend to
+# invalidate across gunicorn/Celery processes.
+CACHE_URL = os.getenv("CACHE_URL", "")
+
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "mixtum"),
+            "TIMEOUT": int(os.getenv("CACHE_DEFAULT_TIMEOUT", "300")),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "mixtum-default",
+        }
+    }
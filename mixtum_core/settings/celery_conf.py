@@ -8,3 +8,39 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 
 DJANGO_CELERY_RESULTS_TASK_ID_MAX_LENGTH = 191
+
+# Static entries, synced into django_celery_beat's DatabaseScheduler
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for the n8n outbox: retries and anything not picked up
+    # by the task scheduled on enqueue
+    "n8n-process-outbox": {
+        "task": "integrations.n8n.tasks.process_outbox",
+        "schedule": float(os.getenv("N8N_OUTBOX_SWEEP_INTERVAL", "60")),
+    },
+    # Keeps the Slack user cache warm for message authors (does nothing
+    # without SLACK_BOT_TOKEN)
+    "slack-warm-users": {
+        "task": "integrations.slack.tasks.warm_slack_users",
+        "schedule": float(os.getenv("SLACK_USER_CACHE_WARM_INTERVAL", "1800")),
+    },
+    # Safety net for the Slack outbox, as for n8n
+    "slack-send-outbox": {
+        "task": "integrations.slack.tasks.send_outbox",
+        "schedule": float(os.getenv("SLACK_OUTBOX_SWEEP_INTERVAL", "60")),
+    },
+    # Safety net for the WhatsApp send queue
+    "whatsapp-send-queue": {
+        "task": "base_modules.integrations.twilio.tasks.send_whatsapp_queue",
+        "schedule": float(os.getenv("TWILIO_SEND_SWEEP_INTERVAL", "60")),
+    },
+    # Fetches the statuses of WhatsApp messages whose callback was lost
+    "whatsapp-reconcile-statuses": {
+        "task": "base_modules.integrations.twilio.tasks.reconcile_whatsapp_statuses",
+        "schedule": float(os.getenv("TWILIO_RECONCILE_INTERVAL", "300")),
+    },
+    # Safety net for incoming WhatsApp messages waiting to be ingested
+    "whatsapp-ingest-inbound": {
+        "task": "base_modules.integrations.twilio.tasks.ingest_whatsapp_inbound",
+        "schedule": float(os.getenv("TWILIO_INBOUND_SWEEP_INTERVAL", "60")),
+    },
+}
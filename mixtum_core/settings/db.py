@@ -1,5 +1,29 @@
+import importlib.util
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
+# Process role, exported by scripts/entrypoint.sh: web, worker or beat.
+# Each role gets its own connection reuse defaults, overridable from env.
+APP_ROLE = os.getenv("APP_ROLE", "web")
+
+_ROLE_DB_DEFAULTS = {
+    # gunicorn worker: one pool per process, shared by its threads
+    "web": {"CONN_MAX_AGE": 60, "POOL_MIN_SIZE": 2, "POOL_MAX_SIZE": 10},
+    # Celery worker: tasks run one at a time per child process
+    "worker": {"CONN_MAX_AGE": 300, "POOL_MIN_SIZE": 1, "POOL_MAX_SIZE": 2},
+    # Celery beat: a single scheduler connection, mostly idle
+    "beat": {"CONN_MAX_AGE": 0, "POOL_MIN_SIZE": 1, "POOL_MAX_SIZE": 1},
+}
+_role_defaults = _ROLE_DB_DEFAULTS.get(APP_ROLE, _ROLE_DB_DEFAULTS["web"])
+
+# DB_POOL=1 uses Django's native psycopg 3 pool (requirements-pool.txt)
+# instead of persistent connections.
+# DB_PGBOUNCER=1 targets PgBouncer in transaction mode: no server-side
+# cursors, and no application-side pool on top of PgBouncer's.
+DB_POOL = os.getenv("DB_POOL", "0") == "1"
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"
+
 if os.getenv("POSTGRES_HOST"):
     DATABASES = {
         "default": {
@@ -9,9 +33,31 @@ if os.getenv("POSTGRES_HOST"):
             "PASSWORD": os.getenv("POSTGRES_PASSWORD", "mixtumpassword"),
             "HOST": os.getenv("POSTGRES_HOST", "db"),
             "PORT": int(os.getenv("POSTGRES_PORT", "5432")),
-            "CONN_MAX_AGE": 60,
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", _role_defaults["CONN_MAX_AGE"])),
+            # Reused connections are checked before use, so a connection
+            # dropped by Postgres or PgBouncer fails over instead of erroring
+            "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "1") == "1",
+            "OPTIONS": {
+                "application_name": f"mixtum-{APP_ROLE}",
+            },
         }
     }
+
+    if DB_POOL and not DB_PGBOUNCER:
+        if importlib.util.find_spec("psycopg_pool") is None:
+            raise ImproperlyConfigured(
+                "DB_POOL=1 needs psycopg 3 with its pool: pip install -r requirements-pool.txt"
+            )
+        # The pool owns the connections: persistent connections must be off
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", _role_defaults["POOL_MIN_SIZE"])),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", _role_defaults["POOL_MAX_SIZE"])),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        }
+
+    if DB_PGBOUNCER:
+        DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
 else:
     from .base import BASE_DIR  # local fallback
     DATABASES = {
@@ -20,3 +66,44 @@ else:
             "NAME": BASE_DIR / "db.sqlite3",
         }
     }
+
+# Optional read replica, used by the views and tasks that opt in
+# (see mixtum_core/db_routers.py).
+#   Postgres: REPLICA_POSTGRES_HOST (other REPLICA_POSTGRES_* default to the
+#             primary's); REPLICA_POSTGRES_SCHEMA points the replica at
+#             another schema of the same database, for local testing.
+#   SQLite:   REPLICA_SQLITE_PATH, e.g. a periodic copy of db.sqlite3.
+DATABASE_REPLICA_ALIAS = None
+
+if os.getenv("REPLICA_POSTGRES_HOST") and DATABASES["default"]["ENGINE"].endswith("postgresql"):
+    _primary = DATABASES["default"]
+    DATABASES["replica"] = {
+        **_primary,
+        "OPTIONS": {**_primary["OPTIONS"], "application_name": f"mixtum-{APP_ROLE}-replica"},
+        "NAME": os.getenv("REPLICA_POSTGRES_DB", _primary["NAME"]),
+        "USER": os.getenv("REPLICA_POSTGRES_USER", _primary["USER"]),
+        "PASSWORD": os.getenv("REPLICA_POSTGRES_PASSWORD", _primary["PASSWORD"]),
+        "HOST": os.getenv("REPLICA_POSTGRES_HOST"),
+        "PORT": int(os.getenv("REPLICA_POSTGRES_PORT", _primary["PORT"])),
+    }
+    if os.getenv("REPLICA_POSTGRES_SCHEMA"):
+        DATABASES["replica"]["OPTIONS"]["options"] = (
+            f"-c search_path={os.getenv('REPLICA_POSTGRES_SCHEMA')}"
+        )
+    DATABASE_REPLICA_ALIAS = "replica"
+elif os.getenv("REPLICA_SQLITE_PATH") and DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("REPLICA_SQLITE_PATH"),
+    }
+    DATABASE_REPLICA_ALIAS = "replica"
+
+if DATABASE_REPLICA_ALIAS:
+    # Tests run against a single database
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+    DATABASE_ROUTERS = ["mixtum_core.db_routers.PrimaryReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they write
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+# Cap on how long results computed from the replica may be cached
+DATABASE_REPLICA_CACHE_TIMEOUT = int(os.getenv("REPLICA_CACHE_TIMEOUT", "60"))
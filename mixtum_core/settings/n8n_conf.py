@@ -0,0 +1,25 @@
+"""
+n8n Configuration Settings
+
+Outbox (queued webhook deliveries) and the domain events sent to n8n.
+N8N_BASE_URL and N8N_API_KEY are read by the service itself.
+"""
+import os
+
+# Events for the same webhook within this many seconds go out as one
+# batched payload (0: every event is sent on its own, at once)
+N8N_OUTBOX_COALESCE_WINDOW = float(os.getenv("N8N_OUTBOX_COALESCE_WINDOW", "5"))
+N8N_OUTBOX_MAX_BATCH = int(os.getenv("N8N_OUTBOX_MAX_BATCH", "100"))
+
+# Retries: delay doubles from the base up to the max, then gives up
+N8N_OUTBOX_MAX_ATTEMPTS = int(os.getenv("N8N_OUTBOX_MAX_ATTEMPTS", "8"))
+N8N_OUTBOX_RETRY_BASE = float(os.getenv("N8N_OUTBOX_RETRY_BASE", "10"))
+N8N_OUTBOX_RETRY_MAX = float(os.getenv("N8N_OUTBOX_RETRY_MAX", "3600"))
+
+# Domain events sent to n8n, as "event=webhook-path" pairs, e.g.
+# N8N_EVENT_WEBHOOKS=ticket.created=new-ticket,transaction.paid=payments
+N8N_EVENT_WEBHOOKS = dict(
+    pair.strip().split("=", 1)
+    for pair in os.getenv("N8N_EVENT_WEBHOOKS", "").split(",")
+    if "=" in pair
+)
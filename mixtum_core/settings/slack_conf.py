@@ -0,0 +1,28 @@
+"""
+Slack Configuration Settings
+
+Rate limiting of the Web API calls (see integrations/slack/ratelimit.py)
+and the outbox of queued messages (integrations/slack/outbox.py).
+SLACK_BOT_TOKEN is read by the service itself.
+"""
+import os
+
+# Redis shared by every process for the per-workspace limits; empty: each
+# process limits its own calls
+SLACK_RATE_LIMIT_REDIS_URL = os.getenv("SLACK_RATE_LIMIT_REDIS_URL", os.getenv("CACHE_URL", ""))
+
+# A call waits at most this many seconds for its slot, then fails with
+# SlackRateLimited (Celery tasks retry later)
+SLACK_RATE_LIMIT_MAX_WAIT = float(os.getenv("SLACK_RATE_LIMIT_MAX_WAIT", "30"))
+
+# 429 responses retried after Retry-After before giving up
+SLACK_RATE_LIMIT_RETRIES = int(os.getenv("SLACK_RATE_LIMIT_RETRIES", "3"))
+
+# Outbox: mergeable messages to the same channel within this many seconds
+# are posted as one Block Kit message (0: never merged)
+SLACK_OUTBOX_MERGE_WINDOW = float(os.getenv("SLACK_OUTBOX_MERGE_WINDOW", "5"))
+
+# Retries: delay doubles from the base up to the max, then gives up
+SLACK_OUTBOX_MAX_ATTEMPTS = int(os.getenv("SLACK_OUTBOX_MAX_ATTEMPTS", "6"))
+SLACK_OUTBOX_RETRY_BASE = float(os.getenv("SLACK_OUTBOX_RETRY_BASE", "10"))
+SLACK_OUTBOX_RETRY_MAX = float(os.getenv("SLACK_OUTBOX_RETRY_MAX", "3600"))
@@ -16,3 +16,31 @@ TWILIO_WHATSAPP_NUMBER = os.environ.get("TWILIO_WHATSAPP_NUMBER", "")
 TWILIO_SKIP_SIGNATURE_VALIDATION = os.environ.get(
     "TWILIO_SKIP_SIGNATURE_VALIDATION", "0"
 ).lower() in ("1", "true", "yes")
+
+# Queued sending (see base_modules/integrations/twilio/sending.py): the
+# account's messages-per-second limit, requests in flight and batch size
+TWILIO_MESSAGES_PER_SECOND = float(os.environ.get("TWILIO_MESSAGES_PER_SECOND", "10"))
+TWILIO_SEND_CONCURRENCY = int(os.environ.get("TWILIO_SEND_CONCURRENCY", "8"))
+TWILIO_SEND_BATCH_SIZE = int(os.environ.get("TWILIO_SEND_BATCH_SIZE", "100"))
+
+# Seconds a send_whatsapp_queue run works before handing over to a new one
+TWILIO_SEND_TIME_BUDGET = float(os.environ.get("TWILIO_SEND_TIME_BUDGET", "50"))
+
+# HTTP connections of the Twilio client (shared per process, kept alive)
+TWILIO_HTTP_TIMEOUT = float(os.environ.get("TWILIO_HTTP_TIMEOUT", "10"))
+TWILIO_HTTP_POOL_MAXSIZE = int(os.environ.get("TWILIO_HTTP_POOL_MAXSIZE", "10"))
+TWILIO_HTTP_MAX_RETRIES = int(os.environ.get("TWILIO_HTTP_MAX_RETRIES", "2"))
+
+# Status reconciliation (see base_modules/integrations/twilio/reconciliation.py):
+# outbound messages without a final status, older than the minimum age and
+# younger than the maximum one, are fetched from Twilio
+TWILIO_RECONCILE_MIN_AGE_MINUTES = int(os.environ.get("TWILIO_RECONCILE_MIN_AGE_MINUTES", "15"))
+TWILIO_RECONCILE_MAX_AGE_HOURS = int(os.environ.get("TWILIO_RECONCILE_MAX_AGE_HOURS", "72"))
+TWILIO_RECONCILE_REQUESTS_PER_SECOND = float(os.environ.get("TWILIO_RECONCILE_REQUESTS_PER_SECOND", "10"))
+TWILIO_RECONCILE_BATCH_SIZE = int(os.environ.get("TWILIO_RECONCILE_BATCH_SIZE", "200"))
+TWILIO_RECONCILE_TIME_BUDGET = float(os.environ.get("TWILIO_RECONCILE_TIME_BUDGET", "120"))
+
+# Incoming messages (see base_modules/integrations/twilio/inbound.py): the
+# webhook stores the payload, a worker ingests them in batches every window
+TWILIO_INBOUND_BATCH_WINDOW = float(os.environ.get("TWILIO_INBOUND_BATCH_WINDOW", "1"))
+TWILIO_INBOUND_BATCH_SIZE = int(os.environ.get("TWILIO_INBOUND_BATCH_SIZE", "500"))
@@ -0,0 +1,35 @@
+"""
+Test helpers shared by the apps' test suites.
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+
+from aiohttp import web
+
+
+@contextmanager
+def stub_server(routes):
+    """
+    Run an aiohttp app in a background thread; yields its base URL.
+
+    `routes` maps (method, path) to async handlers.
+    """
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    for (method, path), handler in routes.items():
+        app.router.add_route(method, path, handler)
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(runner.cleanup())
+        loop.close()
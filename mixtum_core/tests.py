@@ -0,0 +1,324 @@
+"""
+Tests for mixtum_core.
+"""
+import asyncio
+import json
+from unittest import mock, skipUnless
+
+from aiohttp import web
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from plugins.finance_manager_core.models import Category
+
+from integrations.n8n.services import N8nService
+from integrations.slack.services import SlackService
+
+from . import http_sessions
+from .async_views import AsyncAPIView, json_response
+from .db_routers import (
+    ReplicaReadMixin,
+    ReplicaStickinessMiddleware,
+    is_pinned_to_primary,
+    pin_to_primary,
+    replica_reads,
+)
+from .testing import stub_server
+
+REPLICA_SETTINGS = {
+    'DATABASE_ROUTERS': ['mixtum_core.db_routers.PrimaryReplicaRouter'],
+    'DATABASE_REPLICA_ALIAS': 'replica',
+}
+
+
+class ReadAliasView(ReplicaReadMixin, APIView):
+    """Reports the alias its reads would use, without querying."""
+
+    def get(self, request):
+        return Response({'db': Category.objects.all().db})
+
+    def post(self, request):
+        return Response({'db': Category.objects.all().db})
+
+
+class FailingView(ReplicaReadMixin, APIView):
+
+    def get(self, request):
+        raise RuntimeError("boom")
+
+
+@override_settings(**REPLICA_SETTINGS)
+class PrimaryReplicaRouterTests(TestCase):
+    """Tests for replica routing and read-your-writes pinning."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="reader", email="reader@example.com")
+
+    def _get(self, method='get'):
+        request = getattr(APIRequestFactory(), method)('/')
+        force_authenticate(request, user=self.user)
+        view = ReplicaStickinessMiddleware(ReadAliasView.as_view())
+        return view(request).data['db']
+
+    def test_reads_use_primary_unless_opted_in(self):
+        self.assertEqual(Category.objects.all().db, 'default')
+        with replica_reads():
+            self.assertEqual(Category.objects.all().db, 'replica')
+        self.assertEqual(Category.objects.all().db, 'default')
+
+    def test_reads_after_a_write_use_primary(self):
+        with replica_reads():
+            Category.objects.create(name="Nuova")
+            self.assertEqual(Category.objects.all().db, 'default')
+
+    def test_view_reads_from_replica_for_safe_methods(self):
+        self.assertEqual(self._get(), 'replica')
+        self.assertEqual(self._get('post'), 'default')
+        # The context is restored once the response is finalized
+        self.assertEqual(Category.objects.all().db, 'default')
+
+    def test_user_pinned_after_write(self):
+        def write(request):
+            request.user = self.user
+            Category.objects.create(name="Scritta")
+            return HttpResponse()
+
+        ReplicaStickinessMiddleware(write)(RequestFactory().post('/'))
+
+        self.assertTrue(is_pinned_to_primary(self.user))
+        self.assertEqual(self._get(), 'default')
+
+    def test_read_only_request_does_not_pin(self):
+        def read(request):
+            request.user = self.user
+            list(Category.objects.all())
+            return HttpResponse()
+
+        ReplicaStickinessMiddleware(read)(RequestFactory().get('/'))
+        self.assertFalse(is_pinned_to_primary(self.user))
+
+    def test_context_restored_after_unhandled_exception(self):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.user)
+        with self.assertRaises(RuntimeError):
+            ReplicaStickinessMiddleware(FailingView.as_view())(request)
+        self.assertEqual(Category.objects.all().db, 'default')
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_no_replica_configured(self):
+        pin_to_primary(self.user)
+        self.assertFalse(is_pinned_to_primary(self.user))
+        self.assertEqual(self._get(), 'default')
+        with replica_reads():
+            self.assertEqual(Category.objects.all().db, 'default')
+
+
+CONFIGURED_REPLICA = getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+
+
+@skipUnless(CONFIGURED_REPLICA, "set REPLICA_SQLITE_PATH or REPLICA_POSTGRES_HOST to run against a replica")
+class ReplicaIntegrationTests(TransactionTestCase):
+    """
+    End-to-end check with a configured replica (mirrored in tests).
+
+    Data must be committed for the replica connection to see it.
+    """
+    databases = {'default', CONFIGURED_REPLICA} if CONFIGURED_REPLICA else {'default'}
+
+    def test_report_endpoint_reads_from_replica(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(username="report", email="report@example.com")
+        )
+        with CaptureQueriesContext(connections[CONFIGURED_REPLICA]) as replica_queries:
+            response = client.get('/api/finance_manager_core/cashflow/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica_queries.captured_queries)
+
+
+class AsyncIntegrationViewTests(TestCase):
+    """Tests for the async views of the Slack and n8n integrations."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(username="async", email="async@example.com")
+        )
+
+    def test_requires_authentication(self):
+        response = APIClient().post('/api/slack/send-message/', {'channel_id': 'C1', 'text': 'hi'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('detail', response.json())
+
+    def test_authenticates_before_the_handler(self):
+        class DatabaseAuthentication:
+            def authenticate(self, request):
+                user = get_user_model().objects.get(username="async")
+                return user, None
+
+            def authenticate_header(self, request):
+                return None
+
+        class WhoAmIView(AsyncAPIView):
+            authentication_classes = [DatabaseAuthentication]
+            permission_classes = [AllowAny]
+
+            async def get(self, request):
+                return json_response({'username': request.user.username})
+
+        response = async_to_sync(WhoAmIView.as_view())(RequestFactory().get('/whoami/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {'username': "async"})
+
+    def test_validation_errors(self):
+        with mock.patch('integrations.slack.services.get_slack_service', return_value=SlackService(bot_token='xoxb-test')):
+            response = self.client.post('/api/slack/send-message/', {'text': 'hi'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('channel_id', response.json())
+
+    def test_slack_send_message(self):
+        async def post_message(request):
+            body = await request.json()
+            self.assertEqual(request.headers['Authorization'], 'Bearer xoxb-test')
+            return web.json_response({'ok': True, 'channel': body['channel'], 'ts': '1700000000.000100'})
+
+        async def channel_not_found(request):
+            return web.json_response({'ok': False, 'error': 'channel_not_found'})
+
+        routes = {('POST', '/chat.postMessage'): post_message, ('GET', '/conversations.info'): channel_not_found}
+        with stub_server(routes) as base_url:
+            service = SlackService(bot_token='xoxb-test')
+            service.BASE_URL = base_url
+            with mock.patch('integrations.slack.services.get_slack_service', return_value=service):
+                sent = self.client.post('/api/slack/send-message/', {'channel_id': 'C1', 'text': 'hi'}, format='json')
+                failed = self.client.post('/api/slack/channel-info/', {'channel_id': 'C404'}, format='json')
+
+        self.assertEqual(sent.status_code, 201)
+        self.assertEqual(sent.json()['ts'], '1700000000.000100')
+        self.assertEqual(failed.status_code, 400)
+        self.assertEqual(failed.json()['error_code'], 'channel_not_found')
+
+    def test_n8n_webhooks_run_concurrently(self):
+        in_flight = 0
+        peak = 0
+
+        async def hook(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.2)
+            in_flight -= 1
+            return web.json_response({'hook': request.match_info['name']})
+
+        with stub_server({('POST', '/webhook/{name}'): hook}) as base_url:
+            service = N8nService(base_url=base_url)
+            with mock.patch('integrations.n8n.services.get_n8n_service', return_value=service):
+                response = self.client.post('/api/n8n/call-webhook/', {'webhook_path': 'one'}, format='json')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['data'], {'hook': 'one'})
+
+                # Many calls in flight on a single event loop
+                from integrations.n8n.services import AsyncN8nService
+                from mixtum_core.async_http import close_client_session
+
+                async def fan_out():
+                    try:
+                        return await asyncio.gather(*[
+                            AsyncN8nService(service).call_webhook(f'hook-{i}') for i in range(20)
+                        ])
+                    finally:
+                        await close_client_session()
+
+                results = async_to_sync(fan_out)()
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(peak, 20)
+
+
+@override_settings(**REPLICA_SETTINGS)
+class AsyncReplicaStickinessTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="async-writer", email="aw@example.com")
+
+    def test_async_write_pins_user(self):
+        async def write(request):
+            request.user = self.user
+            await sync_to_async(Category.objects.create)(name="Async")
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(write)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().post('/'))
+        self.assertTrue(is_pinned_to_primary(self.user))
+
+
+class PooledHTTPSessionTests(TestCase):
+    """Tests for the shared requests sessions of the API clients."""
+
+    def tearDown(self):
+        http_sessions.close_sessions()
+
+    def test_one_session_per_name_and_process(self):
+        session = http_sessions.get_session('n8n')
+        self.assertIs(http_sessions.get_session('n8n'), session)
+        self.assertIsNot(http_sessions.get_session('slack'), session)
+
+        http_sessions._reset_after_fork()
+        self.assertIsNot(http_sessions.get_session('n8n'), session)
+
+    def test_calls_reuse_connections(self):
+        peers = set()
+
+        async def hook(request):
+            peers.add(request.transport.get_extra_info('peername'))
+            return web.json_response({'ok': True})
+
+        with stub_server({('POST', '/webhook/{name}'): hook}) as base_url:
+            service = N8nService(base_url=base_url)
+            results = [service.call_webhook('hook', {'n': i}) for i in range(5)]
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(len(peers), 1)
+
+    def test_rate_limited_post_is_retried_after_retry_after(self):
+        calls = []
+
+        async def post_message(request):
+            calls.append(request.path)
+            if len(calls) == 1:
+                return web.json_response({'ok': False, 'error': 'ratelimited'}, status=429, headers={'Retry-After': '0'})
+            return web.json_response({'ok': True, 'channel': 'C1', 'ts': '1.0'})
+
+        with stub_server({('POST', '/chat.postMessage'): post_message}) as base_url:
+            service = SlackService(bot_token='xoxb-test')
+            service.BASE_URL = base_url
+            message = service.send_message('C1', 'hi')
+
+        self.assertEqual(message.ts, '1.0')
+        self.assertEqual(len(calls), 2)
+
+    def test_server_errors_not_replayed_for_post(self):
+        calls = []
+
+        async def hook(request):
+            calls.append(request.path)
+            return web.json_response({'error': 'unavailable'}, status=503)
+
+        with stub_server({('POST', '/webhook/{name}'): hook}) as base_url:
+            result = N8nService(base_url=base_url).call_webhook('hook')
+
+        self.assertEqual(result.status_code, 503)
+        self.assertEqual(len(calls), 1)
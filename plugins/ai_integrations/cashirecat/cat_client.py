@@ -1,10 +1,12 @@
 # cat_client.py
+import asyncio
 import json
 import time
 import threading
 from queue import Queue, Empty
-from typing import Optional, Dict, Any, Generator, List
+from typing import Optional, Dict, Any, AsyncIterator, Generator, List
 
+import aiohttp
 import websocket  # pip install websocket-client
 
 
@@ -164,3 +166,116 @@ class CatWSClient:
             return self.recv_queue.get(timeout=timeout)
         except Empty:
             return None
+
+
+class AsyncCatClient:
+    """
+    Client WebSocket asincrono per Cheshire Cat, per le view async.
+    Stessa semantica di CatWSClient (chat_once/chat_stream), senza thread:
+    l'attesa della risposta non occupa un worker.
+
+    Uso:
+        async with AsyncCatClient(url, token) as client:
+            result = await client.chat_once("Ciao")
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        connect_timeout: int = 30,
+        ping_interval: int = 20,
+        event_timeout: float = 30,
+    ):
+        self.url = url
+        self.token = token
+        self.connect_timeout = connect_timeout
+        self.ping_interval = ping_interval
+        self.event_timeout = event_timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+
+    async def __aenter__(self) -> "AsyncCatClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def connect(self):
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout),
+        )
+        try:
+            self.ws = await asyncio.wait_for(
+                self._session.ws_connect(self.url, headers=headers, heartbeat=self.ping_interval),
+                timeout=self.connect_timeout,
+            )
+        except asyncio.TimeoutError:
+            await self.close()
+            raise TimeoutError(f"Connessione a {self.url} scaduta.")
+        except Exception:
+            await self.close()
+            raise
+
+    async def close(self):
+        if self.ws is not None and not self.ws.closed:
+            await self.ws.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def send_human(self, text: str):
+        if self.ws is None:
+            raise RuntimeError("WebSocket non inizializzato.")
+        await self.ws.send_str(json.dumps({"text": text}))
+
+    async def _next_event(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Prossimo evento, oppure None su timeout o chiusura del socket."""
+        try:
+            msg = await self.ws.receive(timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        if msg.type == aiohttp.WSMsgType.TEXT:
+            try:
+                return json.loads(msg.data)
+            except ValueError:
+                return {"type": "raw", "content": msg.data}
+        if msg.type == aiohttp.WSMsgType.ERROR:
+            return {"type": "error", "content": str(self.ws.exception())}
+        return None
+
+    async def chat_stream(self, message: str, drain_seconds: float = 0.15) -> AsyncIterator[Dict[str, Any]]:
+        """Come CatWSClient.chat_stream, come async generator."""
+        await self.send_human(message)
+
+        end_seen = False
+        while True:
+            item = await self._next_event(timeout=self.event_timeout)
+            if item is None:
+                break
+            yield item
+            if item.get("type") == "chat":
+                end_seen = True
+                break
+
+        # drain finale
+        if end_seen:
+            loop = asyncio.get_running_loop()
+            end = loop.time() + drain_seconds
+            while loop.time() < end:
+                item = await self._next_event(timeout=drain_seconds)
+                if item is None:
+                    break
+                yield item
+
+    async def chat_once(self, message: str, drain_seconds: float = 0.15) -> Dict[str, Any]:
+        """Come CatWSClient.chat_once: {"final": "<testo finale>", "events": [...]}."""
+        events: List[Dict[str, Any]] = []
+        final_text: Optional[str] = None
+        async for item in self.chat_stream(message, drain_seconds=drain_seconds):
+            events.append(item)
+            if item.get("type") == "chat" and final_text is None:
+                final_text = str(item.get("content") or "")
+        return {"final": final_text or "", "events": events}
@@ -1,56 +1,59 @@
 # views.py
 import json
-from typing import Dict, Any, Iterable
+from typing import AsyncIterator
 
+import aiohttp
 from django.conf import settings
-from django.http import JsonResponse, StreamingHttpResponse, HttpResponseBadRequest
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
+from django.http import StreamingHttpResponse, HttpResponseBadRequest
 
-from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticatedOrReadOnly  # adatta come preferisci
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication  # o JWT
+from mixtum_core.async_views import AsyncAPIView, json_response
 
-from .cat_client import CatWSClient
+from .cat_client import AsyncCatClient
 
 
-def _get_cat_client() -> CatWSClient:
-    return CatWSClient(
-        url="ws://host.docker.internal:1865/ws",
+def _get_cat_client() -> AsyncCatClient:
+    return AsyncCatClient(
+        url=getattr(settings, "CAT_WS_URL", "ws://host.docker.internal:1865/ws"),
         token=getattr(settings, "CAT_TOKEN", None),
         connect_timeout=getattr(settings, "CAT_CONNECT_TIMEOUT", 30),
     )
 
 
-class CatChatView(APIView):
+def _read_message(request):
+    """Restituisce (message, None) oppure (None, risposta di errore)."""
+    try:
+        payload = json.loads(request.body.decode("utf-8")) if request.body else {}
+    except json.JSONDecodeError:
+        return None, HttpResponseBadRequest("Invalid JSON")
+
+    message = payload.get("message") or payload.get("text")
+    if not message:
+        return None, HttpResponseBadRequest("Missing 'message'")
+    return message, None
+
+
+class CatChatView(AsyncAPIView):
     """
     Endpoint REST "one-shot":
       POST /api/cat/chat
       body: {"message": "..."}
       resp: {"content": "<final_text>", "events": [<eventi grezzi>]}
-    """
 
-    def post(self, request, *args, **kwargs):
-        try:
-            payload = json.loads(request.body.decode("utf-8")) if request.body else {}
-        except json.JSONDecodeError:
-            return HttpResponseBadRequest("Invalid JSON")
+    Async: l'attesa della risposta del Cat non occupa un worker (ASGI).
+    """
 
-        message = payload.get("message") or payload.get("text")
-        if not message:
-            return HttpResponseBadRequest("Missing 'message'")
+    async def post(self, request, *args, **kwargs):
+        message, error = _read_message(request)
+        if error is not None:
+            return error
 
-        client = _get_cat_client()
-        try:
-            client.connect()
-            result = client.chat_once(
+        async with _get_cat_client() as client:
+            result = await client.chat_once(
                 message=message,
                 drain_seconds=getattr(settings, "CAT_STREAM_DRAIN_SECONDS", 0.15),
             )
-        finally:
-            client.close()
 
-        return JsonResponse(
+        return json_response(
             {
                 "content": result.get("final", ""),
                 "events": result.get("events", []),  # utile per debug/telemetria
@@ -58,8 +61,7 @@ class CatChatView(APIView):
         )
 
 
-@method_decorator(csrf_exempt, name="dispatch")
-class CatChatStreamView(APIView):
+class CatChatStreamView(AsyncAPIView):
     """
     Endpoint SSE (Server-Sent Events):
       POST /api/cat/chat/stream
@@ -71,40 +73,36 @@ class CatChatStreamView(APIView):
         data: {"type":"chat","content":"<finale>"}
     """
 
-    def post(self, request, *args, **kwargs):
-        try:
-            payload = json.loads(request.body.decode("utf-8")) if request.body else {}
-        except json.JSONDecodeError:
-            return HttpResponseBadRequest("Invalid JSON")
-
-        message = payload.get("message") or payload.get("text")
-        if not message:
-            return HttpResponseBadRequest("Missing 'message'")
-
-        client = _get_cat_client()
-        client.connect()
+    async def post(self, request, *args, **kwargs):
+        message, error = _read_message(request)
+        if error is not None:
+            return error
 
-        def event_stream() -> Iterable[bytes]:
+        async def event_stream() -> AsyncIterator[bytes]:
+            # La connessione si apre qui: con un server sync lo stream gira
+            # in un event loop diverso da quello della view
             try:
-                for evt in client.chat_stream(
-                    message=message,
-                    drain_seconds=getattr(settings, "CAT_STREAM_DRAIN_SECONDS", 0.15),
-                ):
-                    # Normalizza alcuni 'type' per il front-end
-                    t = evt.get("type")
-                    if t in (None, "stream", "partial", "token", "chunk"):
-                        norm = "token"
-                    else:
-                        norm = t
-
-                    data = {"type": norm, "content": evt.get("content", "")}
-                    # SSE frame
-                    yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
-
-                # opzionale: evento 'done'
-                yield b"data: {\"type\":\"done\"}\n\n"
-            finally:
-                client.close()
+                async with _get_cat_client() as client:
+                    async for evt in client.chat_stream(
+                        message=message,
+                        drain_seconds=getattr(settings, "CAT_STREAM_DRAIN_SECONDS", 0.15),
+                    ):
+                        # Normalizza alcuni 'type' per il front-end
+                        t = evt.get("type")
+                        if t in (None, "stream", "partial", "token", "chunk"):
+                            norm = "token"
+                        else:
+                            norm = t
+
+                        data = {"type": norm, "content": evt.get("content", "")}
+                        # SSE frame
+                        yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+            except (aiohttp.ClientError, OSError, TimeoutError) as e:
+                data = {"type": "error", "content": str(e)}
+                yield f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+            # opzionale: evento 'done'
+            yield b"data: {\"type\":\"done\"}\n\n"
 
         # Nota: StreamingHttpResponse mantiene la connessione aperta finché il generator produce dati.
         resp = StreamingHttpResponse(
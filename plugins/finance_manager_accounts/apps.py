@@ -5,3 +5,7 @@ class FinanceManagerAccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'plugins.finance_manager_accounts'
     verbose_name = 'Finance Manager - Accounts'
+
+    def ready(self):
+        # Import signals to ensure they are registered when the app is ready.
+        from . import signals  # noqa: F401
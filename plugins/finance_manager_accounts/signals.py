@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from plugins.finance_manager_core.cache import invalidate_finance_data
+
+from .models import Account
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+def invalidate_cached_balances(sender, instance, **kwargs):
+    """
+    Invalidate cached balances and forecasts when an account changes
+    (initial balance, active flag, inclusion in totals).
+    """
+    invalidate_finance_data()
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
+from mixtum_core.db_routers import ReplicaReadMixin
 from mixtum_core.settings.base import REMOTE_API
 from base_modules.user_manager.authentication import JWTAuthentication
 
@@ -61,7 +62,7 @@ class BankDetailView(generics.RetrieveUpdateDestroyAPIView):
         authentication_classes = [JWTAuthentication]
 
 
-class AccountListCreateView(generics.ListCreateAPIView):
+class AccountListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     GET: List all accounts
     POST: Create a new account
@@ -128,7 +129,7 @@ class AccountDetailView(generics.RetrieveUpdateDestroyAPIView):
         authentication_classes = [JWTAuthentication]
 
 
-class AggregateBalanceView(APIView):
+class AggregateBalanceView(ReplicaReadMixin, APIView):
     """
     GET: Calculate aggregate balance across multiple accounts.
     
@@ -188,7 +189,7 @@ class AggregateBalanceView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class AccountBalanceByTypeView(APIView):
+class AccountBalanceByTypeView(ReplicaReadMixin, APIView):
     """
     GET: Get balance breakdown by account type.
     
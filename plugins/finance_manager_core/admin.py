@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Category, Transaction
+from .services import bulk_update_transactions
 
 
 @admin.register(Category)
@@ -128,19 +129,20 @@ class TransactionAdmin(admin.ModelAdmin):
 
     def mark_as_paid(self, request, queryset):
         from django.utils import timezone
-        updated = queryset.exclude(status='paid').update(
+        updated = bulk_update_transactions(
+            queryset.exclude(status='paid'),
             status='paid',
             payment_date=timezone.now().date()
-        )
+        ).updated_count
         self.message_user(request, f'{updated} transactions marked as paid.')
     mark_as_paid.short_description = "Mark selected as paid"
 
     def mark_as_pending(self, request, queryset):
-        updated = queryset.exclude(status='pending').update(status='pending')
+        updated = bulk_update_transactions(queryset.exclude(status='pending'), status='pending').updated_count
         self.message_user(request, f'{updated} transactions marked as pending.')
     mark_as_pending.short_description = "Mark selected as pending"
 
     def mark_as_cancelled(self, request, queryset):
-        updated = queryset.exclude(status='cancelled').update(status='cancelled')
+        updated = bulk_update_transactions(queryset.exclude(status='cancelled'), status='cancelled').updated_count
         self.message_user(request, f'{updated} transactions marked as cancelled.')
     mark_as_cancelled.short_description = "Mark selected as cancelled"
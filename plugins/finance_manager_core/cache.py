@@ -0,0 +1,65 @@
+"""
+Version-key caching helpers for finance data.
+
+Cached entries live under keys embedding a per-namespace version number.
+Writers bump the version instead of deleting keys: every entry built from
+the old data becomes unreachable at once and simply expires.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+KEY_PREFIX = 'finance'
+
+# Bumped by every write that can change balances or projections:
+# transactions, accounts and recurrence rules
+FINANCE_DATA_NAMESPACE = 'finance_data'
+
+
+def _version_key(namespace: str) -> str:
+    return f'{KEY_PREFIX}:{namespace}:version'
+
+
+def get_version(namespace: str) -> int:
+    """Return the current version of a cache namespace."""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Start from a timestamp rather than 1, so that an evicted version
+        # key can never bring back entries cached under an older version.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace: str) -> None:
+    """
+    Invalidate every entry of a namespace.
+
+    The version is bumped immediately and, when called inside a transaction,
+    again on commit: other connections may rebuild an entry from the
+    pre-commit data in between, and the second bump discards it.
+    """
+    def bump():
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            get_version(namespace)
+
+    bump()
+    if connection.in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def versioned_key(namespace: str, *parts) -> str:
+    """Build a cache key bound to the current namespace version."""
+    return ':'.join(
+        [KEY_PREFIX, namespace, f'v{get_version(namespace)}']
+        + [str(part) for part in parts]
+    )
+
+
+def invalidate_finance_data() -> None:
+    """Discard everything cached from transactions, accounts and rules."""
+    bump_version(FINANCE_DATA_NAMESPACE)
@@ -0,0 +1,92 @@
+"""
+Cached category hierarchy.
+
+The whole category table is loaded with one query and kept in the cache
+under a version key (see cache.py). Category writes bump the version, so
+the tree endpoint, full_path and depth never walk parents in the database.
+"""
+from typing import Any, Dict, List
+
+from django.core.cache import cache
+
+from .cache import bump_version, versioned_key
+
+CATEGORY_TREE_NAMESPACE = 'category_tree'
+CATEGORY_TREE_TIMEOUT = 60 * 60
+
+
+def _build_snapshot() -> Dict[str, Any]:
+    """Load all categories in one query and derive the node index and tree."""
+    from .models import Category
+
+    rows = list(
+        Category.objects.order_by('sort_order', 'name').values(
+            'id', 'name', 'color', 'icon', 'transaction_type', 'parent_id', 'is_active'
+        )
+    )
+
+    nodes = {row['id']: {'name': row['name'], 'parent_id': row['parent_id']} for row in rows}
+
+    # Active categories only: children of inactive categories are not
+    # reachable.
+    children: Dict[Any, List[Dict[str, Any]]] = {}
+    for row in rows:
+        if row['is_active']:
+            children.setdefault(row['parent_id'], []).append(row)
+
+    def build(parent_id, seen):
+        branch = []
+        for row in children.get(parent_id, []):
+            if row['id'] in seen:
+                continue
+            branch.append({
+                'id': row['id'],
+                'name': row['name'],
+                'color': row['color'],
+                'icon': row['icon'],
+                'transaction_type': row['transaction_type'],
+                'children': build(row['id'], seen | {row['id']}),
+            })
+        return branch
+
+    return {'nodes': nodes, 'tree': build(None, frozenset())}
+
+
+def get_category_snapshot() -> Dict[str, Any]:
+    """Return the cached {'nodes': {id: {...}}, 'tree': [...]} snapshot."""
+    key = versioned_key(CATEGORY_TREE_NAMESPACE, 'snapshot')
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _build_snapshot()
+        cache.set(key, snapshot, CATEGORY_TREE_TIMEOUT)
+    return snapshot
+
+
+def get_category_tree() -> List[Dict[str, Any]]:
+    """Return the active category tree, top-level categories first."""
+    return get_category_snapshot()['tree']
+
+
+def get_ancestor_names(category) -> List[str]:
+    """Return the names of a category's ancestors, root first."""
+    nodes = get_category_snapshot()['nodes']
+    names = []
+    parent_id = category.parent_id
+    seen = {category.pk}
+    while parent_id is not None and parent_id not in seen:
+        node = nodes.get(parent_id)
+        if node is None:
+            # Parent created after the snapshot was taken (e.g. inside a
+            # transaction not yet visible to the cache): walk the database.
+            parent = category.parent
+            return get_ancestor_names(parent) + [parent.name]
+        seen.add(parent_id)
+        names.append(node['name'])
+        parent_id = node['parent_id']
+    names.reverse()
+    return names
+
+
+def invalidate_category_tree() -> None:
+    """Discard the cached hierarchy after a category write."""
+    bump_version(CATEGORY_TREE_NAMESPACE)
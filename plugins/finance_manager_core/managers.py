@@ -55,14 +55,13 @@ class TransactionQuerySet(models.QuerySet):
         Optionally includes subcategories.
         """
         if include_subcategories:
-            from plugins.finance_manager_core.models import Category
-            category_ids = [category_id]
-            # Get all subcategory IDs recursively
-            subcats = Category.objects.filter(parent_id=category_id).values_list('id', flat=True)
-            while subcats:
-                category_ids.extend(subcats)
-                subcats = Category.objects.filter(parent_id__in=subcats).values_list('id', flat=True)
-            return self.filter(category_id__in=category_ids)
+            from plugins.finance_manager_core.models import CategoryClosure
+            # The closure table lists every descendant (and the category
+            # itself), so this compiles to a single query with a subselect.
+            descendants = CategoryClosure.objects.filter(
+                ancestor_id=category_id
+            ).values('descendant_id')
+            return self.filter(category_id__in=descendants)
         return self.filter(category_id=category_id)
 
     def this_month(self):
@@ -223,6 +222,13 @@ class CategoryQuerySet(models.QuerySet):
         """Filter to categories designated for expenses."""
         return self.filter(Q(transaction_type='expense') | Q(transaction_type__isnull=True))
 
+    def descendants_of(self, category_id, include_self=True):
+        """Filter to a category's subtree using the closure table."""
+        lookups = {'ancestor_links__ancestor_id': category_id}
+        if not include_self:
+            lookups['ancestor_links__depth__gt'] = 0
+        return self.filter(**lookups)
+
     def with_transaction_count(self):
         """Annotate with transaction count."""
         from django.db.models import Count
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:51
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollup(apps, schema_editor):
+    Transaction = apps.get_model('finance_manager_core', 'Transaction')
+    MonthlyCashflow = apps.get_model('finance_manager_core', 'MonthlyCashflow')
+
+    rows = (
+        Transaction.objects.order_by()
+        .annotate(month=TruncMonth('competence_date'))
+        .values('account_id', 'category_id', 'month', 'transaction_type', 'status', 'is_hypothetical')
+        .annotate(total_amount=Sum('gross_amount'), transaction_count=Count('id'))
+    )
+    MonthlyCashflow.objects.bulk_create(
+        [MonthlyCashflow(**row) for row in rows],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_manager_accounts', '0001_initial'),
+        ('finance_manager_core', '0003_categoryclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCashflow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the competence month', verbose_name='Month')),
+                ('transaction_type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10, verbose_name='Type')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('scheduled', 'Scheduled'), ('paid', 'Paid'), ('cancelled', 'Cancelled')], max_length=20, verbose_name='Status')),
+                ('is_hypothetical', models.BooleanField(default=False, verbose_name='Hypothetical')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Sum of gross amounts in the bucket', max_digits=18, verbose_name='Total Amount')),
+                ('transaction_count', models.IntegerField(default=0, verbose_name='Transaction Count')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_cashflows', to='finance_manager_accounts.account', verbose_name='Account')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_cashflows', to='finance_manager_core.category', verbose_name='Category')),
+            ],
+            options={
+                'verbose_name': 'Monthly Cashflow',
+                'verbose_name_plural': 'Monthly Cashflows',
+                'indexes': [models.Index(fields=['month', 'status'], name='finance_man_month_c804a8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('account', 'category', 'month', 'transaction_type', 'status', 'is_hypothetical'), name='unique_monthly_cashflow_bucket')],
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
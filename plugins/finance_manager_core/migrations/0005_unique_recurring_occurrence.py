@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def detach_duplicate_occurrences(apps, schema_editor):
+    """
+    Keep the oldest transaction of each (rule, date) pair linked to its
+    rule; duplicates stay in place but are no longer marked as generated.
+    """
+    Transaction = apps.get_model('finance_manager_core', 'Transaction')
+
+    duplicates = (
+        Transaction.objects.filter(recurring_rule__isnull=False)
+        .order_by()
+        .values('recurring_rule_id', 'competence_date')
+        .annotate(keep_id=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicates:
+        Transaction.objects.filter(
+            recurring_rule_id=row['recurring_rule_id'],
+            competence_date=row['competence_date'],
+        ).exclude(id=row['keep_id']).update(recurring_rule=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance_manager_accounts', '0001_initial'),
+        ('finance_manager_core', '0004_monthlycashflow'),
+        ('finance_manager_planning', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(detach_duplicate_occurrences, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurring_rule__isnull', False)), fields=('recurring_rule', 'competence_date'), name='unique_recurring_occurrence'),
+        ),
+    ]
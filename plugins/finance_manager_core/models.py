@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, router, transaction as db_transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
@@ -102,19 +102,108 @@ class Category(models.Model):
     @property
     def full_path(self):
         """Return the full category path including all ancestors."""
-        if self.parent:
-            return f"{self.parent.full_path} → {self.name}"
-        return self.name
+        from .category_tree import get_ancestor_names
+        return " → ".join(get_ancestor_names(self) + [self.name])
 
     @property
     def depth(self):
         """Return the depth level of this category in the hierarchy."""
-        level = 0
-        parent = self.parent
-        while parent:
-            level += 1
-            parent = parent.parent
-        return level
+        from .category_tree import get_ancestor_names
+        return len(get_ancestor_names(self))
+
+
+class CategoryClosure(models.Model):
+    """
+    Closure table for the category hierarchy.
+
+    Holds one row per (ancestor, descendant) pair, including the zero-depth
+    pair of each category with itself, so that subtree and ancestor lookups
+    are a single indexed query. Maintained by the Category save signals;
+    rows disappear by cascade when a category is deleted.
+    """
+    ancestor = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='descendant_links',
+        verbose_name="Ancestor"
+    )
+    descendant = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        verbose_name="Descendant"
+    )
+    depth = models.PositiveIntegerField(
+        verbose_name="Depth",
+        help_text="Distance between ancestor and descendant (0 = same category)"
+    )
+
+    class Meta:
+        verbose_name = "Category Closure"
+        verbose_name_plural = "Category Closures"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestor', 'descendant'],
+                name='unique_category_closure_pair'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth']),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} → {self.descendant_id} ({self.depth})"
+
+    @classmethod
+    def insert_category(cls, category):
+        """Add the links of a newly created category."""
+        links = [cls(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+        if category.parent_id:
+            links.extend(
+                cls(ancestor_id=ancestor_id, descendant_id=category.pk, depth=depth + 1)
+                for ancestor_id, depth in cls.objects.filter(
+                    descendant_id=category.parent_id
+                ).values_list('ancestor_id', 'depth')
+            )
+        cls.objects.bulk_create(links)
+
+    @classmethod
+    def move_category(cls, category):
+        """Re-link the subtree of a category after its parent changed."""
+        subtree = list(
+            cls.objects.filter(ancestor_id=category.pk).values_list('descendant_id', 'depth')
+        )
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+
+        # Drop the links between the old ancestors and the subtree
+        cls.objects.filter(descendant_id__in=subtree_ids).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+
+        if category.parent_id:
+            new_ancestors = list(
+                cls.objects.filter(descendant_id=category.parent_id).values_list('ancestor_id', 'depth')
+            )
+            cls.objects.bulk_create([
+                cls(ancestor_id=ancestor_id, descendant_id=descendant_id,
+                    depth=ancestor_depth + descendant_depth + 1)
+                for ancestor_id, ancestor_depth in new_ancestors
+                for descendant_id, descendant_depth in subtree
+            ])
+
+    @classmethod
+    def rebuild(cls):
+        """Rebuild the whole table from Category.parent (e.g. after bulk updates)."""
+        parents = dict(Category.objects.values_list('id', 'parent_id'))
+        links = []
+        for category_id in parents:
+            ancestor_id, depth, seen = category_id, 0, set()
+            while ancestor_id is not None and ancestor_id not in seen:
+                seen.add(ancestor_id)
+                links.append(cls(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+                ancestor_id, depth = parents.get(ancestor_id), depth + 1
+        cls.objects.all().delete()
+        cls.objects.bulk_create(links, batch_size=1000)
 
 
 class Transaction(models.Model):
@@ -223,6 +312,15 @@ class Transaction(models.Model):
             models.Index(fields=['payment_date']),
             models.Index(fields=['is_hypothetical', 'status']),
         ]
+        constraints = [
+            # One generated transaction per rule occurrence: makes the
+            # recurring generation idempotent
+            models.UniqueConstraint(
+                fields=['recurring_rule', 'competence_date'],
+                condition=models.Q(recurring_rule__isnull=False),
+                name='unique_recurring_occurrence'
+            ),
+        ]
 
     def __str__(self):
         sign = '+' if self.transaction_type == 'income' else '-'
@@ -248,9 +346,90 @@ class Transaction(models.Model):
             return -self.gross_amount
         return self.gross_amount
 
+    def save(self, *args, **kwargs):
+        """
+        Save in a transaction: the pre_save signal locks the row to read its
+        previous state, and post_save moves it between rollup buckets.
+        """
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with db_transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
     def mark_as_paid(self, payment_date=None):
         """Mark the transaction as paid."""
         from django.utils import timezone
         self.status = 'paid'
         self.payment_date = payment_date or timezone.now().date()
         self.save(update_fields=['status', 'payment_date', 'updated_at'])
+
+
+class MonthlyCashflow(models.Model):
+    """
+    Incremental monthly rollup of transactions.
+
+    One row per (account, category, month, type, status, hypothetical)
+    bucket, holding the sum of gross amounts and the number of transactions.
+    Kept up to date by the Transaction signals and by the bulk update paths
+    (see rollup.py); reporting endpoints read from here instead of
+    aggregating the raw Transaction table.
+    """
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name='monthly_cashflows',
+        verbose_name="Account"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='monthly_cashflows',
+        verbose_name="Category"
+    )
+    month = models.DateField(
+        verbose_name="Month",
+        help_text="First day of the competence month"
+    )
+    transaction_type = models.CharField(
+        max_length=10,
+        choices=TRANSACTION_TYPE_CHOICES,
+        verbose_name="Type"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=TRANSACTION_STATUS_CHOICES,
+        verbose_name="Status"
+    )
+    is_hypothetical = models.BooleanField(
+        default=False,
+        verbose_name="Hypothetical"
+    )
+    total_amount = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Total Amount",
+        help_text="Sum of gross amounts in the bucket"
+    )
+    transaction_count = models.IntegerField(
+        default=0,
+        verbose_name="Transaction Count"
+    )
+
+    class Meta:
+        verbose_name = "Monthly Cashflow"
+        verbose_name_plural = "Monthly Cashflows"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account', 'category', 'month', 'transaction_type', 'status', 'is_hypothetical'],
+                name='unique_monthly_cashflow_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'status']),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.month:%Y-%m} | {self.account_id}/{self.category_id} "
+            f"{self.transaction_type} {self.status}: {self.total_amount}"
+        )
@@ -0,0 +1,477 @@
+"""
+Monthly cashflow rollup maintenance and queries.
+
+MonthlyCashflow holds one row per (account, category, month, type, status,
+hypothetical) bucket. Every write to Transaction is turned into signed
+deltas (subtract the old bucket, add the new one) applied with a single
+INSERT ... ON CONFLICT DO UPDATE, so concurrent writers never overwrite
+each other's totals. Bulk paths that bypass model signals must go through
+services.bulk_update_transactions() / record_created().
+
+Reads combine whole months from the rollup with the raw Transaction table
+for the partial months at the edges of a date range.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from django.db import connections, router, transaction as db_transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When
+from django.db.models.functions import TruncMonth, TruncYear
+
+from .cache import invalidate_finance_data
+from .models import MonthlyCashflow, Transaction
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('pending', 'paid', 'scheduled')
+
+# Transaction fields that determine the bucket and the amount of a row
+TRACKED_FIELDS = (
+    'account_id', 'category_id', 'competence_date',
+    'transaction_type', 'status', 'is_hypothetical', 'gross_amount',
+)
+
+ZERO = Decimal('0.00')
+
+# Buckets corrected per transaction by reconcile_rollup()
+FIX_BATCH_SIZE = 200
+
+
+class RollupKey(NamedTuple):
+    account_id: int
+    category_id: int
+    month: date
+    transaction_type: str
+    status: str
+    is_hypothetical: bool
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def rollup_key(row: dict) -> RollupKey:
+    """Build the bucket key of a transaction state dict."""
+    return RollupKey(
+        row['account_id'],
+        row['category_id'],
+        month_start(row['competence_date']),
+        row['transaction_type'],
+        row['status'],
+        bool(row['is_hypothetical']),
+    )
+
+
+def transaction_state(instance: Transaction) -> dict:
+    """Snapshot the tracked fields of a Transaction instance."""
+    # to_python: attributes may still hold raw input (e.g. date strings)
+    return {
+        field: Transaction._meta.get_field(field).to_python(getattr(instance, field))
+        for field in TRACKED_FIELDS
+    }
+
+
+def collect_deltas(
+    before: Iterable[dict],
+    after: Iterable[dict]
+) -> Dict[RollupKey, Tuple[Decimal, int]]:
+    """
+    Net (amount, count) change per bucket between two sets of row states.
+
+    Rows only in `before` are removed, rows only in `after` are added; a
+    row whose bucket did not change contributes only its amount difference.
+    """
+    deltas = defaultdict(lambda: [ZERO, 0])
+    for row in before:
+        delta = deltas[rollup_key(row)]
+        delta[0] -= row['gross_amount']
+        delta[1] -= 1
+    for row in after:
+        delta = deltas[rollup_key(row)]
+        delta[0] += row['gross_amount']
+        delta[1] += 1
+    return {key: (amount, count) for key, (amount, count) in deltas.items() if amount or count}
+
+
+def apply_deltas(deltas: Dict[RollupKey, Tuple[Decimal, int]]) -> None:
+    """Add the deltas to their buckets, creating missing buckets."""
+    if not deltas:
+        return
+
+    connection = connections[router.db_for_write(MonthlyCashflow)]
+    qn = connection.ops.quote_name
+    table = qn(MonthlyCashflow._meta.db_table)
+    key_columns = [
+        'account_id', 'category_id', 'month',
+        'transaction_type', 'status', 'is_hypothetical',
+    ]
+    columns = key_columns + ['total_amount', 'transaction_count']
+
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({', '.join(qn(c) for c in key_columns)}) DO UPDATE SET "
+        f"{qn('total_amount')} = {table}.{qn('total_amount')} + EXCLUDED.{qn('total_amount')}, "
+        f"{qn('transaction_count')} = {table}.{qn('transaction_count')} + EXCLUDED.{qn('transaction_count')}"
+    )
+
+    # Sorted so that concurrent writers lock buckets in the same order
+    params = [
+        (
+            key.account_id,
+            key.category_id,
+            connection.ops.adapt_datefield_value(key.month),
+            key.transaction_type,
+            key.status,
+            key.is_hypothetical,
+            connection.ops.adapt_decimalfield_value(amount, 18, 2),
+            count,
+        )
+        for key, (amount, count) in sorted(deltas.items())
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def record_transaction_change(before: Optional[dict], after: Optional[dict]) -> None:
+    """Apply a single create (before=None), update or delete (after=None)."""
+    apply_deltas(collect_deltas(
+        [before] if before else [],
+        [after] if after else [],
+    ))
+
+
+def record_created(transactions: Iterable[Transaction]) -> None:
+    """Account for transactions inserted with bulk_create()."""
+    apply_deltas(collect_deltas([], [transaction_state(t) for t in transactions]))
+    invalidate_finance_data()
+
+
+# =============================================================================
+# Queries
+# =============================================================================
+
+def _split_range(
+    date_from: Optional[date],
+    date_to: Optional[date]
+) -> Tuple[Optional[date], Optional[date], List[Tuple[date, date]]]:
+    """
+    Split [date_from, date_to] into whole months and partial edge ranges.
+
+    Returns (first whole month, end month exclusive, partial ranges); the
+    whole months are answered by the rollup, the partial ranges by the
+    raw Transaction table.
+    """
+    partial = []
+
+    first_month = None
+    if date_from:
+        first_month = month_start(date_from)
+        if date_from.day != 1:
+            edge_end = first_month + relativedelta(months=1, days=-1)
+            if date_to and date_to < edge_end:
+                edge_end = date_to
+            partial.append((date_from, edge_end))
+            first_month += relativedelta(months=1)
+
+    end_month = None
+    if date_to:
+        end_month = month_start(date_to)
+        if (date_to + timedelta(days=1)).day == 1:
+            end_month += relativedelta(months=1)
+        elif first_month is None or end_month >= first_month:
+            partial.append((end_month, date_to))
+
+    return first_month, end_month, partial
+
+
+def _querysets(date_from, date_to, **filters):
+    """Return (rollup queryset, raw queryset or None) for a date range."""
+    first_month, end_month, partial = _split_range(date_from, date_to)
+
+    rollup = MonthlyCashflow.objects.filter(**filters).order_by()
+    if first_month:
+        rollup = rollup.filter(month__gte=first_month)
+    if end_month:
+        rollup = rollup.filter(month__lt=end_month)
+
+    raw = None
+    if partial:
+        ranges = Q()
+        for start, end in partial:
+            ranges |= Q(competence_date__gte=start, competence_date__lte=end)
+        raw = Transaction.objects.filter(ranges, **filters).order_by()
+
+    return rollup, raw
+
+
+def _sum_by_type(transaction_type: str, field: str) -> Sum:
+    return Sum(
+        Case(
+            When(transaction_type=transaction_type, then=F(field)),
+            default=ZERO,
+            output_field=DecimalField()
+        )
+    )
+
+
+def cashflow_by_period(
+    granularity: str = 'month',
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    account_id=None,
+    include_hypothetical: bool = False,
+) -> List[dict]:
+    """
+    Income, expenses and transaction count per month or year.
+
+    Returns dicts with 'period' (first day of the period), 'total_income',
+    'total_expenses' and 'transaction_count', ordered by period.
+    """
+    filters = {'status__in': ACTIVE_STATUSES}
+    if account_id:
+        filters['account_id'] = account_id
+    if not include_hypothetical:
+        filters['is_hypothetical'] = False
+
+    rollup, raw = _querysets(date_from, date_to, **filters)
+    trunc = TruncMonth if granularity == 'month' else TruncYear
+
+    periods = {}
+
+    def add(rows):
+        for row in rows:
+            totals = periods.setdefault(row['period'], [ZERO, ZERO, 0])
+            totals[0] += row['income'] or ZERO
+            totals[1] += row['expenses'] or ZERO
+            totals[2] += row['count'] or 0
+
+    add(
+        rollup.annotate(period=F('month') if granularity == 'month' else TruncYear('month'))
+        .values('period')
+        .annotate(
+            income=_sum_by_type('income', 'total_amount'),
+            expenses=_sum_by_type('expense', 'total_amount'),
+            count=Sum('transaction_count'),
+        )
+    )
+    if raw is not None:
+        add(
+            raw.annotate(period=trunc('competence_date'))
+            .values('period')
+            .annotate(
+                income=_sum_by_type('income', 'gross_amount'),
+                expenses=_sum_by_type('expense', 'gross_amount'),
+                count=Count('id'),
+            )
+        )
+
+    return [
+        {
+            'period': period,
+            'total_income': income,
+            'total_expenses': expenses,
+            'transaction_count': count,
+        }
+        for period, (income, expenses, count) in sorted(periods.items())
+        if count
+    ]
+
+
+def totals_by_category(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    transaction_type: Optional[str] = None,
+    account_id=None,
+) -> List[dict]:
+    """
+    Real (non-hypothetical) totals per category, largest first.
+
+    Returns dicts with 'category_id', 'category_name', 'category_color',
+    'total' and 'count'.
+    """
+    filters = {'status__in': ACTIVE_STATUSES, 'is_hypothetical': False}
+    if transaction_type:
+        filters['transaction_type'] = transaction_type
+    if account_id:
+        filters['account_id'] = account_id
+
+    rollup, raw = _querysets(date_from, date_to, **filters)
+    group = ('category__id', 'category__name', 'category__color')
+
+    categories = {}
+
+    def add(rows):
+        for row in rows:
+            totals = categories.setdefault(tuple(row[field] for field in group), [ZERO, 0])
+            totals[0] += row['total'] or ZERO
+            totals[1] += row['count'] or 0
+
+    add(rollup.values(*group).annotate(total=Sum('total_amount'), count=Sum('transaction_count')))
+    if raw is not None:
+        add(raw.values(*group).annotate(total=Sum('gross_amount'), count=Count('id')))
+
+    results = [
+        {
+            'category_id': category_id,
+            'category_name': name,
+            'category_color': color,
+            'total': total,
+            'count': count,
+        }
+        for (category_id, name, color), (total, count) in categories.items()
+        if count
+    ]
+    results.sort(key=lambda item: item['total'], reverse=True)
+    return results
+
+
+def totals_by_category_account(
+    date_from: Optional[date],
+    date_to: Optional[date],
+    category_ids: Optional[Iterable[int]] = None,
+) -> Dict[Tuple[int, int], Decimal]:
+    """
+    Real (non-hypothetical) totals keyed by (category_id, account_id).
+    """
+    filters = {'status__in': ACTIVE_STATUSES, 'is_hypothetical': False}
+    if category_ids is not None:
+        filters['category_id__in'] = list(category_ids)
+
+    rollup, raw = _querysets(date_from, date_to, **filters)
+
+    totals = defaultdict(lambda: ZERO)
+    rows = list(rollup.values('category_id', 'account_id').annotate(total=Sum('total_amount')))
+    if raw is not None:
+        rows += list(raw.values('category_id', 'account_id').annotate(total=Sum('gross_amount')))
+    for row in rows:
+        totals[(row['category_id'], row['account_id'])] += row['total'] or ZERO
+    return dict(totals)
+
+
+# =============================================================================
+# Reconciliation
+# =============================================================================
+
+def _bucket_filter(keys: Iterable[RollupKey], month_field: str) -> Q:
+    """Match the rows of the given buckets, by raw date or by rollup month."""
+    condition = Q()
+    for key in keys:
+        if month_field == 'month':
+            month = Q(month=key.month)
+        else:
+            month = Q(**{
+                f'{month_field}__gte': key.month,
+                f'{month_field}__lt': key.month + relativedelta(months=1),
+            })
+        condition |= month & Q(
+            account_id=key.account_id,
+            category_id=key.category_id,
+            transaction_type=key.transaction_type,
+            status=key.status,
+            is_hypothetical=key.is_hypothetical,
+        )
+    return condition
+
+
+def _expected_buckets(keys: Optional[List[RollupKey]] = None) -> Dict[RollupKey, Tuple[Decimal, int]]:
+    """Raw totals per bucket, of every bucket or only of `keys`."""
+    rows = Transaction.objects.order_by()
+    if keys is not None:
+        rows = rows.filter(_bucket_filter(keys, 'competence_date'))
+    rows = (
+        rows.annotate(month=TruncMonth('competence_date'))
+        .values('account_id', 'category_id', 'month', 'transaction_type', 'status', 'is_hypothetical')
+        .annotate(total=Sum('gross_amount'), count=Count('id'))
+    )
+    return {
+        RollupKey(
+            row['account_id'], row['category_id'], row['month'],
+            row['transaction_type'], row['status'], bool(row['is_hypothetical'])
+        ): (row['total'], row['count'])
+        for row in rows
+    }
+
+
+def _actual_buckets(queryset) -> Dict[RollupKey, Tuple[Decimal, int]]:
+    return {
+        RollupKey(
+            row['account_id'], row['category_id'], row['month'],
+            row['transaction_type'], row['status'], row['is_hypothetical']
+        ): (row['total_amount'], row['transaction_count'])
+        for row in queryset.values(
+            'account_id', 'category_id', 'month', 'transaction_type', 'status',
+            'is_hypothetical', 'total_amount', 'transaction_count'
+        )
+    }
+
+
+def _fix_buckets(keys: List[RollupKey]) -> int:
+    """
+    Bring the given buckets back in line with the raw table.
+
+    The buckets are locked first (in the order apply_deltas() uses), which
+    waits for the writers holding them to commit; their raw totals are then
+    recomputed and the difference applied as a delta, so a write committed
+    since the comparison is neither lost nor "fixed". Returns the number of
+    buckets that still differed.
+    """
+    empty = (ZERO, 0)
+    buckets = _bucket_filter(keys, 'month')
+    with db_transaction.atomic():
+        actual = _actual_buckets(
+            MonthlyCashflow.objects.select_for_update().filter(buckets).order_by(
+                'account_id', 'category_id', 'month', 'transaction_type', 'status', 'is_hypothetical'
+            )
+        )
+        expected = _expected_buckets(keys)
+        deltas = {}
+        for key in keys:
+            expected_amount, expected_count = expected.get(key, empty)
+            actual_amount, actual_count = actual.get(key, empty)
+            if (expected_amount, expected_count) != (actual_amount, actual_count):
+                deltas[key] = (expected_amount - actual_amount, expected_count - actual_count)
+        apply_deltas(deltas)
+        MonthlyCashflow.objects.filter(buckets, transaction_count=0, total_amount=0).delete()
+    return len(deltas)
+
+
+def reconcile_rollup(fix: bool = True) -> dict:
+    """
+    Compare the rollup with an aggregate of the raw Transaction table.
+
+    Mismatching buckets are logged and, when `fix` is set, locked,
+    recomputed and corrected; empty buckets are removed.
+    """
+    expected = _expected_buckets()
+    actual = _actual_buckets(MonthlyCashflow.objects.order_by())
+
+    empty = (ZERO, 0)
+    mismatched = sorted(
+        key for key in expected.keys() | actual.keys()
+        if expected.get(key, empty) != actual.get(key, empty)
+    )
+    for key in mismatched[:20]:
+        logger.warning(
+            "Cashflow rollup mismatch for %s: expected %s, found %s",
+            key, expected.get(key, empty), actual.get(key, empty)
+        )
+
+    stats = {
+        'buckets_checked': len(expected.keys() | actual.keys()),
+        'mismatches': len(mismatched),
+        'fixed': 0,
+    }
+
+    if fix and mismatched:
+        # The comparison above ran without locks: a writer may have been
+        # caught mid-flight, so every bucket is checked again under lock
+        for start in range(0, len(mismatched), FIX_BATCH_SIZE):
+            stats['fixed'] += _fix_buckets(mismatched[start:start + FIX_BATCH_SIZE])
+
+    return stats
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from decimal import Decimal
 
-from .models import Category, Transaction
+from .models import Category, CategoryClosure, Transaction
 from plugins.finance_manager_accounts.serializers import AccountMinimalSerializer
 
 
@@ -21,6 +21,15 @@ class CategorySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+    def validate_parent(self, parent):
+        if parent and self.instance and CategoryClosure.objects.filter(
+            ancestor_id=self.instance.pk, descendant_id=parent.pk
+        ).exists():
+            raise serializers.ValidationError(
+                "A category cannot be moved under itself or one of its subcategories."
+            )
+        return parent
+
     def get_subcategories_count(self, obj):
         return obj.subcategories.filter(is_active=True).count()
 
@@ -36,19 +45,6 @@ class CategoryMinimalSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'color', 'icon']
 
 
-class CategoryTreeSerializer(serializers.ModelSerializer):
-    """Serializer for hierarchical category tree."""
-    children = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Category
-        fields = ['id', 'name', 'color', 'icon', 'transaction_type', 'children']
-
-    def get_children(self, obj):
-        children = obj.subcategories.filter(is_active=True).order_by('sort_order', 'name')
-        return CategoryTreeSerializer(children, many=True).data
-
-
 class TransactionSerializer(serializers.ModelSerializer):
     account = AccountMinimalSerializer(read_only=True)
     account_id = serializers.PrimaryKeyRelatedField(
@@ -3,22 +3,28 @@ Business logic services for finance_manager_core.
 
 Provides:
 - CSV/Excel import functionality
+- CSV format sniffing (date format, separators, sign convention)
 - Transaction deduplication
 - Data validation and transformation
+- Set-based bulk updates announced with one transactions_changed event
 """
 
 import csv
 import hashlib
 import logging
-from datetime import datetime
+import re
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
 from io import StringIO
-from typing import List, Dict, Tuple, Optional, Any
+from typing import Callable, List, Dict, Tuple, Optional, Any
 
 from django.db import transaction as db_transaction
 from django.utils import timezone
 
 from .models import Transaction, Category, TRANSACTION_TYPE_CHOICES
+from .rollup import TRACKED_FIELDS, record_created
+from .signals import transactions_changed
 from plugins.finance_manager_accounts.models import Account
 
 logger = logging.getLogger(__name__)
@@ -29,6 +35,290 @@ class ImportError(Exception):
     pass
 
 
+# Date formats tried (in order) when the configured one does not match
+FALLBACK_DATE_FORMATS = ['%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y']
+
+# Number of rows inspected by the format sniffer
+SNIFF_SAMPLE_SIZE = 50
+
+INCOME_TYPE_VALUES = frozenset(['income', 'entrata', 'e', '+'])
+EXPENSE_TYPE_VALUES = frozenset(['expense', 'uscita', 'u', '-'])
+
+# Characters that never carry meaning in an amount cell
+_AMOUNT_NOISE_CHARS = ' \u00a0\u202f€$£¥\''
+
+_DATE_TOKENS = {
+    '%d': r'(?P<d>\d{1,2})',
+    '%m': r'(?P<m>\d{1,2})',
+    '%Y': r'(?P<Y>\d{4})',
+    '%y': r'(?P<y>\d{2})',
+}
+
+
+@dataclass
+class CsvFormatProfile:
+    """
+    Format of a CSV export, detected once from a sample of rows.
+
+    sign_convention is one of 'leading' (-12.50), 'trailing' (12.50-)
+    or 'parentheses' ((12.50)).
+    """
+    date_format: Optional[str] = None
+    decimal_separator: str = '.'
+    thousands_separator: str = ','
+    sign_convention: str = 'leading'
+    sampled_rows: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _compile_date_parser(date_format: str) -> Callable[[str], date]:
+    """
+    Build a parser for a date format.
+
+    Formats made only of day/month/year fields and literal separators are
+    compiled to a regex, which is several times faster than strptime.
+    Anything else falls back to strptime.
+    """
+    def strptime_parser(value: str) -> date:
+        return datetime.strptime(value, date_format).date()
+
+    pattern = ''
+    seen = set()
+    i = 0
+    while i < len(date_format):
+        if date_format[i] == '%':
+            token = date_format[i:i + 2]
+            if token not in _DATE_TOKENS or token in seen:
+                return strptime_parser
+            seen.add(token)
+            pattern += _DATE_TOKENS[token]
+            i += 2
+        else:
+            pattern += re.escape(date_format[i])
+            i += 1
+
+    if '%d' not in seen or '%m' not in seen or not seen & {'%Y', '%y'}:
+        return strptime_parser
+
+    match = re.compile(pattern + r'\Z').match
+    two_digit_year = '%y' in seen
+
+    def regex_parser(value: str) -> date:
+        m = match(value)
+        if m is None:
+            raise ValueError(f"Date {value!r} does not match format {date_format!r}")
+        if two_digit_year:
+            # Same pivot as strptime: 69-99 -> 1900s, 00-68 -> 2000s
+            year = int(m.group('y'))
+            year += 1900 if year >= 69 else 2000
+        else:
+            year = int(m.group('Y'))
+        return date(year, int(m.group('m')), int(m.group('d')))
+
+    return regex_parser
+
+
+def _parse_date_fallback(value: str, date_format: str) -> date:
+    """Parse a date trying the configured format, then the common ones."""
+    for fmt in [date_format] + FALLBACK_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date format: {value}")
+
+
+def _parse_amount_generic(value: str) -> Decimal:
+    """
+    Parse an amount without any knowledge of the file format.
+
+    Any separator is treated as decimal point, as the importer always did.
+    Used for unsniffed imports and for cells the compiled parser rejects.
+    """
+    amount_str = value.strip()
+    negative = False
+    if amount_str.startswith('(') and amount_str.endswith(')'):
+        negative = True
+        amount_str = amount_str[1:-1]
+    elif amount_str.endswith('-'):
+        negative = True
+        amount_str = amount_str[:-1]
+
+    amount_str = amount_str.replace(',', '.').replace(' ', '')
+    amount_str = ''.join(c for c in amount_str if c.isdigit() or c in '.-')
+
+    try:
+        amount = Decimal(amount_str)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value}")
+    return -amount if negative else amount
+
+
+def _compile_amount_parser(profile: CsvFormatProfile) -> Callable[[str], Decimal]:
+    """
+    Build an amount parser specialised for the detected number format.
+
+    The thousands separator is only dropped where it groups exactly three
+    digits; any other shape (e.g. "12,50" in a file sniffed as 1,234.56)
+    falls back to _parse_amount_generic.
+    """
+    delete_noise = str.maketrans('', '', _AMOUNT_NOISE_CHARS)
+    decimal_separator = profile.decimal_separator
+    thousands_separator = profile.thousands_separator
+    grouping = (
+        re.compile(r'-?\d{1,3}(?:%s\d{3})+' % re.escape(thousands_separator))
+        if thousands_separator else None
+    )
+    sign_convention = profile.sign_convention
+
+    def parse(value: str) -> Decimal:
+        amount_str = value.strip()
+        negative = False
+        if sign_convention == 'trailing' and amount_str.endswith('-'):
+            negative = True
+            amount_str = amount_str[:-1]
+        elif sign_convention == 'parentheses' and amount_str.startswith('('):
+            negative = True
+            amount_str = amount_str.strip('()')
+
+        amount_str = amount_str.translate(delete_noise)
+        integer, separator, fraction = amount_str.partition(decimal_separator)
+        if grouping and thousands_separator in integer:
+            if not grouping.fullmatch(integer):
+                return _parse_amount_generic(value)
+            integer = integer.replace(thousands_separator, '')
+        amount_str = f"{integer}.{fraction}" if separator else integer
+
+        try:
+            amount = Decimal(amount_str)
+        except InvalidOperation:
+            return _parse_amount_generic(value)
+        return -amount if negative else amount
+
+    return parse
+
+
+def _sniff_date_format(values: List[str], preferred: Optional[str]) -> Optional[str]:
+    """Return the format parsing the most sample dates (preferred format wins ties)."""
+    if not values:
+        return preferred
+
+    candidates = []
+    for fmt in ([preferred] if preferred else []) + FALLBACK_DATE_FORMATS:
+        if fmt not in candidates:
+            candidates.append(fmt)
+
+    best_format, best_score = None, 0
+    for fmt in candidates:
+        parser = _compile_date_parser(fmt)
+        score = 0
+        for value in values:
+            try:
+                parser(value)
+                score += 1
+            except ValueError:
+                pass
+        if score == len(values):
+            return fmt
+        if score > best_score:
+            best_format, best_score = fmt, score
+
+    return best_format
+
+
+def _sniff_number_format(values: List[str]) -> Tuple[str, str, str]:
+    """Return (decimal_separator, thousands_separator, sign_convention)."""
+    decimal_votes = {',': 0, '.': 0}
+    sign_votes = {'leading': 0, 'trailing': 0, 'parentheses': 0}
+    ambiguous_comma = False
+
+    for raw in values:
+        value = raw.strip().translate(str.maketrans('', '', _AMOUNT_NOISE_CHARS))
+        if value.startswith('(') and value.endswith(')'):
+            sign_votes['parentheses'] += 1
+        elif value.endswith('-'):
+            sign_votes['trailing'] += 1
+        elif value.startswith('-'):
+            sign_votes['leading'] += 1
+
+        last_comma, last_dot = value.rfind(','), value.rfind('.')
+        if last_comma >= 0 and last_dot >= 0:
+            # Both present: whichever comes last is the decimal separator
+            decimal_votes[',' if last_comma > last_dot else '.'] += 1
+            continue
+
+        for sep, pos in ((',', last_comma), ('.', last_dot)):
+            if pos < 0:
+                continue
+            if value.count(sep) > 1:
+                # Repeated separator can only group thousands
+                decimal_votes['.' if sep == ',' else ','] += 1
+            elif len(value[pos + 1:].rstrip('-)')) != 3:
+                decimal_votes[sep] += 1
+            elif sep == ',':
+                ambiguous_comma = True
+
+    if decimal_votes[','] > decimal_votes['.']:
+        decimal_separator = ','
+    elif decimal_votes['.'] > decimal_votes[',']:
+        decimal_separator = '.'
+    else:
+        # No evidence either way: keep the historical comma-as-decimal reading
+        decimal_separator = ',' if ambiguous_comma else '.'
+
+    if any(decimal_votes.values()) or ambiguous_comma:
+        thousands_separator = '.' if decimal_separator == ',' else ','
+    else:
+        # No separator in the sample: assume no grouping at all
+        thousands_separator = ''
+    sign_convention = max(sign_votes, key=lambda k: (sign_votes[k], k == 'leading'))
+    return decimal_separator, thousands_separator, sign_convention
+
+
+def sniff_csv_format(
+    rows: List[Dict[str, str]],
+    mapping: Dict[str, str],
+    preferred_date_format: Optional[str] = None,
+    sample_size: int = SNIFF_SAMPLE_SIZE,
+) -> CsvFormatProfile:
+    """
+    Detect the date and number format of a CSV export from its first rows.
+
+    Args:
+        rows: Parsed CSV rows (dicts keyed by header)
+        mapping: Resolved column mapping (see _resolve_column_mapping)
+        preferred_date_format: Format to keep when it matches the sample
+        sample_size: Number of rows to inspect
+
+    Returns:
+        CsvFormatProfile describing the file
+    """
+    sample = rows[:sample_size]
+    date_col = mapping.get('date')
+    amount_col = mapping.get('amount')
+
+    date_values = [
+        row[date_col].strip() for row in sample
+        if date_col and row.get(date_col)
+    ]
+    amount_values = [
+        row[amount_col] for row in sample
+        if amount_col and row.get(amount_col)
+    ]
+
+    decimal_separator, thousands_separator, sign_convention = _sniff_number_format(amount_values)
+
+    return CsvFormatProfile(
+        date_format=_sniff_date_format(date_values, preferred_date_format),
+        decimal_separator=decimal_separator,
+        thousands_separator=thousands_separator,
+        sign_convention=sign_convention,
+        sampled_rows=len(sample),
+    )
+
+
 class TransactionImportService:
     """
     Service for importing transactions from CSV/Excel files.
@@ -57,6 +347,8 @@ class TransactionImportService:
         self.imported_count = 0
         self.skipped_count = 0
         self.duplicate_count = 0
+        self.format_profile: Optional[CsvFormatProfile] = None
+        self._category_cache: Dict[str, Optional[Category]] = {}
 
     def import_csv(
         self,
@@ -65,6 +357,8 @@ class TransactionImportService:
         date_format: str = '%Y-%m-%d',
         skip_duplicates: bool = True,
         delimiter: str = ',',
+        sniff_format: bool = True,
+        sniff_sample_size: int = SNIFF_SAMPLE_SIZE,
     ) -> Tuple[int, int, List[Dict]]:
         """
         Import transactions from CSV content.
@@ -75,6 +369,9 @@ class TransactionImportService:
             date_format: Date format string for parsing dates
             skip_duplicates: Whether to skip duplicate transactions
             delimiter: CSV delimiter character
+            sniff_format: Detect date/number format from the first rows and
+                          parse the file with a specialised row parser
+            sniff_sample_size: Number of rows inspected when sniffing
             
         Returns:
             Tuple of (imported_count, skipped_count, errors)
@@ -98,9 +395,20 @@ class TransactionImportService:
             transactions_to_create = []
             seen_hashes = set()
 
+            if sniff_format:
+                self.format_profile = sniff_csv_format(
+                    rows, mapping,
+                    preferred_date_format=date_format,
+                    sample_size=sniff_sample_size,
+                )
+                parse_row = self._compile_row_parser(self.format_profile, mapping, date_format)
+            else:
+                def parse_row(row):
+                    return self._parse_csv_row(row, mapping, date_format)
+
             for row_num, row in enumerate(rows, start=2):  # Start at 2 (1 is header)
                 try:
-                    tx_data = self._parse_csv_row(row, mapping, date_format)
+                    tx_data = parse_row(row)
                     
                     if tx_data is None:
                         self.skipped_count += 1
@@ -147,6 +455,8 @@ class TransactionImportService:
                         )
                         for tx in transactions_to_create
                     ])
+                    # bulk_create skips signals: update the rollup here
+                    record_created(created)
                     self.imported_count = len(created)
 
         except Exception as e:
@@ -195,18 +505,7 @@ class TransactionImportService:
         if not date_col or not row.get(date_col):
             raise ValueError("Missing date field")
         
-        try:
-            result['date'] = datetime.strptime(row[date_col].strip(), date_format).date()
-        except ValueError:
-            # Try alternative formats
-            for fmt in ['%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y']:
-                try:
-                    result['date'] = datetime.strptime(row[date_col].strip(), fmt).date()
-                    break
-                except ValueError:
-                    continue
-            else:
-                raise ValueError(f"Invalid date format: {row[date_col]}")
+        result['date'] = _parse_date_fallback(row[date_col].strip(), date_format)
 
         # Parse description (required)
         desc_col = mapping.get('description')
@@ -219,26 +518,79 @@ class TransactionImportService:
         if not amount_col or not row.get(amount_col):
             raise ValueError("Missing amount field")
         
-        amount_str = row[amount_col].strip()
-        # Handle different number formats
-        amount_str = amount_str.replace(',', '.').replace(' ', '')
-        amount_str = ''.join(c for c in amount_str if c.isdigit() or c in '.-')
-        
-        try:
-            amount = Decimal(amount_str)
-        except InvalidOperation:
-            raise ValueError(f"Invalid amount: {row[amount_col]}")
+        amount = _parse_amount_generic(row[amount_col])
+
+        self._fill_common_fields(result, row, mapping, amount)
+        return result
+
+    def _compile_row_parser(
+        self,
+        profile: CsvFormatProfile,
+        mapping: Dict[str, str],
+        date_format: str
+    ) -> Callable[[Dict[str, str]], Dict[str, Any]]:
+        """
+        Build a row parser specialised for a sniffed file format.
 
+        Produces the same dicts as _parse_csv_row, but resolves the date and
+        amount parsers once per file instead of probing formats on every row.
+        Cells that do not match the profile fall back to the generic parsers.
+        """
+        date_col = mapping.get('date')
+        desc_col = mapping.get('description')
+        amount_col = mapping.get('amount')
+        fallback_format = date_format
+
+        if profile.date_format:
+            parse_date = _compile_date_parser(profile.date_format)
+        else:
+            def parse_date(value):
+                return _parse_date_fallback(value, fallback_format)
+
+        parse_amount = _compile_amount_parser(profile)
+
+        def parse_row(row: Dict[str, str]) -> Dict[str, Any]:
+            raw_date = row.get(date_col) if date_col else None
+            if not raw_date:
+                raise ValueError("Missing date field")
+            raw_date = raw_date.strip()
+            try:
+                tx_date = parse_date(raw_date)
+            except ValueError:
+                tx_date = _parse_date_fallback(raw_date, fallback_format)
+
+            description = row.get(desc_col) if desc_col else None
+            if not description:
+                raise ValueError("Missing description field")
+
+            raw_amount = row.get(amount_col) if amount_col else None
+            if not raw_amount:
+                raise ValueError("Missing amount field")
+
+            result = {
+                'date': tx_date,
+                'description': description.strip()[:500],
+            }
+            self._fill_common_fields(result, row, mapping, parse_amount(raw_amount))
+            return result
+
+        return parse_row
+
+    def _fill_common_fields(
+        self,
+        result: Dict[str, Any],
+        row: Dict[str, str],
+        mapping: Dict[str, str],
+        amount: Decimal
+    ) -> None:
+        """Fill type, amount, category and reference of a parsed row."""
         # Determine transaction type from amount sign or explicit field
         type_col = mapping.get('type')
-        if type_col and row.get(type_col):
-            type_val = row[type_col].strip().lower()
-            if type_val in ['income', 'entrata', 'e', '+']:
-                result['type'] = 'income'
-            elif type_val in ['expense', 'uscita', 'u', '-']:
-                result['type'] = 'expense'
-            else:
-                result['type'] = 'income' if amount >= 0 else 'expense'
+        type_val = row[type_col].strip().lower() if type_col and row.get(type_col) else None
+        if type_val in INCOME_TYPE_VALUES:
+            result['type'] = 'income'
+        elif type_val in EXPENSE_TYPE_VALUES:
+            result['type'] = 'expense'
         else:
             result['type'] = 'income' if amount >= 0 else 'expense'
 
@@ -247,8 +599,7 @@ class TransactionImportService:
         # Parse category (optional)
         cat_col = mapping.get('category')
         if cat_col and row.get(cat_col):
-            cat_name = row[cat_col].strip()
-            category = Category.objects.filter(name__iexact=cat_name, is_active=True).first()
+            category = self._get_category(row[cat_col].strip())
             result['category'] = category or self.default_category
         else:
             result['category'] = self.default_category
@@ -261,7 +612,14 @@ class TransactionImportService:
         if ref_col and row.get(ref_col):
             result['reference'] = row[ref_col].strip()[:200]
 
-        return result
+    def _get_category(self, name: str) -> Optional[Category]:
+        """Look up an active category by name, once per distinct name per import."""
+        key = name.lower()
+        if key not in self._category_cache:
+            self._category_cache[key] = Category.objects.filter(
+                name__iexact=name, is_active=True
+            ).first()
+        return self._category_cache[key]
 
     def _generate_transaction_hash(self, tx_data: Dict[str, Any]) -> str:
         """Generate a hash for deduplication based on key transaction data."""
@@ -331,6 +689,7 @@ def import_transactions_from_csv(
         'imported': imported,
         'skipped': skipped,
         'duplicates': service.duplicate_count,
+        'detected_format': service.format_profile.to_dict() if service.format_profile else None,
         'errors': errors
     }
 
@@ -406,6 +765,7 @@ def import_transactions_from_excel(
             'imported': imported,
             'skipped': skipped,
             'duplicates': service.duplicate_count,
+            'detected_format': service.format_profile.to_dict() if service.format_profile else None,
             'errors': errors
         }
 
@@ -418,3 +778,74 @@ def import_transactions_from_excel(
             'skipped': 0,
             'errors': []
         }
+
+
+# =============================================================================
+# Bulk updates
+# =============================================================================
+
+# Fields carried by transactions_changed for every affected row
+CHANGE_FIELDS = ('payment_date',) + TRACKED_FIELDS
+
+
+@dataclass
+class TransactionChange:
+    """Old and new values of one transaction touched by a bulk update."""
+    id: int
+    old: Dict[str, Any]
+    new: Dict[str, Any]
+
+    @property
+    def changed_fields(self) -> List[str]:
+        return [field for field in self.new if self.old[field] != self.new[field]]
+
+
+@dataclass
+class BulkUpdateResult:
+    """Outcome of bulk_update_transactions()."""
+    updated_count: int
+    changes: List[TransactionChange]
+
+
+def bulk_update_transactions(queryset, **changes) -> BulkUpdateResult:
+    """
+    Apply QuerySet.update() and announce the changed rows.
+
+    The affected rows are locked and their old values read, the update
+    runs as one statement and the new values are read back. Rows whose
+    values actually changed are then sent in a single transactions_changed
+    event, inside the transaction: its receivers keep the rollup, the
+    cached finance data and the status side effects in step, as the
+    post_save handlers do for single saves.
+
+    Args:
+        queryset: Transactions to update
+        **changes: Field values, as for QuerySet.update()
+
+    Returns:
+        BulkUpdateResult with the number of rows updated and their changes
+    """
+    with db_transaction.atomic():
+        before = {
+            row['id']: row
+            for row in queryset.select_for_update().order_by().values('id', *CHANGE_FIELDS)
+        }
+        if not before:
+            return BulkUpdateResult(updated_count=0, changes=[])
+
+        updated = Transaction.objects.filter(id__in=before).update(**changes)
+        after = Transaction.objects.filter(id__in=before).order_by().values('id', *CHANGE_FIELDS)
+
+        changed = []
+        for row in after:
+            pk = row.pop('id')
+            old = before[pk]
+            old.pop('id')
+            if old != row:
+                changed.append(TransactionChange(id=pk, old=old, new=row))
+
+        if changed:
+            transactions_changed.send(sender=Transaction, changes=changed)
+
+    return BulkUpdateResult(updated_count=updated, changes=changed)
+
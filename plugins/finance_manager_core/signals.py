@@ -1,29 +1,94 @@
 import logging
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
 
-from .models import Transaction
+from .cache import invalidate_finance_data
+from .category_tree import invalidate_category_tree
+from .models import Category, CategoryClosure, Transaction
+from .rollup import TRACKED_FIELDS, apply_deltas, collect_deltas, record_transaction_change, transaction_state
 
 logger = logging.getLogger(__name__)
 
+# Sent once per bulk update (see services.bulk_update_transactions) with
+# changes=[TransactionChange, ...], the old and new values of every row
+# whose values changed. Sent inside the updating transaction.
+transactions_changed = Signal()
+
+# Sent when a transaction becomes paid, by a save or a bulk update, with
+# transaction_id and payment_date. Sent inside the updating transaction.
+transaction_paid = Signal()
+
+
+@receiver(pre_save, sender=Category)
+def cache_previous_parent(sender, instance, **kwargs):
+    """
+    Cache the previous parent to detect moves, and refuse cycles.
+    """
+    if not instance.pk:
+        instance._previous_parent_id = None
+        return
+
+    instance._previous_parent_id = (
+        sender.objects.filter(pk=instance.pk).values_list('parent_id', flat=True).first()
+    )
+
+    if instance.parent_id and instance.parent_id != instance._previous_parent_id:
+        if CategoryClosure.objects.filter(
+            ancestor_id=instance.pk,
+            descendant_id=instance.parent_id
+        ).exists():
+            raise ValueError("A category cannot be moved under itself or one of its subcategories")
+
+
+@receiver(post_save, sender=Category)
+def update_category_closure(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the closure table in sync and invalidate the cached tree.
+    """
+    if raw:
+        return
+
+    if created:
+        CategoryClosure.insert_category(instance)
+    elif getattr(instance, '_previous_parent_id', None) != instance.parent_id:
+        CategoryClosure.move_category(instance)
+
+    invalidate_category_tree()
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_tree_on_delete(sender, instance, **kwargs):
+    invalidate_category_tree()
+
 
 @receiver(pre_save, sender=Transaction)
 def cache_previous_status(sender, instance, **kwargs):
     """
     Cache the previous status before saving to detect status changes.
     """
+    instance._previous_state = None
     if not instance.pk:
         instance._previous_status = None
         instance._previous_payment_date = None
         return
     
-    try:
-        previous = sender.objects.only('status', 'payment_date').get(pk=instance.pk)
-        instance._previous_status = previous.status
-        instance._previous_payment_date = previous.payment_date
-    except sender.DoesNotExist:
+    # Locked until the save commits (Transaction.save() is atomic), so two
+    # concurrent saves of the row cannot both move it from the same state
+    previous = (
+        sender.objects.using(kwargs.get('using'))
+        .select_for_update()
+        .filter(pk=instance.pk)
+        .values('payment_date', *TRACKED_FIELDS)
+        .first()
+    )
+    if previous is None:
         instance._previous_status = None
         instance._previous_payment_date = None
+        return
+
+    instance._previous_status = previous['status']
+    instance._previous_payment_date = previous.pop('payment_date')
+    instance._previous_state = previous
 
 
 @receiver(post_save, sender=Transaction)
@@ -37,7 +102,23 @@ def handle_transaction_status_change(sender, instance, created, **kwargs):
     
     Note: The actual balance calculation is done dynamically via the
     Account.current_balance property, so no balance update is needed here.
+    The monthly cashflow rollup is updated with the row's deltas.
     """
+    previous_state = getattr(instance, '_previous_state', None)
+    current_state = transaction_state(instance)
+    update_fields = kwargs.get('update_fields')
+    if previous_state and update_fields:
+        # Fields left out of update_fields were not written
+        current_state = {
+            field: (
+                current_state[field]
+                if field in update_fields or field.removesuffix('_id') in update_fields
+                else previous_state[field]
+            )
+            for field in current_state
+        }
+    record_transaction_change(previous_state, current_state)
+
     if created:
         logger.info(
             "Transaction #%s created: %s %s (%s)",
@@ -61,39 +142,95 @@ def handle_transaction_status_change(sender, instance, created, **kwargs):
         
         # Transaction marked as paid
         if instance.status == 'paid' and prev_status != 'paid':
-            _handle_transaction_paid(instance)
+            _handle_transaction_paid(instance.id, instance.payment_date)
         
         # Transaction unmarked as paid
         elif prev_status == 'paid' and instance.status != 'paid':
-            _handle_transaction_unpaid(instance)
+            _handle_transaction_unpaid(instance.id, instance.status)
+
+
+@receiver(post_delete, sender=Transaction)
+def remove_transaction_from_rollup(sender, instance, **kwargs):
+    """
+    Subtract a deleted transaction from the monthly cashflow rollup.
+    """
+    record_transaction_change(transaction_state(instance), None)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_cached_finance_data(sender, instance, **kwargs):
+    """
+    Invalidate cached balances and forecasts after any transaction write.
+    """
+    invalidate_finance_data()
+
+
+@receiver(transactions_changed)
+def update_rollup_for_changes(sender, changes, **kwargs):
+    """
+    Move the changed rows between monthly cashflow buckets, in one statement.
+    """
+    apply_deltas(collect_deltas(
+        [change.old for change in changes],
+        [change.new for change in changes]
+    ))
+
+
+@receiver(transactions_changed)
+def invalidate_finance_data_for_changes(sender, changes, **kwargs):
+    """
+    Invalidate cached balances and forecasts once for the whole batch.
+    """
+    invalidate_finance_data()
+
+
+@receiver(transactions_changed)
+def handle_bulk_status_change(sender, changes, **kwargs):
+    """
+    Run the status change side effects of a bulk update, row by row.
+    """
+    for change in changes:
+        prev_status = change.old['status']
+        new_status = change.new['status']
+        if prev_status == new_status:
+            continue
+
+        logger.info(
+            "Transaction #%s status changed: %s → %s",
+            change.id,
+            prev_status,
+            new_status
+        )
+
+        if new_status == 'paid':
+            _handle_transaction_paid(change.id, change.new['payment_date'])
+        elif prev_status == 'paid':
+            _handle_transaction_unpaid(change.id, new_status)
 
 
-def _handle_transaction_paid(transaction):
+def _handle_transaction_paid(transaction_id, payment_date):
     """
     Handle side effects when a transaction is marked as paid.
     
-    Could be extended to:
-    - Send notifications
-    - Update related records
-    - Trigger reconciliation workflows
+    Announces it with transaction_paid, for receivers outside this app
+    (e.g. the n8n integration, to trigger reconciliation workflows).
     """
     logger.info(
         "Transaction #%s marked as paid on %s",
-        transaction.id,
-        transaction.payment_date
+        transaction_id,
+        payment_date
     )
     
-    # Future: Add notification logic here if needed
-    # from base_modules.mailer.services import send_templated_email
-    # send_templated_email(...)
+    transaction_paid.send(sender=Transaction, transaction_id=transaction_id, payment_date=payment_date)
 
 
-def _handle_transaction_unpaid(transaction):
+def _handle_transaction_unpaid(transaction_id, status):
     """
     Handle side effects when a transaction is unmarked as paid.
     """
     logger.info(
         "Transaction #%s status reverted from paid to %s",
-        transaction.id,
-        transaction.status
+        transaction_id,
+        status
     )
@@ -0,0 +1,49 @@
+"""
+Celery tasks for finance_manager_core.
+
+Handles:
+- Reconciliation of the monthly cashflow rollup
+"""
+
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+
+from .rollup import reconcile_rollup
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_cashflow_rollup(fix: bool = True) -> dict:
+    """
+    Verify the monthly cashflow rollup against the raw transactions.
+    
+    This task should be scheduled to run daily, off-peak. Drift can only
+    come from writes that bypass both the model signals and the rollup
+    helpers (raw SQL, QuerySet.update() in shell sessions, ...).
+    
+    Args:
+        fix: Overwrite mismatching buckets with the raw totals.
+    
+    Returns:
+        Dict with reconciliation statistics
+    """
+    stats = reconcile_rollup(fix=fix)
+
+    if stats['mismatches']:
+        logger.warning(
+            "Cashflow rollup reconciliation: %d/%d buckets mismatched (%d fixed)",
+            stats['mismatches'],
+            stats['buckets_checked'],
+            stats['fixed']
+        )
+    else:
+        logger.info(
+            "Cashflow rollup reconciliation: %d buckets verified",
+            stats['buckets_checked']
+        )
+
+    return stats
@@ -0,0 +1,378 @@
+"""
+Tests for finance_manager_core.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from plugins.finance_manager_accounts.models import Account
+
+from .category_tree import get_category_tree
+from .models import Category, CategoryClosure, MonthlyCashflow, Transaction
+from . import rollup
+from .rollup import cashflow_by_period, reconcile_rollup, totals_by_category
+from .signals import transactions_changed
+from .services import (
+    TransactionImportService,
+    bulk_update_transactions,
+    sniff_csv_format,
+    _compile_amount_parser,
+    _compile_date_parser,
+)
+
+
+class CsvFormatSniffingTests(TestCase):
+    """Tests for CSV format detection and compiled parsers."""
+
+    MAPPING = {'date': 'date', 'amount': 'amount'}
+
+    def _rows(self, dates, amounts):
+        return [{'date': d, 'amount': a} for d, a in zip(dates, amounts)]
+
+    def test_sniff_italian_format(self):
+        rows = self._rows(
+            ['01/02/2024', '15/02/2024', '28/02/2024'],
+            ['1.234,56', '-12,50', '3.000,00'],
+        )
+        profile = sniff_csv_format(rows, self.MAPPING, preferred_date_format='%Y-%m-%d')
+        self.assertEqual(profile.date_format, '%d/%m/%Y')
+        self.assertEqual(profile.decimal_separator, ',')
+        self.assertEqual(profile.thousands_separator, '.')
+        self.assertEqual(profile.sign_convention, 'leading')
+
+    def test_sniff_us_format_with_parentheses(self):
+        rows = self._rows(
+            ['02/01/2024', '02/15/2024', '02/28/2024'],
+            ['$1,234.56', '($12.50)', '3,000.00'],
+        )
+        profile = sniff_csv_format(rows, self.MAPPING)
+        self.assertEqual(profile.date_format, '%m/%d/%Y')
+        self.assertEqual(profile.decimal_separator, '.')
+        self.assertEqual(profile.sign_convention, 'parentheses')
+
+        parse_amount = _compile_amount_parser(profile)
+        self.assertEqual(parse_amount('($1,234.56)'), Decimal('-1234.56'))
+
+    def test_preferred_date_format_is_kept_when_it_matches(self):
+        rows = self._rows(['01/02/2024', '03/04/2024'], ['1', '2'])
+        profile = sniff_csv_format(rows, self.MAPPING, preferred_date_format='%m/%d/%Y')
+        self.assertEqual(profile.date_format, '%m/%d/%Y')
+
+    def test_trailing_minus(self):
+        rows = self._rows(['2024-01-01', '2024-01-02'], ['12,50-', '3,20'])
+        profile = sniff_csv_format(rows, self.MAPPING)
+        self.assertEqual(profile.sign_convention, 'trailing')
+        self.assertEqual(_compile_amount_parser(profile)('12,50-'), Decimal('-12.50'))
+
+    def test_integer_sample_does_not_assume_grouping(self):
+        rows = self._rows(['2024-01-01'] * 3, ['12', '-7', '1500'])
+        profile = sniff_csv_format(rows, self.MAPPING)
+        self.assertEqual(profile.thousands_separator, '')
+
+        parse_amount = _compile_amount_parser(profile)
+        self.assertEqual(parse_amount('12,50'), Decimal('12.50'))
+        self.assertEqual(parse_amount('7,5'), Decimal('7.5'))
+        self.assertEqual(parse_amount('1500'), Decimal('1500'))
+
+    def test_separator_not_grouping_three_digits_is_not_stripped(self):
+        rows = self._rows(['2024-01-01'] * 2, ['1.234,56', '12,50'])
+        parse_amount = _compile_amount_parser(sniff_csv_format(rows, self.MAPPING))
+        self.assertEqual(parse_amount('1.234.567,89'), Decimal('1234567.89'))
+        self.assertEqual(parse_amount('12.50'), Decimal('12.50'))
+
+        rows = self._rows(['2024-01-01'] * 2, ['1,234.56', '12.50'])
+        parse_amount = _compile_amount_parser(sniff_csv_format(rows, self.MAPPING))
+        self.assertEqual(parse_amount('12,50'), Decimal('12.50'))
+        self.assertEqual(parse_amount('-1,234'), Decimal('-1234'))
+
+    def test_compiled_date_parser_matches_strptime(self):
+        parse = _compile_date_parser('%d.%m.%y')
+        self.assertEqual(parse('05.03.24'), date(2024, 3, 5))
+        self.assertEqual(parse('05.03.99'), date(1999, 3, 5))
+        with self.assertRaises(ValueError):
+            parse('31.02.24')
+
+
+class TransactionImportServiceTests(TestCase):
+    """Tests for CSV import with format sniffing."""
+
+    def setUp(self):
+        self.account = Account.objects.create(name="Conto")
+        self.category = Category.objects.create(name="Varie")
+
+    def test_import_italian_export(self):
+        csv_content = (
+            "Data;Descrizione;Importo;Tipo\n"
+            "01/02/2024;Stipendio;2.500,00;Entrata\n"
+            "15/02/2024;Affitto;-850,00;\n"
+        )
+        service = TransactionImportService(self.account, self.category)
+        imported, skipped, errors = service.import_csv(csv_content, delimiter=';')
+
+        self.assertEqual((imported, skipped, errors), (2, 0, []))
+        rent = Transaction.objects.get(description="Affitto")
+        self.assertEqual(rent.gross_amount, Decimal('850.00'))
+        self.assertEqual(rent.transaction_type, 'expense')
+        self.assertEqual(rent.competence_date, date(2024, 2, 15))
+        self.assertEqual(service.format_profile.date_format, '%d/%m/%Y')
+
+
+class CategoryHierarchyTests(TestCase):
+    """Tests for the category closure table and cached tree."""
+
+    def setUp(self):
+        self.root = Category.objects.create(name="Casa")
+        self.child = Category.objects.create(name="Utenze", parent=self.root)
+        self.leaf = Category.objects.create(name="Luce", parent=self.child)
+        self.other = Category.objects.create(name="Lavoro")
+        self.account = Account.objects.create(name="Conto")
+
+    def _closure(self):
+        return set(CategoryClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    def test_closure_rows_on_create(self):
+        self.assertIn((self.root.pk, self.leaf.pk, 2), self._closure())
+        self.assertEqual(self.leaf.depth, 2)
+        self.assertEqual(self.leaf.full_path, "Casa → Utenze → Luce")
+
+    def test_move_subtree(self):
+        self.child.parent = self.other
+        self.child.save()
+
+        closure = self._closure()
+        self.assertNotIn((self.root.pk, self.leaf.pk, 2), closure)
+        self.assertIn((self.other.pk, self.leaf.pk, 2), closure)
+        self.assertEqual(Category.objects.get(pk=self.leaf.pk).full_path, "Lavoro → Utenze → Luce")
+
+    def test_cycle_is_rejected(self):
+        self.root.parent = self.leaf
+        with self.assertRaises(ValueError):
+            self.root.save()
+
+    def test_for_category_includes_descendants(self):
+        for category in (self.root, self.leaf, self.other):
+            Transaction.objects.create(
+                account=self.account, category=category, description=category.name,
+                gross_amount=Decimal('10.00'), competence_date=date(2024, 1, 1),
+                transaction_type='expense',
+            )
+        with self.assertNumQueries(1):
+            names = set(Transaction.objects.all().for_category(self.root.pk).values_list('description', flat=True))
+        self.assertEqual(names, {"Casa", "Luce"})
+
+    def test_tree_is_cached_and_invalidated(self):
+        tree = get_category_tree()
+        self.assertEqual([node['name'] for node in tree], ["Casa", "Lavoro"])
+        self.assertEqual(tree[0]['children'][0]['children'][0]['name'], "Luce")
+
+        with self.assertNumQueries(0):
+            get_category_tree()
+
+        self.leaf.is_active = False
+        self.leaf.save()
+        self.assertEqual(get_category_tree()[0]['children'][0]['children'], [])
+
+
+class MonthlyCashflowRollupTests(TestCase):
+    """Tests for the incremental monthly cashflow rollup."""
+
+    def setUp(self):
+        self.account = Account.objects.create(name="Conto")
+        self.rent = Category.objects.create(name="Affitto")
+        self.food = Category.objects.create(name="Spesa")
+
+    def _create(self, day, amount, category=None, **kwargs):
+        return Transaction.objects.create(
+            account=self.account, category=category or self.rent,
+            description="Test", gross_amount=Decimal(amount), competence_date=day,
+            transaction_type=kwargs.pop('transaction_type', 'expense'), **kwargs
+        )
+
+    def assertRollupConsistent(self):
+        self.assertEqual(reconcile_rollup(fix=False)['mismatches'], 0)
+
+    def test_signals_keep_rollup_in_sync(self):
+        first = self._create(date(2024, 1, 10), '100.00')
+        second = self._create(date(2024, 1, 20), '50.00')
+        self.assertEqual(MonthlyCashflow.objects.get().total_amount, Decimal('150.00'))
+
+        first.gross_amount = Decimal('120.00')
+        first.competence_date = date(2024, 2, 1)
+        first.save()
+        second.mark_as_paid(date(2024, 1, 25))
+        self.assertRollupConsistent()
+
+        first.delete()
+        self.assertRollupConsistent()
+        self.assertEqual(
+            MonthlyCashflow.objects.get(month=date(2024, 2, 1)).transaction_count, 0
+        )
+
+    def test_bulk_update_keeps_rollup_in_sync(self):
+        for day in (1, 2, 3):
+            self._create(date(2024, 3, day), '10.00')
+
+        updated = bulk_update_transactions(
+            Transaction.objects.filter(competence_date__day__lte=2),
+            status='paid', category_id=self.food.pk
+        ).updated_count
+
+        self.assertEqual(updated, 2)
+        self.assertRollupConsistent()
+        self.assertEqual(
+            MonthlyCashflow.objects.get(category=self.food, status='paid').total_amount,
+            Decimal('20.00')
+        )
+
+    def test_partial_months_match_raw_data(self):
+        self._create(date(2024, 1, 5), '10.00')
+        self._create(date(2024, 1, 25), '20.00')
+        self._create(date(2024, 2, 15), '40.00', category=self.food)
+        self._create(date(2024, 3, 5), '80.00')
+        self._create(date(2024, 3, 25), '1000.00', transaction_type='income')
+        self._create(date(2024, 2, 15), '5.00', is_hypothetical=True)
+
+        rows = cashflow_by_period('month', date(2024, 1, 20), date(2024, 3, 10))
+        self.assertEqual(
+            [(row['period'], row['total_expenses'], row['transaction_count']) for row in rows],
+            [
+                (date(2024, 1, 1), Decimal('20.00'), 1),
+                (date(2024, 2, 1), Decimal('40.00'), 1),
+                (date(2024, 3, 1), Decimal('80.00'), 1),
+            ]
+        )
+
+        yearly = cashflow_by_period('year', include_hypothetical=True)
+        self.assertEqual(yearly[0]['total_expenses'], Decimal('155.00'))
+        self.assertEqual(yearly[0]['total_income'], Decimal('1000.00'))
+
+        totals = totals_by_category(date(2024, 1, 10), date(2024, 3, 31), transaction_type='expense')
+        self.assertEqual(
+            [(item['category_name'], item['total']) for item in totals],
+            [("Affitto", Decimal('100.00')), ("Spesa", Decimal('40.00'))]
+        )
+
+    def test_reconcile_fixes_drift(self):
+        self._create(date(2024, 1, 10), '100.00')
+        # Bypasses signals and rollup helpers
+        Transaction.objects.update(gross_amount=Decimal('70.00'))
+
+        stats = reconcile_rollup()
+        self.assertEqual((stats['mismatches'], stats['fixed']), (1, 1))
+        self.assertRollupConsistent()
+        self.assertEqual(MonthlyCashflow.objects.get().total_amount, Decimal('70.00'))
+
+    def test_reconcile_keeps_writes_made_after_the_comparison(self):
+        self._create(date(2024, 1, 10), '100.00')
+        Transaction.objects.update(gross_amount=Decimal('70.00'))
+        fix_buckets = rollup._fix_buckets
+
+        def write_then_fix(keys):
+            # Committed between the unlocked comparison and the fix
+            self._create(date(2024, 1, 15), '5.00')
+            return fix_buckets(keys)
+
+        with mock.patch.object(rollup, '_fix_buckets', side_effect=write_then_fix):
+            stats = reconcile_rollup()
+
+        self.assertEqual(stats['fixed'], 1)
+        self.assertRollupConsistent()
+        bucket = MonthlyCashflow.objects.get()
+        self.assertEqual((bucket.total_amount, bucket.transaction_count), (Decimal('75.00'), 2))
+
+    def test_summary_endpoint(self):
+        self._create(date(2024, 1, 10), '100.00')
+        self._create(date(2024, 1, 12), '300.00', transaction_type='income')
+
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(username="tester", email="tester@example.com")
+        )
+        response = client.get('/api/finance_manager_core/cashflow/summary/', {'from': '2024-01-01'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['net_cashflow'], Decimal('200.00'))
+
+        response = client.get('/api/finance_manager_core/cashflow/by-category/', {'to': '2024-13-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TransactionBulkUpdateTests(TestCase):
+    """Tests for set-based bulk updates and the transactions_changed event."""
+
+    def setUp(self):
+        self.account = Account.objects.create(name="Conto")
+        self.rent = Category.objects.create(name="Affitto")
+        self.food = Category.objects.create(name="Spesa")
+        self.events = []
+        transactions_changed.connect(self._record, sender=Transaction)
+        self.addCleanup(transactions_changed.disconnect, self._record, sender=Transaction)
+
+    def _record(self, sender, changes, **kwargs):
+        self.events.append(changes)
+
+    def _create(self, count, **kwargs):
+        return [
+            Transaction.objects.create(
+                account=self.account, category=self.rent, description="Test",
+                gross_amount=Decimal('10.00'), competence_date=date(2024, 3, 1 + index),
+                transaction_type='expense', **kwargs
+            )
+            for index in range(count)
+        ]
+
+    def test_one_event_with_old_and_new_values(self):
+        first, second, already_paid = self._create(3)
+        already_paid.mark_as_paid(date(2024, 3, 3))
+
+        with self.assertLogs('plugins.finance_manager_core.signals', 'INFO') as logs:
+            result = bulk_update_transactions(
+                Transaction.objects.all(), status='paid', payment_date=date(2024, 3, 10)
+            )
+
+        self.assertEqual(result.updated_count, 3)
+        self.assertEqual(len(self.events), 1)
+        changes = {change.id: change for change in self.events[0]}
+        self.assertEqual(set(changes), {first.pk, second.pk, already_paid.pk})
+        self.assertEqual(changes[first.pk].old['status'], 'pending')
+        self.assertEqual(changes[first.pk].new['status'], 'paid')
+        self.assertEqual(changes[first.pk].changed_fields, ['payment_date', 'status'])
+        self.assertEqual(changes[already_paid.pk].changed_fields, ['payment_date'])
+        self.assertEqual(sum('marked as paid' in line for line in logs.output), 2)
+        self.assertEqual(reconcile_rollup(fix=False)['mismatches'], 0)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self._create(2)
+        with self.assertNumQueries(6) as small:
+            bulk_update_transactions(Transaction.objects.all(), status='scheduled')
+        self._create(20)
+        with self.assertNumQueries(len(small.captured_queries)):
+            bulk_update_transactions(Transaction.objects.exclude(status='cancelled'), status='cancelled')
+        self.assertEqual(reconcile_rollup(fix=False)['mismatches'], 0)
+
+    def test_unchanged_rows_send_no_event(self):
+        self._create(2)
+        result = bulk_update_transactions(Transaction.objects.all(), category_id=self.rent.pk)
+        self.assertEqual(result.updated_count, 2)
+        self.assertEqual(result.changes, [])
+        self.assertEqual(self.events, [])
+
+    def test_bulk_update_endpoint(self):
+        transactions = self._create(2)
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(username="bulk", email="bulk@example.com")
+        )
+        response = client.post('/api/finance_manager_core/transactions/bulk-update/', {
+            'transaction_ids': [t.pk for t in transactions],
+            'category_id': self.food.pk,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated_count'], 2)
+        self.assertEqual(Transaction.objects.filter(category=self.food).count(), 2)
+        self.assertEqual(reconcile_rollup(fix=False)['mismatches'], 0)
@@ -2,8 +2,7 @@ from decimal import Decimal
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
-from django.db.models import Sum, Count, Q, Case, When, F, DecimalField
-from django.db.models.functions import TruncMonth, TruncYear
+from django.db.models import Q
 from django.utils import timezone
 
 from rest_framework import generics, status
@@ -11,17 +10,20 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
+from mixtum_core.db_routers import ReplicaReadMixin
 from mixtum_core.settings.base import REMOTE_API
 from base_modules.user_manager.authentication import JWTAuthentication
 
 from .models import Category, Transaction
 from .serializers import (
-    CategorySerializer, CategoryMinimalSerializer, CategoryTreeSerializer,
+    CategorySerializer, CategoryMinimalSerializer,
     TransactionSerializer, TransactionCreateSerializer,
     TransactionBulkUpdateSerializer, TransactionImportSerializer,
     CashflowSummarySerializer
 )
-from .services import import_transactions_from_csv
+from .services import bulk_update_transactions, import_transactions_from_csv
+from .category_tree import get_category_tree
+from .rollup import cashflow_by_period, totals_by_category
 
 
 class CategoryListCreateView(generics.ListCreateAPIView):
@@ -96,17 +98,11 @@ class CategoryTreeView(APIView):
         authentication_classes = [JWTAuthentication]
 
     def get(self, request):
-        # Get only top-level categories, tree serializer handles children
-        categories = Category.objects.filter(
-            parent__isnull=True,
-            is_active=True
-        ).order_by('sort_order', 'name')
-        
-        serializer = CategoryTreeSerializer(categories, many=True)
-        return Response(serializer.data)
+        # Built from a single query and cached until a category changes
+        return Response(get_category_tree())
 
 
-class TransactionListCreateView(generics.ListCreateAPIView):
+class TransactionListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     GET: List transactions with filtering
     POST: Create a new transaction
@@ -241,6 +237,7 @@ class TransactionBulkUpdateView(APIView):
         transactions = Transaction.objects.filter(id__in=transaction_ids)
         updated_count = 0
         
+        update_data = {}
         update_fields = []
         if 'status' in data:
             transactions = transactions.exclude(status=data['status'])
@@ -259,7 +256,9 @@ class TransactionBulkUpdateView(APIView):
             update_fields.append('category_id')
         
         if update_fields:
-            updated_count = transactions.update(**update_data)
+            # One UPDATE, then one transactions_changed event for the rollup,
+            # caches and status side effects
+            updated_count = bulk_update_transactions(transactions, **update_data).updated_count
         
         return Response({
             'updated_count': updated_count,
@@ -328,7 +327,17 @@ class TransactionImportView(APIView):
         return Response(result, status=status_code)
 
 
-class CashflowSummaryView(APIView):
+def _parse_date_range(params):
+    """Parse the optional 'from'/'to' query params (YYYY-MM-DD)."""
+    date_from = params.get('from')
+    date_to = params.get('to')
+    return (
+        date.fromisoformat(date_from) if date_from else None,
+        date.fromisoformat(date_to) if date_to else None,
+    )
+
+
+class CashflowSummaryView(ReplicaReadMixin, APIView):
     """
     GET: Get cashflow summary aggregated by month or year.
     
@@ -354,51 +363,24 @@ class CashflowSummaryView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        qs = Transaction.objects.filter(status__in=['pending', 'paid', 'scheduled'])
-        
-        # Account filter
-        account_id = params.get('account')
-        if account_id:
-            qs = qs.filter(account_id=account_id)
-        
-        # Hypothetical filter
-        include_hypothetical = params.get('include_hypothetical', 'false').lower() == 'true'
-        if not include_hypothetical:
-            qs = qs.filter(is_hypothetical=False)
-        
-        # Date range
-        date_from = params.get('from')
-        date_to = params.get('to')
-        if date_from:
-            qs = qs.filter(competence_date__gte=date_from)
-        if date_to:
-            qs = qs.filter(competence_date__lte=date_to)
-        
-        # Aggregate
-        trunc = TruncMonth if granularity == 'month' else TruncYear
-        tz = timezone.get_current_timezone()
-        
-        aggregated = (
-            qs.annotate(period=trunc('competence_date', tzinfo=tz))
-            .values('period')
-            .annotate(
-                total_income=Sum(
-                    Case(
-                        When(transaction_type='income', then=F('gross_amount')),
-                        default=Decimal('0.00'),
-                        output_field=DecimalField()
-                    )
-                ),
-                total_expenses=Sum(
-                    Case(
-                        When(transaction_type='expense', then=F('gross_amount')),
-                        default=Decimal('0.00'),
-                        output_field=DecimalField()
-                    )
-                ),
-                transaction_count=Count('id')
+        try:
+            date_from, date_to = _parse_date_range(params)
+        except ValueError:
+            return Response(
+                {'error': 'Invalid date format. Use YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            .order_by('period')
+
+        include_hypothetical = params.get('include_hypothetical', 'false').lower() == 'true'
+
+        # Whole months come from the monthly rollup, partial edge months
+        # from the raw transactions
+        aggregated = cashflow_by_period(
+            granularity,
+            date_from=date_from,
+            date_to=date_to,
+            account_id=params.get('account'),
+            include_hypothetical=include_hypothetical,
         )
         
         results = []
@@ -413,8 +395,8 @@ class CashflowSummaryView(APIView):
                 period_start = date(period_date.year, 1, 1)
                 period_end = date(period_date.year, 12, 31)
             
-            income = row['total_income'] or Decimal('0.00')
-            expenses = row['total_expenses'] or Decimal('0.00')
+            income = row['total_income']
+            expenses = row['total_expenses']
             
             results.append({
                 'period': period_str,
@@ -432,7 +414,7 @@ class CashflowSummaryView(APIView):
         })
 
 
-class CategoryBreakdownView(APIView):
+class CategoryBreakdownView(ReplicaReadMixin, APIView):
     """
     GET: Get transaction breakdown by category.
     
@@ -450,52 +432,21 @@ class CategoryBreakdownView(APIView):
     def get(self, request):
         params = request.query_params
         
-        qs = Transaction.objects.filter(
-            status__in=['pending', 'paid', 'scheduled'],
-            is_hypothetical=False
-        ).select_related('category')
-        
-        # Transaction type filter
-        tx_type = params.get('type')
-        if tx_type:
-            qs = qs.filter(transaction_type=tx_type)
-        
-        # Account filter
-        account_id = params.get('account')
-        if account_id:
-            qs = qs.filter(account_id=account_id)
-        
-        # Date range
-        date_from = params.get('from')
-        date_to = params.get('to')
-        if date_from:
-            qs = qs.filter(competence_date__gte=date_from)
-        if date_to:
-            qs = qs.filter(competence_date__lte=date_to)
-        
-        # Aggregate by category
-        breakdown = (
-            qs.values('category__id', 'category__name', 'category__color')
-            .annotate(
-                total=Sum('gross_amount'),
-                count=Count('id')
+        try:
+            date_from, date_to = _parse_date_range(params)
+        except ValueError:
+            return Response(
+                {'error': 'Invalid date format. Use YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            .order_by('-total')
+
+        results = totals_by_category(
+            date_from=date_from,
+            date_to=date_to,
+            transaction_type=params.get('type'),
+            account_id=params.get('account'),
         )
-        
-        results = []
-        grand_total = Decimal('0.00')
-        
-        for row in breakdown:
-            total = row['total'] or Decimal('0.00')
-            grand_total += total
-            results.append({
-                'category_id': row['category__id'],
-                'category_name': row['category__name'],
-                'category_color': row['category__color'],
-                'total': total,
-                'count': row['count']
-            })
+        grand_total = sum((item['total'] for item in results), Decimal('0.00'))
         
         # Calculate percentages
         for item in results:
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from .logic_budgets import evaluate_budgets
 from .models import Budget, RecurrenceRule, TaxConfig
 
 
@@ -39,6 +40,12 @@ class BudgetAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        # One batch for the whole page instead of one query per row
+        evaluate_budgets(changelist.result_list)
+        return changelist
+
     def usage_display(self, obj):
         try:
             amount, percentage = obj.get_current_usage()
@@ -5,3 +5,7 @@ class FinanceManagerPlanningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'plugins.finance_manager_planning'
     verbose_name = 'Finance Manager - Planning'
+
+    def ready(self):
+        # Import signals to ensure they are registered when the app is ready.
+        from . import signals  # noqa: F401
@@ -0,0 +1,139 @@
+"""
+Budget usage evaluation for finance_manager_planning.
+
+Provides:
+- Current period bounds for each budget period type
+- Batch evaluation of budget usage with one grouped query per window
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from django.utils import timezone
+
+from plugins.finance_manager_core.rollup import totals_by_category_account
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BudgetUsage:
+    """Usage of a budget in its current period."""
+    budget_id: Optional[int]
+    period_start: date
+    period_end: date
+    amount: Decimal
+    percentage: Decimal
+    alert_threshold: Decimal
+
+    @property
+    def is_over_budget(self) -> bool:
+        return self.percentage > 100
+
+    @property
+    def is_near_limit(self) -> bool:
+        return self.percentage >= self.alert_threshold
+
+    @property
+    def status(self) -> str:
+        """'over_budget', 'near_limit' or 'healthy'."""
+        if self.is_over_budget:
+            return 'over_budget'
+        if self.is_near_limit:
+            return 'near_limit'
+        return 'healthy'
+
+
+def get_period_bounds(period: str, today: date) -> Tuple[date, date]:
+    """Return the (start, end) of the budget period containing `today`."""
+    if period == 'monthly':
+        period_start = date(today.year, today.month, 1)
+        period_end = period_start + relativedelta(months=1) - relativedelta(days=1)
+    elif period == 'quarterly':
+        quarter = (today.month - 1) // 3
+        period_start = date(today.year, quarter * 3 + 1, 1)
+        period_end = period_start + relativedelta(months=3) - relativedelta(days=1)
+    elif period == 'semiannual':
+        half = 0 if today.month <= 6 else 6
+        period_start = date(today.year, half + 1, 1)
+        period_end = period_start + relativedelta(months=6) - relativedelta(days=1)
+    else:  # annual
+        period_start = date(today.year, 1, 1)
+        period_end = date(today.year, 12, 31)
+    return period_start, period_end
+
+
+def evaluate_budgets(budgets: Iterable, today: Optional[date] = None) -> Dict[int, BudgetUsage]:
+    """
+    Compute the current usage of many budgets at once.
+
+    Budgets are grouped by counting window: the current period of their
+    period type, narrowed by their own start/end dates. Each distinct
+    window costs one grouped query over (category, account), so the
+    usual case is one query per period type whatever the number of
+    budgets.
+
+    The result is also stored on each budget, so that get_current_usage()
+    and the is_over_budget/is_near_limit properties do not query again.
+
+    Args:
+        budgets: Budget instances
+        today: Reference date (default: today)
+
+    Returns:
+        Dict of BudgetUsage keyed by budget id
+    """
+    if today is None:
+        today = timezone.now().date()
+
+    budgets = list(budgets)
+    windows = defaultdict(list)
+    bounds = {}
+    for budget in budgets:
+        period_start, period_end = get_period_bounds(budget.period, today)
+        bounds[id(budget)] = (period_start, period_end)
+        window_start = max(period_start, budget.start_date)
+        window_end = min(period_end, budget.end_date) if budget.end_date else period_end
+        windows[(window_start, window_end)].append(budget)
+
+    results = {}
+    for (window_start, window_end), window_budgets in windows.items():
+        totals = {}
+        if window_start <= window_end:
+            totals = totals_by_category_account(
+                window_start,
+                window_end,
+                category_ids={budget.category_id for budget in window_budgets}
+            )
+
+        # Budgets without an account apply across all accounts
+        category_totals = defaultdict(lambda: Decimal('0.00'))
+        for (category_id, _), total in totals.items():
+            category_totals[category_id] += total
+
+        for budget in window_budgets:
+            if budget.account_id:
+                amount = totals.get((budget.category_id, budget.account_id), Decimal('0.00'))
+            else:
+                amount = category_totals[budget.category_id]
+
+            percentage = (amount / budget.target_value * 100) if budget.target_value else Decimal('0.00')
+            period_start, period_end = bounds[id(budget)]
+
+            usage = BudgetUsage(
+                budget_id=budget.pk,
+                period_start=period_start,
+                period_end=period_end,
+                amount=amount,
+                percentage=percentage.quantize(Decimal('0.01')),
+                alert_threshold=budget.alert_threshold
+            )
+            budget._usage = usage
+            results[budget.pk] = usage
+
+    return results
@@ -14,12 +14,21 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from dateutil.relativedelta import relativedelta
 
-from django.db.models import Sum, Q, Case, When, F, DecimalField
-from django.db.models.functions import TruncMonth
+from django.core.cache import cache
+from django.db.models import Sum, Q, Case, When, F, DecimalField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncMonth
 from django.utils import timezone
 
+from mixtum_core.db_routers import replica_cache_timeout
+from plugins.finance_manager_core.cache import FINANCE_DATA_NAMESPACE, get_version, versioned_key
+
+from .logic_occurrences import count_rule_occurrences
+from .logic_taxes import TAX_CONFIG_NAMESPACE, TaxEngine, TaxItem
+
 logger = logging.getLogger(__name__)
 
+FORECAST_CACHE_TIMEOUT = 6 * 60 * 60
+
 
 @dataclass
 class ForecastPeriod:
@@ -33,6 +42,7 @@ class ForecastPeriod:
     cumulative_balance: Decimal
     hypothetical_income: Decimal = Decimal('0.00')
     hypothetical_expenses: Decimal = Decimal('0.00')
+    projected_tax: Decimal = Decimal('0.00')
 
 
 @dataclass
@@ -48,6 +58,7 @@ class ForecastResult:
     net_change: Decimal
     periods: List[ForecastPeriod]
     warnings: List[str]
+    total_projected_tax: Decimal = Decimal('0.00')
 
 
 class CashflowForecaster:
@@ -59,6 +70,13 @@ class CashflowForecaster:
     - Recurring transaction rules
     - Hypothetical/planned transactions
     - Budget constraints
+
+    A forecast runs a fixed number of queries whatever its horizon: one
+    for the starting balance, one for historical averages, one grouped by
+    month for scheduled and hypothetical transactions, and one for the
+    recurrence rules, whose occurrences are counted arithmetically.
+    Projecting tax outflows adds one query for the individual scheduled
+    transactions; the tax rules come from the cached TaxEngine snapshot.
     """
 
     def __init__(self, account_ids: Optional[List[int]] = None):
@@ -77,7 +95,8 @@ class CashflowForecaster:
         include_hypothetical: bool = True,
         include_recurring: bool = True,
         use_historical_averages: bool = True,
-        historical_months: int = 6
+        historical_months: int = 6,
+        include_taxes: bool = False
     ) -> ForecastResult:
         """
         Generate a cashflow forecast for the specified period.
@@ -89,14 +108,12 @@ class CashflowForecaster:
             include_recurring: Project recurring transactions
             use_historical_averages: Fill gaps with historical averages
             historical_months: Months of history to use for averages
+            include_taxes: Project tax outflows on scheduled and recurring
+                transactions and deduct them from the net cashflow
             
         Returns:
             ForecastResult with period-by-period projections
         """
-        from plugins.finance_manager_core.models import Transaction
-        from plugins.finance_manager_accounts.models import Account
-        from .models import RecurrenceRule
-        
         today = timezone.now().date()
         
         if start_date is None:
@@ -118,39 +135,37 @@ class CashflowForecaster:
                 historical_months
             )
         
+        bounds = self._period_bounds(start_date, end_date)
+
+        # Scheduled/pending and hypothetical transactions, by period
+        scheduled, hypothetical = self._get_transaction_totals(bounds, include_hypothetical)
+
+        # Project recurring transactions
+        recurring = {}
+        rules = []
+        if include_recurring and bounds:
+            rules = self._get_recurrence_rules(start_date, end_date)
+            recurring = self._project_recurring_transactions(rules, bounds)
+
+        # Project tax outflows
+        taxes = {}
+        if include_taxes and bounds:
+            taxes = self._project_taxes(bounds, include_hypothetical, rules)
+
         # Generate period-by-period forecast
         periods = []
         cumulative_balance = starting_balance
         total_income = Decimal('0.00')
         total_expenses = Decimal('0.00')
+        total_tax = Decimal('0.00')
+        zero = (Decimal('0.00'), Decimal('0.00'))
         
-        current = start_date
-        while current < end_date:
-            period_start = current
-            period_end = (current + relativedelta(months=1)).replace(day=1) - timedelta(days=1)
-            if period_end > end_date:
-                period_end = end_date
-            
-            period_label = current.strftime('%Y-%m')
-            
-            # Get scheduled/pending transactions for this period
-            income, expenses = self._get_scheduled_transactions(period_start, period_end)
+        for period_start, period_end in bounds:
+            period_label = period_start.strftime('%Y-%m')
             
-            # Add hypothetical transactions
-            hypo_income = Decimal('0.00')
-            hypo_expenses = Decimal('0.00')
-            if include_hypothetical:
-                hypo_income, hypo_expenses = self._get_hypothetical_transactions(
-                    period_start, period_end
-                )
-            
-            # Project recurring transactions
-            recurring_income = Decimal('0.00')
-            recurring_expenses = Decimal('0.00')
-            if include_recurring:
-                recurring_income, recurring_expenses = self._project_recurring_transactions(
-                    period_start, period_end
-                )
+            income, expenses = scheduled.get(period_start, zero)
+            hypo_income, hypo_expenses = hypothetical.get(period_start, zero)
+            recurring_income, recurring_expenses = recurring.get(period_start, zero)
             
             # Combine projections
             projected_income = income + hypo_income + recurring_income
@@ -169,10 +184,13 @@ class CashflowForecaster:
                         f"Using historical average for expenses in {period_label}"
                     )
             
-            net_cashflow = projected_income - projected_expenses
+            projected_tax = taxes.get(period_start, Decimal('0.00'))
+            
+            net_cashflow = projected_income - projected_expenses - projected_tax
             cumulative_balance += net_cashflow
             total_income += projected_income
             total_expenses += projected_expenses
+            total_tax += projected_tax
             
             periods.append(ForecastPeriod(
                 period_start=period_start,
@@ -183,10 +201,9 @@ class CashflowForecaster:
                 net_cashflow=net_cashflow,
                 cumulative_balance=cumulative_balance,
                 hypothetical_income=hypo_income,
-                hypothetical_expenses=hypo_expenses
+                hypothetical_expenses=hypo_expenses,
+                projected_tax=projected_tax
             ))
-            
-            current = current + relativedelta(months=1)
         
         # Check for negative balance warnings
         min_balance = min(p.cumulative_balance for p in periods) if periods else starting_balance
@@ -203,14 +220,36 @@ class CashflowForecaster:
             ending_balance=cumulative_balance,
             total_projected_income=total_income,
             total_projected_expenses=total_expenses,
-            net_change=total_income - total_expenses,
+            net_change=total_income - total_expenses - total_tax,
             periods=periods,
-            warnings=warnings
+            warnings=warnings,
+            total_projected_tax=total_tax
         )
 
+    @staticmethod
+    def _period_bounds(start_date: date, end_date: date) -> List[Tuple[date, date]]:
+        """
+        Split the horizon into (start, end) periods, one per calendar month.
+
+        Each period starts on the forecast start day of its month and ends
+        on the last day of that month (or on the forecast end date).
+        """
+        bounds = []
+        current = start_date
+        while current < end_date:
+            period_end = (current + relativedelta(months=1)).replace(day=1) - timedelta(days=1)
+            bounds.append((current, min(period_end, end_date)))
+            current = current + relativedelta(months=1)
+        return bounds
+
     def _calculate_starting_balance(self) -> Decimal:
-        """Calculate the current total balance across relevant accounts."""
+        """
+        Calculate the current total balance across relevant accounts.
+
+        Same figure as summing Account.current_balance, in one query.
+        """
         from plugins.finance_manager_accounts.models import Account
+        from plugins.finance_manager_core.models import Transaction
         
         accounts = Account.objects.filter(
             is_active=True,
@@ -220,14 +259,36 @@ class CashflowForecaster:
         if self.account_ids:
             accounts = accounts.filter(id__in=self.account_ids)
         
-        total = Decimal('0.00')
-        for account in accounts:
-            try:
-                total += account.current_balance
-            except Exception:
-                pass
+        paid_net = (
+            Transaction.objects.filter(
+                account=OuterRef('pk'),
+                is_hypothetical=False,
+                status='paid'
+            )
+            .order_by()
+            .values('account')
+            .annotate(
+                net=Sum(
+                    Case(
+                        When(transaction_type='income', then=F('gross_amount')),
+                        When(transaction_type='expense', then=-F('gross_amount')),
+                        default=Decimal('0.00'),
+                        output_field=DecimalField()
+                    )
+                )
+            )
+            .values('net')
+        )
+        
+        result = accounts.annotate(
+            balance=F('initial_balance') + Coalesce(
+                Subquery(paid_net, output_field=DecimalField()),
+                Decimal('0.00'),
+                output_field=DecimalField()
+            )
+        ).aggregate(total=Sum('balance'))
         
-        return total
+        return result['total'] or Decimal('0.00')
 
     def _calculate_historical_averages(self, months: int) -> Tuple[Decimal, Decimal]:
         """Calculate average monthly income and expenses from historical data."""
@@ -274,144 +335,186 @@ class CashflowForecaster:
         
         return Decimal('0.00'), Decimal('0.00')
 
-    def _get_scheduled_transactions(
-        self,
-        start: date,
-        end: date
-    ) -> Tuple[Decimal, Decimal]:
-        """Get scheduled/pending transactions for a period."""
+    def _scheduled_transactions(self, bounds: List[Tuple[date, date]], include_hypothetical: bool):
+        """Pending/scheduled transactions falling in the forecast periods."""
         from plugins.finance_manager_core.models import Transaction
-        
+
+        # Adjacent periods collapse into one range (always the case when
+        # the forecast starts on the first of a month)
+        ranges = []
+        for period_start, period_end in bounds:
+            if ranges and ranges[-1][1] + timedelta(days=1) == period_start:
+                ranges[-1][1] = period_end
+            else:
+                ranges.append([period_start, period_end])
+
+        in_periods = Q()
+        for range_start, range_end in ranges:
+            in_periods |= Q(competence_date__gte=range_start, competence_date__lte=range_end)
+
         qs = Transaction.objects.filter(
-            competence_date__gte=start,
-            competence_date__lte=end,
-            is_hypothetical=False,
+            in_periods,
             status__in=['pending', 'scheduled']
         )
         
+        if not include_hypothetical:
+            qs = qs.filter(is_hypothetical=False)
+        
         if self.account_ids:
             qs = qs.filter(account_id__in=self.account_ids)
+
+        return qs
+
+    def _get_transaction_totals(
+        self,
+        bounds: List[Tuple[date, date]],
+        include_hypothetical: bool = True
+    ) -> Tuple[Dict[date, Tuple[Decimal, Decimal]], Dict[date, Tuple[Decimal, Decimal]]]:
+        """
+        Get scheduled/pending and hypothetical transactions for all periods.
         
-        result = qs.aggregate(
-            income=Sum(
-                Case(
-                    When(transaction_type='income', then=F('gross_amount')),
-                    default=Decimal('0.00'),
-                    output_field=DecimalField()
-                )
-            ),
-            expenses=Sum(
-                Case(
-                    When(transaction_type='expense', then=F('gross_amount')),
-                    default=Decimal('0.00'),
-                    output_field=DecimalField()
+        Returns two dicts keyed by period start, with (income, expenses)
+        for real and for hypothetical transactions.
+        """
+        if not bounds:
+            return {}, {}
+
+        qs = self._scheduled_transactions(bounds, include_hypothetical)
+        
+        rows = (
+            qs.order_by()
+            .annotate(month=TruncMonth('competence_date'))
+            .values('month', 'is_hypothetical')
+            .annotate(
+                income=Sum(
+                    Case(
+                        When(transaction_type='income', then=F('gross_amount')),
+                        default=Decimal('0.00'),
+                        output_field=DecimalField()
+                    )
+                ),
+                expenses=Sum(
+                    Case(
+                        When(transaction_type='expense', then=F('gross_amount')),
+                        default=Decimal('0.00'),
+                        output_field=DecimalField()
+                    )
                 )
             )
         )
         
-        return (
-            result['income'] or Decimal('0.00'),
-            result['expenses'] or Decimal('0.00')
-        )
+        # Every period lies within one calendar month
+        period_by_month = {period_start.replace(day=1): period_start for period_start, _ in bounds}
+        scheduled = {}
+        hypothetical = {}
+        for row in rows:
+            period_start = period_by_month[row['month']]
+            target = hypothetical if row['is_hypothetical'] else scheduled
+            target[period_start] = (
+                row['income'] or Decimal('0.00'),
+                row['expenses'] or Decimal('0.00')
+            )
+        
+        return scheduled, hypothetical
 
-    def _get_hypothetical_transactions(
-        self,
-        start: date,
-        end: date
-    ) -> Tuple[Decimal, Decimal]:
-        """Get hypothetical transactions for forecasting."""
-        from plugins.finance_manager_core.models import Transaction
+    def _get_recurrence_rules(self, start: date, end: date) -> list:
+        """Load the active rules overlapping the forecast horizon."""
+        from .models import RecurrenceRule
         
-        qs = Transaction.objects.filter(
-            competence_date__gte=start,
-            competence_date__lte=end,
-            is_hypothetical=True,
-            status__in=['pending', 'scheduled']
+        qs = RecurrenceRule.objects.filter(
+            is_active=True,
+            start_date__lte=end
+        ).filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=start)
         )
         
         if self.account_ids:
             qs = qs.filter(account_id__in=self.account_ids)
         
-        result = qs.aggregate(
-            income=Sum(
-                Case(
-                    When(transaction_type='income', then=F('gross_amount')),
-                    default=Decimal('0.00'),
-                    output_field=DecimalField()
-                )
-            ),
-            expenses=Sum(
-                Case(
-                    When(transaction_type='expense', then=F('gross_amount')),
-                    default=Decimal('0.00'),
-                    output_field=DecimalField()
-                )
-            )
-        )
-        
-        return (
-            result['income'] or Decimal('0.00'),
-            result['expenses'] or Decimal('0.00')
-        )
+        return list(qs.only(
+            'category_id', 'frequency', 'day_of_month', 'start_date', 'end_date',
+            'last_generated_date', 'gross_amount', 'transaction_type'
+        ))
 
     def _project_recurring_transactions(
         self,
-        start: date,
-        end: date
-    ) -> Tuple[Decimal, Decimal]:
+        rules,
+        bounds: List[Tuple[date, date]]
+    ) -> Dict[date, Tuple[Decimal, Decimal]]:
         """
         Project recurring transactions that haven't been generated yet.
         
         This estimates what recurring rules would generate if they run.
+        Returns (income, expenses) keyed by period start.
         """
-        from .models import RecurrenceRule
+        totals = {period_start: [Decimal('0.00'), Decimal('0.00')] for period_start, _ in bounds}
+        
+        for rule in rules:
+            target = 0 if rule.transaction_type == 'income' else 1
+            for period_start, period_end in bounds:
+                if rule.start_date > period_end or (rule.end_date and rule.end_date < period_start):
+                    continue
+                
+                # Count occurrences in the period
+                occurrences = self._count_occurrences(rule, period_start, period_end)
+                if occurrences:
+                    totals[period_start][target] += rule.gross_amount * occurrences
+        
+        return {period_start: tuple(amounts) for period_start, amounts in totals.items()}
+
+    def _project_taxes(
+        self,
+        bounds: List[Tuple[date, date]],
+        include_hypothetical: bool,
+        rules
+    ) -> Dict[date, Decimal]:
+        """
+        Project the tax due on scheduled and recurring transactions.
         
-        qs = RecurrenceRule.objects.filter(
-            is_active=True,
-            start_date__lte=end
-        ).filter(
-            Q(end_date__isnull=True) | Q(end_date__gte=start)
+        Scheduled transactions are taxed one by one, as thresholds apply
+        per transaction; a recurring rule is taxed once per period and
+        multiplied by its occurrences. Returns the tax keyed by period start.
+        """
+        engine = TaxEngine()
+        totals = {period_start: Decimal('0.00') for period_start, _ in bounds}
+        if not engine.rates:
+            return totals
+        
+        period_by_month = {period_start.replace(day=1): period_start for period_start, _ in bounds}
+        rows = (
+            self._scheduled_transactions(bounds, include_hypothetical)
+            .order_by()
+            .values_list('gross_amount', 'category_id', 'competence_date', 'transaction_type')
         )
+        for gross_amount, category_id, competence_date, transaction_type in rows:
+            tax = engine.calculate(TaxItem(gross_amount, category_id, competence_date, transaction_type))
+            totals[period_by_month[competence_date.replace(day=1)]] += tax.total_tax
+        
+        for rule in rules:
+            for period_start, period_end in bounds:
+                if rule.start_date > period_end or (rule.end_date and rule.end_date < period_start):
+                    continue
+                occurrences = self._count_occurrences(rule, period_start, period_end)
+                if occurrences:
+                    tax = engine.calculate(
+                        TaxItem(rule.gross_amount, rule.category_id, period_start, rule.transaction_type)
+                    )
+                    totals[period_start] += tax.total_tax * occurrences
         
-        if self.account_ids:
-            qs = qs.filter(account_id__in=self.account_ids)
-        
-        income = Decimal('0.00')
-        expenses = Decimal('0.00')
-        
-        for rule in qs:
-            # Count occurrences in the period
-            occurrences = self._count_occurrences(rule, start, end)
-            total = rule.gross_amount * occurrences
-            
-            if rule.transaction_type == 'income':
-                income += total
-            else:
-                expenses += total
-        
-        return income, expenses
+        return totals
 
     def _count_occurrences(self, rule, start: date, end: date) -> int:
         """Count how many times a recurring rule would trigger in a period."""
-        count = 0
         current = rule.last_generated_date or rule.start_date
         
         # Start from before the period to catch the first occurrence
         if current >= start:
             current = start - timedelta(days=1)
         
-        while True:
-            next_date = rule.get_next_occurrence_date(current)
-            
-            if next_date is None or next_date > end:
-                break
-            
-            if next_date >= start:
-                count += 1
-            
-            current = next_date
+        if rule.end_date and rule.end_date < end:
+            end = rule.end_date
         
-        return count
+        return count_rule_occurrences(rule.frequency, rule.day_of_month, current, start, end)
 
 
 def generate_forecast(
@@ -452,14 +555,75 @@ def generate_forecast(
                 'net_cashflow': float(p.net_cashflow),
                 'cumulative_balance': float(p.cumulative_balance),
                 'hypothetical_income': float(p.hypothetical_income),
-                'hypothetical_expenses': float(p.hypothetical_expenses)
+                'hypothetical_expenses': float(p.hypothetical_expenses),
+                'projected_tax': float(p.projected_tax)
             }
             for p in result.periods
         ],
+        'total_projected_tax': float(result.total_projected_tax),
         'warnings': result.warnings
     }
 
 
+def cached_forecast(
+    months: int = 3,
+    account_ids: Optional[List[int]] = None,
+    start_date: Optional[date] = None,
+    include_hypothetical: bool = True,
+    include_recurring: bool = True,
+    use_historical_averages: bool = True,
+    historical_months: int = 6,
+    include_taxes: bool = False,
+    refresh: bool = False
+) -> Dict:
+    """
+    generate_forecast() behind the cache.
+    
+    Entries are keyed on the request (accounts, months, flags, start date)
+    and on today's date, which drives the default start date and the
+    historical averages. They are bound to the finance data version, so
+    any transaction, recurrence rule or account write invalidates them;
+    with include_taxes they are also bound to the tax configuration version.
+    A forecast computed from the read replica, which may lag behind the
+    version bump, is only cached briefly.
+    
+    Args:
+        refresh: Recompute and overwrite the cached entry
+    """
+    today = timezone.now().date()
+    if start_date is None:
+        start_date = today.replace(day=1) + relativedelta(months=1)
+
+    key = versioned_key(
+        FINANCE_DATA_NAMESPACE,
+        'forecast',
+        today.isoformat(),
+        ','.join(str(pk) for pk in sorted(set(account_ids))) if account_ids else 'all',
+        months,
+        start_date.isoformat(),
+        int(include_hypothetical),
+        int(include_recurring),
+        int(use_historical_averages),
+        historical_months,
+        get_version(TAX_CONFIG_NAMESPACE) if include_taxes else 0,
+    )
+
+    result = None if refresh else cache.get(key)
+    if result is None:
+        result = generate_forecast(
+            months=months,
+            account_ids=account_ids,
+            start_date=start_date,
+            include_hypothetical=include_hypothetical,
+            include_recurring=include_recurring,
+            use_historical_averages=use_historical_averages,
+            historical_months=historical_months,
+            include_taxes=include_taxes
+        )
+        cache.set(key, result, replica_cache_timeout(FORECAST_CACHE_TIMEOUT))
+    return result
+
+
 def forecast_3_months(account_ids: Optional[List[int]] = None) -> Dict:
     """Shortcut for 3-month forecast."""
     return generate_forecast(months=3, account_ids=account_ids)
@@ -0,0 +1,196 @@
+"""
+Occurrence calculation for recurrence rules in finance_manager_planning.
+
+Provides:
+- Closed-form counting of the occurrences of a rule in a date range
+- Direct expansion of the occurrence dates in a date range
+- The generation window semantics shared by the generator tasks and the
+  occurrence preview
+
+The results are the same as walking RecurrenceRule.get_next_occurrence_date
+one step at a time, including its month-end behaviour: a day_of_month past
+the end of a month falls on the month's last day, and a month-stepped rule
+without day_of_month keeps the day it was clamped to.
+"""
+
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Iterator, List, Optional
+
+# Fixed-interval frequencies, in days and in months. Anything else is
+# projected monthly, as RecurrenceRule.get_next_occurrence_date does.
+DAY_STEP_FREQUENCIES = {'daily': 1, 'weekly': 7, 'biweekly': 14}
+MONTH_STEP_FREQUENCIES = {
+    'monthly': 1,
+    'bimonthly': 2,
+    'quarterly': 3,
+    'semiannual': 6,
+    'annual': 12,
+}
+
+# Month-stepping clamps the day (Jan 31 -> Feb 28 -> Mar 28 ...). The clamped
+# day is the minimum over the months visited, which is reached within four
+# years of steps for every interval.
+_CLAMP_HORIZON_STEPS = 48
+
+
+def _month_index(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def _days_in_month(index: int) -> int:
+    year, month = divmod(index, 12)
+    return monthrange(year, month + 1)[1]
+
+
+def _month_step_date(anchor: date, months: int, day_of_month: Optional[int], k: int) -> date:
+    """Date of the k-th occurrence of a month-stepped rule after `anchor`."""
+    index = _month_index(anchor) + k * months
+    if day_of_month:
+        day = min(day_of_month, _days_in_month(index))
+    else:
+        day = anchor.day
+        if day > 28:
+            base = _month_index(anchor)
+            for step in range(1, min(k, _CLAMP_HORIZON_STEPS) + 1):
+                day = min(day, _days_in_month(base + step * months))
+    year, month = divmod(index, 12)
+    return date(year, month + 1, day)
+
+
+def _step_range(frequency: str, day_of_month: Optional[int], anchor: date, start: date, end: date):
+    """
+    Return (first, last, months, day_of_month) for the steps after `anchor`
+    falling in [start, end]; the range is empty when first > last.
+    """
+    step_days = DAY_STEP_FREQUENCIES.get(frequency)
+    if step_days:
+        first = max(1, -(-(start - anchor).days // step_days))
+        last = (end - anchor).days // step_days
+        return first, last, None, None
+
+    months = MONTH_STEP_FREQUENCIES.get(frequency, 1)
+    if frequency != 'monthly':
+        day_of_month = None
+
+    base = _month_index(anchor)
+    first = max(1, -(-(_month_index(start) - base) // months))
+    if _month_step_date(anchor, months, day_of_month, first) < start:
+        first += 1
+    last = (_month_index(end) - base) // months
+    if last >= 1 and _month_step_date(anchor, months, day_of_month, last) > end:
+        last -= 1
+    return first, last, months, day_of_month
+
+
+def count_rule_occurrences(
+    frequency: str,
+    day_of_month: Optional[int],
+    anchor: date,
+    start: date,
+    end: date
+) -> int:
+    """
+    Count the occurrences after `anchor` falling in [start, end], in O(1).
+
+    Equivalent to walking RecurrenceRule.get_next_occurrence_date from
+    `anchor`; `end` must already be capped at the rule's end date.
+    """
+    if end < start or end <= anchor:
+        return 0
+
+    first, last, _, _ = _step_range(frequency, day_of_month, anchor, start, end)
+    return max(0, last - first + 1)
+
+
+def iter_rule_occurrences(
+    frequency: str,
+    day_of_month: Optional[int],
+    anchor: date,
+    start: date,
+    end: date
+) -> Iterator[date]:
+    """
+    Yield the occurrences after `anchor` falling in [start, end].
+
+    The first occurrence is found arithmetically, so the cost depends only
+    on the number of dates yielded, not on how far `anchor` lies behind
+    `start`. `end` must already be capped at the rule's end date.
+    """
+    if end < start or end <= anchor:
+        return
+
+    first, last, months, day_of_month = _step_range(frequency, day_of_month, anchor, start, end)
+    if first > last:
+        return
+
+    if months is None:
+        step = timedelta(days=DAY_STEP_FREQUENCIES[frequency])
+        current = anchor + step * first
+        for _ in range(last - first + 1):
+            yield current
+            current += step
+        return
+
+    if day_of_month or anchor.day <= 28:
+        for k in range(first, last + 1):
+            yield _month_step_date(anchor, months, day_of_month, k)
+        return
+
+    # Without day_of_month the clamped day only ever decreases, and stops
+    # changing once it reaches 28 or the clamp horizon.
+    base = _month_index(anchor)
+    day = _month_step_date(anchor, months, None, first).day
+    for k in range(first, last + 1):
+        index = base + k * months
+        if k <= _CLAMP_HORIZON_STEPS:
+            day = min(day, _days_in_month(index))
+        year, month = divmod(index, 12)
+        yield date(year, month + 1, day)
+
+
+def generation_anchor(rule, start: date) -> date:
+    """
+    Date the generator counts a rule's occurrences from.
+
+    The last generated date (or the start date for a new rule), moved to
+    the day before the window when older, so that a rule that fell behind
+    resumes at the start of the window instead of back-filling it.
+    """
+    current = rule.last_generated_date or rule.start_date
+    if current < start:
+        current = start - timedelta(days=1)
+    return current
+
+
+def iter_due_occurrences(rule, start: date, end: date) -> Iterator[date]:
+    """
+    Yield the dates a rule should generate in [start, end].
+
+    Used by the generator tasks and by the occurrence preview.
+    """
+    if rule.end_date:
+        if rule.end_date < start:
+            return iter(())
+        end = min(end, rule.end_date)
+
+    return iter_rule_occurrences(
+        rule.frequency, rule.day_of_month, generation_anchor(rule, start), start, end
+    )
+
+
+def due_occurrences(rule, start: date, end: date) -> List[date]:
+    """Return the dates a rule should generate in [start, end]."""
+    return list(iter_due_occurrences(rule, start, end))
+
+
+def count_due_occurrences(rule, start: date, end: date) -> int:
+    """Number of dates iter_due_occurrences() would yield, in O(1)."""
+    if rule.end_date:
+        if rule.end_date < start:
+            return 0
+        end = min(end, rule.end_date)
+
+    return count_rule_occurrences(
+        rule.frequency, rule.day_of_month, generation_anchor(rule, start), start, end
+    )
@@ -0,0 +1,152 @@
+"""
+Bulk generation of recurring transactions for finance_manager_planning.
+
+Provides:
+- Batched insertion of the generated transactions
+- Skipping of the occurrences already generated
+"""
+
+import logging
+from datetime import date
+from typing import Dict, List, Set, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from plugins.finance_manager_core.models import Transaction
+from plugins.finance_manager_core.rollup import record_created
+
+from .logic_occurrences import due_occurrences
+from .models import RecurrenceRule
+
+logger = logging.getLogger(__name__)
+
+GENERATION_BATCH_SIZE = 1000
+
+
+def generate_occurrences(
+    rules,
+    start: date,
+    end: date,
+    batch_size: int = GENERATION_BATCH_SIZE
+) -> Dict:
+    """
+    Generate the transactions due in [start, end] for many rules.
+
+    Rules are processed in batches. For each batch the due occurrences
+    are computed in memory, the ones already generated are skipped, the
+    new transactions are inserted with one bulk_create and the rules'
+    last_generated_date is advanced with one bulk_update, all in one
+    database transaction. The batch's rules are locked first, so
+    concurrent runs wait for each other; an occurrence created by other
+    means in the meantime is skipped thanks to the unique
+    (recurring_rule, competence_date) constraint, without failing the
+    rest of the batch.
+
+    Args:
+        rules: RecurrenceRule queryset (or iterable)
+        start: First date to generate for
+        end: Last date to generate for
+        batch_size: Number of rules per batch
+
+    Returns:
+        Dict with generation statistics
+    """
+    stats = {
+        'rules_processed': 0,
+        'transactions_created': 0,
+        'errors': []
+    }
+
+    if hasattr(rules, 'iterator'):
+        rules = rules.iterator(chunk_size=batch_size)
+
+    batch = []
+    for rule in rules:
+        batch.append(rule)
+        if len(batch) >= batch_size:
+            _generate_batch(batch, start, end, stats)
+            batch = []
+    if batch:
+        _generate_batch(batch, start, end, stats)
+
+    return stats
+
+
+def _generate_batch(rules: List[RecurrenceRule], start: date, end: date, stats: Dict) -> None:
+    stats['rules_processed'] += len(rules)
+
+    occurrences = {}
+    for rule in rules:
+        try:
+            dates = due_occurrences(rule, start, end)
+        except Exception as e:
+            logger.exception("Error processing recurrence rule #%s", rule.id)
+            stats['errors'].append({
+                'rule_id': rule.id,
+                'rule_name': rule.name,
+                'error': str(e)
+            })
+            continue
+        if dates:
+            occurrences[rule] = dates
+
+    if not occurrences:
+        return
+
+    now = timezone.now()
+    for rule, dates in occurrences.items():
+        rule.last_generated_date = dates[-1]
+        rule.updated_at = now
+
+    with transaction.atomic():
+        # Concurrent runs over the same rules wait here, so the rows found
+        # after the insert below are the ones this run created
+        rule_ids = list(
+            RecurrenceRule.objects.select_for_update()
+            .filter(pk__in=[rule.pk for rule in occurrences])
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        existing = _existing_occurrences(rule_ids, start, end)
+        new_transactions = [
+            rule.build_transaction(for_date)
+            for rule, dates in occurrences.items()
+            for for_date in dates
+            if (rule.pk, for_date) not in existing
+        ]
+
+        # An occurrence created in the meantime is skipped, not the batch
+        Transaction.objects.bulk_create(
+            new_transactions, batch_size=GENERATION_BATCH_SIZE, ignore_conflicts=True
+        )
+        created = []
+        if new_transactions:
+            new_pairs = {(t.recurring_rule_id, t.competence_date) for t in new_transactions}
+            created = [
+                t for t in Transaction.objects.filter(
+                    recurring_rule_id__in=rule_ids,
+                    competence_date__gte=start,
+                    competence_date__lte=end
+                ).order_by()
+                if (t.recurring_rule_id, t.competence_date) in new_pairs
+            ]
+        # bulk_create skips signals: update the rollup here
+        record_created(created)
+        RecurrenceRule.objects.bulk_update(
+            list(occurrences),
+            ['last_generated_date', 'updated_at'],
+            batch_size=GENERATION_BATCH_SIZE
+        )
+
+    stats['transactions_created'] += len(created)
+
+
+def _existing_occurrences(rule_ids: List[int], start: date, end: date) -> Set[Tuple[int, date]]:
+    """The (rule, date) pairs already generated in [start, end]."""
+    return set(
+        Transaction.objects.filter(
+            recurring_rule_id__in=rule_ids,
+            competence_date__gte=start,
+            competence_date__lte=end
+        ).order_by().values_list('recurring_rule_id', 'competence_date')
+    )
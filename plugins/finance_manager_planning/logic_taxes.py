@@ -0,0 +1,200 @@
+"""
+Tax calculation logic for finance_manager_planning.
+
+Provides:
+- A cached snapshot of the active tax configurations, with their
+  applicable categories resolved in memory
+- Batch tax calculation for many (amount, category, date) items
+
+The snapshot is loaded with two queries and kept in the cache under a
+version key (see finance_manager_core.cache). TaxConfig writes bump the
+version, so calculating tax for thousands of items costs no query at all
+once the cache is warm.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from plugins.finance_manager_core.cache import bump_version, versioned_key
+
+logger = logging.getLogger(__name__)
+
+TAX_CONFIG_NAMESPACE = 'tax_configs'
+TAX_CONFIG_TIMEOUT = 60 * 60
+
+
+def calculate_tax_amount(
+    amount: Decimal,
+    percentage: Decimal,
+    threshold_amount: Optional[Decimal] = None,
+    is_progressive: bool = False
+) -> Decimal:
+    """
+    Tax due on an amount.
+
+    Nothing is due up to the threshold; above it the rate applies to the
+    whole amount, or only to the part above the threshold when progressive.
+    """
+    if threshold_amount and amount <= threshold_amount:
+        return Decimal('0.00')
+
+    taxable_amount = amount
+    if is_progressive and threshold_amount:
+        taxable_amount = amount - threshold_amount
+
+    return (taxable_amount * percentage / 100).quantize(Decimal('0.01'))
+
+
+@dataclass(frozen=True)
+class TaxRate:
+    """In-memory snapshot of an active TaxConfig."""
+    id: int
+    name: str
+    percentage: Decimal
+    applicable_to: str
+    category_ids: FrozenSet[int]
+    threshold_amount: Optional[Decimal]
+    is_progressive: bool
+    valid_from: date
+    valid_until: Optional[date]
+
+    def is_valid_on(self, day: date) -> bool:
+        return self.valid_from <= day and (self.valid_until is None or self.valid_until >= day)
+
+    def applies_to(self, transaction_type: str, category_id: Optional[int]) -> bool:
+        """Same meaning as TaxConfig.applicable_to."""
+        if self.applicable_to == 'all':
+            return True
+        if self.applicable_to == 'category':
+            return category_id in self.category_ids
+        return self.applicable_to == transaction_type
+
+    def calculate_tax(self, amount: Decimal) -> Decimal:
+        return calculate_tax_amount(amount, self.percentage, self.threshold_amount, self.is_progressive)
+
+
+@dataclass
+class TaxItem:
+    """An amount to calculate tax on."""
+    amount: Decimal
+    category_id: Optional[int] = None
+    date: Optional[date] = None
+    transaction_type: str = 'income'
+
+
+@dataclass
+class TaxResult:
+    """Tax due on one item, with the share of each tax."""
+    amount: Decimal
+    total_tax: Decimal = Decimal('0.00')
+    breakdown: List[Tuple[TaxRate, Decimal]] = field(default_factory=list)
+
+    @property
+    def net_amount(self) -> Decimal:
+        return self.amount - self.total_tax
+
+
+def _load_tax_rates() -> List[TaxRate]:
+    """Load the active tax configurations and their categories, in two queries."""
+    from .models import TaxConfig
+
+    configs = list(TaxConfig.objects.filter(is_active=True).order_by('name', 'pk'))
+
+    category_ids: Dict[int, set] = {config.pk: set() for config in configs}
+    through = TaxConfig.applicable_categories.through
+    rows = through.objects.filter(taxconfig_id__in=category_ids).values_list('taxconfig_id', 'category_id')
+    for config_id, category_id in rows:
+        category_ids[config_id].add(category_id)
+
+    return [
+        TaxRate(
+            id=config.pk,
+            name=config.name,
+            percentage=config.percentage,
+            applicable_to=config.applicable_to,
+            category_ids=frozenset(category_ids[config.pk]),
+            threshold_amount=config.threshold_amount,
+            is_progressive=config.is_progressive,
+            valid_from=config.valid_from,
+            valid_until=config.valid_until
+        )
+        for config in configs
+    ]
+
+
+def get_tax_rates() -> List[TaxRate]:
+    """Return the cached snapshot of the active tax configurations."""
+    key = versioned_key(TAX_CONFIG_NAMESPACE, 'rates')
+    rates = cache.get(key)
+    if rates is None:
+        rates = _load_tax_rates()
+        cache.set(key, rates, TAX_CONFIG_TIMEOUT)
+    return rates
+
+
+def invalidate_tax_configs() -> None:
+    """Discard the cached tax configurations."""
+    bump_version(TAX_CONFIG_NAMESPACE)
+
+
+class TaxEngine:
+    """
+    Calculates tax for many items against one snapshot of the tax rules.
+
+    The configurations valid on each date are resolved once per engine,
+    so a batch spread over a few dates filters the snapshot a few times
+    whatever its size.
+    """
+
+    def __init__(self, rates: Optional[List[TaxRate]] = None):
+        self.rates = get_tax_rates() if rates is None else rates
+        self._rates_by_date: Dict[date, List[TaxRate]] = {}
+
+    def rates_on(self, day: date) -> List[TaxRate]:
+        """Tax configurations valid on a date."""
+        rates = self._rates_by_date.get(day)
+        if rates is None:
+            rates = [rate for rate in self.rates if rate.is_valid_on(day)]
+            self._rates_by_date[day] = rates
+        return rates
+
+    def calculate(self, item: TaxItem, today: Optional[date] = None) -> TaxResult:
+        """Calculate the tax due on one item (undated items: today)."""
+        result = TaxResult(amount=item.amount)
+        day = item.date or today or timezone.now().date()
+        for rate in self.rates_on(day):
+            if not rate.applies_to(item.transaction_type, item.category_id):
+                continue
+            tax = rate.calculate_tax(item.amount)
+            if tax > 0:
+                result.total_tax += tax
+                result.breakdown.append((rate, tax))
+        return result
+
+    def calculate_many(self, items: Iterable[TaxItem]) -> List[TaxResult]:
+        """Calculate the tax due on each item, in input order."""
+        today = timezone.now().date()
+        return [self.calculate(item, today) for item in items]
+
+
+def calculate_taxes(items: Iterable) -> List[TaxResult]:
+    """
+    Calculate tax for a list of items in one call.
+
+    Args:
+        items: TaxItem instances or (amount, category_id, date) tuples,
+            optionally followed by the transaction type (default 'income')
+
+    Returns:
+        One TaxResult per item, in input order
+    """
+    return TaxEngine().calculate_many(
+        item if isinstance(item, TaxItem) else TaxItem(*item)
+        for item in items
+    )
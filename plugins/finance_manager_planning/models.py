@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
@@ -114,50 +114,16 @@ class Budget(models.Model):
         """
         Calculate current spending/earning for this budget period.
         Returns a tuple of (amount, percentage).
+
+        The result is memoised on the instance; evaluate_budgets() fills
+        it for many budgets at once.
         """
-        from django.utils import timezone
-        from datetime import date
-        from dateutil.relativedelta import relativedelta
-        
-        today = timezone.now().date()
-        
-        # Determine the current period bounds
-        if self.period == 'monthly':
-            period_start = date(today.year, today.month, 1)
-            period_end = period_start + relativedelta(months=1) - relativedelta(days=1)
-        elif self.period == 'quarterly':
-            quarter = (today.month - 1) // 3
-            period_start = date(today.year, quarter * 3 + 1, 1)
-            period_end = period_start + relativedelta(months=3) - relativedelta(days=1)
-        elif self.period == 'semiannual':
-            half = 0 if today.month <= 6 else 6
-            period_start = date(today.year, half + 1, 1)
-            period_end = period_start + relativedelta(months=6) - relativedelta(days=1)
-        else:  # annual
-            period_start = date(today.year, 1, 1)
-            period_end = date(today.year, 12, 31)
-        
-        # Build query
-        qs = Transaction.objects.filter(
-            category=self.category,
-            competence_date__gte=max(period_start, self.start_date),
-            competence_date__lte=period_end,
-            is_hypothetical=False,
-            status__in=['pending', 'paid', 'scheduled']
-        )
-        
-        if self.account:
-            qs = qs.filter(account=self.account)
-        
-        if self.end_date:
-            qs = qs.filter(competence_date__lte=self.end_date)
-        
-        from django.db.models import Sum
-        total = qs.aggregate(total=Sum('gross_amount'))['total'] or Decimal('0.00')
-        
-        percentage = (total / self.target_value * 100) if self.target_value else Decimal('0.00')
-        
-        return total, percentage.quantize(Decimal('0.01'))
+        usage = getattr(self, '_usage', None)
+        if usage is None:
+            from .logic_budgets import evaluate_budgets
+            evaluate_budgets([self])
+            usage = self._usage
+        return usage.amount, usage.percentage
 
     @property
     def is_over_budget(self):
@@ -330,16 +296,11 @@ class RecurrenceRule(models.Model):
         
         return next_date
 
-    def generate_transaction(self, for_date=None):
-        """Generate a transaction based on this rule."""
-        from django.utils import timezone
-        
-        if for_date is None:
-            for_date = timezone.now().date()
-        
-        transaction = Transaction.objects.create(
-            account=self.account,
-            category=self.category,
+    def build_transaction(self, for_date):
+        """Build (without saving) the transaction of an occurrence."""
+        return Transaction(
+            account_id=self.account_id,
+            category_id=self.category_id,
             description=self.description,
             gross_amount=self.gross_amount,
             vat_percentage=self.vat_percentage,
@@ -350,9 +311,23 @@ class RecurrenceRule(models.Model):
             data_source='recurring',
             recurring_rule=self
         )
+
+    def generate_transaction(self, for_date=None):
+        """Generate a transaction based on this rule."""
+        from django.utils import timezone
         
-        self.last_generated_date = for_date
-        self.save(update_fields=['last_generated_date', 'updated_at'])
+        if for_date is None:
+            for_date = timezone.now().date()
+        
+        with db_transaction.atomic():
+            # Same lock as the bulk generation (logic_recurring), which
+            # tells the rows it created from the ones found after its insert
+            list(RecurrenceRule.objects.select_for_update().filter(pk=self.pk).values_list('pk', flat=True))
+            transaction = self.build_transaction(for_date)
+            transaction.save()
+
+            self.last_generated_date = for_date
+            self.save(update_fields=['last_generated_date', 'updated_at'])
         
         return transaction
 
@@ -444,11 +419,6 @@ class TaxConfig(models.Model):
         Returns:
             The calculated tax amount
         """
-        if self.threshold_amount and amount <= self.threshold_amount:
-            return Decimal('0.00')
-        
-        taxable_amount = amount
-        if self.is_progressive and self.threshold_amount:
-            taxable_amount = amount - self.threshold_amount
-        
-        return (taxable_amount * self.percentage / 100).quantize(Decimal('0.01'))
+        from .logic_taxes import calculate_tax_amount
+
+        return calculate_tax_amount(amount, self.percentage, self.threshold_amount, self.is_progressive)
@@ -1,11 +1,23 @@
 from rest_framework import serializers
 from decimal import Decimal
 
+from django.db import models
+
+from .logic_budgets import evaluate_budgets
 from .models import Budget, RecurrenceRule, TaxConfig
 from plugins.finance_manager_core.serializers import CategoryMinimalSerializer
 from plugins.finance_manager_accounts.serializers import AccountMinimalSerializer
 
 
+class BudgetListSerializer(serializers.ListSerializer):
+    """Evaluates the usage of all listed budgets in one batch."""
+
+    def to_representation(self, data):
+        budgets = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        evaluate_budgets(budgets)
+        return super().to_representation(budgets)
+
+
 class BudgetSerializer(serializers.ModelSerializer):
     category = CategoryMinimalSerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
@@ -33,6 +45,7 @@ class BudgetSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Budget
+        list_serializer_class = BudgetListSerializer
         fields = [
             'id', 'category', 'category_id', 'account', 'account_id',
             'target_value', 'period', 'period_display',
@@ -162,6 +175,19 @@ class TaxConfigCreateSerializer(serializers.ModelSerializer):
         ]
 
 
+class TaxBatchItemSerializer(serializers.Serializer):
+    """Serializer for one amount of a batch tax calculation."""
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2)
+    category_id = serializers.IntegerField(required=False, allow_null=True)
+    date = serializers.DateField(required=False, allow_null=True)
+    transaction_type = serializers.ChoiceField(choices=['income', 'expense'], default='income')
+
+
+class TaxBatchRequestSerializer(serializers.Serializer):
+    """Serializer for batch tax calculation requests."""
+    items = TaxBatchItemSerializer(many=True, allow_empty=False, max_length=10000)
+
+
 class ForecastPeriodSerializer(serializers.Serializer):
     """Serializer for a single forecast period."""
     period_start = serializers.DateField()
@@ -173,6 +199,7 @@ class ForecastPeriodSerializer(serializers.Serializer):
     cumulative_balance = serializers.DecimalField(max_digits=15, decimal_places=2)
     hypothetical_income = serializers.DecimalField(max_digits=15, decimal_places=2)
     hypothetical_expenses = serializers.DecimalField(max_digits=15, decimal_places=2)
+    projected_tax = serializers.DecimalField(max_digits=15, decimal_places=2)
 
 
 class ForecastResultSerializer(serializers.Serializer):
@@ -185,6 +212,7 @@ class ForecastResultSerializer(serializers.Serializer):
     total_projected_income = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_projected_expenses = serializers.DecimalField(max_digits=15, decimal_places=2)
     net_change = serializers.DecimalField(max_digits=15, decimal_places=2)
+    total_projected_tax = serializers.DecimalField(max_digits=15, decimal_places=2)
     periods = ForecastPeriodSerializer(many=True)
     warnings = serializers.ListField(child=serializers.CharField())
 
@@ -201,3 +229,18 @@ class ForecastRequestSerializer(serializers.Serializer):
     include_recurring = serializers.BooleanField(default=True)
     use_historical_averages = serializers.BooleanField(default=True)
     historical_months = serializers.IntegerField(default=6, min_value=1, max_value=24)
+    include_taxes = serializers.BooleanField(default=False)
+
+
+class OccurrencePreviewSerializer(serializers.Serializer):
+    """Serializer for occurrence preview query parameters."""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    limit = serializers.IntegerField(default=100, min_value=1, max_value=1000)
+
+    def validate(self, attrs):
+        date_from = attrs.get('date_from')
+        date_to = attrs.get('date_to')
+        if date_from and date_to and date_to < date_from:
+            raise serializers.ValidationError({'date_to': 'Must not be before date_from.'})
+        return attrs
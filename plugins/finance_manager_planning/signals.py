@@ -0,0 +1,26 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from plugins.finance_manager_core.cache import invalidate_finance_data
+
+from .logic_taxes import invalidate_tax_configs
+from .models import RecurrenceRule, TaxConfig
+
+
+@receiver(post_save, sender=RecurrenceRule)
+@receiver(post_delete, sender=RecurrenceRule)
+def invalidate_cached_projections(sender, instance, **kwargs):
+    """
+    Invalidate cached forecasts when a recurrence rule changes.
+    """
+    invalidate_finance_data()
+
+
+@receiver(post_save, sender=TaxConfig)
+@receiver(post_delete, sender=TaxConfig)
+@receiver(m2m_changed, sender=TaxConfig.applicable_categories.through)
+def invalidate_cached_tax_configs(sender, instance, **kwargs):
+    """
+    Invalidate the cached tax configurations when one changes.
+    """
+    invalidate_tax_configs()
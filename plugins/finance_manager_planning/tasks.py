@@ -5,18 +5,23 @@ Handles:
 - Automatic generation of recurring transactions
 - Budget alert notifications
 - Periodic financial summaries
+- Forecast cache warm-up
 """
 
 from __future__ import annotations
 
 import logging
-from datetime import date, timedelta
+from datetime import timedelta
 from decimal import Decimal
 
 from celery import shared_task
-from django.db import transaction
 from django.utils import timezone
 
+from mixtum_core.db_routers import replica_reads
+
+from .logic_budgets import evaluate_budgets
+from .logic_forecasting import cached_forecast
+from .logic_recurring import generate_occurrences
 from .models import RecurrenceRule, Budget
 
 logger = logging.getLogger(__name__)
@@ -25,7 +30,8 @@ logger = logging.getLogger(__name__)
 @shared_task
 def generate_recurring_transactions(
     lookahead_days: int = 7,
-    generate_for_today: bool = True
+    generate_for_today: bool = True,
+    warm_forecasts: bool = True
 ) -> dict:
     """
     Generate recurring transactions based on active recurrence rules.
@@ -36,6 +42,7 @@ def generate_recurring_transactions(
         lookahead_days: Number of days ahead to generate transactions for.
                        Set to 0 to only generate for past due transactions.
         generate_for_today: Whether to include today's date in generation.
+        warm_forecasts: Queue warm_forecast_cache once generation is done.
     
     Returns:
         Dict with generation statistics
@@ -46,30 +53,14 @@ def generate_recurring_transactions(
     if not generate_for_today:
         today = today + timedelta(days=1)
     
-    stats = {
-        'rules_processed': 0,
-        'transactions_created': 0,
-        'errors': []
-    }
-    
     active_rules = RecurrenceRule.objects.filter(
         is_active=True,
         start_date__lte=end_date
-    ).select_related('account', 'category')
+    ).filter(
+        models.Q(end_date__isnull=True) | models.Q(end_date__gte=today)
+    ).order_by('pk')
     
-    for rule in active_rules:
-        stats['rules_processed'] += 1
-        
-        try:
-            transactions_created = _process_recurrence_rule(rule, today, end_date)
-            stats['transactions_created'] += transactions_created
-        except Exception as e:
-            logger.exception("Error processing recurrence rule #%s", rule.id)
-            stats['errors'].append({
-                'rule_id': rule.id,
-                'rule_name': rule.name,
-                'error': str(e)
-            })
+    stats = generate_occurrences(active_rules, today, end_date)
     
     logger.info(
         "Recurring transactions generated: %d transactions from %d rules",
@@ -77,50 +68,19 @@ def generate_recurring_transactions(
         stats['rules_processed']
     )
     
-    return stats
-
-
-def _process_recurrence_rule(rule: RecurrenceRule, start: date, end: date) -> int:
-    """
-    Process a single recurrence rule and generate due transactions.
-    
-    Returns the number of transactions created.
-    """
-    if rule.end_date and rule.end_date < start:
-        return 0
-    
-    created_count = 0
-    current_date = rule.last_generated_date or rule.start_date
-    
-    # If we haven't generated yet and start_date is before our window
-    if current_date < start:
-        current_date = start - timedelta(days=1)
-    
-    # Generate transactions for each occurrence in the window
-    while True:
-        next_date = rule.get_next_occurrence_date(current_date)
-        
-        if next_date is None:
-            break
-        
-        if next_date > end:
-            break
-        
-        if next_date >= start:
-            with transaction.atomic():
-                tx = rule.generate_transaction(for_date=next_date)
-                logger.debug(
-                    "Generated transaction #%s for rule '%s' on %s",
-                    tx.id, rule.name, next_date
-                )
-                created_count += 1
-        
-        current_date = next_date
+    if warm_forecasts:
+        # New transactions invalidated the cached forecasts: rebuild the
+        # common ones before users ask for them
+        try:
+            warm_forecast_cache.delay()
+        except Exception:
+            logger.exception("Could not queue forecast cache warm-up")
     
-    return created_count
+    return stats
 
 
 @shared_task
+@replica_reads()
 def check_budget_alerts() -> dict:
     """
     Check all active budgets and generate alerts for those near or over limit.
@@ -145,11 +105,15 @@ def check_budget_alerts() -> dict:
         models.Q(end_date__isnull=True) | models.Q(end_date__gte=today)
     ).select_related('category', 'account')
     
+    active_budgets = list(active_budgets)
+    usages = evaluate_budgets(active_budgets, today=today)
+    
     for budget in active_budgets:
         stats['budgets_checked'] += 1
         
         try:
-            current_amount, percentage = budget.get_current_usage()
+            usage = usages[budget.pk]
+            current_amount, percentage = usage.amount, usage.percentage
             
             alert_data = {
                 'budget_id': budget.id,
@@ -160,10 +124,10 @@ def check_budget_alerts() -> dict:
                 'period': budget.period
             }
             
-            if percentage > 100:
+            if usage.is_over_budget:
                 stats['over_budget'].append(alert_data)
                 _send_budget_alert(budget, 'over_budget', current_amount, percentage)
-            elif percentage >= budget.alert_threshold:
+            elif usage.is_near_limit:
                 stats['near_limit'].append(alert_data)
                 _send_budget_alert(budget, 'near_limit', current_amount, percentage)
                 
@@ -235,44 +199,64 @@ def generate_monthly_forecast(months_ahead: int = 3) -> dict:
     start = (today.replace(day=1) + relativedelta(months=1))
     end = start + relativedelta(months=months_ahead) - timedelta(days=1)
     
+    # Get rules that generate hypothetical transactions
+    forecast_rules = RecurrenceRule.objects.filter(
+        is_active=True,
+        generate_as_hypothetical=True,
+        start_date__lte=end
+    ).filter(
+        models.Q(end_date__isnull=True) | models.Q(end_date__gte=start)
+    ).order_by('pk')
+    
     stats = {
         'period': {
             'start': start.isoformat(),
             'end': end.isoformat(),
             'months': months_ahead
         },
-        'rules_processed': 0,
-        'transactions_created': 0,
-        'errors': []
+        **generate_occurrences(forecast_rules, start, end)
     }
     
-    # Get rules that generate hypothetical transactions
-    forecast_rules = RecurrenceRule.objects.filter(
-        is_active=True,
-        generate_as_hypothetical=True,
-        start_date__lte=end
-    ).filter(
-        models.Q(end_date__isnull=True) | models.Q(end_date__gte=start)
-    ).select_related('account', 'category')
+    logger.info(
+        "Monthly forecast generated: %d transactions for %d months ahead",
+        stats['transactions_created'],
+        months_ahead
+    )
     
-    for rule in forecast_rules:
-        stats['rules_processed'] += 1
-        
+    return stats
+
+
+@shared_task
+def warm_forecast_cache(months_options: tuple = (3, 6, 12)) -> dict:
+    """
+    Precompute the common all-accounts forecasts into the cache.
+    
+    Queued by generate_recurring_transactions after the nightly run; can
+    also be scheduled on its own.
+    
+    Args:
+        months_options: Forecast horizons to precompute
+    
+    Returns:
+        Dict with warm-up statistics
+    """
+    stats = {
+        'forecasts_warmed': [],
+        'errors': []
+    }
+    
+    for months in months_options:
         try:
-            count = _process_recurrence_rule(rule, start, end)
-            stats['transactions_created'] += count
+            cached_forecast(months=months, refresh=True)
+            stats['forecasts_warmed'].append(months)
         except Exception as e:
-            logger.exception("Error generating forecast for rule #%s", rule.id)
+            logger.exception("Error warming %d-month forecast", months)
             stats['errors'].append({
-                'rule_id': rule.id,
+                'months': months,
                 'error': str(e)
             })
     
-    logger.info(
-        "Monthly forecast generated: %d transactions for %d months ahead",
-        stats['transactions_created'],
-        months_ahead
-    )
+    logger.info("Forecast cache warmed for %s months", stats['forecasts_warmed'])
     
     return stats
 
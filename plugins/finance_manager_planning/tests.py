@@ -0,0 +1,499 @@
+"""
+Tests for finance_manager_planning.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction as db_transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from plugins.finance_manager_accounts.models import Account
+from plugins.finance_manager_core.models import Category, Transaction
+from plugins.finance_manager_core.rollup import reconcile_rollup
+
+from .logic_budgets import evaluate_budgets
+from .logic_forecasting import CashflowForecaster, cached_forecast
+from .logic_occurrences import (
+    count_due_occurrences, count_rule_occurrences, due_occurrences, iter_rule_occurrences
+)
+from . import logic_recurring
+from .logic_recurring import generate_occurrences
+from .logic_taxes import calculate_taxes
+from .models import FREQUENCY_CHOICES, Budget, RecurrenceRule, TaxConfig
+from .tasks import generate_recurring_transactions, warm_forecast_cache
+
+
+def iterative_count(rule, start, end):
+    """Reference implementation: walk get_next_occurrence_date."""
+    count = 0
+    current = rule.last_generated_date or rule.start_date
+    if current >= start:
+        current = start - timedelta(days=1)
+    while True:
+        next_date = rule.get_next_occurrence_date(current)
+        if next_date is None or next_date > end:
+            break
+        if next_date >= start:
+            count += 1
+        current = next_date
+    return count
+
+
+class OccurrenceCountingTests(TestCase):
+    """The closed-form count must match the iterative walk."""
+
+    def _random_rule(self, rng):
+        start_date = date(2020, 1, 1) + timedelta(days=rng.randint(0, 2000))
+        return RecurrenceRule(
+            frequency=rng.choice(FREQUENCY_CHOICES)[0],
+            day_of_month=rng.choice([None, None, 1, 15, 28, 29, 30, 31]),
+            start_date=start_date,
+            end_date=rng.choice([None, start_date + timedelta(days=rng.randint(0, 1500))]),
+            last_generated_date=rng.choice([None, start_date + timedelta(days=rng.randint(0, 400))]),
+        )
+
+    def test_matches_iterative_walk(self):
+        rng = random.Random(42)
+        forecaster = CashflowForecaster()
+        for _ in range(2000):
+            rule = self._random_rule(rng)
+            start = date(2021, 1, 1) + timedelta(days=rng.randint(0, 1500))
+            end = start + timedelta(days=rng.randint(0, 40))
+            self.assertEqual(
+                forecaster._count_occurrences(rule, start, end),
+                iterative_count(rule, start, end),
+                msg=f"{rule.frequency} dom={rule.day_of_month} start={rule.start_date} "
+                    f"end={rule.end_date} last={rule.last_generated_date} period={start}..{end}"
+            )
+
+    def test_month_end_anchor_clamps(self):
+        rule = RecurrenceRule(frequency='monthly', start_date=date(2024, 1, 31))
+        forecaster = CashflowForecaster()
+        # Jan 31 -> Feb 29 -> Mar 29: the day stays clamped
+        self.assertEqual(forecaster._count_occurrences(rule, date(2024, 3, 29), date(2024, 3, 29)), 1)
+        self.assertEqual(forecaster._count_occurrences(rule, date(2024, 3, 30), date(2024, 3, 31)), 0)
+
+
+def iterative_due_occurrences(rule, start, end):
+    """Reference implementation of the generator walk."""
+    if rule.end_date and rule.end_date < start:
+        return []
+    dates = []
+    current = rule.last_generated_date or rule.start_date
+    if current < start:
+        current = start - timedelta(days=1)
+    while True:
+        next_date = rule.get_next_occurrence_date(current)
+        if next_date is None or next_date > end:
+            break
+        if next_date >= start:
+            dates.append(next_date)
+        current = next_date
+    return dates
+
+
+class OccurrenceExpansionTests(TestCase):
+    """The occurrence engine must match the iterative generator walk."""
+
+    def _random_rule(self, rng):
+        start_date = date(2019, 1, 1) + timedelta(days=rng.randint(0, 2500))
+        return RecurrenceRule(
+            frequency=rng.choice(FREQUENCY_CHOICES)[0],
+            day_of_month=rng.choice([None, None, 1, 15, 28, 29, 30, 31]),
+            start_date=start_date,
+            end_date=rng.choice([None, start_date + timedelta(days=rng.randint(0, 2000))]),
+            last_generated_date=rng.choice([None, start_date + timedelta(days=rng.randint(0, 800))]),
+        )
+
+    def test_matches_iterative_walk(self):
+        rng = random.Random(7)
+        for _ in range(3000):
+            rule = self._random_rule(rng)
+            start = date(2020, 1, 1) + timedelta(days=rng.randint(0, 2500))
+            end = start + timedelta(days=rng.choice([0, 1, 30, 95, 400]))
+            expected = iterative_due_occurrences(rule, start, end)
+            msg = (f"{rule.frequency} dom={rule.day_of_month} start={rule.start_date} "
+                   f"end={rule.end_date} last={rule.last_generated_date} window={start}..{end}")
+            self.assertEqual(due_occurrences(rule, start, end), expected, msg=msg)
+            self.assertEqual(count_due_occurrences(rule, start, end), len(expected), msg=msg)
+
+    def test_day_of_month_past_month_end(self):
+        rule = RecurrenceRule(
+            frequency='monthly', day_of_month=31,
+            start_date=date(2024, 1, 31), last_generated_date=date(2024, 1, 31)
+        )
+        self.assertEqual(
+            due_occurrences(rule, date(2024, 1, 1), date(2024, 5, 31)),
+            [date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)]
+        )
+
+    def test_rule_far_behind_window(self):
+        rule = RecurrenceRule(frequency='weekly', start_date=date(2024, 3, 4))
+        start, end = date(2024, 3, 1), date(2024, 3, 31)
+        self.assertEqual(
+            due_occurrences(rule, start, end),
+            [date(2024, 3, 11), date(2024, 3, 18), date(2024, 3, 25)]
+        )
+        # The anchor is arithmetic: a century-old rule costs the same
+        self.assertEqual(count_rule_occurrences('daily', None, date(1924, 1, 1), start, end), 31)
+        self.assertEqual(
+            list(iter_rule_occurrences('daily', None, date(1924, 1, 1), start, end))[-1],
+            end
+        )
+
+
+class CashflowForecasterTests(TestCase):
+    """Tests for the single-pass forecaster."""
+
+    def setUp(self):
+        self.account = Account.objects.create(name="Conto", initial_balance=Decimal('1000.00'))
+        self.category = Category.objects.create(name="Varie")
+
+    def _transaction(self, day, amount, transaction_type='expense', **kwargs):
+        return Transaction.objects.create(
+            account=self.account, category=self.category, description="Test",
+            gross_amount=Decimal(amount), competence_date=day,
+            transaction_type=transaction_type, **kwargs
+        )
+
+    def test_forecast_runs_fixed_number_of_queries(self):
+        self._transaction(date(2024, 1, 10), '200.00', status='paid')
+        self._transaction(date(2024, 3, 5), '100.00', status='scheduled')
+        self._transaction(date(2024, 4, 5), '50.00', is_hypothetical=True)
+        self._transaction(date(2024, 4, 6), '500.00', transaction_type='income', is_hypothetical=True)
+        for index in range(20):
+            RecurrenceRule.objects.create(
+                name=f"Rule {index}", account=self.account, category=self.category,
+                description="Rule", gross_amount=Decimal('10.00'), transaction_type='expense',
+                frequency='weekly' if index % 2 else 'monthly', start_date=date(2023, 12, 1),
+            )
+
+        with self.assertNumQueries(3):
+            result = CashflowForecaster().forecast(
+                months=12, start_date=date(2024, 3, 1), use_historical_averages=False
+            )
+
+        self.assertEqual(result.starting_balance, Decimal('800.00'))
+        march, april = result.periods[0], result.periods[1]
+        # Scheduled 100, 10 monthly rules on Mar 1, 10 weekly rules on Mar 1..29
+        self.assertEqual(march.projected_expenses, Decimal('100.00') + Decimal('100.00') + Decimal('500.00'))
+        self.assertEqual(april.hypothetical_income, Decimal('500.00'))
+        self.assertEqual(april.hypothetical_expenses, Decimal('50.00'))
+        self.assertEqual(len(result.periods), 12)
+
+
+class ForecastCacheTests(TestCase):
+    """Tests for forecast caching and invalidation."""
+
+    def setUp(self):
+        self.account = Account.objects.create(name="Conto", initial_balance=Decimal('1000.00'))
+        self.category = Category.objects.create(name="Varie")
+
+    def _forecast(self, **kwargs):
+        return cached_forecast(months=3, start_date=date(2024, 3, 1), use_historical_averages=False, **kwargs)
+
+    def test_cached_until_data_changes(self):
+        first = self._forecast()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._forecast(), first)
+
+        # Different flags are a different entry
+        with self.assertNumQueries(2):
+            self._forecast(include_recurring=False)
+
+        Transaction.objects.create(
+            account=self.account, category=self.category, description="Affitto",
+            gross_amount=Decimal('300.00'), competence_date=date(2024, 3, 10),
+            transaction_type='expense',
+        )
+        self.assertEqual(self._forecast()['total_projected_expenses'], 300.0)
+
+        rule = RecurrenceRule.objects.create(
+            name="Canone", account=self.account, category=self.category, description="Canone",
+            gross_amount=Decimal('10.00'), transaction_type='expense', frequency='monthly',
+            start_date=date(2024, 1, 1),
+        )
+        self.assertEqual(self._forecast()['total_projected_expenses'], 330.0)
+
+        rule.delete()
+        self.account.initial_balance = Decimal('2000.00')
+        self.account.save()
+        self.assertEqual(self._forecast()['starting_balance'], 2000.0)
+
+    def test_warm_up_task(self):
+        stats = warm_forecast_cache()
+        self.assertEqual(stats['forecasts_warmed'], [3, 6, 12])
+        with self.assertNumQueries(0):
+            cached_forecast(months=6)
+
+
+class BudgetEvaluationTests(TestCase):
+    """Tests for batch budget usage evaluation."""
+
+    def setUp(self):
+        self.account = Account.objects.create(name="Conto")
+        self.other_account = Account.objects.create(name="Carta")
+        self.food = Category.objects.create(name="Spesa")
+        self.fuel = Category.objects.create(name="Carburante")
+        self.today = date(2024, 5, 20)
+
+    def _expense(self, day, amount, category, account=None):
+        Transaction.objects.create(
+            account=account or self.account, category=category, description="Test",
+            gross_amount=Decimal(amount), competence_date=day, transaction_type='expense',
+        )
+
+    def _budget(self, category, target, period='monthly', **kwargs):
+        return Budget.objects.create(
+            category=category, target_value=Decimal(target), period=period,
+            start_date=kwargs.pop('start_date', date(2024, 1, 1)), **kwargs
+        )
+
+    def test_usage_matches_periods_and_filters(self):
+        self._expense(date(2024, 5, 2), '300.00', self.food)
+        self._expense(date(2024, 5, 10), '100.00', self.food, account=self.other_account)
+        self._expense(date(2024, 4, 10), '50.00', self.food)
+        self._expense(date(2024, 4, 15), '80.00', self.fuel)
+
+        monthly = self._budget(self.food, '500.00')
+        per_account = self._budget(self.food, '250.00', account=self.account)
+        quarterly = self._budget(self.fuel, '100.00', period='quarterly', alert_threshold=Decimal('75.00'))
+        started_late = self._budget(self.food, '1000.00', start_date=date(2024, 5, 5))
+
+        usages = evaluate_budgets(
+            Budget.objects.order_by('pk'), today=self.today
+        )
+
+        self.assertEqual(usages[monthly.pk].amount, Decimal('400.00'))
+        self.assertEqual(usages[monthly.pk].status, 'near_limit')
+        self.assertEqual(usages[per_account.pk].percentage, Decimal('120.00'))
+        self.assertTrue(usages[per_account.pk].is_over_budget)
+        self.assertEqual(usages[quarterly.pk].amount, Decimal('80.00'))
+        self.assertEqual(usages[quarterly.pk].period_start, date(2024, 4, 1))
+        self.assertEqual(usages[started_late.pk].amount, Decimal('100.00'))
+
+    def test_query_count_does_not_grow_with_budgets(self):
+        for index in range(30):
+            self._budget(self.food if index % 2 else self.fuel, '100.00',
+                         period=('monthly', 'quarterly', 'annual')[index % 3])
+        budgets = list(Budget.objects.all())
+
+        with self.assertNumQueries(3):
+            evaluate_budgets(budgets, today=self.today)
+
+        with self.assertNumQueries(0):
+            for budget in budgets:
+                budget.is_over_budget
+                budget.is_near_limit
+
+    def test_budget_endpoints(self):
+        self._expense(date.today(), '120.00', self.food)
+        self._budget(self.food, '100.00', start_date=date(2000, 1, 1))
+        self._budget(self.fuel, '100.00', start_date=date(2000, 1, 1))
+
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(username="tester", email="tester@example.com")
+        )
+
+        response = client.get('/api/finance_manager_planning/budgets/status/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_budgets'], 2)
+        self.assertEqual([item['category'] for item in response.data['over_budget']], ["Spesa"])
+
+        response = client.get('/api/finance_manager_planning/budgets/')
+        self.assertEqual(response.status_code, 200)
+        items = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(
+            sorted((item['category']['name'], item['is_over_budget']) for item in items),
+            [("Carburante", False), ("Spesa", True)]
+        )
+
+
+class RecurringGenerationTests(TestCase):
+    """Tests for bulk recurring transaction generation."""
+
+    def setUp(self):
+        self.account = Account.objects.create(name="Conto")
+        self.category = Category.objects.create(name="Abbonamenti")
+
+    def _rule(self, name, frequency, **kwargs):
+        return RecurrenceRule.objects.create(
+            name=name, account=self.account, category=self.category, description=name,
+            gross_amount=Decimal('10.00'), transaction_type='expense', frequency=frequency,
+            start_date=kwargs.pop('start_date', date(2024, 1, 1)), **kwargs
+        )
+
+    def test_bulk_generation_is_idempotent(self):
+        daily = self._rule("Parcheggio", 'daily')
+        weekly = self._rule("Palestra", 'weekly')
+        ended = self._rule("Vecchio", 'daily', end_date=date(2024, 2, 1))
+        start, end = date(2024, 3, 1), date(2024, 3, 7)
+
+        # rules, savepoint, rule locks, existing pairs, insert, created rows,
+        # rollup, bulk_update, release
+        with self.assertNumQueries(9):
+            stats = generate_occurrences(RecurrenceRule.objects.order_by('pk'), start, end)
+
+        self.assertEqual(stats['rules_processed'], 3)
+        self.assertEqual(stats['transactions_created'], 8)
+        self.assertEqual(daily.generated_transactions.count(), 7)
+        self.assertEqual(weekly.generated_transactions.get().competence_date, date(2024, 3, 7))
+        self.assertFalse(ended.generated_transactions.exists())
+        daily.refresh_from_db()
+        self.assertEqual(daily.last_generated_date, date(2024, 3, 7))
+        self.assertEqual(reconcile_rollup(fix=False)['mismatches'], 0)
+
+        # Rerun over the same window: nothing new
+        RecurrenceRule.objects.update(last_generated_date=None)
+        stats = generate_occurrences(RecurrenceRule.objects.order_by('pk'), start, end)
+        self.assertEqual(stats['transactions_created'], 0)
+        self.assertEqual(Transaction.objects.count(), 8)
+
+    def test_conflicting_occurrence_does_not_block_the_batch(self):
+        rent = self._rule("Affitto", 'monthly')
+        gym = self._rule("Palestra", 'weekly')
+        start, end = date(2024, 3, 1), date(2024, 3, 31)
+        generated = rent.generate_transaction(for_date=date(2024, 3, 1))
+
+        # As if generated after the check for existing occurrences
+        with mock.patch.object(logic_recurring, '_existing_occurrences', return_value=set()):
+            stats = generate_occurrences(RecurrenceRule.objects.order_by('pk'), start, end)
+
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual(stats['transactions_created'], 4)
+        self.assertEqual(list(rent.generated_transactions.all()), [generated])
+        self.assertEqual(gym.generated_transactions.count(), 4)
+        gym.refresh_from_db()
+        self.assertEqual(
+            gym.last_generated_date,
+            gym.generated_transactions.order_by('-competence_date')[0].competence_date
+        )
+        self.assertEqual(reconcile_rollup(fix=False)['mismatches'], 0)
+
+    def test_unique_occurrence_constraint(self):
+        rule = self._rule("Affitto", 'monthly')
+        rule.generate_transaction(for_date=date(2024, 3, 1))
+        with self.assertRaises(IntegrityError):
+            with db_transaction.atomic():
+                rule.generate_transaction(for_date=date(2024, 3, 1))
+
+    def test_task_generates_through_bulk_path(self):
+        self._rule("Caffè", 'daily', start_date=date.today() - timedelta(days=30))
+        stats = generate_recurring_transactions(lookahead_days=2, warm_forecasts=False)
+        self.assertEqual(stats['transactions_created'], 3)
+
+    def test_preview_endpoint(self):
+        rule = self._rule("Affitto", 'monthly', day_of_month=31, start_date=date(2024, 1, 1))
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username="anna", email="anna@example.com"))
+        url = f'/api/finance_manager_planning/recurrence-rules/{rule.pk}/occurrences/'
+
+        response = client.get(url, {'date_from': '2025-01-01', 'date_to': '2025-12-31', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(response.data['occurrences'], ['2025-01-31', '2025-02-28'])
+
+        response = client.get(url, {'date_from': '2025-02-01', 'date_to': '2025-01-01'})
+        self.assertEqual(response.status_code, 400)
+        response = client.get('/api/finance_manager_planning/recurrence-rules/999/occurrences/')
+        self.assertEqual(response.status_code, 404)
+
+
+class TaxEngineTests(TestCase):
+    """Tests for cached, batched tax calculation."""
+
+    def setUp(self):
+        self.account = Account.objects.create(name="Conto", initial_balance=Decimal('0.00'))
+        self.consulting = Category.objects.create(name="Consulenze")
+        self.rent = Category.objects.create(name="Affitti")
+        self.irpef = TaxConfig.objects.create(
+            name="IRPEF", percentage=Decimal('20.00'), applicable_to='income',
+            threshold_amount=Decimal('100.00'), valid_from=date(2024, 1, 1)
+        )
+        self.cedolare = TaxConfig.objects.create(
+            name="Cedolare", percentage=Decimal('10.00'), applicable_to='category',
+            valid_from=date(2024, 1, 1), valid_until=date(2024, 6, 30)
+        )
+        self.cedolare.applicable_categories.add(self.rent)
+        TaxConfig.objects.create(
+            name="Sospesa", percentage=Decimal('50.00'), applicable_to='all',
+            valid_from=date(2024, 1, 1), is_active=False
+        )
+
+    def test_batch_matches_single_calculation(self):
+        items = [
+            (Decimal('1000.00'), self.consulting.pk, date(2024, 3, 1)),
+            (Decimal('1000.00'), self.rent.pk, date(2024, 3, 1)),
+            (Decimal('1000.00'), self.rent.pk, date(2024, 9, 1)),
+            (Decimal('50.00'), None, date(2024, 3, 1)),
+            (Decimal('1000.00'), self.consulting.pk, date(2024, 3, 1), 'expense'),
+        ]
+        results = calculate_taxes(items)
+
+        self.assertEqual([r.total_tax for r in results], [
+            self.irpef.calculate_tax(Decimal('1000.00')),
+            self.irpef.calculate_tax(Decimal('1000.00')) + self.cedolare.calculate_tax(Decimal('1000.00')),
+            Decimal('200.00'),
+            Decimal('0.00'),
+            Decimal('0.00'),
+        ])
+        self.assertEqual([rate.name for rate, _ in results[1].breakdown], ["Cedolare", "IRPEF"])
+
+    def test_rules_cached_until_config_changes(self):
+        calculate_taxes([(Decimal('1000.00'), self.rent.pk, date(2024, 3, 1))])
+        with self.assertNumQueries(0):
+            calculate_taxes([(Decimal('10.00') * n, self.rent.pk, date(2024, 3, 1)) for n in range(2000)])
+
+        self.cedolare.applicable_categories.add(self.consulting)
+        result, = calculate_taxes([(Decimal('1000.00'), self.consulting.pk, date(2024, 3, 1))])
+        self.assertEqual(result.total_tax, Decimal('300.00'))
+
+        self.irpef.percentage = Decimal('30.00')
+        self.irpef.save()
+        result, = calculate_taxes([(Decimal('1000.00'), None, date(2024, 3, 1))])
+        self.assertEqual(result.total_tax, Decimal('300.00'))
+
+    def test_batch_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username="luca", email="luca@example.com"))
+        response = client.post('/api/finance_manager_planning/tax-configs/calculate-batch/', {
+            'items': [
+                {'amount': '1000.00', 'category_id': self.rent.pk, 'date': '2024-03-01'},
+                {'amount': '500.00', 'date': '2024-03-01', 'transaction_type': 'expense'},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['total_tax'], 300.0)
+        self.assertEqual(response.data['results'][1]['breakdown'], [])
+
+        response = client.post('/api/finance_manager_planning/tax-configs/calculate-batch/', {'items': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_forecast_projects_tax_outflows(self):
+        Transaction.objects.create(
+            account=self.account, category=self.rent, description="Canone",
+            gross_amount=Decimal('800.00'), competence_date=date(2024, 3, 10),
+            transaction_type='income', status='scheduled'
+        )
+        RecurrenceRule.objects.create(
+            name="Consulenza", account=self.account, category=self.consulting, description="Consulenza",
+            gross_amount=Decimal('1000.00'), transaction_type='income', frequency='monthly',
+            start_date=date(2024, 1, 1)
+        )
+
+        result = CashflowForecaster().forecast(
+            months=2, start_date=date(2024, 3, 1), use_historical_averages=False, include_taxes=True
+        )
+
+        march = result.periods[0]
+        # Rent: 20% + 10%; consulting: 20%
+        self.assertEqual(march.projected_tax, Decimal('240.00') + Decimal('200.00'))
+        self.assertEqual(march.net_cashflow, Decimal('1800.00') - Decimal('440.00'))
+        self.assertEqual(result.total_projected_tax, Decimal('640.00'))
+        self.assertEqual(result.net_change, Decimal('2800.00') - Decimal('640.00'))
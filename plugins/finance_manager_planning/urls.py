@@ -2,7 +2,8 @@ from django.urls import path
 from .views import (
     BudgetListCreateView, BudgetDetailView, BudgetStatusView,
     RecurrenceRuleListCreateView, RecurrenceRuleDetailView, RecurrenceRuleGenerateView,
-    TaxConfigListCreateView, TaxConfigDetailView, TaxCalculateView,
+    RecurrenceRuleOccurrencesView,
+    TaxConfigListCreateView, TaxConfigDetailView, TaxCalculateView, TaxBatchCalculateView,
     CashflowForecastView
 )
 
@@ -16,11 +17,13 @@ urlpatterns = [
     path('recurrence-rules/', RecurrenceRuleListCreateView.as_view(), name='recurrence-rule-list'),
     path('recurrence-rules/<int:pk>/', RecurrenceRuleDetailView.as_view(), name='recurrence-rule-detail'),
     path('recurrence-rules/<int:pk>/generate/', RecurrenceRuleGenerateView.as_view(), name='recurrence-rule-generate'),
+    path('recurrence-rules/<int:pk>/occurrences/', RecurrenceRuleOccurrencesView.as_view(), name='recurrence-rule-occurrences'),
     
     # Tax Configurations
     path('tax-configs/', TaxConfigListCreateView.as_view(), name='tax-config-list'),
     path('tax-configs/<int:pk>/', TaxConfigDetailView.as_view(), name='tax-config-detail'),
     path('tax-configs/calculate/', TaxCalculateView.as_view(), name='tax-calculate'),
+    path('tax-configs/calculate-batch/', TaxBatchCalculateView.as_view(), name='tax-calculate-batch'),
     
     # Forecasting
     path('forecast/', CashflowForecastView.as_view(), name='cashflow-forecast'),
@@ -1,6 +1,8 @@
 from decimal import Decimal
-from datetime import date
+from datetime import date, timedelta
+from itertools import islice
 
+from django.db import IntegrityError, transaction as db_transaction
 from django.db.models import Q
 from django.utils import timezone
 
@@ -9,6 +11,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
+from mixtum_core.db_routers import ReplicaReadMixin
 from mixtum_core.settings.base import REMOTE_API
 from base_modules.user_manager.authentication import JWTAuthentication
 
@@ -17,12 +20,15 @@ from .serializers import (
     BudgetSerializer, BudgetCreateSerializer,
     RecurrenceRuleSerializer, RecurrenceRuleCreateSerializer,
     TaxConfigSerializer, TaxConfigCreateSerializer,
-    ForecastRequestSerializer
+    ForecastRequestSerializer, OccurrencePreviewSerializer, TaxBatchRequestSerializer
 )
-from .logic_forecasting import generate_forecast
+from .logic_budgets import evaluate_budgets
+from .logic_forecasting import cached_forecast
+from .logic_occurrences import count_due_occurrences, iter_due_occurrences
+from .logic_taxes import TaxEngine, TaxItem, calculate_taxes
 
 
-class BudgetListCreateView(generics.ListCreateAPIView):
+class BudgetListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     GET: List all budgets
     POST: Create a new budget
@@ -100,7 +106,7 @@ class BudgetDetailView(generics.RetrieveUpdateDestroyAPIView):
         return BudgetSerializer
 
 
-class BudgetStatusView(APIView):
+class BudgetStatusView(ReplicaReadMixin, APIView):
     """
     GET: Get status overview of all active budgets.
     """
@@ -119,35 +125,32 @@ class BudgetStatusView(APIView):
             Q(end_date__isnull=True) | Q(end_date__gte=today)
         ).select_related('category', 'account')
         
+        budgets = list(budgets)
+        usages = evaluate_budgets(budgets, today=today)
+        
         results = {
-            'total_budgets': budgets.count(),
+            'total_budgets': len(budgets),
             'over_budget': [],
             'near_limit': [],
             'healthy': []
         }
         
         for budget in budgets:
-            amount, percentage = budget.get_current_usage()
+            usage = usages[budget.pk]
             budget_data = {
                 'id': budget.id,
                 'category': budget.category.name,
                 'target': float(budget.target_value),
-                'current': float(amount),
-                'percentage': float(percentage),
+                'current': float(usage.amount),
+                'percentage': float(usage.percentage),
                 'period': budget.period
             }
-            
-            if percentage > 100:
-                results['over_budget'].append(budget_data)
-            elif percentage >= budget.alert_threshold:
-                results['near_limit'].append(budget_data)
-            else:
-                results['healthy'].append(budget_data)
+            results[usage.status].append(budget_data)
         
         return Response(results)
 
 
-class RecurrenceRuleListCreateView(generics.ListCreateAPIView):
+class RecurrenceRuleListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     GET: List all recurrence rules
     POST: Create a new recurrence rule
@@ -258,7 +261,14 @@ class RecurrenceRuleGenerateView(APIView):
         else:
             for_date = timezone.now().date()
         
-        transaction = rule.generate_transaction(for_date=for_date)
+        try:
+            with db_transaction.atomic():
+                transaction = rule.generate_transaction(for_date=for_date)
+        except IntegrityError:
+            return Response(
+                {'error': 'A transaction was already generated for this rule on this date'},
+                status=status.HTTP_409_CONFLICT
+            )
         
         from plugins.finance_manager_core.serializers import TransactionSerializer
         serializer = TransactionSerializer(transaction)
@@ -269,6 +279,56 @@ class RecurrenceRuleGenerateView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class RecurrenceRuleOccurrencesView(APIView):
+    """
+    GET: Preview the occurrences a recurrence rule would generate.
+
+    Query params:
+        date_from: First date (default: today)
+        date_to: Last date (default: date_from + 90 days)
+        limit: Maximum number of dates returned (default 100, max 1000)
+
+    The count covers the whole range even when the dates are truncated.
+    """
+    permission_classes = [IsAuthenticated]
+
+    if JWTAuthentication is not None:
+        authentication_classes = [JWTAuthentication]
+
+    def get(self, request, pk):
+        try:
+            rule = RecurrenceRule.objects.get(pk=pk)
+        except RecurrenceRule.DoesNotExist:
+            return Response(
+                {'error': 'Recurrence rule not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = OccurrencePreviewSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        date_from = data.get('date_from') or timezone.now().date()
+        date_to = data.get('date_to') or date_from + timedelta(days=90)
+        if date_to < date_from:
+            return Response(
+                {'error': 'date_to must not be before date_from'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        occurrences = list(islice(
+            iter_due_occurrences(rule, date_from, date_to), data['limit']
+        ))
+
+        return Response({
+            'rule_id': rule.id,
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'count': count_due_occurrences(rule, date_from, date_to),
+            'occurrences': [occurrence.isoformat() for occurrence in occurrences]
+        })
+
+
 class TaxConfigListCreateView(generics.ListCreateAPIView):
     """
     GET: List all tax configurations
@@ -379,13 +439,10 @@ class TaxCalculateView(APIView):
         
         # Calculate using all applicable income taxes
         today = timezone.now().date()
-        configs = TaxConfig.objects.filter(
-            is_active=True,
-            applicable_to='income',
-            valid_from__lte=today
-        ).filter(
-            Q(valid_until__isnull=True) | Q(valid_until__gte=today)
-        )
+        configs = [
+            rate for rate in TaxEngine().rates_on(today)
+            if rate.applicable_to == 'income'
+        ]
         
         total_tax = Decimal('0.00')
         breakdown = []
@@ -408,7 +465,55 @@ class TaxCalculateView(APIView):
         })
 
 
-class CashflowForecastView(APIView):
+class TaxBatchCalculateView(APIView):
+    """
+    POST: Calculate tax for many amounts in one call.
+    
+    Body: {
+        "items": [
+            {"amount": 1000.00, "category_id": 3, "date": "2025-01-31", "transaction_type": "income"},
+            ...
+        ]
+    }
+    Each item gets every active tax that applies to its type or category
+    and is valid on its date (default: today).
+    """
+    permission_classes = [IsAuthenticated]
+
+    if JWTAuthentication is not None:
+        authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        serializer = TaxBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        results = calculate_taxes(
+            TaxItem(**item) for item in serializer.validated_data['items']
+        )
+        
+        total_amount = sum((result.amount for result in results), Decimal('0.00'))
+        total_tax = sum((result.total_tax for result in results), Decimal('0.00'))
+        
+        return Response({
+            'count': len(results),
+            'total_amount': float(total_amount),
+            'total_tax': float(total_tax),
+            'results': [
+                {
+                    'amount': float(result.amount),
+                    'total_tax': float(result.total_tax),
+                    'net_amount': float(result.net_amount),
+                    'breakdown': [
+                        {'id': rate.id, 'name': rate.name, 'rate': float(rate.percentage), 'amount': float(tax)}
+                        for rate, tax in result.breakdown
+                    ]
+                }
+                for result in results
+            ]
+        })
+
+
+class CashflowForecastView(ReplicaReadMixin, APIView):
     """
     POST: Generate a cashflow forecast.
     
@@ -418,10 +523,13 @@ class CashflowForecastView(APIView):
         "include_hypothetical": true,
         "include_recurring": true,
         "use_historical_averages": true,
-        "historical_months": 6
+        "historical_months": 6,
+        "include_taxes": false
     }
     """
     permission_classes = [IsAuthenticated]
+    # The POST only computes: serve it from the replica too
+    replica_read_methods = ('GET', 'HEAD', 'OPTIONS', 'POST')
 
     if JWTAuthentication is not None:
         authentication_classes = [JWTAuthentication]
@@ -432,13 +540,14 @@ class CashflowForecastView(APIView):
         
         data = serializer.validated_data
         
-        result = generate_forecast(
+        result = cached_forecast(
             months=data['months'],
             account_ids=data.get('account_ids'),
             include_hypothetical=data.get('include_hypothetical', True),
             include_recurring=data.get('include_recurring', True),
             use_historical_averages=data.get('use_historical_averages', True),
-            historical_months=data.get('historical_months', 6)
+            historical_months=data.get('historical_months', 6),
+            include_taxes=data.get('include_taxes', False)
         )
         
         return Response(result)
@@ -457,7 +566,7 @@ class CashflowForecastView(APIView):
         else:
             account_ids = None
         
-        result = generate_forecast(
+        result = cached_forecast(
             months=months,
             account_ids=account_ids,
             include_hypothetical=True,
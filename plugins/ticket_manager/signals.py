@@ -2,7 +2,7 @@ import logging
 from typing import Dict, List, Optional
 
 from django.db.models.signals import m2m_changed, post_save, pre_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 
 from base_modules.mailer.services import send_individual_templated_emails
 from base_modules.user_manager.models import User
@@ -11,6 +11,9 @@ from .models import Ticket
 
 logger = logging.getLogger(__name__)
 
+# Sent after a ticket is created, with ticket=<Ticket>
+ticket_created = Signal()
+
 
 def _get_status_display_message(status: Optional[str]) -> str:
     """
@@ -168,6 +171,7 @@ def _ticket_post_save(sender, instance, created, **kwargs):
     if created:
         context = _get_ticket_context(instance)
         _dispatch_individual_notifications("ticket_created", recipients, context)
+        ticket_created.send(sender=sender, ticket=instance)
         return
 
     prev_status = getattr(instance, "_previous_status", None)
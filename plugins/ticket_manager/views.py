@@ -19,6 +19,7 @@ from typing import Optional
 from .serializers import MessageFullSerializer, TicketSerializer, MessageSerializer, TicketPostSerializer, TaskSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from mixtum_core.db_routers import ReplicaReadMixin
 from mixtum_core.settings.base import REMOTE_API
 from base_modules.user_manager.authentication import JWTAuthentication
 from base_modules.user_manager.models import *
@@ -584,7 +585,7 @@ class TicketMessageAttachment(APIView):
         
 
 
-class TicketProjectStatsView(APIView):
+class TicketProjectStatsView(ReplicaReadMixin, APIView):
     """
     GET /api/projects/<project_id>/tickets/stats/?granularity=month|year&from=YYYY-MM-DD&to=YYYY-MM-DD&fill_gaps=true
 
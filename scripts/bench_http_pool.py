@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Benchmark for the pooled HTTP sessions of the Slack and n8n services.
+
+Starts a local stub server speaking the Slack and n8n APIs and reports
+per-call latency and the number of connections opened, with a new
+connection per call (plain requests.request, the previous behaviour) and
+with the shared pooled session. A delay on every new connection stands in
+for the TCP and TLS handshake of the real services.
+
+Usage:
+    python scripts/bench_http_pool.py [--calls 200] [--handshake-ms 30]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mixtum_core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from integrations.n8n.services import N8nService  # noqa: E402
+from integrations.slack.services import SlackService  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    handshake_seconds = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes: avoid the Nagle and
+        # delayed-ACK stall on kept-alive connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with StubHandler.lock:
+            StubHandler.connections += 1
+        time.sleep(self.handshake_seconds)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.startswith("/webhook/"):
+            body = {"received": True}
+        else:
+            body = {"ok": True, "channel": "C1", "ts": "1700000000.000100"}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class Unpooled:
+    """Session stand-in opening a connection per call, like requests.request()."""
+
+    def request(self, *args, **kwargs):
+        return requests.request(*args, **kwargs)
+
+    def post(self, *args, **kwargs):
+        return requests.post(*args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        return requests.get(*args, **kwargs)
+
+
+def run(label, call, calls):
+    before = StubHandler.connections
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<22} p50 {statistics.median(latencies) * 1000:>7.2f} ms   "
+          f"p99 {p99 * 1000:>7.2f} ms   connections {StubHandler.connections - before:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--handshake-ms', type=float, default=30)
+    args = parser.parse_args()
+
+    StubHandler.handshake_seconds = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"calls={args.calls} handshake={args.handshake_ms:g} ms")
+    for pooled in (False, True):
+        session = None if pooled else Unpooled()
+        suffix = "pooled" if pooled else "new connection"
+
+        slack = SlackService(bot_token="xoxb-bench", session=session)
+        slack.BASE_URL = base_url
+        run(f"slack {suffix}", lambda: slack.send_message("C1", "bench"), args.calls)
+
+        n8n = N8nService(base_url=base_url, session=session)
+        run(f"n8n {suffix}", lambda: n8n.call_webhook("bench", {"n": 1}), args.calls)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
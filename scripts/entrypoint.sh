@@ -2,6 +2,8 @@
 set -euo pipefail
 
 ROLE="${1:-web}"
+# Lets settings/db.py pick the connection pooling defaults of the role
+export APP_ROLE="${APP_ROLE:-$ROLE}"
 
 wait_for_pg() {
   if [[ -n "${POSTGRES_HOST:-}" && -n "${POSTGRES_USER:-}" ]]; then
@@ -36,9 +38,20 @@ case "$ROLE" in
     python manage.py migrate --noinput
     # In prod/stage può servirti:
     python manage.py collectstatic --noinput || true
+    if [[ "${WEB_SERVER:-wsgi}" == "asgi" ]]; then
+      # Uvicorn workers: the async views (Slack, n8n, Cat) keep many
+      # outbound calls in flight per process instead of one per worker
+      echo "Starting gunicorn with uvicorn (ASGI) workers"
+      exec gunicorn mixtum_core.asgi:application \
+        --bind 0.0.0.0:8000 \
+        --workers ${GUNICORN_WORKERS:-3} \
+        --worker-class uvicorn_worker.UvicornWorker \
+        --timeout ${GUNICORN_TIMEOUT:-120}
+    fi
     exec gunicorn mixtum_core.wsgi:application \
       --bind 0.0.0.0:8000 \
       --workers ${GUNICORN_WORKERS:-3} \
+      --threads ${GUNICORN_THREADS:-1} \
       --timeout ${GUNICORN_TIMEOUT:-120}
     ;;
 
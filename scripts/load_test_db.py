@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Load test for database connection handling under concurrency.
+
+Runs a representative read (the cashflow summary aggregate) from many
+threads, each iteration wrapped in the same connection bookkeeping Django
+does around a request, and reports p50/p99 latency together with the
+number of server connections opened by the application, sampled from
+pg_stat_activity while the test runs (Postgres only).
+
+Compare the settings by running it with different environments, e.g.:
+    DB_CONN_MAX_AGE=0 python scripts/load_test_db.py
+    DB_CONN_MAX_AGE=60 python scripts/load_test_db.py
+    DB_POOL=1 DB_POOL_MAX_SIZE=10 python scripts/load_test_db.py
+
+With --url the requests go through HTTP instead, against a running server
+(pass a JWT with --token).
+
+Usage:
+    python scripts/load_test_db.py [--threads 32] [--requests 2000] [--url URL]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mixtum_core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import close_old_connections, connection, connections  # noqa: E402
+from django.db.models import Count, Sum  # noqa: E402
+
+from plugins.finance_manager_core.models import Transaction  # noqa: E402
+
+
+def orm_request():
+    """One request cycle: the summary aggregate between connection checks."""
+    close_old_connections()
+    try:
+        list(
+            Transaction.objects.values('transaction_type')
+            .annotate(total=Sum('gross_amount'), count=Count('id'))
+            .order_by()
+        )
+    finally:
+        close_old_connections()
+
+
+def http_request(session, url, headers):
+    def run():
+        response = session.get(url, headers=headers, timeout=30)
+        response.raise_for_status()
+    return run
+
+
+def count_app_connections():
+    """Server connections opened by this application, or None off Postgres."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connections['default'].cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity WHERE application_name LIKE 'mixtum-%%'"
+        )
+        return cursor.fetchone()[0]
+
+
+class ConnectionSampler(threading.Thread):
+    """Samples the connection count every `interval` seconds."""
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                value = count_app_connections()
+                if value is None:
+                    return
+                self.samples.append(value)
+                self._stop_event.wait(self.interval)
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--url', help="hit this URL over HTTP instead of querying directly")
+    parser.add_argument('--token', help="JWT sent as a Bearer token with --url")
+    args = parser.parse_args()
+
+    if args.url:
+        import requests
+
+        session = requests.Session()
+        headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+        operation = http_request(session, args.url, headers)
+    else:
+        operation = orm_request
+
+    latencies = []
+    errors = []
+    remaining = iter(range(args.requests))
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                started = time.perf_counter()
+                try:
+                    operation()
+                except Exception as exc:
+                    with lock:
+                        errors.append(exc)
+                    continue
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+        finally:
+            # Connections are per thread: release this one before exiting
+            connections.close_all()
+
+    sampler = ConnectionSampler()
+    sampler.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    sampler.stop()
+
+    db = settings.DATABASES['default']
+    pool = db.get('OPTIONS', {}).get('pool')
+    print(f"target={args.url or 'orm'} threads={args.threads} requests={args.requests}")
+    print(f"engine={db['ENGINE'].rsplit('.', 1)[-1]} role={getattr(settings, 'APP_ROLE', '-')} "
+          f"conn_max_age={db.get('CONN_MAX_AGE', 0)} health_checks={db.get('CONN_HEALTH_CHECKS', False)} "
+          f"pool={pool or 'off'}")
+    if latencies:
+        print(f"throughput    {len(latencies) / wall:>10.1f} req/s")
+        print(f"p50           {statistics.median(latencies) * 1000:>10.1f} ms")
+        print(f"p99           {_percentile(latencies, 99) * 1000:>10.1f} ms")
+    print(f"errors        {len(errors):>10}" + (f"  first: {errors[0]!r}" if errors else ""))
+    if sampler.samples:
+        print(f"connections   {max(sampler.samples):>10} peak, {statistics.mean(sampler.samples):.1f} mean")
+    else:
+        print("connections          n/a (pg_stat_activity needs Postgres)")
+
+
+if __name__ == '__main__':
+    main()